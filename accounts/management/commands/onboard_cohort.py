@@ -0,0 +1,58 @@
+"""
+Guruhni (masalan 500 ta yangi o'quvchi) bitta buyruq bilan ro'yxatdan o'tkazish va OTP ro'yxatini chiqarish.
+
+Ishlatish:
+  python manage.py onboard_cohort students.csv
+  python manage.py onboard_cohort students.csv --output roster.csv --expiry-hours 72
+  python manage.py onboard_cohort students.csv --no-sat --jobs
+
+CSV: `username` ustuni (ixtiyoriy: first_name, last_name, email) yoki sarlavhasiz — har qatorda username.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.onboarding import onboard_cohort, read_cohort_csv, write_roster_csv
+
+
+class Command(BaseCommand):
+    help = "CSV dagi o'quvchilarni ommaviy yaratadi (User + OTP + modul ruxsati) va ro'yxat chiqaradi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path", help="Username lar CSV fayli.")
+        parser.add_argument("--output", help="Ro'yxatni (username, OTP) CSV faylga yozish.")
+        parser.add_argument("--expiry-hours", type=int, default=None, help="OTP amal qilish muddati (soat).")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--no-ielts", action="store_true", help="IELTS bo'limiga ruxsat bermaslik.")
+        parser.add_argument("--no-sat", action="store_true", help="SAT bo'limiga ruxsat bermaslik.")
+        parser.add_argument("--jobs", action="store_true", help="Jobs bo'limiga ruxsat berish.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["csv_path"], encoding="utf-8-sig") as fh:
+                rows = read_cohort_csv(fh)
+        except OSError as exc:
+            raise CommandError(f"CSV o'qilmadi: {exc}")
+        if not rows:
+            raise CommandError("CSV da username topilmadi.")
+
+        roster, skipped = onboard_cohort(
+            rows,
+            expiry_hours=options["expiry_hours"],
+            can_access_ielts=not options["no_ielts"],
+            can_access_sat=not options["no_sat"],
+            can_access_jobs=options["jobs"],
+            batch_size=max(1, options["batch_size"]),
+        )
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as fh:
+                write_roster_csv(roster, fh)
+            self.stdout.write(f"Ro'yxat yozildi: {options['output']}")
+        elif roster:
+            width = max(len(r["username"]) for r in roster)
+            self.stdout.write(f"{'Username'.ljust(width)}  {'OTP':<12}  Ism")
+            for r in roster:
+                self.stdout.write(f"{r['username'].ljust(width)}  {r['otp_code']:<12}  {r['full_name']}")
+
+        if skipped:
+            self.stdout.write(self.style.WARNING(f"Mavjud (o'tkazib yuborildi): {', '.join(skipped)}"))
+        self.stdout.write(self.style.SUCCESS(f"Yaratildi: {len(roster)} ta foydalanuvchi."))
@@ -0,0 +1,53 @@
+"""
+Muddati o'tgan sessiyalarni partiyalab o'chirish (`clearsessions` o'rniga, cron orqali).
+
+`clearsessions` bitta katta DELETE bilan butun jadvalni qulflaydi; bu buyruq expire_date indeksi bo'yicha
+kichik partiyalarda o'chiradi va o'chirilgan kalitlarni UserModuleAccess.active_session_key dan tozalaydi.
+
+Ishlatish:
+  python manage.py sweep_sessions
+  python manage.py sweep_sessions --batch-size 2000 --sleep 0.2 --max-batches 50
+"""
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import UserModuleAccess
+
+
+class Command(BaseCommand):
+    help = "Muddati o'tgan sessiyalarni partiyalab o'chiradi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--sleep", type=float, default=0.0, help="Partiyalar orasidagi pauza (soniya).")
+        parser.add_argument("--max-batches", type=int, default=0, help="0 — cheklovsiz.")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        now = timezone.now()
+        total = batches = 0
+        while True:
+            keys = list(
+                Session.objects.filter(expire_date__lt=now)
+                .order_by("expire_date")
+                .values_list("session_key", flat=True)[:batch_size]
+            )
+            if not keys:
+                break
+            with transaction.atomic():
+                Session.objects.filter(session_key__in=keys).delete()
+                UserModuleAccess.objects.filter(active_session_key__in=keys).update(
+                    active_session_key=None,
+                    updated_at=now,
+                )
+            total += len(keys)
+            batches += 1
+            if len(keys) < batch_size or (options["max_batches"] and batches >= options["max_batches"]):
+                break
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+        self.stdout.write(self.style.SUCCESS(f"O'chirildi: {total} ta sessiya ({batches} partiya)."))
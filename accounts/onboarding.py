@@ -0,0 +1,142 @@
+"""
+Guruh (kogorta) bo'yicha o'quvchilarni ommaviy ro'yxatdan o'tkazish.
+
+Har bir user uchun signal (OTP + access) va `while ... exists()` tekshiruvlari o'rniga:
+- OTP kodlar xotirada generatsiya qilinadi, to'qnashuv har bir partiya uchun bitta `IN` so'rov bilan tekshiriladi;
+- User, UserOTP va UserModuleAccess `bulk_create` bilan yoziladi (post_save signal ishlamaydi).
+"""
+import csv
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import UserModuleAccess
+
+from .models import UserOTP
+
+ROSTER_FIELDS = ('username', 'full_name', 'otp_code', 'expires_at')
+
+
+def read_cohort_csv(fh):
+    """CSV: `username` ustuni majburiy; first_name, last_name, email — ixtiyoriy.
+
+    Sarlavhasiz fayl ham qabul qilinadi (birinchi ustun = username). Takroriy va bo'sh qatorlar tashlanadi.
+    """
+    lines = [line for line in fh.read().splitlines() if line.strip()]
+    if not lines:
+        return []
+    header = [h.strip().lower() for h in next(csv.reader([lines[0]]))]
+    if 'username' in header:
+        reader = csv.DictReader(lines[1:], fieldnames=header)
+    else:
+        reader = (dict(zip(('username', 'first_name', 'last_name', 'email'), row)) for row in csv.reader(lines))
+    rows, seen = [], set()
+    for row in reader:
+        username = (row.get('username') or '').strip()
+        if not username or username.lower() in seen:
+            continue
+        seen.add(username.lower())
+        rows.append({
+            'username': username,
+            'first_name': (row.get('first_name') or '').strip()[:150],
+            'last_name': (row.get('last_name') or '').strip()[:150],
+            'email': (row.get('email') or '').strip(),
+        })
+    return rows
+
+
+def generate_unique_otps(count, length=None):
+    """count ta takrorlanmas OTP: xotirada generatsiya + bazada bitta `IN` tekshiruv (kam hollarda qayta)."""
+    if length is None:
+        length = getattr(settings, 'OTP_LENGTH', 10)
+    codes = set()
+    while len(codes) < count:
+        fresh = set()
+        while len(codes) + len(fresh) < count:
+            code = UserOTP.generate_otp(length)
+            if code not in codes:
+                fresh.add(code)
+        taken = set(UserOTP.objects.filter(otp_code__in=fresh).values_list('otp_code', flat=True))
+        codes |= fresh - taken
+    return list(codes)
+
+
+def onboard_cohort(
+    rows,
+    *,
+    expiry_hours=None,
+    can_access_ielts=True,
+    can_access_sat=True,
+    can_access_jobs=False,
+    batch_size=500,
+):
+    """rows (read_cohort_csv natijasi) bo'yicha userlarni yaratadi. (roster, skipped_usernames) qaytaradi.
+
+    Bazada mavjud username lar o'tkazib yuboriladi — buyruqni qayta ishga tushirish xavfsiz.
+    """
+    if expiry_hours is None:
+        expiry_hours = getattr(settings, 'OTP_EXPIRY_HOURS', 24)
+    roster, skipped = [], []
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        names = [r['username'] for r in batch]
+        existing = {
+            u.lower() for u in User.objects.filter(username__in=names).values_list('username', flat=True)
+        }
+        batch = [r for r in batch if r['username'].lower() not in existing]
+        skipped.extend(n for n in names if n.lower() in existing)
+        if not batch:
+            continue
+
+        now = timezone.now()
+        expires_at = now + timedelta(hours=expiry_hours)
+        codes = generate_unique_otps(len(batch))
+        # Parolsiz kirish (faqat OTP) — create_user(password=None) bilan bir xil
+        unusable = make_password(None)
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(
+                    username=r['username'],
+                    first_name=r['first_name'],
+                    last_name=r['last_name'],
+                    email=r['email'],
+                    password=unusable,
+                    date_joined=now,
+                )
+                for r in batch
+            ])
+            # bulk_create hamma bazada pk qaytarmaydi — bitta so'rov bilan qayta o'qiladi
+            user_ids = dict(
+                User.objects.filter(username__in=[r['username'] for r in batch]).values_list('username', 'id')
+            )
+            UserOTP.objects.bulk_create([
+                UserOTP(user_id=user_ids[r['username']], otp_code=code, expires_at=expires_at)
+                for r, code in zip(batch, codes)
+            ])
+            UserModuleAccess.objects.bulk_create([
+                UserModuleAccess(
+                    user_id=user_ids[r['username']],
+                    can_access_ielts=can_access_ielts,
+                    can_access_sat=can_access_sat,
+                    can_access_jobs=can_access_jobs,
+                )
+                for r in batch
+            ])
+        for r, code in zip(batch, codes):
+            roster.append({
+                'username': r['username'],
+                'full_name': f"{r['first_name']} {r['last_name']}".strip(),
+                'otp_code': code,
+                'expires_at': timezone.localtime(expires_at).strftime('%Y-%m-%d %H:%M'),
+            })
+    return roster, skipped
+
+
+def write_roster_csv(roster, fh):
+    writer = csv.DictWriter(fh, fieldnames=ROSTER_FIELDS)
+    writer.writeheader()
+    writer.writerows(roster)
@@ -0,0 +1,75 @@
+"""
+Bir foydalanuvchi — bitta aktiv sessiya: keshdagi reyestr.
+
+Umumiy kesh bo'lsa (settings.SHARED_CACHE, Redis) reyestr (accounts:active_session:<user_id>) sessiya muddatigacha
+keshda turadi; UserModuleAccess.active_session_key esa kesh tozalanganda zaxira manba. locmem da (har worker o'z keshi)
+reyestr keshga yozilmaydi — faqat bazadagi active_session_key tekshiriladi, aks holda natija so'rovni qaysi worker
+olganiga bog'liq bo'lib qolardi. Sessiya tirikligi sessiya jadvalini skanerlamasdan, SESSION_ENGINE orqali bitta kalit
+bo'yicha tekshiriladi.
+"""
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.models import UserModuleAccess
+
+
+def _registry_key(user_id):
+    return f'accounts:active_session:{user_id}'
+
+
+def _use_cache():
+    return getattr(settings, 'SHARED_CACHE', False)
+
+
+def _session_store(session_key):
+    return import_module(settings.SESSION_ENGINE).SessionStore(session_key=session_key)
+
+
+def session_is_alive(session_key, user_id):
+    """Sessiya muddati o'tmagan va shu user bilan kirilgan bo'lsa True (load() muddati o'tganini {} qaytaradi)."""
+    if not session_key:
+        return False
+    data = _session_store(session_key).load()
+    return str(data.get(SESSION_KEY)) == str(user_id)
+
+
+def has_other_active_session(user, access):
+    """Boshqa qurilmada aktiv sessiya bormi. Eskirgan kalit topilsa reyestrdan olib tashlanadi."""
+    session_key = cache.get(_registry_key(user.pk)) if _use_cache() else None
+    if session_key is None:
+        session_key = access.active_session_key
+    if not session_key:
+        return False
+    if session_is_alive(session_key, user.pk):
+        return True
+    if _use_cache():
+        cache.delete(_registry_key(user.pk))
+    return False
+
+
+def register_active_session(request, access):
+    """Login dan keyin: joriy sessiyani reyestrga (sessiya muddatigacha) va zaxira maydonga yozish."""
+    if not request.session.session_key:
+        request.session.save()
+    session_key = request.session.session_key
+    if _use_cache():
+        cache.set(_registry_key(access.user_id), session_key, request.session.get_expiry_age())
+    if access.active_session_key != session_key:
+        access.active_session_key = session_key
+        access.save(update_fields=['active_session_key', 'updated_at'])
+
+
+def release_active_session(user_id, session_key):
+    """Logout: faqat shu sessiya aktiv bo'lsa bo'shatiladi (SELECT siz bitta UPDATE)."""
+    if not session_key:
+        return
+    if _use_cache() and cache.get(_registry_key(user_id)) == session_key:
+        cache.delete(_registry_key(user_id))
+    UserModuleAccess.objects.filter(user_id=user_id, active_session_key=session_key).update(
+        active_session_key=None,
+        updated_at=timezone.now(),
+    )
@@ -1,8 +1,9 @@
 from django.contrib.auth.models import User
 from django.contrib import admin
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.test import Client
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta
@@ -12,6 +13,10 @@ from core.models import UserModuleAccess
 
 
 class AccountAccessFlowTests(TestCase):
+    def setUp(self):
+        # Sessiya reyestri va cached_db sessiyalari (SHARED_CACHE) keshda — testlar orasida pk qayta ishlatiladi
+        cache.clear()
+
     def test_user_creation_also_creates_module_access(self):
         user = get_user_model().objects.create_user(username='newuser', password='secret123')
         self.assertTrue(UserModuleAccess.objects.filter(user=user).exists())
@@ -194,6 +199,7 @@ class AccountAccessFlowTests(TestCase):
 
         first_logout = first_client.get(reverse('accounts:logout'))
         self.assertEqual(first_logout.status_code, 302)
+        self.assertEqual(first_logout['Clear-Site-Data'], '"cache", "storage"')
 
         second_login = second_client.post(
             reverse('accounts:login'),
@@ -201,3 +207,130 @@ class AccountAccessFlowTests(TestCase):
         )
         self.assertEqual(second_login.status_code, 302)
         self.assertEqual(second_login.url, reverse('core:module_selector'))
+
+
+class CohortOnboardingTests(TestCase):
+    def test_bulk_onboarding_creates_users_otps_and_access(self):
+        from io import StringIO
+        from accounts.onboarding import onboard_cohort, read_cohort_csv
+
+        get_user_model().objects.create_user(username='old_student')
+        UserOTP.objects.create(
+            user=get_user_model().objects.get(username='old_student'),
+            otp_code='1111111111',
+            expires_at=timezone.now() + timedelta(days=1),
+        )
+        rows = read_cohort_csv(StringIO(
+            'username,first_name,last_name\n'
+            'stu1,Ali,Valiyev\nstu2,,\nstu1,Dup,\nold_student,,\n\n'
+            + ''.join(f'stu_b{i}\n' for i in range(20))
+        ))
+        self.assertEqual(len(rows), 23)
+
+        roster, skipped = onboard_cohort(rows, batch_size=10, can_access_sat=False)
+        self.assertEqual(skipped, ['old_student'])
+        self.assertEqual(len(roster), 22)
+        self.assertEqual(roster[0]['full_name'], 'Ali Valiyev')
+
+        codes = [r['otp_code'] for r in roster]
+        self.assertEqual(len(set(codes)), 22)
+        self.assertNotIn('1111111111', codes)
+        stu1 = get_user_model().objects.get(username='stu1')
+        self.assertFalse(stu1.has_usable_password())
+        self.assertEqual(UserOTP.objects.get(user=stu1).otp_code, roster[0]['otp_code'])
+        access = UserModuleAccess.objects.get(user=stu1)
+        self.assertTrue(access.can_access_ielts)
+        self.assertFalse(access.can_access_sat)
+
+        response = Client().post(
+            reverse('accounts:login'),
+            data={'username': 'stu1', 'otp_code': roster[0]['otp_code']},
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_command_writes_roster(self):
+        import os
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, 'cohort.csv')
+            out = os.path.join(tmp, 'roster.csv')
+            with open(src, 'w', encoding='utf-8') as fh:
+                fh.write('alpha\nbeta\n')
+            stdout = StringIO()
+            call_command('onboard_cohort', src, '--output', out, stdout=stdout)
+            with open(out, encoding='utf-8') as fh:
+                lines = fh.read().splitlines()
+        self.assertEqual(lines[0], 'username,full_name,otp_code,expires_at')
+        self.assertEqual(len(lines), 3)
+        self.assertIn('Yaratildi: 2', stdout.getvalue())
+        self.assertEqual(UserOTP.objects.filter(user__username__in=['alpha', 'beta']).count(), 2)
+
+
+class SessionRegistryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _user_with_otp(self, username, code):
+        user = get_user_model().objects.create_user(username=username, password='secret123')
+        UserOTP.objects.create(user=user, otp_code=code, expires_at=timezone.now() + timedelta(days=1))
+        return user
+
+    def _login(self, client, username, code):
+        return client.post(reverse('accounts:login'), data={'username': username, 'otp_code': code})
+
+    def test_lock_survives_cache_flush(self):
+        self._user_with_otp('flushuser', '4444444444')
+        self.assertEqual(self._login(Client(), 'flushuser', '4444444444').status_code, 302)
+        cache.clear()
+        response = self._login(Client(), 'flushuser', '4444444444')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Bu kod bilan allaqachon tizimga kirilgan")
+
+    def test_registry_skips_cache_without_shared_cache(self):
+        from accounts.session_registry import _registry_key
+        user = self._user_with_otp('localuser', '6666666666')
+        with override_settings(SHARED_CACHE=False):
+            self.assertEqual(self._login(Client(), 'localuser', '6666666666').status_code, 302)
+        self.assertIsNone(cache.get(_registry_key(user.pk)))
+        self.assertTrue(UserModuleAccess.objects.get(user=user).active_session_key)
+
+    @override_settings(SHARED_CACHE=True)
+    def test_registry_uses_shared_cache(self):
+        from accounts.session_registry import _registry_key
+        user = self._user_with_otp('shareduser', '8888888888')
+        self.assertEqual(self._login(Client(), 'shareduser', '8888888888').status_code, 302)
+        access = UserModuleAccess.objects.get(user=user)
+        self.assertEqual(cache.get(_registry_key(user.pk)), access.active_session_key)
+        response = self._login(Client(), 'shareduser', '8888888888')
+        self.assertContains(response, "Bu kod bilan allaqachon tizimga kirilgan")
+
+    def test_expired_session_key_is_stale(self):
+        from django.contrib.sessions.models import Session
+        user = self._user_with_otp('staleuser', '5555555555')
+        self.assertEqual(self._login(Client(), 'staleuser', '5555555555').status_code, 302)
+        Session.objects.update(expire_date=timezone.now() - timedelta(minutes=1))
+        cache.clear()
+        self.assertEqual(self._login(Client(), 'staleuser', '5555555555').status_code, 302)
+        access = UserModuleAccess.objects.get(user=user)
+        self.assertTrue(Session.objects.filter(session_key=access.active_session_key).exists())
+
+    def test_sweep_sessions_deletes_expired_in_batches(self):
+        from io import StringIO
+        from django.contrib.sessions.models import Session
+        from django.core.management import call_command
+
+        user = self._user_with_otp('sweepuser', '7777777777')
+        past = timezone.now() - timedelta(days=1)
+        for i in range(5):
+            Session.objects.create(session_key=f'expired{i}', session_data='', expire_date=past)
+        Session.objects.create(session_key='alive', session_data='', expire_date=timezone.now() + timedelta(days=1))
+        UserModuleAccess.objects.filter(user=user).update(active_session_key='expired3')
+
+        out = StringIO()
+        call_command('sweep_sessions', '--batch-size', '2', stdout=out)
+        self.assertIn("O'chirildi: 5", out.getvalue())
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['alive'])
+        self.assertIsNone(UserModuleAccess.objects.get(user=user).active_session_key)
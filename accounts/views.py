@@ -2,7 +2,6 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import login
 from django.contrib import messages
 from django.conf import settings
-from django.contrib.sessions.models import Session
 from django.views.decorators.http import require_http_methods
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
@@ -10,6 +9,7 @@ from django.utils.decorators import method_decorator
 from django.utils import timezone
 from .forms import OTPLoginForm
 from .models import UserOTP
+from .session_registry import has_other_active_session, register_active_session, release_active_session
 from core.models import UserActivity
 from core.access import get_user_module_access
 
@@ -37,11 +37,7 @@ def login_view(request):
                 
                 if otp and otp.is_valid():
                     access = get_user_module_access(user)
-                    active_session_key = access.active_session_key
-                    if active_session_key and Session.objects.filter(
-                        session_key=active_session_key,
-                        expire_date__gt=timezone.now()
-                    ).exists():
+                    if has_other_active_session(user, access):
                         error_msg = "Bu kod bilan allaqachon tizimga kirilgan. Avval oldingi sessiyadan chiqing."
                         if request.headers.get('HX-Request'):
                             form.add_error('otp_code', error_msg)
@@ -51,14 +47,11 @@ def login_view(request):
 
                     # Login qilish
                     login(request, user)
-                    if not request.session.session_key:
-                        request.session.save()
+                    register_active_session(request, access)
                     
                     # Faqat single-use yoqilgan bo'lsa ishlatilgan deb belgilaymiz
                     if getattr(settings, 'OTP_SINGLE_USE', False):
                         otp.mark_as_used()
-                    access.active_session_key = request.session.session_key
-                    access.save(update_fields=['active_session_key', 'updated_at'])
                     
                     # Faollik yozish
                     UserActivity.objects.create(
@@ -99,10 +92,10 @@ def logout_view(request):
     """Chiqish"""
     from django.contrib.auth import logout
     if request.user.is_authenticated:
-        access = get_user_module_access(request.user)
-        if access.active_session_key == request.session.session_key:
-            access.active_session_key = None
-            access.save(update_fields=['active_session_key', 'updated_at'])
+        release_active_session(request.user.pk, request.session.session_key)
     logout(request)
     messages.success(request, 'Tizimdan chiqdingiz.')
-    return redirect('accounts:login')
+    response = redirect('accounts:login')
+    # Umumiy kompyuter: imtihon sahifalari keshi (exam_sw.js) va IndexedDB jurnali keyingi foydalanuvchiga qolmasin
+    response['Clear-Site-Data'] = '"cache", "storage"'
+    return response
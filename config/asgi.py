@@ -3,14 +3,70 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Tez-tez chaqiriladigan JSON endpointlar (core.async_views, `lean_asgi` belgisi) LEAN_ASGI_MIDDLEWARE
+zanjiri orqali, qolgan barcha sahifalar to'liq MIDDLEWARE bilan xizmat qilinadi.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
 
 import os
+from functools import lru_cache
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+import types  # noqa: E402
+
+from django.conf import settings  # noqa: E402
+from django.core.handlers import base  # noqa: E402
+from django.core.handlers.asgi import ASGIHandler  # noqa: E402
+from django.urls import Resolver404, resolve  # noqa: E402
+
+
+class _LeanSettings:
+    """settings o'rinbosari: MIDDLEWARE → LEAN_ASGI_MIDDLEWARE, qolgan barcha qiymatlar global settings dan."""
+
+    def __getattr__(self, name):
+        if name == 'MIDDLEWARE':
+            return settings.LEAN_ASGI_MIDDLEWARE
+        return getattr(settings, name)
+
+
+def _with_settings(func, lean_settings):
+    """Django funksiyasining o'zi, faqat modul darajasidagi `settings` nomi lean_settings ga bog'langan nusxada."""
+    return types.FunctionType(
+        func.__code__, {**func.__globals__, 'settings': lean_settings}, func.__name__, func.__defaults__, func.__closure__,
+    )
+
+
+class LeanASGIHandler(ASGIHandler):
+    """
+    MIDDLEWARE o'rniga LEAN_ASGI_MIDDLEWARE (sessiya + CSRF) bilan yuklanadigan handler.
+
+    Zanjirni Django ning o'z BaseHandler.load_middleware i quradi; global settings.MIDDLEWARE o'zgartirilmaydi
+    (parallel yuklanayotgan to'liq handler ga ta'sir qilmaydi) — faqat shu nusxa ro'yxatni _LeanSettings dan o'qiydi.
+    """
+
+    load_middleware = _with_settings(base.BaseHandler.load_middleware, _LeanSettings())
+
+
+lean_application = LeanASGIHandler()
+
+
+@lru_cache(maxsize=4096)
+def is_lean_path(path):
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return False
+    return getattr(match.func, 'lean_asgi', False)
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and is_lean_path(scope['path']):
+        return await lean_application(scope, receive, send)
+    return await django_application(scope, receive, send)
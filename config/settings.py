@@ -51,6 +51,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.PrecompressedStaticMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -60,6 +61,13 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# ASGI da core.async_views JSON endpointlari uchun qisqa zanjir (config/asgi.py): autentifikatsiya va
+# modul ruxsati view dekoratorida (async_json_endpoint) tekshiriladi.
+LEAN_ASGI_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+]
+
 # Security settings for YouTube embeds
 # Allow embedding YouTube videos in our site
 X_FRAME_OPTIONS = 'SAMEORIGIN'
@@ -83,7 +91,6 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.platform_notifications',
-                'core.context_processors.static_asset_version',
             ],
         },
     },
@@ -107,6 +114,45 @@ DATABASES = {
     }
 }
 
+# O'qish replikasi: POSTGRES_REPLICA_HOST berilsa analitika/hisobot sahifalari undan o'qiydi (core.db_routing).
+# Testlarda replika alias primary ga ko'zgu (MIRROR) — alohida baza yaratilmaydi.
+REPLICA_DATABASE_ALIAS = 'replica'
+REPLICA_MAX_LAG_SECONDS = int(os.environ.get('REPLICA_MAX_LAG_SECONDS', 5))
+READ_YOUR_WRITES_SECONDS = int(os.environ.get('READ_YOUR_WRITES_SECONDS', 30))
+if os.environ.get('POSTGRES_REPLICA_HOST'):
+    DATABASES[REPLICA_DATABASE_ALIAS] = {
+        **DATABASES['default'],
+        'HOST': os.environ['POSTGRES_REPLICA_HOST'],
+        'PORT': os.environ.get('POSTGRES_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['core.db_routing.ReplicaRouter']
+
+# Kesh: REDIS_URL berilsa barcha workerlar uchun umumiy Redis (redis paketi kerak), aks holda locmem.
+# locmem har worker uchun alohida — unda bir workerdagi o'zgarish (logout, versiya oshishi) boshqalariga yetmaydi,
+# shuning uchun workerlar o'rtasida bo'lishilishi kerak bo'lgan holat faqat SHARED_CACHE bo'lsa keshga qo'yiladi.
+REDIS_URL = os.environ.get('REDIS_URL')
+SHARED_CACHE = bool(REDIS_URL)
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+    # Sessiya avval keshdan o'qiladi, bazaga faqat yozishda (yoki kesh "miss"da) murojaat qilinadi
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+else:
+    # locmem da cached_db xavfli: logout faqat bitta workerning keshidan o'chiradi
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+
+# Kontent versiyalari (core.content_versions) locmem da shuncha soniyada eskiradi — boshqa workerlar o'zgarishni ko'radi
+CONTENT_VERSION_LOCAL_TTL = int(os.environ.get('CONTENT_VERSION_LOCAL_TTL', 60))
+
+# Shablon fragmentlari keshi (core.fragment_cache): kalit obyekt versiyalariga bog'langan, muddat — zaxira tozalash uchun
+FRAGMENT_CACHE_ENABLED = os.environ.get('FRAGMENT_CACHE_ENABLED', '1') == '1'
+FRAGMENT_CACHE_TIMEOUT = int(os.environ.get('FRAGMENT_CACHE_TIMEOUT', 24 * 60 * 60))
+
 
 
 
@@ -148,9 +194,8 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
-
-# Cache busting for CSS/JS — bump after changing static assets (or set STATIC_ASSET_VERSION env on deploy).
-STATIC_ASSET_VERSION = os.environ.get('STATIC_ASSET_VERSION', '11')
+# collectstatic: nomlarga kontent hash + .gz/.br nusxalar (core.static_storage); qo'lda ?v= versiya kerak emas
+STATICFILES_STORAGE = 'core.static_storage.CompressedManifestStaticFilesStorage'
 
 # Media files
 
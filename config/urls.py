@@ -20,7 +20,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.http import HttpResponse
 
-from core.views import admin_toliq_yoriqnoma
+from core.views import admin_toliq_yoriqnoma, fragment_cache_toggle
 
 
 def favicon_view(request):
@@ -32,6 +32,7 @@ def favicon_view(request):
 urlpatterns = [
     path('favicon.ico', favicon_view),
     path('admin/yoriqnoma/', admin_toliq_yoriqnoma, name='admin_toliq_yoriqnoma'),
+    path('admin/fragment-cache/toggle/', fragment_cache_toggle, name='fragment_cache_toggle'),
     path('admin/', admin.site.urls),
     path('accounts/', include('accounts.urls')),
     path('sat/', include('sat.urls')),
@@ -0,0 +1,219 @@
+"""
+UserActivity saqlash siyosati: oylik bo'limlar (PostgreSQL), kunlik yig'indilar va eski oylarni arxivlash.
+
+PostgreSQL da jadval created_at bo'yicha RANGE bo'lingan (0032 migratsiya) — yaqin davrdagi so'rovlar
+faqat 1–2 bo'limni o'qiydi. Boshqa bazalarda oddiy jadval: arxivlashda qatorlar o'chiriladi.
+"""
+import gzip
+import json
+import os
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.models import UserActivity, UserActivityDailyRollup
+
+PARENT_TABLE = UserActivity._meta.db_table
+DEFAULT_PARTITION = f'{PARENT_TABLE}_default'
+ARCHIVE_FIELDS = (
+    'id', 'user_id', 'activity_type', 'related_object_id', 'related_object_type', 'metadata', 'created_at',
+)
+
+
+def month_start(value=None):
+    """Berilgan vaqt/sana oyining boshi (mahalliy vaqt zonasida, aware)."""
+    if value is None:
+        value = timezone.now()
+    if isinstance(value, datetime):
+        value = timezone.localtime(value)
+    return timezone.make_aware(datetime(value.year, value.month, 1))
+
+
+def add_months(month, count):
+    index = month.year * 12 + (month.month - 1) + count
+    return timezone.make_aware(datetime(index // 12, index % 12 + 1, 1))
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def partition_name(month):
+    return f'{PARENT_TABLE}_p{month:%Y%m}'
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [PARENT_TABLE])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def existing_partitions():
+    """Ota jadvalga ulangan oylik bo'limlar nomlari (DEFAULT dan tashqari)."""
+    if not is_partitioned():
+        return set()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [PARENT_TABLE],
+        )
+        names = {row[0] for row in cursor.fetchall()}
+    names.discard(DEFAULT_PARTITION)
+    return names
+
+
+def ensure_month_partition(month):
+    """Oy bo'limi yo'q bo'lsa yaratadi; DEFAULT ga tushib qolgan qatorlarni unga ko'chiradi."""
+    name = partition_name(month)
+    if name in existing_partitions():
+        return False
+    start, end = month.isoformat(), add_months(month, 1).isoformat()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)')
+        # Aks holda ATTACH "default partition contains rows" xatosini beradi
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE created_at >= '{start}' AND created_at < '{end}'
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """
+        )
+        cursor.execute(
+            f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+    return True
+
+
+def ensure_future_partitions(months_ahead=2):
+    """Joriy oy va keyingi months_ahead oy uchun bo'limlar. Bo'limlanmagan bazada — bo'sh ro'yxat."""
+    if not is_partitioned():
+        return []
+    current = month_start()
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if ensure_month_partition(month):
+            created.append(partition_name(month))
+    return created
+
+
+def first_raw_day():
+    first_at = UserActivity.objects.aggregate(first=Min('created_at'))['first']
+    return timezone.localdate(first_at) if first_at else None
+
+
+def pending_rollup_start():
+    """Yig'ilmagan birinchi kun: oxirgi yig'ilgan kun qayta hisoblanadi (u kun to'liq bo'lmagan bo'lishi mumkin)."""
+    last_day = UserActivityDailyRollup.objects.aggregate(last=Max('day'))['last']
+    if last_day:
+        return last_day
+    return first_raw_day()
+
+
+def rollup_days(start_day, end_day):
+    """[start_day, end_day] oralig'ini xom jurnaldan qayta hisoblaydi (idempotent).
+
+    Xom yozuvlari arxivlangan kunlarga tegmaydi — ularning yig'indisi saqlanib qoladi.
+    """
+    first_day = first_raw_day()
+    if first_day is None:
+        return 0
+    start_day = max(start_day, first_day)
+    if start_day > end_day:
+        return 0
+    rows = (
+        UserActivity.objects.filter(
+            created_at__gte=day_start(start_day),
+            created_at__lt=day_start(end_day + timedelta(days=1)),
+        )
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'user_id', 'activity_type')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    rollups = [
+        UserActivityDailyRollup(
+            day=row['day'],
+            user_id=row['user_id'],
+            activity_type=row['activity_type'],
+            count=row['count'],
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        UserActivityDailyRollup.objects.filter(day__gte=start_day, day__lte=end_day).delete()
+        UserActivityDailyRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+
+def expired_months(retain_months):
+    """Saqlash muddatidan o'tgan oylar (eng eskisidan boshlab)."""
+    cutoff = add_months(month_start(), -retain_months)
+    months = set()
+    first_day = first_raw_day()
+    if first_day is not None:
+        month = month_start(first_day)
+        while month < cutoff:
+            months.add(month)
+            month = add_months(month, 1)
+    for name in existing_partitions():
+        suffix = name.rsplit('_p', 1)[-1]
+        if len(suffix) == 6 and suffix.isdigit():
+            month = timezone.make_aware(datetime(int(suffix[:4]), int(suffix[4:]), 1))
+            if month < cutoff:
+                months.add(month)
+    return sorted(months)
+
+
+def archive_month(month, archive_dir):
+    """Oyning xom yozuvlarini archive_dir/useractivity_YYYY_MM.jsonl.gz ga yozadi. (yo'l, qatorlar soni)
+
+    Bo'sh oy uchun fayl yaratilmaydi — (None, 0).
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f'useractivity_{month:%Y_%m}.jsonl.gz')
+    tmp_path = f'{path}.tmp'
+    rows = (
+        UserActivity.objects.filter(created_at__gte=month, created_at__lt=add_months(month, 1))
+        .order_by('created_at', 'id')
+        .values(*ARCHIVE_FIELDS)
+    )
+    count = 0
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as fh:
+        for row in rows.iterator(chunk_size=2000):
+            row['created_at'] = row['created_at'].isoformat()
+            fh.write(json.dumps(row, ensure_ascii=False) + '\n')
+            count += 1
+    if not count:
+        os.remove(tmp_path)
+        return None, 0
+    os.replace(tmp_path, path)
+    return path, count
+
+
+def drop_month(month, detach_only=False):
+    """Oy bo'limini ajratadi (detach_only=False bo'lsa o'chiradi); bo'limlanmagan bazada qatorlarni o'chiradi."""
+    end = add_months(month, 1)
+    name = partition_name(month)
+    if name in existing_partitions():
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}')
+            if not detach_only:
+                cursor.execute(f'DROP TABLE {name}')
+    # DEFAULT bo'lim yoki oddiy jadvaldagi qoldiqlar
+    UserActivity.objects.filter(created_at__gte=month, created_at__lt=end).delete()
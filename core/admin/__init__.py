@@ -11,6 +11,7 @@ from . import category_admins  # noqa: F401
 from . import test_admins  # noqa: F401
 from . import user_admins  # noqa: F401
 from . import sat_admins  # noqa: F401
+from . import job_admins  # noqa: F401
 from . import site_custom  # noqa: F401 — index override
 
 __all__ = [
@@ -77,7 +77,10 @@ class VideoLessonAdmin(admin.ModelAdmin):
     list_filter = ['category', 'is_active', 'created_at']
     search_fields = ['title', 'description', 'youtube_id']
     ordering = ['order', 'created_at']
-    readonly_fields = ['youtube_id', 'youtube_thumbnail', 'views_count', 'created_at', 'updated_at']
+    readonly_fields = [
+        'youtube_id', 'youtube_thumbnail', 'views_count',
+        'rating_average', 'rating_count', 'comment_count', 'created_at', 'updated_at',
+    ]
     
     def save_model(self, request, obj, form, change):
         """Admin panelda saqlashda YouTube ID ni yangilash"""
@@ -0,0 +1,149 @@
+"""
+Katta jadvallar uchun yengil changelist (natijalar, javoblar, video progress, faollik).
+
+- EstimatedCountPaginator: PostgreSQL da planner bahosi (EXPLAIN) chegaradan katta bo'lsa aniq COUNT(*) qilinmaydi;
+  kichik jadvallar va SQLite da — odatdagi aniq son.
+- LeanChangeListMixin: show_full_result_count o'chiq, list_defer dagi og'ir ustunlar (answers_json, metadata)
+  faqat ro'yxat sahifasida yuklanmaydi, ?after=<pk> — chuqur sahifalar uchun keyset "keyingi sahifa" (OFFSET siz).
+- AutocompleteListFilter: FK bo'yicha filtr barcha yozuvlarni sanab chiqmaydi — admin autocomplete (select2) orqali.
+"""
+import json
+
+from django import forms
+from django.contrib import admin
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+KEYSET_VAR = 'after'
+ESTIMATE_THRESHOLD = 100_000
+
+
+def planner_estimate(queryset):
+    """PostgreSQL planner bahosi (qatorlar soni) yoki None (boshqa baza / xato)."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+    except Exception:
+        return None
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Planner bahosi estimate_threshold dan katta bo'lsa — taxminiy son, aks holda aniq COUNT(*)."""
+    estimate_threshold = ESTIMATE_THRESHOLD
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            estimate = planner_estimate(self.object_list)
+            if estimate is not None and estimate >= self.estimate_threshold:
+                return estimate
+        return super().count
+
+
+class LeanChangeList(ChangeList):
+    """?after=<pk> bo'lsa: pk < after, -pk tartibida (sahifa raqami va OFFSET ishlatilmaydi)."""
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(KEYSET_VAR, None)
+        return lookup_params
+
+    @cached_property
+    def keyset_after(self):
+        try:
+            return int(self.params.get(KEYSET_VAR) or 0) or None
+        except ValueError:
+            return None
+
+    def get_queryset(self, request, *args, **kwargs):
+        qs = super().get_queryset(request, *args, **kwargs)
+        if self.keyset_after:
+            qs = qs.filter(pk__lt=self.keyset_after).order_by('-pk')
+        # Keyset faqat -pk tartibida to'g'ri (ustun bo'yicha saralanganda oddiy sahifalash)
+        self.keyset_enabled = list(qs.query.order_by[:1]) in (['-pk'], ['-id'])
+        return qs
+
+    def get_results(self, request):
+        super().get_results(request)
+        self.next_after = None
+        # len() querysetni keshlaydi — sahifa qatorlari qayta so'ralmaydi
+        if self.keyset_enabled and len(self.result_list) >= self.list_per_page:
+            # To'liq sahifa — ehtimol davomi bor; oxirgi pk dan keyingi sahifa
+            self.next_after = self.result_list[len(self.result_list) - 1].pk
+
+    def keyset_url(self):
+        if not self.next_after:
+            return ''
+        return self.get_query_string({KEYSET_VAR: self.next_after}, [PAGE_VAR])
+
+
+class LeanChangeListMixin:
+    """ModelAdmin uchun: taxminiy son, og'ir ustunlarsiz ro'yxat va keyset navigatsiya."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = 'admin/lean_change_list.html'
+    # Ro'yxatda kerak bo'lmagan og'ir ustunlar (masalan JSON)
+    list_defer = ()
+
+    def get_changelist(self, request, **kwargs):
+        return LeanChangeList
+
+    @property
+    def media(self):
+        media = super().media
+        for list_filter in self.list_filter:
+            if isinstance(list_filter, (list, tuple)) and issubclass(list_filter[1], AutocompleteListFilter):
+                field = self.opts.get_field(list_filter[0])
+                media += AutocompleteSelect(field, self.admin_site).media
+        return media
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        match = getattr(request, 'resolver_match', None)
+        if self.list_defer and match and match.url_name == '%s_%s_changelist' % (self.opts.app_label, self.opts.model_name):
+            qs = qs.defer(*self.list_defer)
+        return qs
+
+
+class AutocompleteListFilter(admin.FieldListFilter):
+    """FK filtri: variantlar ro'yxati o'rniga select2 autocomplete (bog'liq admin da search_fields bo'lishi shart)."""
+    template = 'admin/core/filters/autocomplete.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = '%s__%s__exact' % (field_path, field.target_field.name)
+        self.lookup_val = params.get(self.lookup_kwarg)
+        super().__init__(field, request, params, model, model_admin, field_path)
+        # ModelChoiceField widget.choices ni o'rnatadi — render faqat tanlangan yozuvni so'raydi
+        self.widget = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(),
+            widget=AutocompleteSelect(field, model_admin.admin_site, attrs={'data-lookup': self.lookup_kwarg}),
+            required=False,
+        ).widget
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def has_output(self):
+        return True
+
+    def rendered_widget(self):
+        return self.widget.render(self.lookup_kwarg, self.lookup_val, attrs={'id': 'id_filter_%s' % self.field_path})
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.lookup_val is None,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg, PAGE_VAR, KEYSET_VAR]),
+            'display': "Hammasi",
+        }
@@ -1,9 +1,11 @@
 """Admin: savol formasi, import/export resurslari (barcha savol turlari o'zgartirilmasdan)."""
+import copy
 import json
 
 from django import forms
 from import_export import resources
 
+from ..answer_key import ANSWER_KEY_FIELDS, AnswerKeyRescore, answer_key_snapshot, stored_answer_key
 from ..models import Question, QuestionTypeRule, Test
 
 
@@ -183,6 +185,11 @@ class QuestionAdminForm(forms.ModelForm):
             "Format: savol matni||2 (ikki vertikal chiziq + 1 yoki 2 yoki 3)."
         ),
     )
+    confirm_answer_key_change = forms.BooleanField(
+        required=False,
+        label="Natijalarni qayta baholashni tasdiqlayman",
+        help_text="Javob kaliti o'zgarganda ko'rinadi: mavjud javoblar fon vazifasida qayta baholanadi.",
+    )
 
     class Meta:
         model = Question
@@ -738,8 +745,29 @@ class QuestionAdminForm(forms.ModelForm):
                 if not (options_json.get('options') or []):
                     raise forms.ValidationError("Summary + box: variantlar ro'yxati (a|matn) kerak.")
 
+        self._check_answer_key_change(cleaned)
         return cleaned
 
+    def _check_answer_key_change(self, cleaned):
+        """Kalit o'zgarsa va mavjud javoblar bahosi o'zgarsa — saqlashdan oldin sonlarni ko'rsatib tasdiq so'rash."""
+        inst = self.instance
+        if not getattr(inst, 'pk', None) or self.errors or cleaned.get('confirm_answer_key_change'):
+            return
+        old_key = stored_answer_key(inst.pk) or answer_key_snapshot(inst)
+        candidate = copy.copy(inst)
+        for name in ('question_type', 'max_choices', 'question_text', 'options_json') + ANSWER_KEY_FIELDS:
+            if name in cleaned:
+                setattr(candidate, name, cleaned[name])
+        if answer_key_snapshot(candidate) == old_key:
+            return
+        preview = AnswerKeyRescore(candidate, old_key).preview()
+        if not preview['results']:
+            return
+        self.add_error('confirm_answer_key_change', (
+            f"Javob kaliti o'zgardi: {preview['answers']} ta javobdan {preview['changed_answers']} tasining bahosi o'zgaradi, "
+            f"{preview['results']} ta natija qayta hisoblanadi (fon vazifasida). Tasdiqlab yana saqlang."
+        ))
+
     def save(self, commit=True):
         """options_json va correct_answer_json inline da render bo'lmasa ham aniq saqlansin."""
         instance = super().save(commit=False)
@@ -0,0 +1,95 @@
+"""Fon vazifalari (core.jobs): navbat holati, progress va jurnal."""
+from django.contrib import admin, messages
+from django.urls import reverse
+from django.utils.html import format_html
+
+from .. import jobs
+from ..models import Job
+
+# Faol vazifa bor sahifa shuncha soniyada yangilanadi
+AUTO_REFRESH_SECONDS = 5
+
+
+def job_queued_message(job):
+    """Admin amali vazifani navbatga qo'ygandan keyingi xabar (havola bilan)."""
+    url = reverse('admin:core_job_change', args=[job.pk])
+    return format_html(
+        'Vazifa navbatga qo\'yildi: <a href="{}">#{} {}</a>. Holati «Fon vazifalari» sahifasida ko\'rinadi.',
+        url, job.pk, job.kind,
+    )
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status_display', 'progress_display', 'attempts_display', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind', 'created_at']
+    search_fields = ['kind', 'log', 'error']
+    list_select_related = ['created_by']
+    list_per_page = 50
+    actions = ['retry_jobs']
+    fields = [
+        'kind', 'status', 'progress_display', 'attempts_display', 'payload',
+        'created_by', 'created_at', 'run_after', 'started_at', 'finished_at', 'locked_by',
+        'log_display', 'error_display',
+    ]
+    readonly_fields = fields
+
+    STATUS_COLORS = {
+        Job.STATUS_QUEUED: '#6c757d',
+        Job.STATUS_RUNNING: '#0d6efd',
+        Job.STATUS_SUCCEEDED: '#198754',
+        Job.STATUS_FAILED: '#dc3545',
+    }
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def status_display(self, obj):
+        return format_html(
+            '<strong style="color: {};">{}</strong>', self.STATUS_COLORS.get(obj.status, '#333'), obj.get_status_display(),
+        )
+    status_display.short_description = "Holat"
+    status_display.admin_order_field = 'status'
+
+    def progress_display(self, obj):
+        counts = f"{obj.progress}/{obj.total}" if obj.total else ''
+        return format_html(
+            '<div style="width: 140px; background: #e9ecef; border-radius: 4px; overflow: hidden;">'
+            '<div style="width: {}%; background: {}; height: 8px;"></div></div>'
+            '<span class="quiet">{}% {}</span>',
+            obj.percent, self.STATUS_COLORS.get(obj.status, '#333'), obj.percent, counts,
+        )
+    progress_display.short_description = "Progress"
+
+    def attempts_display(self, obj):
+        return f"{obj.attempts}/{obj.max_attempts}"
+    attempts_display.short_description = "Urinish"
+
+    def log_display(self, obj):
+        return format_html('<pre style="white-space: pre-wrap; max-height: 400px; overflow: auto;">{}</pre>', obj.log or '—')
+    log_display.short_description = "Jurnal"
+
+    def error_display(self, obj):
+        if not obj.error:
+            return '—'
+        return format_html('<pre style="white-space: pre-wrap; max-height: 300px; overflow: auto;">{}</pre>', obj.error)
+    error_display.short_description = "Oxirgi xato"
+
+    def _auto_refresh(self, active):
+        return {'job_auto_refresh': AUTO_REFRESH_SECONDS if active else None}
+
+    def changelist_view(self, request, extra_context=None):
+        active = Job.objects.filter(status__in=[Job.STATUS_QUEUED, Job.STATUS_RUNNING]).exists()
+        return super().changelist_view(request, {**(extra_context or {}), **self._auto_refresh(active)})
+
+    def change_view(self, request, object_id, form_url='', extra_context=None):
+        active = Job.objects.filter(pk=object_id, status__in=[Job.STATUS_QUEUED, Job.STATUS_RUNNING]).exists()
+        return super().change_view(request, object_id, form_url, {**(extra_context or {}), **self._auto_refresh(active)})
+
+    @admin.action(description="Xato bo'lganlarni qayta navbatga qo'yish")
+    def retry_jobs(self, request, queryset):
+        count = jobs.retry(list(queryset.values_list('pk', flat=True)))
+        self.message_user(request, f"{count} ta vazifa qayta navbatga qo'yildi.", level=messages.SUCCESS)
@@ -1,6 +1,7 @@
 """Admin bosh sahifa va index override (CustomAdminSite — kelajakda statistics URL uchun)."""
 import json
-from datetime import timedelta
+from collections import Counter
+from datetime import datetime, time, timedelta
 from types import MethodType
 
 from django.contrib import admin
@@ -12,10 +13,13 @@ from django.shortcuts import render
 from django.urls import path
 from django.utils import timezone
 
+from .. import fragment_cache
+from ..db_routing import use_replica
 from ..models import (
     Category,
     Test,
     UserActivity,
+    UserActivityDailyRollup,
     UserTestResult,
     UserVideoProgress,
     VideoLesson,
@@ -47,6 +51,10 @@ def _gather_active_user_ids(since):
     ids.update(
         UserActivity.objects.filter(created_at__gte=since).values_list('user_id', flat=True)
     )
+    # Xom jurnal arxivlangan oylar uchun — kunlik yig'indilar
+    ids.update(
+        UserActivityDailyRollup.objects.filter(day__gt=timezone.localdate(since)).values_list('user_id', flat=True)
+    )
     if not ids:
         return []
     return list(
@@ -108,21 +116,33 @@ def build_active_users_report(days=ACTIVE_USERS_DEFAULT_DAYS, limit=ACTIVE_USERS
 
 
 def build_active_users_monthly_trend(days=365):
-    """Oxirgi 12 oy — faollik jurnali (yengil so'rov)."""
+    """Oxirgi 12 oy — kunlik yig'indilar + hali yig'ilmagan kunlar uchun xom jurnal."""
     since = timezone.now() - timedelta(days=min(days, 365))
-    rows = list(
-        UserActivity.objects.filter(created_at__gte=since)
+    pairs = set()
+    raw_since = since
+    last_day = UserActivityDailyRollup.objects.aggregate(last=Max('day'))['last']
+    if last_day:
+        pairs.update(
+            UserActivityDailyRollup.objects.filter(day__gte=timezone.localdate(since), day__lte=last_day)
+            .annotate(month=TruncMonth('day'))
+            .values_list('month', 'user_id')
+            .distinct()
+        )
+        raw_since = max(since, timezone.make_aware(datetime.combine(last_day + timedelta(days=1), time.min)))
+    for month, user_id in (
+        UserActivity.objects.filter(created_at__gte=raw_since)
         .annotate(month=TruncMonth('created_at'))
-        .values('month')
-        .annotate(count=Count('user', distinct=True))
-        .order_by('month')[:12]
-    )
+        .values_list('month', 'user_id')
+        .distinct()
+    ):
+        pairs.add((month.date() if isinstance(month, datetime) else month, user_id))
+
+    monthly = Counter(month for month, _ in pairs if month)
     labels = []
     counts = []
-    for row in rows:
-        if row['month']:
-            labels.append(row['month'].strftime('%b %Y'))
-            counts.append(row['count'])
+    for month in sorted(monthly)[-12:]:
+        labels.append(month.strftime('%b %Y'))
+        counts.append(monthly[month])
     return labels, counts
 
 
@@ -154,7 +174,11 @@ class CustomAdminSite(admin.AdminSite):
         return custom_urls + urls
     
     def statistics_view(self, request):
-        """Umumiy statistikalar"""
+        """Umumiy statistikalar (og'ir o'qishlar — replikadan, bo'lsa)"""
+        with use_replica():
+            return self._statistics_view(request)
+
+    def _statistics_view(self, request):
         # Foydalanuvchilar statistikasi
         total_users = User.objects.count()
         active_users_7d = count_active_users(7)
@@ -480,6 +504,9 @@ def custom_index(request, extra_context=None):
         'avg_score': round(avg_score, 2),
         'category_test_stats': category_test_stats,
         'chart_payload_json': json.dumps(chart_payload),
+        'fragment_cache_stats': fragment_cache.fragment_stats(),
+        'fragment_cache_stats_enabled': fragment_cache.stats_enabled(),
+        'fragment_cache_bypassed': fragment_cache.is_bypassed(request),
     })
     
     return original_index(request, extra_context=extra_context)
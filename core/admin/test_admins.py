@@ -1,14 +1,27 @@
 """Test, savol, passage admin (Reading / Listening / Writing — barcha turlar)."""
+import json
+
 from django.contrib import admin
 from django import forms
 from django.contrib import messages
+from django.contrib.admin import helpers
+from django.contrib.admin.utils import flatten_fieldsets
+from django.core.exceptions import PermissionDenied
 from django.db import transaction
+from django.forms import modelform_factory
+from django.http import Http404, HttpResponseRedirect, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
 from django.utils.html import format_html
-from django.core.management import call_command
 from import_export.admin import ImportExportModelAdmin
 
+from .. import jobs
 from .forms import QuestionAdminForm, QuestionResource, TestResource, question_type_rules_json
-from ..models import Question, ReadingPassage, Test
+from ..item_analysis import MIN_ATTEMPTS_FOR_FLAGS, item_flags, item_report
+from ..models import Question, QuestionItemStats, ReadingPassage, Test, TestItemAnalysis
+from .job_admins import job_queued_message
 
 
 # Question Inline - StackedInline - savol qo'shish qulayroq
@@ -32,6 +45,7 @@ class QuestionInline(admin.StackedInline):
         return [
             (None, {
                 'fields': [
+                    'confirm_answer_key_change',
                     'order',
                     'variant',
                     'question_type',
@@ -78,6 +92,47 @@ class QuestionInline(admin.StackedInline):
         ]
 
 
+# Savollar soni shundan ko'p bo'lsa test sahifasida inline o'rniga ixcham ro'yxat + so'rov bo'yicha yuklanadigan forma
+LAZY_QUESTION_EDITOR_THRESHOLD = 30
+QUESTION_PREVIEW_CHARS = 70
+
+
+def question_status(question):
+    """Ro'yxatdagi belgi: (kod, matn)."""
+    if not (question.question_text or '').strip():
+        return 'draft', 'Draft'
+    if question.question_type != 'essay' and not (question.correct_answer or question.correct_answer_json):
+        return 'no_answer', "Javob yo'q"
+    return 'ok', 'Tayyor'
+
+
+def question_index_row(question):
+    """Lazy muharrir ro'yxatidagi bitta qator (shablon va JSON javoblar uchun)."""
+    status, status_label = question_status(question)
+    text = ' '.join((question.question_text or '').split())
+    return {
+        'id': question.pk,
+        'order': question.order,
+        'question_type': question.question_type,
+        'question_type_display': question.get_question_type_display(),
+        'part': (question.options_json or {}).get('part'),
+        'variant': question.variant,
+        'status': status,
+        'status_label': status_label,
+        'preview': text[:QUESTION_PREVIEW_CHARS] + ('…' if len(text) > QUESTION_PREVIEW_CHARS else ''),
+    }
+
+
+def _optional_int(value, allowed=None):
+    """Batch delta qiymati: '' / None -> None; aks holda butun son (allowed ichida)."""
+    if value in (None, ''):
+        return None
+    number = int(value)
+    if allowed is not None and number not in allowed:
+        raise ValueError(value)
+    return number
+
+
 class ReadingPassageForm(forms.ModelForm):
     """Passage matni uchun katta textarea."""
     class Meta:
@@ -169,9 +224,51 @@ class TestAdmin(ImportExportModelAdmin):
         ro.extend(['created_at', 'updated_at'])
         return ro
 
+    def uses_lazy_question_editor(self, obj):
+        return obj is not None and obj.pk is not None and obj.questions.count() > LAZY_QUESTION_EDITOR_THRESHOLD
+
+    def get_inlines(self, request, obj):
+        # Katta testda savollar inline formalari umuman chizilmaydi va POST qilinmaydi — Test maydonlari alohida saqlanadi
+        if self.uses_lazy_question_editor(obj):
+            return [ReadingPassageInline]
+        return super().get_inlines(request, obj)
+
+    def get_urls(self):
+        info = self.opts.app_label, self.opts.model_name
+        return [
+            path(
+                '<path:object_id>/questions/add/',
+                self.admin_site.admin_view(self.question_editor_view),
+                name='%s_%s_question_add' % info,
+            ),
+            path(
+                '<path:object_id>/questions/batch/',
+                self.admin_site.admin_view(self.question_batch_view),
+                name='%s_%s_question_batch' % info,
+            ),
+            path(
+                '<path:object_id>/questions/<int:question_id>/',
+                self.admin_site.admin_view(self.question_editor_view),
+                name='%s_%s_question_edit' % info,
+            ),
+            path(
+                '<path:object_id>/item-analysis/',
+                self.admin_site.admin_view(self.item_analysis_view),
+                name='%s_%s_item_analysis' % info,
+            ),
+        ] + super().get_urls()
+
     def change_view(self, request, object_id, form_url='', extra_context=None):
         extra_context = extra_context or {}
         extra_context['question_type_rules_json'] = question_type_rules_json()
+        obj = self.get_object(request, object_id)
+        if self.uses_lazy_question_editor(obj):
+            questions = Question.objects.filter(test=obj).order_by('order', 'pk').only(
+                'pk', 'order', 'question_type', 'variant', 'options_json',
+                'question_text', 'correct_answer', 'correct_answer_json',
+            )
+            extra_context['lazy_question_index'] = [question_index_row(q) for q in questions]
+            extra_context['lazy_question_variant_choices'] = Question._meta.get_field('variant').choices
         return super().change_view(request, object_id, form_url, extra_context=extra_context)
 
     def add_view(self, request, form_url='', extra_context=None):
@@ -179,6 +276,118 @@ class TestAdmin(ImportExportModelAdmin):
         extra_context['question_type_rules_json'] = question_type_rules_json()
         return super().add_view(request, form_url, extra_context=extra_context)
 
+    def _editable_test(self, request, object_id):
+        test = self.get_object(request, object_id)
+        if test is None:
+            raise Http404
+        if not self.has_change_permission(request, test):
+            raise PermissionDenied
+        return test
+
+    def item_analysis_view(self, request, object_id):
+        """Savollar item-analizi hisoboti; POST — shu test uchun qayta hisoblash vazifasi."""
+        test = self.get_object(request, object_id)
+        if test is None:
+            raise Http404
+        if not self.has_view_permission(request, test):
+            raise PermissionDenied
+        if request.method == 'POST':
+            if not self.has_change_permission(request, test):
+                raise PermissionDenied
+            job = jobs.enqueue('item_analysis', {'test_ids': [test.pk], 'full': bool(request.POST.get('full'))}, user=request.user)
+            self.message_user(request, job_queued_message(job))
+            return HttpResponseRedirect(request.path)
+        state = TestItemAnalysis.objects.filter(test=test).first()
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.opts,
+            'original': test,
+            'title': f"Item-analiz: {test.title}",
+            'analysis': state,
+            'rows': item_report(test),
+            'min_attempts_for_flags': MIN_ATTEMPTS_FOR_FLAGS,
+        }
+        return TemplateResponse(request, 'admin/core/test/item_analysis.html', context)
+
+    def question_editor_form_class(self, request):
+        """QuestionInline bilan bir xil maydonlar va fieldsetlar (test maydonisiz)."""
+        fieldsets = QuestionInline(self.model, self.admin_site).get_fieldsets(request)
+        return modelform_factory(Question, form=QuestionAdminForm, fields=flatten_fieldsets(fieldsets)), fieldsets
+
+    def question_editor_view(self, request, object_id, question_id=None):
+        """Bitta savol formasi: GET — HTML fragment, POST — saqlash (JSON: yangilangan ro'yxat qatori yoki xatoli forma)."""
+        test = self._editable_test(request, object_id)
+        question = get_object_or_404(Question, pk=question_id, test=test) if question_id else Question(test=test)
+        form_class, fieldsets = self.question_editor_form_class(request)
+        prefix = f'q-{question.pk or "new"}'
+        if request.method == 'POST':
+            form = form_class(request.POST, request.FILES, instance=question, prefix=prefix)
+            if form.is_valid():
+                saved = form.save(commit=False)
+                saved.test = test
+                saved.save()
+                form.save_m2m()
+                return JsonResponse({'ok': True, 'created': question_id is None, 'row': question_index_row(saved)})
+        else:
+            form = form_class(instance=question, prefix=prefix)
+        html = render_to_string('admin/core/test/question_editor_form.html', {
+            'adminform': helpers.AdminForm(form, fieldsets, {}, model_admin=self),
+            'form': form,
+            'question': question if question.pk else None,
+            'action_url': request.path,
+        }, request=request)
+        if request.method == 'POST':
+            return JsonResponse({'ok': False, 'html': html}, status=400)
+        return JsonResponse({'ok': True, 'html': html})
+
+    def question_batch_view(self, request, object_id):
+        """Ro'yxatdan tartib / part / variant o'zgarishlari bitta so'rovda: {"changes": [{"id", "order", "part", "variant"}]}."""
+        test = self._editable_test(request, object_id)
+        if request.method != 'POST':
+            return JsonResponse({'ok': False, 'error': 'POST kerak'}, status=405)
+        try:
+            changes = json.loads(request.body or b'{}').get('changes') or []
+        except (ValueError, AttributeError):
+            return JsonResponse({'ok': False, 'error': "Noto'g'ri JSON"}, status=400)
+        variant_values = {value for value, _ in Question._meta.get_field('variant').choices}
+        deltas = {}
+        try:
+            for change in changes:
+                delta = {}
+                if 'order' in change:
+                    delta['order'] = int(change['order'])
+                if 'variant' in change:
+                    delta['variant'] = _optional_int(change['variant'], variant_values)
+                if 'part' in change:
+                    delta['part'] = _optional_int(change['part'], range(1, 5))
+                deltas[int(change['id'])] = delta
+        except (KeyError, TypeError, ValueError):
+            return JsonResponse({'ok': False, 'error': "Noto'g'ri qiymat (tartib — son, part 1–4, variant 1–3)"}, status=400)
+
+        with transaction.atomic():
+            questions = list(Question.objects.select_for_update().filter(test=test, pk__in=deltas))
+            if len(questions) != len(deltas):
+                return JsonResponse({'ok': False, 'error': "Ba'zi savollar bu testga tegishli emas"}, status=400)
+            for question in questions:
+                delta = deltas[question.pk]
+                fields = []
+                for name in ('order', 'variant'):
+                    if name in delta and delta[name] != getattr(question, name):
+                        setattr(question, name, delta[name])
+                        fields.append(name)
+                if 'part' in delta:
+                    options = dict(question.options_json or {})
+                    if delta['part'] is None:
+                        options.pop('part', None)
+                    else:
+                        options['part'] = delta['part']
+                    if options != (question.options_json or {}):
+                        question.options_json = options
+                        fields.append('options_json')
+                if fields:
+                    question.save(update_fields=fields)
+        return JsonResponse({'ok': True, 'rows': [question_index_row(q) for q in questions]})
+
     def content_summary_display(self, obj):
         """Ro'yxatda: 3 passage, 40 savol ko'rinishi."""
         p_count = obj.reading_passages.count() if hasattr(obj, 'reading_passages') else 0
@@ -251,28 +460,25 @@ class TestAdmin(ImportExportModelAdmin):
                 level=messages.ERROR,
             )
             return
-        try:
-            call_command('reset_and_seed', verbosity=0)
-            self.message_user(
-                request,
-                "reset_and_seed bajarildi: ideal testlar + namuna savollar.",
-                level=messages.WARNING,
-            )
-        except Exception as e:
-            self.message_user(request, f"Seeding xatolik: {e}", level=messages.ERROR)
+        # Uzoq amal — so'rov ichida emas, run_jobs workerida (proxy timeout yarim yo'lda to'xtatmasin)
+        job = jobs.enqueue('reset_and_seed', user=request.user, max_attempts=1)
+        self.message_user(request, job_queued_message(job), level=messages.WARNING)
 
 
 # Question Admin - savol qo'shish qulay (yangi format: part/task ko'rsatish)
 @admin.register(Question)
 class QuestionAdmin(ImportExportModelAdmin):
     form = QuestionAdminForm
-    list_display = ['test', 'order', 'part_or_task_display', 'question_type', 'question_text_short', 'correct_answer', 'points', 'created_at']
+    list_display = [
+        'test', 'order', 'part_or_task_display', 'question_type', 'question_text_short', 'correct_answer', 'points',
+        'p_value_display', 'discrimination_display', 'created_at',
+    ]
     list_filter = ['test__category', 'test__test_type', 'test__is_active', 'question_type', 'created_at']
     search_fields = ['question_text', 'option_a', 'option_b', 'option_c', 'option_d', 'test__title']
     ordering = ['test', 'order']
     list_per_page = 30
     autocomplete_fields = ['test']
-    list_select_related = ['test', 'test__category']
+    list_select_related = ['test', 'test__category', 'item_stats']
     save_as = True
     save_on_top = True
     resource_class = QuestionResource
@@ -290,6 +496,7 @@ class QuestionAdmin(ImportExportModelAdmin):
     fieldsets = (
         ('Asosiy', {
             'fields': (
+                'confirm_answer_key_change',
                 'test',
                 'order',
                 'question_type',
@@ -365,6 +572,33 @@ class QuestionAdmin(ImportExportModelAdmin):
         extra_context['question_type_rules_json'] = question_type_rules_json()
         return super().add_view(request, form_url, extra_context=extra_context)
 
+    def _item_stats(self, obj):
+        try:
+            return obj.item_stats
+        except QuestionItemStats.DoesNotExist:
+            return None
+
+    def p_value_display(self, obj):
+        stats = self._item_stats(obj)
+        if stats is None or stats.p_value is None:
+            return '—'
+        return format_html('<span title="{} urinish">{}</span>', stats.attempts, f"{stats.p_value:.2f}")
+    p_value_display.short_description = "Qiyinlik (p)"
+    p_value_display.admin_order_field = 'item_stats__p_value'
+
+    def discrimination_display(self, obj):
+        stats = self._item_stats(obj)
+        if stats is None or stats.discrimination is None:
+            return '—'
+        flags = item_flags(stats)
+        if flags:
+            return format_html(
+                '<strong style="color: #dc3545;" title="{}">⚠ {}</strong>', ', '.join(flags), f"{stats.discrimination:.2f}",
+            )
+        return f"{stats.discrimination:.2f}"
+    discrimination_display.short_description = "Ajrata olish"
+    discrimination_display.admin_order_field = 'item_stats__discrimination'
+
     def question_text_short(self, obj):
         t = obj.question_text or ''
         return (t[:80] + '...') if len(t) > 80 else t
@@ -1,8 +1,15 @@
 """Foydalanuvchi natijalari, video progress, flashcard va hokazo."""
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseRedirect
+from django.template.response import TemplateResponse
+from django.urls import path
 from django.utils.html import format_html
 from import_export.admin import ImportExportModelAdmin
 
+from .. import jobs
+from .changelist import AutocompleteListFilter, LeanChangeListMixin
+from ..essay_grading import BAND_CHOICES, apply_grades, grading_queue, parse_band, queue_size
 from ..models import (
     AdminAnnouncement,
     Bookmark,
@@ -11,6 +18,7 @@ from ..models import (
     PlaylistVideo,
     StudyStreak,
     UserActivity,
+    UserActivityDailyRollup,
     UserModuleAccess,
     UserTestAnswer,
     UserTestResult,
@@ -20,6 +28,7 @@ from ..models import (
     VideoPlaylist,
     VideoRating,
 )
+from .job_admins import job_queued_message
 
 
 # UserTestAnswer Inline
@@ -28,21 +37,22 @@ class UserTestAnswerInline(admin.TabularInline):
     extra = 0
     readonly_fields = ['question', 'user_answer', 'answered_at']
     can_delete = False
-    # is_correct – tahrirlash mumkin (essay baholash uchun). O'zgartirsangiz "Qayta hisoblash" actionini ishlating.
+    # Essaylar "Essay baholash navbati" sahifasida baholanadi (band_score); is_correct o'zgarsa natija qayta hisoblanadi.
 
 
 # UserTestResult Admin - Yaxshilangan
 @admin.register(UserTestResult)
-class UserTestResultAdmin(ImportExportModelAdmin):
+class UserTestResultAdmin(LeanChangeListMixin, ImportExportModelAdmin):
     list_display = ['user', 'test', 'score', 'total_questions', 'percentage', 'correct_answers', 'attempt_number', 'is_passed_display', 'completed_at']
-    list_filter = ['test', 'test__category', 'completed_at', 'started_at', 'test__test_type', 'is_paused']
+    list_filter = [('test', AutocompleteListFilter), 'test__category', 'completed_at', 'started_at', 'test__test_type', 'is_paused']
     search_fields = ['user__username', 'user__email', 'user__first_name', 'user__last_name', 'test__title']
     readonly_fields = ['score', 'percentage', 'correct_answers', 'wrong_answers', 'answers_json', 'attempt_number', 'started_at', 'completed_at']
-    ordering = ['-completed_at', '-started_at']
+    # -pk: indeks bo'yicha (completed_at saralash millionlab qatorni tartiblaydi); date_hierarchy yo'q — u ham butun jadvalni skanerlaydi
+    ordering = ['-pk']
     inlines = [UserTestAnswerInline]
     list_per_page = 50
+    list_defer = ['answers_json', 'test__description', 'test__reading_text', 'test__reading_passages_json']
     autocomplete_fields = ['user', 'test']
-    date_hierarchy = 'completed_at'
     actions = ['recalculate_selected_results']
     
     fieldsets = (
@@ -72,24 +82,24 @@ class UserTestResultAdmin(ImportExportModelAdmin):
 
     @admin.action(description="Tanlangan natijalarni qayta hisoblash")
     def recalculate_selected_results(self, request, queryset):
-        updated = 0
-        for result in queryset.select_related('test'):
-            result.total_questions = result.total_questions or (result.test.total_questions if result.test else 0)
-            result.recalculate_from_answers()
-            updated += 1
-        self.message_user(request, f"{updated} ta natija qayta hisoblandi.")
+        result_ids = list(queryset.values_list('pk', flat=True))
+        job = jobs.enqueue('recalculate_results', {'result_ids': result_ids}, user=request.user)
+        self.message_user(request, job_queued_message(job))
 
 
 @admin.register(UserTestAnswer)
-class UserTestAnswerAdmin(admin.ModelAdmin):
-    list_display = ['test_result', 'question_type_display', 'user_answer_short', 'is_correct', 'answered_at']
+class UserTestAnswerAdmin(LeanChangeListMixin, admin.ModelAdmin):
+    list_display = ['test_result', 'question_type_display', 'user_answer_short', 'is_correct', 'band_score', 'answered_at']
     list_editable = ['is_correct']
-    list_filter = ['is_correct', 'answered_at', 'question__question_type', 'question__test__test_type']
+    list_filter = ['is_correct', 'needs_grading', 'answered_at', 'question__question_type', 'question__test__test_type']
     search_fields = ['test_result__user__username', 'question__question_text', 'user_answer']
-    readonly_fields = ['answered_at']
+    readonly_fields = ['answered_at', 'graded_at', 'graded_by']
     autocomplete_fields = ['test_result', 'question']
-    ordering = ['-answered_at']
+    ordering = ['-pk']
     list_per_page = 50
+    list_select_related = ['test_result__user', 'test_result__test', 'question']
+    list_defer = ['test_result__answers_json']
+    change_list_template = 'admin/core/usertestanswer/change_list.html'
 
     def question_type_display(self, obj):
         return obj.question.get_question_type_display() if obj.question_id else '-'
@@ -102,10 +112,76 @@ class UserTestAnswerAdmin(admin.ModelAdmin):
 
     user_answer_short.short_description = "Javob"
 
+    def get_urls(self):
+        info = self.opts.app_label, self.opts.model_name
+        return [
+            path(
+                'grading-queue/',
+                self.admin_site.admin_view(self.grading_queue_view),
+                name='%s_%s_grading_queue' % info,
+            ),
+        ] + super().get_urls()
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {**(extra_context or {}), 'grading_queue_size': queue_size()}
+        return super().changelist_view(request, extra_context)
+
+    def grading_queue_view(self, request):
+        """Baholanmagan essaylar: savol va javob yonma-yon, bir POST da ko'p band."""
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+        try:
+            after = max(0, int(request.GET.get('after') or 0))
+            test_id = int(request.GET.get('test') or 0) or None
+        except ValueError:
+            after, test_id = 0, None
+
+        errors, submitted = {}, {}
+        if request.method == 'POST':
+            grades = {}
+            for key, value in request.POST.items():
+                if not key.startswith('band_') or not value.strip():
+                    continue
+                try:
+                    answer_id = int(key[len('band_'):])
+                except ValueError:
+                    continue
+                submitted[answer_id] = value
+                try:
+                    grades[answer_id] = parse_band(value)
+                except ValueError as exc:
+                    errors[answer_id] = str(exc)
+            if not errors:
+                outcome = apply_grades(grades, user=request.user)
+                self.message_user(
+                    request,
+                    f"{outcome['graded']} ta essay baholandi, {outcome['results']} ta natija qayta hisoblandi.",
+                )
+                return HttpResponseRedirect(request.get_full_path())
+            self.message_user(request, "Ba'zi bandlar noto'g'ri — hech narsa saqlanmadi.", level='error')
+
+        answers, next_after = grading_queue(after=after, test_id=test_id)
+        for answer in answers:
+            answer.word_count = len((answer.user_answer or '').split())
+            answer.submitted_band = submitted.get(answer.pk, '')
+            answer.band_error = errors.get(answer.pk, '')
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.opts,
+            'title': "Essay baholash navbati",
+            'answers': answers,
+            'next_after': next_after,
+            'after': after,
+            'test_id': test_id,
+            'queue_size': queue_size(test_id),
+            'band_choices': BAND_CHOICES,
+        }
+        return TemplateResponse(request, 'admin/core/usertestanswer/grading_queue.html', context)
+
 
 # UserVideoProgress Admin - Yaxshilangan
 @admin.register(UserVideoProgress)
-class UserVideoProgressAdmin(admin.ModelAdmin):
+class UserVideoProgressAdmin(LeanChangeListMixin, admin.ModelAdmin):
     list_display = ['user', 'video', 'category_display', 'watched', 'watch_percentage', 'last_watched_at', 'completed_at']
     list_filter = ['watched', 'video__category', 'last_watched_at', 'completed_at']
     search_fields = ['user__username', 'user__email', 'user__first_name', 'user__last_name', 'video__title']
@@ -133,13 +209,15 @@ class UserVideoProgressAdmin(admin.ModelAdmin):
 
 # UserActivity Admin
 @admin.register(UserActivity)
-class UserActivityAdmin(admin.ModelAdmin):
+class UserActivityAdmin(LeanChangeListMixin, admin.ModelAdmin):
     list_display = ['user', 'activity_type', 'related_object_type', 'created_at']
     list_filter = ['activity_type', 'related_object_type', 'created_at']
     search_fields = ['user__username', 'user__email']
     readonly_fields = ['created_at']
-    ordering = ['-created_at']
+    ordering = ['-pk']
     list_per_page = 100
+    list_select_related = ['user']
+    list_defer = ['metadata']
     
     fieldsets = (
         ('Asosiy ma\'lumotlar', {
@@ -154,6 +232,17 @@ class UserActivityAdmin(admin.ModelAdmin):
     )
 
 
+# UserActivityDailyRollup Admin (faqat ko'rish uchun)
+@admin.register(UserActivityDailyRollup)
+class UserActivityDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ['day', 'user', 'activity_type', 'count']
+    list_filter = ['activity_type', 'day']
+    search_fields = ['user__username']
+    date_hierarchy = 'day'
+    raw_id_fields = ['user']
+    list_per_page = 100
+
+
 @admin.register(AdminAnnouncement)
 class AdminAnnouncementAdmin(admin.ModelAdmin):
     list_display = ['title', 'is_active', 'starts_at', 'ends_at', 'created_at']
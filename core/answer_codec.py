@@ -0,0 +1,77 @@
+"""
+Javoblar kodeki: saqlash shakli ↔ Python qiymati.
+
+answers_json formati (_meta.answer_format):
+  1 — eski: qiymatlar JSON satr ('["a","c"]', '{"14":"ii"}');
+  2 — joriy: ro'yxat/lug'at JSONField ichida to'g'ridan-to'g'ri (["a","c"], {"14": "ii"}); oddiy javob — satr.
+
+decode_answer ikkala shaklni ham o'qiydi va natija allaqachon list/dict bo'lsa qayta parse qilmaydi —
+scoring, review va template filtrlari shu qiymatni qabul qiladi. answer_text — kanonik matn
+(UserTestAnswer.user_answer va baholashdagi takrorlanmas javoblar kaliti), collect_answer_from_post
+avval yozgan json.dumps shakli bilan bir xil.
+
+Eski qatorlarni o'tkazish: python manage.py migrate_answer_format
+"""
+import json
+
+ANSWER_FORMAT = 2
+
+
+def decode_answer(value):
+    """Saqlangan javob → '' | str | list | dict (JSON satr bir marta parse qilinadi)."""
+    if value is None:
+        return ''
+    if isinstance(value, (list, dict)):
+        return value
+    s = str(value).strip()
+    if s[:1] in ('[', '{'):
+        try:
+            data = json.loads(s)
+        except (json.JSONDecodeError, TypeError):
+            return s
+        if isinstance(data, (list, dict)):
+            return data
+    return s
+
+
+def answer_text(value):
+    """Kanonik matn: list/dict → json.dumps, satr → strip."""
+    if value is None:
+        return ''
+    if isinstance(value, (list, dict)):
+        return json.dumps(value) if value else ''
+    return str(value).strip()
+
+
+def answer_is_empty(value):
+    return not decode_answer(value)
+
+
+def answers_format(answers_json):
+    meta = answers_json.get('_meta') if isinstance(answers_json, dict) else None
+    return int((meta or {}).get('answer_format', 1)) if isinstance(meta, dict) else 1
+
+
+def decode_answers(answers_json):
+    """Butun answers_json: javoblar typed qiymatlarga, bo'shlari tashlanadi; _meta o'zgarmaydi."""
+    if not isinstance(answers_json, dict):
+        return {}
+    decoded = {}
+    for key, value in answers_json.items():
+        if str(key).startswith('_'):
+            decoded[key] = value
+            continue
+        value = decode_answer(value)
+        if value:
+            decoded[key] = value
+    return decoded
+
+
+def upgrade_answers_json(answers_json):
+    """Format 1 → 2: qiymatlar typed, _meta.answer_format = 2 (scoring_version va exam_variant saqlanadi)."""
+    upgraded = decode_answers(answers_json)
+    meta = upgraded.get('_meta')
+    meta = dict(meta) if isinstance(meta, dict) else {}
+    meta['answer_format'] = ANSWER_FORMAT
+    upgraded['_meta'] = meta
+    return upgraded
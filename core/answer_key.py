@@ -0,0 +1,185 @@
+"""
+Javob kaliti (correct_answer / correct_answer_json) o'zgarganda faqat shu savolni qayta baholash.
+
+Question.save() kalit maydonlari saqlanayotganda bazadagi eski kalitni o'qiydi; post_save kalit o'zgarganini ko'rsa 'rescore_question'
+fon vazifasini qo'yadi (payload: eski va yangi kalit). Vazifa:
+  - shu savolning UserTestAnswer qatorlarini (question indeksi orqali) o'qiydi;
+  - har bir takrorlanmas javob matnini eski va yangi kalit bilan bir martadan baholaydi;
+  - is_correct ni faqat o'zgargan qatorlarda yangilaydi;
+  - natijalarga ball farqini (delta) F() bilan qo'shadi va foizni SQL da qayta hisoblaydi —
+    to'liq recalculate_from_answers emas.
+Kalit o'zgarishi slotlar sonini ham o'zgartirsa (masalan list_selection da javoblar soni), delta yetarli
+emas — ta'sirlangan natijalar core.rescoring bilan to'liq qayta baholanadi.
+
+Admin formasi saqlashdan oldin preview() sonlarini ko'rsatadi va tasdiq so'raydi.
+"""
+import copy
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Value
+from django.db.models.functions import Cast, Greatest, Round
+
+from .models import Question, UserTestAnswer, UserTestResult
+from .test_session_helpers import score_question_points
+
+ANSWER_KEY_FIELDS = ('correct_answer', 'correct_answer_json')
+UPDATE_BATCH = 1000
+
+
+def answer_key_snapshot(question):
+    return {name: copy.deepcopy(getattr(question, name)) for name in ANSWER_KEY_FIELDS}
+
+
+def stored_answer_key(question_pk):
+    """Bazadagi joriy kalit (savol topilmasa — None); bir so'rov, faqat saqlash / admin formasida."""
+    return Question.objects.filter(pk=question_pk).values(*ANSWER_KEY_FIELDS).first()
+
+
+def answer_key_diff(old_key, new_key):
+    """O'zgargan qismlar: ['correct_answer', 'correct_answer_json[2]', 'correct_answer_json[14]', ...]."""
+    changes = []
+    if (old_key.get('correct_answer') or '') != (new_key.get('correct_answer') or ''):
+        changes.append('correct_answer')
+    old_json, new_json = old_key.get('correct_answer_json'), new_key.get('correct_answer_json')
+    if old_json == new_json:
+        return changes
+    if isinstance(old_json, dict) and isinstance(new_json, dict):
+        keys = sorted(set(old_json) | set(new_json), key=str)
+        changes.extend(f'correct_answer_json[{k}]' for k in keys if old_json.get(k) != new_json.get(k))
+    elif isinstance(old_json, list) and isinstance(new_json, list) and len(old_json) == len(new_json):
+        changes.extend(f'correct_answer_json[{i}]' for i, (a, b) in enumerate(zip(old_json, new_json)) if a != b)
+    else:
+        changes.append('correct_answer_json')
+    return changes
+
+
+def with_answer_key(question, key):
+    """Savol nusxasi, kalit maydonlari berilgan qiymatlar bilan (baholash uchun, saqlanmaydi)."""
+    clone = copy.copy(question)
+    for name in ANSWER_KEY_FIELDS:
+        setattr(clone, name, copy.deepcopy(key.get(name)))
+    return clone
+
+
+class AnswerKeyRescore:
+    """Bitta savol uchun eski → yangi kalit bo'yicha qayta baholash rejasi."""
+
+    def __init__(self, question, old_key, new_key=None):
+        self.question = question
+        self.old_question = with_answer_key(question, old_key)
+        self.new_question = with_answer_key(question, new_key) if new_key is not None else question
+        self.diff = answer_key_diff(old_key, answer_key_snapshot(self.new_question))
+        self._scores = {}
+
+    @property
+    def slots_changed(self):
+        return self.old_question.gradable_answer_slots() != self.new_question.gradable_answer_slots()
+
+    def answers(self):
+        return UserTestAnswer.objects.filter(question_id=self.question.pk)
+
+    def score(self, user_answer):
+        """(eski_ball, yangi_ball, is_correct) — har bir takrorlanmas javob bir marta baholanadi.
+        is_correct joriy savol kaliti bo'yicha (keyingi tahrir allaqachon saqlangan bo'lishi mumkin)."""
+        if user_answer not in self._scores:
+            ua = (user_answer or '').strip()
+            old_pts, _ = score_question_points(self.old_question, ua)
+            new_pts, _ = score_question_points(self.new_question, ua)
+            current_pts, current_total = score_question_points(self.question, ua)
+            self._scores[user_answer] = (old_pts, new_pts, bool(current_total) and current_pts >= current_total)
+        return self._scores[user_answer]
+
+    def preview(self):
+        """Saqlashdan oldin: {'answers', 'changed_answers', 'results'} — qancha qator/natija o'zgaradi."""
+        if self.question.pk is None or self.question.question_type == 'essay':
+            return {'answers': 0, 'changed_answers': 0, 'results': 0}
+        grouped = self.answers().exclude(user_answer='').values('user_answer').annotate(n=Count('pk'))
+        total, changed, changed_texts = 0, 0, []
+        for row in grouped:
+            total += row['n']
+            old_pts, new_pts, _ = self.score(row['user_answer'])
+            if old_pts != new_pts:
+                changed += row['n']
+                changed_texts.append(row['user_answer'])
+        # apply() kabi faqat yakunlangan natijalar sanaladi
+        completed = self.answers().filter(test_result__completed_at__isnull=False)
+        if self.slots_changed:
+            results = completed.values('test_result_id').distinct().count()
+        elif changed_texts:
+            results = completed.filter(user_answer__in=changed_texts).values('test_result_id').distinct().count()
+        else:
+            results = 0
+        return {'answers': total, 'changed_answers': changed, 'results': results}
+
+    def apply(self, on_progress=None):
+        """Yozish. Qaytadi: {'answers_updated', 'results_updated', 'full_rescore'}."""
+        if self.question.question_type == 'essay':
+            return {'answers_updated': 0, 'results_updated': 0, 'full_rescore': False}
+        if self.slots_changed:
+            return self._full_rescore(on_progress)
+
+        set_correct, set_wrong = [], []
+        result_delta = defaultdict(int)
+        rows = self.answers().values_list('pk', 'test_result_id', 'user_answer', 'is_correct')
+        for pk, result_id, user_answer, is_correct in rows.iterator(chunk_size=UPDATE_BATCH):
+            old_pts, new_pts, new_correct = self.score(user_answer)
+            if new_correct != is_correct:
+                (set_correct if new_correct else set_wrong).append(pk)
+            if new_pts != old_pts:
+                result_delta[result_id] += new_pts - old_pts
+
+        by_delta = defaultdict(list)
+        for result_id, delta in result_delta.items():
+            if delta:
+                by_delta[delta].append(result_id)
+
+        with transaction.atomic():
+            for pks, value in ((set_correct, True), (set_wrong, False)):
+                for start in range(0, len(pks), UPDATE_BATCH):
+                    UserTestAnswer.objects.filter(pk__in=pks[start:start + UPDATE_BATCH]).update(is_correct=value)
+            results_updated = 0
+            for delta, result_ids in by_delta.items():
+                for start in range(0, len(result_ids), UPDATE_BATCH):
+                    results_updated += self._apply_delta(result_ids[start:start + UPDATE_BATCH], delta)
+                if on_progress:
+                    on_progress(results_updated)
+        return {'answers_updated': len(set_correct) + len(set_wrong), 'results_updated': results_updated, 'full_rescore': False}
+
+    def _apply_delta(self, result_ids, delta):
+        # Yakunlanmagan urinishlar finish_test da baribir to'liq hisoblanadi
+        results = UserTestResult.objects.filter(pk__in=result_ids, completed_at__isnull=False)
+        updated = results.update(
+            correct_answers=Greatest(F('correct_answers') + delta, Value(0)),
+            score=Greatest(F('score') + delta, Value(0)),
+            wrong_answers=Greatest(F('total_questions') - F('correct_answers') - delta, Value(0)),
+        )
+        results.filter(total_questions__gt=0).update(
+            percentage=Round(Cast(F('correct_answers'), FloatField()) * 100.0 / F('total_questions'), 2),
+        )
+        return updated
+
+    def _full_rescore(self, on_progress=None):
+        from .rescoring import BulkRescorer, rescoring_queryset
+
+        result_ids = list(self.answers().values_list('test_result_id', flat=True).distinct())
+        rescorer = BulkRescorer(
+            queryset=rescoring_queryset(include_current=True).filter(pk__in=result_ids),
+            on_chunk=(lambda last_id, stats: on_progress(stats['scanned'])) if on_progress else None,
+        )
+        stats = rescorer.run()
+        return {'answers_updated': stats['answers_updated'], 'results_updated': stats['scanned'], 'full_rescore': True}
+
+
+def rescore_question(question_id, old_key, new_key, on_progress=None):
+    """'rescore_question' vazifasi: old_key → new_key farqini qo'llash, is_correct esa joriy kalit bo'yicha.
+
+    Ketma-ket tahrirlarda (k0→k1, k1→k2) ball farqlari qo'shiluvchan, shuning uchun vazifalar tartibi muhim emas.
+    """
+    question = Question.objects.filter(pk=question_id).first()
+    if question is None:
+        return None
+    plan = AnswerKeyRescore(question, old_key, new_key)
+    outcome = plan.apply(on_progress)
+    outcome['diff'] = plan.diff
+    return outcome
@@ -0,0 +1,225 @@
+"""
+Ochiq sahifalar doimiy yuboradigan kichik JSON so'rovlar uchun async view lar (vaqt, autosave, progress, bookmark, reyting).
+
+ASGI da bu view lar `config.asgi` dagi yengil handler orqali o'tadi: faqat sessiya va CSRF middleware,
+autentifikatsiya va modul ruxsati esa `async_json_endpoint` ichida. So'rov kutish paytida worker thread ni band qilmaydi.
+WSGI (runserver, gunicorn) da ham o'sha URL lar ishlaydi — Django async view ni o'zi sinxron chaqiradi.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse
+
+from . import exam_sync, video_aggregates
+from .models import (
+    Bookmark,
+    SATResource,
+    SATResourceProgress,
+    Test,
+    UserModuleAccess,
+    UserTestResult,
+    UserVideoProgress,
+    VideoLesson,
+    VideoRating,
+    apply_watch_progress,
+)
+from .test_session_helpers import collect_answers_from_post, filter_questions_by_exam_variant, get_exam_variant, merge_answers_json
+
+INVALID_REQUEST = {'error': 'Invalid request'}
+
+
+def async_json_endpoint(module=None, methods=('POST',)):
+    """login_required + ModuleAccessMiddleware o'rnini bosadi: redirect emas, JSON 401/403.
+
+    module: 'ielts' yoki 'sat' — UserModuleAccess yozuvi bo'lmasa standart (ruxsat bor) deb olinadi.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return JsonResponse(INVALID_REQUEST, status=400)
+            user = await sync_to_async(get_user)(request)
+            if not user.is_authenticated:
+                return JsonResponse({'error': 'Avtorizatsiya talab qilinadi'}, status=401)
+            request.user = user
+            if module:
+                access = await UserModuleAccess.objects.filter(user_id=user.pk).only(f'can_access_{module}').afirst()
+                if access is not None and not getattr(access, f'can_access_{module}'):
+                    return JsonResponse({'error': "Bo'limga kirish ruxsati yo'q"}, status=403)
+            return await view(request, *args, **kwargs)
+
+        # config.asgi: shu belgili view lar yengil middleware zanjiri orqali xizmat qilinadi
+        wrapper.lean_asgi = True
+        return wrapper
+    return decorator
+
+
+def _int(value, default=0):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return default
+
+
+async def _open_result(user, test_pk, *fields):
+    return await (
+        UserTestResult.objects.filter(
+            user=user, test_id=test_pk, test__is_active=True, completed_at__isnull=True,
+        )
+        .order_by('-started_at')
+        .only('pk', *fields)
+        .afirst()
+    )
+
+
+@async_json_endpoint(module='ielts')
+async def test_update_time(request, pk):
+    """Test vaqtini yangilash (AJAX, sendBeacon)"""
+    test_result = await _open_result(request.user, pk, 'is_paused', 'timer_seconds_left')
+    if test_result is None:
+        return JsonResponse({'error': 'Faol urinish topilmadi'}, status=404)
+    elapsed_time = _int(request.POST.get('elapsed_time'))
+    update = {'time_taken': elapsed_time}
+    timer_seconds_left = request.POST.get('timer_seconds_left')
+    if timer_seconds_left is not None:
+        update['timer_seconds_left'] = _int(timer_seconds_left)
+    await UserTestResult.objects.filter(pk=test_result.pk).aupdate(**update)
+    return JsonResponse({
+        'success': True,
+        'elapsed_time': elapsed_time,
+        'timer_seconds_left': update.get('timer_seconds_left', test_result.timer_seconds_left),
+        'is_paused': test_result.is_paused,
+    })
+
+
+@async_json_endpoint(module='ielts')
+async def test_autosave(request, pk):
+    """Imtihon javoblarini fon rejimida saqlash (test_take dagi autosave bilan bir xil merge)."""
+    test_result = await _open_result(request.user, pk, 'answers_json', 'test')
+    if test_result is None:
+        return JsonResponse({'ok': False, 'error': 'Faol urinish topilmadi'}, status=404)
+    test = await Test.objects.only('pk', 'variants_to_select').aget(pk=pk)
+    exam_variant = await sync_to_async(get_exam_variant)(request, test)
+    questions = await sync_to_async(filter_questions_by_exam_variant)(test, exam_variant)
+    if not questions:
+        return JsonResponse({'ok': False, 'error': "Testda savollar yo'q"}, status=400)
+    loaded_pks = set(request.POST.getlist('loaded_q'))
+    posted_questions = [q for q in questions if str(q.pk) in loaded_pks] if loaded_pks else questions
+    posted = collect_answers_from_post(request, posted_questions)
+    answers = merge_answers_json(
+        test_result.answers_json, posted, [q.pk for q in questions], exam_variant=exam_variant
+    )
+    await UserTestResult.objects.filter(pk=test_result.pk).aupdate(answers_json=answers)
+    return JsonResponse({'ok': True, 'saved_keys': len([k for k, v in posted.items() if v])})
+
+
+@async_json_endpoint(module='ielts')
+async def test_sync(request, pk):
+    """Offline imtihon jurnali: to'plangan javob o'zgarishlarini seq bo'yicha idempotent qo'llash (core.exam_sync)."""
+    try:
+        payload = exam_sync.parse_payload(request.body, request.headers.get('Content-Encoding'))
+    except exam_sync.SyncPayloadError as exc:
+        return JsonResponse({'ok': False, 'error': str(exc)}, status=400)
+    test = await Test.objects.filter(pk=pk, is_active=True).only('pk', 'variants_to_select').afirst()
+    if test is None:
+        return JsonResponse({'ok': False, 'error': 'Test topilmadi'}, status=404)
+    exam_variant = await sync_to_async(get_exam_variant)(request, test)
+    data, status = await sync_to_async(exam_sync.sync_answers)(request.user, test, payload, exam_variant)
+    return JsonResponse(data, status=status)
+
+
+@async_json_endpoint(module='ielts')
+async def update_video_progress(request, pk):
+    """Video progress yangilash"""
+    if not await VideoLesson.objects.filter(pk=pk, is_active=True).aexists():
+        return JsonResponse({'error': 'Video topilmadi'}, status=404)
+    progress, _ = await UserVideoProgress.objects.aget_or_create(user=request.user, video_id=pk)
+    apply_watch_progress(progress, _int(request.POST.get('progress')))
+    await progress.asave()
+    return JsonResponse({'success': True, 'progress': progress.watch_percentage})
+
+
+@async_json_endpoint(module='sat')
+async def sat_update_progress(request, pk):
+    if not await SATResource.objects.filter(pk=pk, is_active=True).aexists():
+        return JsonResponse({'error': 'Resurs topilmadi'}, status=404)
+    progress, _ = await SATResourceProgress.objects.aget_or_create(user=request.user, resource_id=pk)
+    apply_watch_progress(progress, _int(request.POST.get('progress')))
+    progress.last_position_seconds = max(0, _int(request.POST.get('position_seconds')))
+    await progress.asave()
+    return JsonResponse({
+        'success': True,
+        'progress': progress.watch_percentage,
+        'watched': progress.watched,
+        'position_seconds': progress.last_position_seconds,
+    })
+
+
+@async_json_endpoint(module='ielts')
+async def toggle_bookmark(request):
+    """Bookmark qo'shish/olib tashlash: bor bo'lsa o'chiriladi, yo'q bo'lsa yaratiladi."""
+    video_id = request.POST.get('video_id')
+    test_id = request.POST.get('test_id')
+    if video_id:
+        if not await VideoLesson.objects.filter(pk=_int(video_id)).aexists():
+            return JsonResponse({'error': 'Video topilmadi'}, status=404)
+        target = {'video_id': _int(video_id)}
+    elif test_id:
+        visible = Test.objects.filter(pk=_int(test_id), category__show_on_site=True)
+        if not await visible.aexists():
+            return JsonResponse({'error': 'Test mavjud emas.'}, status=404)
+        target = {'test_id': _int(test_id)}
+    else:
+        return JsonResponse(INVALID_REQUEST, status=400)
+    deleted, _ = await Bookmark.objects.filter(user=request.user, **target).adelete()
+    if deleted:
+        return JsonResponse({'bookmarked': False})
+    await Bookmark.objects.aget_or_create(user=request.user, **target)
+    return JsonResponse({'bookmarked': True})
+
+
+def _save_rating(user, video_id, rating_value):
+    """Birinchi reytingni parallel so'rov oldinroq yaratgan bo'lsa (unique user+video) — yangilash sifatida qayta."""
+    try:
+        _write_rating(user, video_id, rating_value)
+    except IntegrityError:
+        _write_rating(user, video_id, rating_value)
+
+
+def _write_rating(user, video_id, rating_value):
+    """Reyting va video yig'indilari bitta tranzaksiyada (async ORM tranzaksiyani qo'llamaydi)."""
+    with transaction.atomic():
+        rating = VideoRating.objects.select_for_update().filter(user=user, video_id=video_id).first()
+        if rating is None:
+            VideoRating.objects.create(user=user, video_id=video_id, rating=rating_value)
+            video_aggregates.apply_rating_change(video_id, rating_value, 1)
+        elif rating.rating != rating_value:
+            old_value = rating.rating
+            rating.rating = rating_value
+            rating.save(update_fields=['rating', 'updated_at'])
+            video_aggregates.apply_rating_change(video_id, rating_value - old_value)
+
+
+@async_json_endpoint(module='ielts')
+async def rate_video(request, pk):
+    """Video reyting qo'yish"""
+    try:
+        rating_value = int(request.POST.get('rating', 0))
+    except (ValueError, TypeError):
+        return JsonResponse({'error': 'Noto\'g\'ri reyting qiymati'}, status=400)
+    if rating_value < 1 or rating_value > 5:
+        return JsonResponse({'error': 'Reyting 1 dan 5 gacha bo\'lishi kerak'}, status=400)
+    if not await VideoLesson.objects.filter(pk=pk, is_active=True).aexists():
+        return JsonResponse({'error': 'Video topilmadi'}, status=404)
+
+    await sync_to_async(_save_rating)(request.user, pk, rating_value)
+    # Yangilangan yig'indilar (aggregate emas — tayyor maydonlar)
+    video = await VideoLesson.objects.only('rating_sum', 'rating_count', 'rating_average').aget(pk=pk)
+    return JsonResponse({
+        'success': True,
+        'rating': rating_value,
+        'average_rating': video.average_rating,
+        'total_ratings': video.total_ratings,
+    })
@@ -0,0 +1,88 @@
+"""
+Kategoriyalar daraxti: butun jadval bir marta o'qiladi va har bir jarayonda (process) xotirada turadi.
+
+Versiya keshda (content_versions, 'category' nomlar fazosi) — Category saqlanganda/o'chirilganda
+yangilanadi (models.py signal) va har bir jarayon keyingi murojaatda daraxtni qayta quradi. Umumiy kesh
+bo'lmasa boshqa workerlar daraxtni versiya muddati (CONTENT_VERSION_LOCAL_TTL) o'tganda qayta quradi.
+Ro'yxat sahifalari JOIN va qo'shimcha so'rovlar o'rniga tayyor id to'plamlari bilan filtrlaydi.
+"""
+import threading
+
+from .content_versions import get_content_version
+
+VERSION_NAMESPACE = 'category'
+VERSION_ID = 'tree'
+
+_lock = threading.Lock()
+_tree = None
+
+
+class CategoryTree:
+    """Category obyektlari va oldindan hisoblangan id to'plamlari (faqat o'qish uchun)."""
+
+    def __init__(self, categories, version=None):
+        self.version = version
+        ordered = sorted(categories, key=lambda c: (c.order, c.name, c.pk))
+        self.by_id = {c.pk: c for c in ordered}
+        self.by_slug = {c.slug: c for c in ordered}
+        self._children = {}
+        for c in ordered:
+            self._children.setdefault(c.parent_id, []).append(c)
+        # Interfeysda ko'rinadigan (show_on_site) kategoriyalar — VideoLesson/Test filtrlari uchun
+        self.site_visible_ids = frozenset(c.pk for c in ordered if c.show_on_site)
+        self.top_level = [c for c in self._children.get(None, []) if c.is_active and c.show_on_site]
+        self._subtree_ids = {}
+        for c in ordered:
+            self._subtree_ids[c.pk] = frozenset(self._collect_active_subtree(c))
+
+    def _collect_active_subtree(self, category):
+        ids = [category.pk]
+        stack = [category.pk]
+        seen = {category.pk}
+        while stack:
+            for child in self._children.get(stack.pop(), []):
+                # parent zanjiridagi sikl (admin xatosi) daraxtni cheksiz aylantirmasin
+                if child.is_active and child.pk not in seen:
+                    seen.add(child.pk)
+                    ids.append(child.pk)
+                    stack.append(child.pk)
+        return ids
+
+    def get_active(self, slug):
+        category = self.by_slug.get(slug) if slug else None
+        return category if category is not None and category.is_active else None
+
+    def children(self, category_id):
+        """Faol bevosita bolalar (order, name bo'yicha)."""
+        return [c for c in self._children.get(category_id, []) if c.is_active]
+
+    def descendant_ids(self, category_id):
+        """Kategoriya va uning barcha faol avlodlari id lari (o'zi ham kiradi)."""
+        return self._subtree_ids.get(category_id, frozenset())
+
+    def is_site_visible(self, category_id):
+        return category_id in self.site_visible_ids
+
+    def ids_matching_name(self, query):
+        """category__name__icontains o'rniga: nomida query bo'lgan kategoriyalar id lari."""
+        needle = (query or '').lower()
+        return frozenset(pk for pk, c in self.by_id.items() if needle in (c.name or '').lower())
+
+
+def load_category_tree(version=None):
+    from .models import Category
+
+    return CategoryTree(list(Category.objects.all()), version=version)
+
+
+def get_category_tree():
+    """Joriy versiyadagi daraxt: odatda bitta kesh o'qish, versiya o'zgarganda bitta SELECT."""
+    global _tree
+    version = get_content_version(VERSION_NAMESPACE, VERSION_ID)
+    tree = _tree
+    if tree is not None and tree.version == version:
+        return tree
+    with _lock:
+        if _tree is None or _tree.version != version:
+            _tree = load_category_tree(version)
+        return _tree
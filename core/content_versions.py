@@ -0,0 +1,39 @@
+"""
+Kontent versiyalari (keshda): test, passage yoki savol o'zgarganda versiya yangilanadi.
+
+HTTP ETag va fragment keshlari shu versiyaga bog'lanadi — eski HTML hech qachon qaytmaydi.
+Kesh tozalansa versiya yangidan yaratiladi (faqat bir martalik kesh "miss").
+
+Versiya workerlar o'rtasida umumiy bo'lishi kerak. settings.SHARED_CACHE (Redis) bo'lsa versiya muddatsiz turadi.
+locmem da bump faqat saqlagan workerga yetadi, shuning uchun versiya CONTENT_VERSION_LOCAL_TTL soniyada eskiradi:
+boshqa workerlar eski kontentni ko'pi bilan shuncha vaqt ko'rsatadi (keyin bitta kesh "miss").
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def version_timeout():
+    """Umumiy keshda None (muddatsiz), locmem da cheklangan muddat."""
+    if getattr(settings, 'SHARED_CACHE', False):
+        return None
+    return getattr(settings, 'CONTENT_VERSION_LOCAL_TTL', 60)
+
+
+def _version_key(namespace, obj_id):
+    return f'core:content_version:{namespace}:{obj_id}'
+
+
+def get_content_version(namespace, obj_id):
+    key = _version_key(namespace, obj_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        cache.add(key, version, version_timeout())
+        version = cache.get(key, version)
+    return version
+
+
+def bump_content_version(namespace, obj_id):
+    cache.set(_version_key(namespace, obj_id), time.time_ns(), version_timeout())
@@ -0,0 +1,111 @@
+"""
+Og'ir o'qish yuklamalarini (analitika, hisobotlar, reyting, eksport) replika bazaga yo'naltirish.
+
+Router faqat `use_replica()` / `@read_from_replica` ichidagi o'qishlarni replikaga yuboradi; qolgan hammasi — primary.
+Replika sozlanmagan, ulanib bo'lmaydigan yoki kechikishi REPLICA_MAX_LAG_SECONDS dan katta bo'lsa — primary.
+Test yakunlagan foydalanuvchi READ_YOUR_WRITES_SECONDS davomida (sessiya belgisi) o'z natijasini primary dan ko'radi.
+Mahalliy tekshiruv uchun DATABASES da ikkinchi alias ('replica', TEST.MIRROR='default') yetarli.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+RECENT_WRITE_SESSION_KEY = 'db_recent_write_at'
+LAG_CACHE_TIMEOUT = 10
+# Sessiya yozilgan zahoti o'qiladi — replika kechikishi login holatini buzmasin
+PRIMARY_ONLY_APPS = frozenset({'sessions'})
+
+_read_alias = ContextVar('core_read_alias', default=None)
+
+
+def replica_alias():
+    return getattr(settings, 'REPLICA_DATABASE_ALIAS', 'replica')
+
+
+def _replica_lag_seconds(alias):
+    """Replika kechikishi (soniya). PostgreSQL bo'lmasa (mahalliy alias) — 0."""
+    conn = connections[alias]
+    if conn.vendor != 'postgresql':
+        return 0.0
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT CASE WHEN pg_is_in_recovery() "
+            "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) ELSE 0 END"
+        )
+        return float(cursor.fetchone()[0] or 0)
+
+
+def replica_is_usable(alias=None):
+    """Replika bor va kechikish chegarada; natija har bir worker uchun keshda qisqa muddat saqlanadi."""
+    alias = alias or replica_alias()
+    if alias == DEFAULT_DB_ALIAS or alias not in settings.DATABASES:
+        return False
+    key = f'core:replica_usable:{alias}'
+    usable = cache.get(key)
+    if usable is None:
+        try:
+            lag = _replica_lag_seconds(alias)
+        except DatabaseError:
+            lag = None
+        usable = lag is not None and lag <= getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 5)
+        cache.set(key, usable, LAG_CACHE_TIMEOUT)
+    return usable
+
+
+@contextmanager
+def use_replica(alias=None):
+    """Blok ichidagi ORM o'qishlari replikaga (yaroqsiz bo'lsa primary); yozishlar doim primary."""
+    alias = alias or replica_alias()
+    token = _read_alias.set(alias if replica_is_usable(alias) else None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def mark_recent_write(request):
+    """Foydalanuvchi yangi natija yozdi: keyingi sahifalar bir muddat primary dan o'qisin."""
+    request.session[RECENT_WRITE_SESSION_KEY] = time.time()
+
+
+def has_recent_write(request):
+    session = getattr(request, 'session', None)
+    written_at = session.get(RECENT_WRITE_SESSION_KEY) if session is not None else None
+    if not written_at:
+        return False
+    return time.time() - written_at < getattr(settings, 'READ_YOUR_WRITES_SECONDS', 30)
+
+
+def read_from_replica(view_func):
+    """View dekoratori: render ham shu blok ichida bo'lgani uchun shablondagi lazy querysetlar ham replikadan."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if has_recent_write(request):
+            return view_func(request, *args, **kwargs)
+        with use_replica():
+            return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """DATABASE_ROUTERS uchun: faqat use_replica() faollashtirgan o'qishlar replikaga."""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replika — primary nusxasi, obyektlar bir xil ma'lumotlar to'plamidan
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,82 @@
+"""
+Essay baholash navbati.
+
+Baholanmagan essaylar UserTestAnswer.needs_grading bilan belgilanadi (save() da, qisman indeks
+core_answer_grading_queue) — navbat butun javoblar jadvalini savol turi bo'yicha skanerlamaydi.
+Sahifalash pk bo'yicha keyset (pk > after), OFFSET yo'q.
+
+apply_grades bir POST dagi barcha bandlarni bitta tranzaksiyada bulk_update bilan yozadi (post_save
+signallari ishlamaydi) va har bir ta'sirlangan natijani faqat bir marta qayta hisoblaydi.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import UserTestAnswer, UserTestResult
+
+QUEUE_PAGE_SIZE = 25
+MIN_BAND, MAX_BAND = Decimal('0'), Decimal('9')
+BAND_CHOICES = [str(Decimal(i) / 2) for i in range(0, 19)]
+
+
+def parse_band(value):
+    """'6.5' → Decimal('6.5'); bo'sh → None; 0–9 oralig'ida 0.5 qadam bo'lmasa ValueError."""
+    value = (value or '').strip().replace(',', '.')
+    if not value:
+        return None
+    try:
+        band = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"Band noto'g'ri: {value}")
+    if not band.is_finite() or not (MIN_BAND <= band <= MAX_BAND) or (band * 2) % 1:
+        raise ValueError(f"Band 0–9 oralig'ida, 0.5 qadam bilan bo'lishi kerak: {value}")
+    return band.quantize(Decimal('0.1'))
+
+
+def grading_queue(after=0, test_id=None, limit=QUEUE_PAGE_SIZE):
+    """Navbatdagi baholanmagan essaylar (eng eskisi birinchi). Qaytadi: (javoblar, keyingi_after yoki None)."""
+    qs = UserTestAnswer.objects.filter(needs_grading=True, pk__gt=after)
+    if test_id:
+        qs = qs.filter(test_result__test_id=test_id)
+    rows = list(
+        qs.select_related('question', 'test_result__user', 'test_result__test')
+        .order_by('pk')[:limit + 1]
+    )
+    next_after = rows[limit - 1].pk if len(rows) > limit else None
+    return rows[:limit], next_after
+
+
+def queue_size(test_id=None):
+    qs = UserTestAnswer.objects.filter(needs_grading=True)
+    if test_id:
+        qs = qs.filter(test_result__test_id=test_id)
+    return qs.count()
+
+
+def apply_grades(grades, user=None):
+    """
+    grades — {answer_id: Decimal band}. Essay bo'lmagan yoki topilmagan id lar e'tiborsiz.
+    Qaytadi: {'graded': N, 'results': M}.
+    """
+    if not grades:
+        return {'graded': 0, 'results': 0}
+    now = timezone.now()
+    with transaction.atomic():
+        answers = list(
+            UserTestAnswer.objects.select_for_update()
+            .filter(pk__in=list(grades), question__question_type='essay')
+            .only('pk', 'test_result_id')
+        )
+        for answer in answers:
+            answer.band_score = grades[answer.pk]
+            answer.needs_grading = False
+            answer.graded_at = now
+            answer.graded_by = user
+        UserTestAnswer.objects.bulk_update(
+            answers, ['band_score', 'needs_grading', 'graded_at', 'graded_by'], batch_size=500,
+        )
+        result_ids = {answer.test_result_id for answer in answers}
+        for result in UserTestResult.objects.filter(pk__in=result_ids, completed_at__isnull=False).select_related('test'):
+            result.recalculate_from_answers()
+    return {'graded': len(answers), 'results': len(result_ids)}
@@ -0,0 +1,135 @@
+"""
+Imtihon javoblari jurnalini sinxronlash (static/js/exam-offline.js).
+
+Brauzer har bir o'zgarishni IndexedDB jurnaliga tartib raqami (seq) bilan yozadi va to'plab yuboradi:
+
+    {"result": 12, "client": "k3j9...", "ops": [{"seq": 7, "q": 45, "f": {"answer_45_1": "cat"}}, ...]}
+
+Tana gzip bilan siqilgan bo'lishi mumkin (Content-Encoding: gzip). Har op — bitta savolning forma maydonlari;
+qiymat serverda collect_answer bilan olinadi (test_take POST bilan bir xil qoida). Paket ichida bir savolning
+faqat oxirgi op i qo'llanadi.
+
+Oxirgi qabul qilingan seq answers_json._meta.sync da saqlanadi: javobi yo'qolgan paket qayta kelsa
+seq <= acked op lar e'tiborsiz qoladi. Boshqa client (yangi tab yoki qurilma) kelsa hisob shu client
+uchun noldan boshlanadi — oxirgi yozgan client ustun.
+"""
+import json
+import zlib
+
+from django.db import transaction
+
+from .models import UserTestResult
+from .test_session_helpers import collect_answer, filter_questions_by_exam_variant, get_answers_meta, merge_answers_json
+
+MAX_BODY_BYTES = 2 * 1024 * 1024
+MAX_OPS = 1000
+MAX_CLIENT_ID = 64
+
+
+class SyncPayloadError(ValueError):
+    """Paket noto'g'ri (400)."""
+
+
+def _gunzip(body):
+    """gzip tanani ochish; MAX_BODY_BYTES dan katta bo'lsa xato (siqilgan "bomba" dan himoya)."""
+    inflater = zlib.decompressobj(wbits=31)
+    try:
+        data = inflater.decompress(body, MAX_BODY_BYTES + 1)
+    except zlib.error:
+        raise SyncPayloadError("gzip tana o'qilmadi")
+    if len(data) > MAX_BODY_BYTES or inflater.unconsumed_tail:
+        raise SyncPayloadError("Paket juda katta")
+    return data
+
+
+def parse_payload(body, content_encoding=''):
+    """So'rov tanasi → {'result', 'client', 'ops': [(seq, q, fields)], 'commit'}; xato bo'lsa SyncPayloadError."""
+    if 'gzip' in (content_encoding or '').lower():
+        body = _gunzip(body)
+    if len(body) > MAX_BODY_BYTES:
+        raise SyncPayloadError("Paket juda katta")
+    try:
+        data = json.loads(body or b'{}')
+    except (ValueError, UnicodeDecodeError):
+        raise SyncPayloadError("JSON o'qilmadi")
+    if not isinstance(data, dict):
+        raise SyncPayloadError("JSON obyekt kutilgan")
+    client = str(data.get('client') or '').strip()
+    if not client or len(client) > MAX_CLIENT_ID:
+        raise SyncPayloadError("client noto'g'ri")
+    raw_ops = data.get('ops') or []
+    if not isinstance(raw_ops, list) or len(raw_ops) > MAX_OPS:
+        raise SyncPayloadError("ops noto'g'ri")
+    ops = []
+    for op in raw_ops:
+        try:
+            seq, question_pk, fields = int(op['seq']), int(op['q']), op.get('f') or {}
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise SyncPayloadError("op noto'g'ri")
+        if seq < 1 or not isinstance(fields, dict):
+            raise SyncPayloadError("op noto'g'ri")
+        ops.append((seq, str(question_pk), {str(k): '' if v is None else str(v) for k, v in fields.items()}))
+    try:
+        result_pk = int(data.get('result') or 0)
+    except (TypeError, ValueError):
+        raise SyncPayloadError("result noto'g'ri")
+    return {'result': result_pk, 'client': client, 'ops': ops, 'commit': bool(data.get('commit'))}
+
+
+def acked_seq(answers_json, client):
+    """Shu client uchun serverda qo'llangan oxirgi seq (boshqa client yoki hali yo'q — 0)."""
+    sync = get_answers_meta(answers_json).get('sync')
+    if not isinstance(sync, dict) or sync.get('client') != client:
+        return 0
+    try:
+        return int(sync.get('seq') or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def apply_ops(test_result, questions, client, ops, exam_variant):
+    """
+    Yangi op larni test_result.answers_json ga qo'shish (saqlamaydi).
+    Qaytadi: (acked, applied) — acked o'zgarmagan bo'lsa answers_json ham o'zgarmaydi.
+    """
+    last = acked_seq(test_result.answers_json, client)
+    by_pk = {str(q.pk): q for q in questions}
+    acked = last
+    latest = {}
+    for seq, question_pk, fields in ops:
+        if seq <= last:
+            continue
+        acked = max(acked, seq)
+        # Boshqa variant / o'chirilgan savol — tasdiqlanadi, lekin yozilmaydi
+        if question_pk in by_pk and seq > latest.get(question_pk, (0, None))[0]:
+            latest[question_pk] = (seq, fields)
+    if acked == last:
+        return acked, 0
+    posted = {question_pk: collect_answer(fields, by_pk[question_pk]) for question_pk, (_, fields) in latest.items()}
+    answers = merge_answers_json(test_result.answers_json, posted, list(by_pk), exam_variant=exam_variant)
+    answers['_meta']['sync'] = {'client': client, 'seq': acked}
+    test_result.answers_json = answers
+    return acked, len(posted)
+
+
+def sync_answers(user, test, payload, exam_variant):
+    """
+    Bitta paketni qo'llash (qator qulflanadi — parallel paketlar ketma-ket). Qaytadi: (javob lug'ati, HTTP status).
+    Yakunlangan urinish uchun 409 va 'completed' — brauzer natija sahifasiga o'tadi.
+    """
+    with transaction.atomic():
+        test_result = (
+            UserTestResult.objects.select_for_update()
+            .filter(pk=payload['result'], user=user, test=test)
+            .first()
+        )
+        if test_result is None:
+            return {'ok': False, 'error': 'Urinish topilmadi'}, 404
+        if test_result.completed_at:
+            return {'ok': False, 'completed': True, 'result': test_result.pk}, 409
+        questions = filter_questions_by_exam_variant(test, exam_variant)
+        before = acked_seq(test_result.answers_json, payload['client'])
+        acked, applied = apply_ops(test_result, questions, payload['client'], payload['ops'], exam_variant)
+        if acked != before:
+            test_result.save(update_fields=['answers_json'])
+    return {'ok': True, 'acked': acked, 'applied': applied}, 200
@@ -0,0 +1,170 @@
+"""
+Shablon fragmentlari keshi: umumiy qism (test/video kartasi, kategoriyalar to'ri) obyekt versiyasi bilan keshlanadi.
+
+Kalit — fragment nomi + har bir obyektning kontent versiyasi (content_versions): Test ('test' — savol va passage
+o'zgarishi ham), VideoLesson ('video'), SATResource ('sat_resource'), Category (butun daraxt, 'category').
+Obyekt o'zgarsa signal versiyani oshiradi, eski HTML o'z-o'zidan ishlatilmay qoladi — o'chirish shart emas.
+Foydalanuvchiga xos qismlar (natija, progress, bookmark) fragmentdan tashqarida, har safar chiziladi.
+
+Hit/miss hisoblagichlari jarayon ichida yig'iladi va har STATS_FLUSH_EVERY hodisada keshga qo'shiladi. Ular faqat
+umumiy keshda (settings.SHARED_CACHE, Redis) yuritiladi: locmem da har worker o'z hisobini ko'rardi va admin paneli
+tasodifiy workerning qismini ko'rsatardi — shuning uchun u holda hisoblanmaydi va panel yashiriladi.
+Staff foydalanuvchi sessiyada keshni chetlab o'tishi mumkin (admin bosh sahifasidagi tugma).
+"""
+import hashlib
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .category_tree import VERSION_ID as CATEGORY_VERSION_ID
+from .category_tree import VERSION_NAMESPACE as CATEGORY_VERSION_NAMESPACE
+from .category_tree import CategoryTree
+from .content_versions import get_content_version
+
+BYPASS_SESSION_KEY = 'fragment_cache_bypass'
+DEFAULT_TIMEOUT = 24 * 60 * 60
+STATS_FLUSH_EVERY = 50
+STATS_NAMES_KEY = 'core:fragment_stats:names'
+OUTCOMES = ('hit', 'miss', 'bypass')
+
+_stats_lock = threading.Lock()
+_pending = Counter()
+
+
+def _model_namespaces():
+    from .models import Category, SATResource, Test, VideoLesson
+
+    return {
+        Test: 'test',
+        VideoLesson: 'video',
+        SATResource: 'sat_resource',
+        Category: None,  # daraxt versiyasi
+    }
+
+
+def version_namespace(value):
+    """(namespace, id) yoki None — versiyasi yo'q oddiy qiymat."""
+    if isinstance(value, CategoryTree):
+        return CATEGORY_VERSION_NAMESPACE, CATEGORY_VERSION_ID
+    for model, namespace in _model_namespaces().items():
+        if isinstance(value, model):
+            if namespace is None:
+                return CATEGORY_VERSION_NAMESPACE, CATEGORY_VERSION_ID
+            return namespace, value.pk
+    return None
+
+
+def vary_tokens(values, versions=None):
+    """Kalit qismlari: obyektlar uchun versiya, ro'yxatlar uchun har bir element, qolgani matn sifatida.
+
+    versions — bitta render ichida takroriy kesh o'qishlarni tejash uchun lug'at.
+    """
+    versions = {} if versions is None else versions
+    tokens = []
+    for value in values:
+        if isinstance(value, (list, tuple)):
+            tokens.append('[' + ','.join(vary_tokens(value, versions)) + ']')
+            continue
+        namespace = version_namespace(value)
+        if namespace is None:
+            tokens.append(str(value))
+            continue
+        if namespace not in versions:
+            versions[namespace] = get_content_version(*namespace)
+        tokens.append(f'{namespace[0]}:{namespace[1]}:{versions[namespace]}')
+    return tokens
+
+
+def fragment_key(name, tokens):
+    digest = hashlib.md5('|'.join(tokens).encode('utf-8'), usedforsecurity=False).hexdigest()
+    return f'core:fragment:{name}:{digest}'
+
+
+def is_bypassed(request):
+    if not getattr(settings, 'FRAGMENT_CACHE_ENABLED', True):
+        return True
+    if request is None:
+        return False
+    user = getattr(request, 'user', None)
+    session = getattr(request, 'session', None)
+    return bool(user is not None and user.is_staff and session is not None and session.get(BYPASS_SESSION_KEY))
+
+
+def set_bypass(request, enabled):
+    if enabled:
+        request.session[BYPASS_SESSION_KEY] = True
+    else:
+        request.session.pop(BYPASS_SESSION_KEY, None)
+
+
+def get_fragment(key):
+    return cache.get(key)
+
+
+def store_fragment(key, html, timeout=None):
+    cache.set(key, html, timeout or getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+
+
+def _stats_key(name, outcome):
+    return f'core:fragment_stats:{name}:{outcome}'
+
+
+def stats_enabled():
+    return getattr(settings, 'SHARED_CACHE', False)
+
+
+def record(name, outcome):
+    if not stats_enabled():
+        return
+    with _stats_lock:
+        _pending[(name, outcome)] += 1
+        due = sum(_pending.values()) >= STATS_FLUSH_EVERY
+    if due:
+        flush_stats()
+
+
+def flush_stats():
+    """Jarayondagi hisoblagichlarni keshdagi umumiy hisoblagichlarga qo'shish."""
+    with _stats_lock:
+        pending = dict(_pending)
+        _pending.clear()
+    if not pending:
+        return
+    names = set(cache.get(STATS_NAMES_KEY) or ())
+    new_names = {name for name, _ in pending} - names
+    if new_names:
+        cache.set(STATS_NAMES_KEY, sorted(names | new_names), None)
+    for (name, outcome), count in pending.items():
+        key = _stats_key(name, outcome)
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key, count)
+        except ValueError:
+            cache.set(key, count, None)
+
+
+def fragment_stats():
+    """[{'name', 'hit', 'miss', 'bypass', 'hit_rate'}] — fragment nomi bo'yicha; umumiy kesh bo'lmasa None."""
+    if not stats_enabled():
+        return None
+    flush_stats()
+    names = cache.get(STATS_NAMES_KEY) or []
+    values = cache.get_many([_stats_key(name, outcome) for name in names for outcome in OUTCOMES])
+    rows = []
+    for name in names:
+        row = {'name': name}
+        for outcome in OUTCOMES:
+            row[outcome] = values.get(_stats_key(name, outcome), 0)
+        served = row['hit'] + row['miss']
+        row['hit_rate'] = round(row['hit'] * 100 / served, 1) if served else 0.0
+        rows.append(row)
+    return rows
+
+
+def reset_stats():
+    with _stats_lock:
+        _pending.clear()
+    names = cache.get(STATS_NAMES_KEY) or []
+    cache.delete_many([_stats_key(name, outcome) for name in names for outcome in OUTCOMES] + [STATS_NAMES_KEY])
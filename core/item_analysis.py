@@ -0,0 +1,227 @@
+"""
+Item-analiz: savol qiyinligi (p), ajrata olish (point-biserial), distraktorlar va bo'sh joylar aniqligi.
+
+Har test uchun yakunlangan urinishlar bo'laklab o'qiladi, UserTestAnswer lardan NumPy matritsa quriladi
+(urinish × savol, qiymat — savol balli 0..1, savol shu variantda bo'lmasa NaN). Variantdagi savolga javob
+qatori bo'lmasa (bo'sh qoldirilgan — yakunlashda qator yozilmaydi) qiymat 0. Har savol uchun yig'indilar
+(n, Σx, Σx², Σy, Σy², Σxy; y — qolgan savollar yig'indisi) QuestionItemStats ga qo'shiladi, shuning uchun
+tungi ishga tushirish faqat TestItemAnalysis.analyzed_until dan keyingi urinishlarni o'qiydi.
+
+Har bir takrorlanmas javob matni savol bo'yicha bir marta baholanadi (ko'p talaba bir xil javob beradi).
+Kalit o'zgargan savollar uchun `item_analysis --full --test ID` bilan qaytadan hisoblang.
+"""
+import math
+from collections import Counter
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Question, QuestionItemStats, TestItemAnalysis, UserTestAnswer, UserTestResult
+from .test_session_helpers import FILL_TYPES, SINGLE_CHOICE, normalize_exam_variant, score_question_points
+
+CHUNK_SIZE = 2000
+# Shubhali savol: juda oson/qiyin yoki kuchli talabalarni ajrata olmaydi
+MIN_ATTEMPTS_FOR_FLAGS = 20
+EASY_P, HARD_P, LOW_DISCRIMINATION = 0.95, 0.10, 0.10
+
+
+def point_biserial(n, sum_x, sum_x2, sum_y, sum_y2, sum_xy):
+    """Yig'indilardan Pirson korrelyatsiyasi (x 0/1 bo'lsa — point-biserial). Hisoblab bo'lmasa None."""
+    if n < 2:
+        return None
+    var_x = n * sum_x2 - sum_x * sum_x
+    var_y = n * sum_y2 - sum_y * sum_y
+    if var_x <= 0 or var_y <= 0:
+        return None
+    return (n * sum_xy - sum_x * sum_y) / math.sqrt(var_x * var_y)
+
+
+def item_flags(stats):
+    """Muharrir uchun ogohlantirishlar ro'yxati (bo'sh — savol normal)."""
+    if stats is None or stats.attempts < MIN_ATTEMPTS_FOR_FLAGS or stats.p_value is None:
+        return []
+    flags = []
+    if stats.p_value >= EASY_P:
+        flags.append("juda oson")
+    elif stats.p_value <= HARD_P:
+        flags.append("juda qiyin — kalitni tekshiring")
+    if stats.discrimination is not None and stats.discrimination < LOW_DISCRIMINATION:
+        flags.append("manfiy ajrata olish — kalitni tekshiring" if stats.discrimination < 0 else "past ajrata olish")
+    return flags
+
+
+class _QuestionScorer:
+    """Savol bo'yicha javob → (ball 0..1, tanlovlar, bo'sh joy belgilari); takroriy javoblar keshdan."""
+
+    def __init__(self, question):
+        self.question = question
+        self.multi_letter = question.uses_choose_two_letter_scoring()
+        self.single_choice = question.question_type in SINGLE_CHOICE and not self.multi_letter
+        self.fill = question.question_type in FILL_TYPES
+        self._cache = {}
+
+    def __call__(self, user_answer):
+        if user_answer not in self._cache:
+            ua = (user_answer or '').strip()
+            pts, total = score_question_points(self.question, ua)
+            if not ua:
+                choices = ()
+            elif self.multi_letter:
+                choices = tuple(sorted(self.question._parse_letter_list(ua)))
+            elif self.single_choice:
+                choices = (ua.lower(),)
+            else:
+                choices = ()
+            marks = self.question.fill_slot_marks(ua) if self.fill else None
+            self._cache[user_answer] = (pts / total if total else 0.0, choices, marks, bool(ua))
+        return self._cache[user_answer]
+
+
+def _add_counts(counts, values):
+    """Bo'sh joylar bo'yicha hisoblagichlarni qo'shish (uzunliklar har xil bo'lishi mumkin)."""
+    width = max(len(counts), len(values))
+    return [
+        (counts[i] if i < len(counts) else 0) + int(values[i] if i < len(values) else 0)
+        for i in range(width)
+    ]
+
+
+def _empty_totals(width):
+    return {
+        'n': np.zeros(width), 'answered': np.zeros(width),
+        'sum_x': np.zeros(width), 'sum_x2': np.zeros(width),
+        'sum_y': np.zeros(width), 'sum_y2': np.zeros(width), 'sum_xy': np.zeros(width),
+    }
+
+
+def accumulate_matrix(scores, answered, totals):
+    """
+    scores — (urinish × savol) ball matritsasi, NaN = savol bu urinishda yo'q; answered — bo'sh emas belgisi.
+    totals ga ustunlar bo'yicha yig'indilar qo'shiladi (vektorlashgan).
+    """
+    present = ~np.isnan(scores)
+    x = np.where(present, scores, 0.0)
+    rest = x.sum(axis=1, keepdims=True) - x
+    rest = np.where(present, rest, 0.0)
+    totals['n'] += present.sum(axis=0)
+    totals['answered'] += (answered & present).sum(axis=0)
+    totals['sum_x'] += x.sum(axis=0)
+    totals['sum_x2'] += (x * x).sum(axis=0)
+    totals['sum_y'] += rest.sum(axis=0)
+    totals['sum_y2'] += (rest * rest).sum(axis=0)
+    totals['sum_xy'] += (x * rest).sum(axis=0)
+
+
+def _presented(test, questions):
+    """Variant → shu variantda ko'rsatilgan savollar maskasi (filter_questions_by_exam_variant bilan bir xil qoida)."""
+    max_v = int(getattr(test, 'variants_to_select', 1) or 1)
+    variants = np.array([q.variant or 0 for q in questions])
+    if max_v < 2:
+        every = np.ones(len(questions), dtype=bool)
+        return lambda raw: every
+    masks = {v: (variants == 0) | (variants == v) for v in range(1, max_v + 1)}
+    return lambda raw: masks[normalize_exam_variant(raw, max_v)]
+
+
+def analyze_test(test, full=False, until=None):
+    """
+    Bitta test: yangi urinishlarni qo'shish (full=True — noldan). Qaytadi: qo'shilgan urinishlar soni.
+    Yozishda TestItemAnalysis qatori qulflanadi; analyzed_until o'qishdan keyin o'zgargan bo'lsa natija tashlanadi (0).
+    """
+    until = until or timezone.now()
+    state, _ = TestItemAnalysis.objects.get_or_create(test=test)
+    since = None if full else state.analyzed_until
+
+    questions = [q for q in Question.objects.filter(test=test).order_by('order', 'pk') if q.question_type != 'essay']
+    column = {q.pk: i for i, q in enumerate(questions)}
+    scorers = [_QuestionScorer(q) for q in questions]
+    totals = _empty_totals(len(questions))
+    distractors = [Counter() for _ in questions]
+    blank_correct = [None] * len(questions)
+    presented = _presented(test, questions)
+
+    results = UserTestResult.objects.filter(test=test, completed_at__isnull=False, completed_at__lte=until)
+    if since is not None:
+        results = results.filter(completed_at__gt=since)
+    attempts = 0
+    after_id = 0
+    while questions:
+        chunk_rows = list(
+            results.filter(pk__gt=after_id).order_by('pk')
+            .values_list('pk', 'answers_json___meta__exam_variant')[:CHUNK_SIZE]
+        )
+        if not chunk_rows:
+            break
+        chunk = [pk for pk, _ in chunk_rows]
+        after_id = chunk[-1]
+        row = {pk: i for i, pk in enumerate(chunk)}
+        # Variantdagi savol — 0 (javob qatori bo'lsa quyida balli yoziladi), variantdan tashqari — NaN
+        scores = np.where(np.array([presented(variant) for _, variant in chunk_rows]), 0.0, np.nan)
+        answered = np.zeros((len(chunk), len(questions)), dtype=bool)
+        rows = UserTestAnswer.objects.filter(test_result_id__in=chunk, question_id__in=column).values_list(
+            'test_result_id', 'question_id', 'user_answer',
+        )
+        for result_id, question_id, user_answer in rows.iterator(chunk_size=CHUNK_SIZE):
+            i, j = row[result_id], column[question_id]
+            score, choices, marks, has_answer = scorers[j](user_answer)
+            scores[i, j] = score
+            answered[i, j] = has_answer
+            distractors[j].update(choices)
+            if marks is not None:
+                blank_correct[j] = _add_counts(blank_correct[j] or [], marks)
+        accumulate_matrix(scores, answered, totals)
+        attempts += len(chunk)
+
+    with transaction.atomic():
+        locked = TestItemAnalysis.objects.select_for_update().get(pk=state.pk)
+        if not full and locked.analyzed_until != since:
+            # Parallel ishga tushirish (tungi buyruq / admin vazifasi) shu oynani allaqachon qo'shgan
+            return 0
+        state = locked
+        existing = {s.question_id: s for s in QuestionItemStats.objects.select_for_update().filter(question__test=test)}
+        to_save = []
+        for j, question in enumerate(questions):
+            stats = existing.get(question.pk) or QuestionItemStats(question=question)
+            if full:
+                stats.attempts = stats.answered = 0
+                stats.sum_x = stats.sum_x2 = stats.sum_y = stats.sum_y2 = stats.sum_xy = 0.0
+                stats.distractors, stats.blank_correct = {}, []
+            stats.attempts += int(totals['n'][j])
+            stats.answered += int(totals['answered'][j])
+            for name in ('sum_x', 'sum_x2', 'sum_y', 'sum_y2', 'sum_xy'):
+                setattr(stats, name, getattr(stats, name) + float(totals[name][j]))
+            merged = Counter(stats.distractors or {})
+            merged.update(distractors[j])
+            stats.distractors = dict(merged.most_common())
+            if blank_correct[j] is not None:
+                stats.blank_correct = _add_counts(stats.blank_correct or [], blank_correct[j])
+            stats.p_value = round(stats.sum_x / stats.attempts, 4) if stats.attempts else None
+            r_pb = point_biserial(stats.attempts, stats.sum_x, stats.sum_x2, stats.sum_y, stats.sum_y2, stats.sum_xy)
+            stats.discrimination = round(r_pb, 4) if r_pb is not None else None
+            to_save.append(stats)
+        for stats in to_save:
+            stats.save()
+        state.analyzed_until = until
+        state.attempts = attempts if full else state.attempts + attempts
+        state.save(update_fields=['analyzed_until', 'attempts', 'updated_at'])
+    return attempts
+
+
+def item_report(test):
+    """Admin hisobot sahifasi uchun: savollar tartibida statistika va ogohlantirishlar."""
+    stats_by_question = {s.question_id: s for s in QuestionItemStats.objects.filter(question__test=test)}
+    rows = []
+    for question in Question.objects.filter(test=test).order_by('order', 'pk'):
+        stats = stats_by_question.get(question.pk)
+        total_choices = sum((stats.distractors or {}).values()) if stats else 0
+        rows.append({
+            'question': question,
+            'stats': stats,
+            'flags': item_flags(stats),
+            'distractors': [
+                {'choice': choice, 'count': count, 'share': round(count * 100 / total_choices, 1)}
+                for choice, count in (stats.distractors or {}).items()
+            ] if stats and total_choices else [],
+        })
+    return rows
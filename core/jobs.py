@@ -0,0 +1,250 @@
+"""
+Fon vazifalari: tashqi broker siz, navbat — core.Job jadvali.
+
+Admin amali enqueue() bilan yozuv qo'shadi va darhol qaytadi; `python manage.py run_jobs` workerlari
+vazifani claim_next() bilan oladi. PostgreSQL da SELECT ... FOR UPDATE SKIP LOCKED — bir nechta worker
+bir-birini kutmaydi va bitta vazifani ikki marta olmaydi. SQLite da (skip_locked yo'q) shartli UPDATE:
+status='queued' qator faqat bitta workerga o'tadi, yutqazgan worker keyingisini sinaydi.
+
+Xato bo'lsa vazifa RETRY_DELAYS bo'yicha kechiktirilib qayta navbatga qo'yiladi, max_attempts dan keyin 'failed'.
+Worker o'lib qolsa, STALE_AFTER dan eski 'running' vazifalar requeue_stale() bilan navbatga qaytadi. Tirik worker har
+flush() da locked_at ni yangilaydi (heartbeat), shuning uchun uzoq davom etadigan vazifa qayta navbatga tushmaydi;
+qulf boshqa workerga o'tgan bo'lsa (heartbeat kechikkan) eski worker natijani yozmaydi.
+
+Yangi vazifa turi:
+    @register('kind')
+    def handler(ctx, **payload):
+        ctx.set_total(n); ctx.advance(); ctx.log("...")
+"""
+import io
+import time
+import traceback
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+# Urinishdan keyingi kutish (soniya): 1-xato → 30 s, 2-xato → 2 daqiqa, keyin 10 daqiqa
+RETRY_DELAYS = (30, 120, 600)
+STALE_AFTER = timedelta(hours=1)
+# Progress bazaga har chaqiruvda emas, shuncha soniyada bir yoziladi
+PROGRESS_FLUSH_SECONDS = 1.0
+CLAIM_BATCH = 10
+
+_handlers = {}
+
+
+def register(kind):
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def get_handler(kind):
+    return _handlers.get(kind)
+
+
+def enqueue(kind, payload=None, user=None, max_attempts=3):
+    if kind not in _handlers:
+        raise ValueError(f"Noma'lum vazifa turi: {kind}")
+    return Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        created_by=user if user is not None and user.is_authenticated else None,
+        max_attempts=max(1, max_attempts),
+    )
+
+
+class JobContext:
+    """Handler ichidan progress va jurnalni yozish."""
+
+    def __init__(self, job):
+        self.job = job
+        self.worker_id = job.locked_by
+        self._lines = [job.log] if job.log else []
+        self._flushed_at = 0.0
+
+    def set_total(self, total):
+        self.job.total = max(0, int(total))
+        self.job.progress = 0
+        self.flush()
+
+    def advance(self, count=1):
+        self.job.progress += count
+        if time.monotonic() - self._flushed_at >= PROGRESS_FLUSH_SECONDS:
+            self.flush()
+
+    def log(self, message):
+        stamp = timezone.localtime().strftime('%H:%M:%S')
+        self._lines.append(f"[{stamp}] {message}")
+        self.job.log = '\n'.join(self._lines)
+        self.flush()
+
+    def checkpoint(self, **values):
+        """payload ni yangilash — qayta urinishda handler shu qiymatlar bilan davom etadi."""
+        self.job.payload = {**self.job.payload, **values}
+        self._owned().update(payload=self.job.payload)
+        self.flush()
+
+    def _owned(self):
+        # Qulf hali shu workerdami — requeue_stale dan keyin boshqa worker olgan bo'lsa hech narsa yozilmaydi
+        return Job.objects.filter(pk=self.job.pk, locked_by=self.worker_id)
+
+    def flush(self):
+        """Progress + heartbeat: locked_at yangilanadi. Qulf yo'qolgan bo'lsa False."""
+        self._flushed_at = time.monotonic()
+        return bool(self._owned().update(
+            progress=self.job.progress, total=self.job.total, log=self.job.log, locked_at=timezone.now(),
+        ))
+
+
+def claim_next(worker_id, now=None):
+    """Navbatdagi tayyor vazifani shu workerga biriktirish; bo'lmasa None."""
+    now = now or timezone.now()
+    ready = Job.objects.filter(status=Job.STATUS_QUEUED, run_after__lte=now).order_by('run_after', 'pk')
+    running = dict(status=Job.STATUS_RUNNING, locked_by=worker_id, locked_at=now, started_at=now, error='')
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = ready.select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            Job.objects.filter(pk=job.pk).update(attempts=F('attempts') + 1, **running)
+        job.refresh_from_db()
+        return job
+    for pk in ready.values_list('pk', flat=True)[:CLAIM_BATCH]:
+        claimed = Job.objects.filter(pk=pk, status=Job.STATUS_QUEUED).update(attempts=F('attempts') + 1, **running)
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def requeue_stale(now=None):
+    """Worker o'lgan (locked_at eski) vazifalarni qaytarish. Urinishlari tugaganlari 'failed'."""
+    now = now or timezone.now()
+    stale = Job.objects.filter(status=Job.STATUS_RUNNING, locked_at__lt=now - STALE_AFTER)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.STATUS_FAILED, finished_at=now, locked_by='', error="Worker javob bermadi (vaqt tugadi).",
+    )
+    requeued = stale.update(status=Job.STATUS_QUEUED, run_after=now, locked_by='', locked_at=None)
+    return requeued + failed
+
+
+def run_job(job):
+    """Vazifani bajarish; natija holati job ga yoziladi."""
+    ctx = JobContext(job)
+    handler = get_handler(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f"Handler topilmadi: {job.kind}")
+        handler(ctx, **job.payload)
+    except Exception as exc:
+        ctx.log(f"Xato ({job.attempts}/{job.max_attempts}-urinish): {exc}")
+        job.error = traceback.format_exc()
+        job.locked_by = ''
+        job.locked_at = None
+        now = timezone.now()
+        if handler is not None and job.attempts < job.max_attempts:
+            delay = RETRY_DELAYS[min(job.attempts, len(RETRY_DELAYS)) - 1]
+            job.status = Job.STATUS_QUEUED
+            job.run_after = now + timedelta(seconds=delay)
+        else:
+            job.status = Job.STATUS_FAILED
+            job.finished_at = now
+        _finalize(ctx, 'status', 'error', 'locked_by', 'locked_at', 'run_after', 'finished_at', 'progress', 'total', 'log')
+        return job
+    if job.total and job.progress < job.total:
+        job.progress = job.total
+    job.status = Job.STATUS_SUCCEEDED
+    job.finished_at = timezone.now()
+    job.locked_by = ''
+    _finalize(ctx, 'status', 'finished_at', 'locked_by', 'progress', 'total', 'log')
+    return job
+
+
+def _finalize(ctx, *fields):
+    """Yakuniy holatni faqat qulf hali shu workerda bo'lsa yozish (aks holda vazifa boshqa workerda davom etmoqda)."""
+    if not ctx._owned().update(**{name: getattr(ctx.job, name) for name in fields}):
+        ctx.job.refresh_from_db()
+
+
+def retry(job_ids):
+    """Admin: xato bilan tugagan vazifalarni yangi urinishlar bilan navbatga qaytarish."""
+    return Job.objects.filter(pk__in=job_ids, status=Job.STATUS_FAILED).update(
+        status=Job.STATUS_QUEUED, attempts=0, run_after=timezone.now(), finished_at=None, locked_by='', locked_at=None,
+    )
+
+
+@register('reset_and_seed')
+def reset_and_seed_job(ctx):
+    from django.core.management import call_command
+
+    output = io.StringIO()
+    ctx.set_total(1)
+    call_command('reset_and_seed', verbosity=0, stdout=output)
+    for line in output.getvalue().splitlines():
+        if line.strip():
+            ctx.log(line)
+    ctx.advance()
+
+
+@register('recalculate_results')
+def recalculate_results_job(ctx, result_ids):
+    from .models import UserTestResult
+
+    ctx.set_total(len(result_ids))
+    done = 0
+    for result in UserTestResult.objects.filter(pk__in=result_ids).select_related('test').iterator(chunk_size=200):
+        result.total_questions = result.total_questions or (result.test.total_questions if result.test else 0)
+        result.recalculate_from_answers()
+        done += 1
+        ctx.advance()
+    ctx.log(f"{done} ta natija qayta hisoblandi.")
+
+
+@register('rescore_results')
+def rescore_results_job(ctx, after_id=0, chunk_size=None, workers=1, dry_run=False, include_current=False):
+    from .rescoring import DEFAULT_CHUNK_SIZE, BulkRescorer, format_report
+
+    def on_chunk(last_id, stats):
+        ctx.advance(stats['scanned'] - ctx.job.progress)
+        if not dry_run:
+            # Qayta urinish shu joydan davom etadi; dry-run har safar to'liq hisobot beradi
+            ctx.checkpoint(after_id=last_id)
+
+    rescorer = BulkRescorer(
+        chunk_size=chunk_size or DEFAULT_CHUNK_SIZE, workers=workers, dry_run=dry_run,
+        include_current=include_current, on_chunk=on_chunk,
+    )
+    ctx.set_total(rescorer.remaining(after_id))
+    stats = rescorer.run(after_id=after_id)
+    for line in format_report(stats, dry_run):
+        ctx.log(line)
+
+
+@register('rescore_question')
+def rescore_question_job(ctx, question_id, old_key, new_key):
+    from .answer_key import rescore_question
+
+    outcome = rescore_question(question_id, old_key, new_key, on_progress=lambda done: ctx.advance(done - ctx.job.progress))
+    if outcome is None:
+        ctx.log(f"Savol #{question_id} topilmadi (o'chirilgan).")
+        return
+    ctx.log(f"O'zgargan kalit qismlari: {', '.join(outcome['diff']) or '—'}")
+    mode = "to'liq qayta baholandi (slotlar soni o'zgardi)" if outcome['full_rescore'] else "delta bilan yangilandi"
+    ctx.log(f"{outcome['answers_updated']} ta javob, {outcome['results_updated']} ta natija {mode}.")
+
+
+@register('item_analysis')
+def item_analysis_job(ctx, test_ids, full=False):
+    from .item_analysis import analyze_test
+    from .models import Test
+
+    ctx.set_total(len(test_ids))
+    for test in Test.objects.filter(pk__in=test_ids):
+        added = analyze_test(test, full=full)
+        ctx.log(f"#{test.pk} {test.title}: {added} ta urinish qo'shildi.")
+        ctx.advance()
@@ -0,0 +1,36 @@
+"""
+Savollar item-analizi (core.item_analysis): qiyinlik, ajrata olish, distraktorlar, bo'sh joylar aniqligi.
+
+Ishlatish:
+  python manage.py item_analysis                 # tungi: faqat oxirgi ishga tushirishdan keyingi urinishlar
+  python manage.py item_analysis --test 12       # bitta test
+  python manage.py item_analysis --full          # noldan (kalit o'zgargandan keyin)
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.item_analysis import analyze_test
+from core.models import Test
+
+
+class Command(BaseCommand):
+    help = "Savol statistikalarini yangi yakunlangan urinishlar bo'yicha yangilaydi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--test", type=int, action="append", default=[], help="Test id (takrorlash mumkin).")
+        parser.add_argument("--full", action="store_true", help="Yig'indilarni tashlab, barcha urinishlardan qayta hisoblash.")
+
+    def handle(self, *args, **options):
+        tests = Test.objects.order_by("pk")
+        if options["test"]:
+            tests = tests.filter(pk__in=options["test"])
+        until = timezone.now()
+        analyzed, attempts = 0, 0
+        for test in tests.iterator():
+            added = analyze_test(test, full=options["full"], until=until)
+            if added:
+                analyzed += 1
+                attempts += added
+                if options["verbosity"] >= 2:
+                    self.stdout.write(f"  #{test.pk} {test.title}: +{added}")
+        self.stdout.write(self.style.SUCCESS(f"Item-analiz: {analyzed} ta test, {attempts} ta yangi urinish."))
@@ -0,0 +1,106 @@
+"""
+Tez-tez chaqiriladigan JSON endpoint (masalan update-time, autosave) bo'yicha WSGI va ASGI serverlarini solishtirish.
+
+Ikkala server bir xil baza va kodda ishlashi kerak, masalan:
+  gunicorn config.wsgi -w 4 -b :8000
+  uvicorn config.asgi:application --workers 4 --port 8001
+
+Ishlatish:
+  python manage.py loadtest_live --username student1 --path /tests/12/update-time/ \\
+      --data elapsed_time=30 --target wsgi=http://127.0.0.1:8000 --target asgi=http://127.0.0.1:8001 \\
+      --requests 5000 --concurrency 300
+
+Buyruq user uchun sessiya yaratadi (parol kerak emas) va CSRF cookie/header ni o'zi qo'yadi.
+"""
+import statistics
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpRequest
+from django.middleware.csrf import get_token
+
+
+def _login_session(user):
+    store = import_module(settings.SESSION_ENGINE).SessionStore()
+    store[SESSION_KEY] = str(user.pk)
+    store[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    store.create()
+    return store.session_key
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = "JSON endpoint o'tkazuvchanligini WSGI va ASGI serverlarida solishtiradi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", required=True)
+        parser.add_argument("--path", required=True, help="Masalan: /tests/12/update-time/")
+        parser.add_argument("--data", action="append", default=[], help="POST maydoni key=value (takrorlash mumkin).")
+        parser.add_argument("--target", action="append", required=True, help="nom=http://host:port")
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument("--timeout", type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(username=options["username"]).first()
+        if user is None:
+            raise CommandError(f"User topilmadi: {options['username']}")
+        session_key = _login_session(user)
+        try:
+            self._run(options, session_key)
+        finally:
+            import_module(settings.SESSION_ENGINE).SessionStore(session_key=session_key).delete()
+
+    def _run(self, options, session_key):
+        csrf_request = HttpRequest()
+        csrf = get_token(csrf_request)
+        csrf_cookie = csrf_request.META["CSRF_COOKIE"]
+        body = urllib.parse.urlencode([item.split("=", 1) for item in options["data"] if "=" in item]).encode()
+        headers = {
+            "Cookie": f"{settings.SESSION_COOKIE_NAME}={session_key}; {settings.CSRF_COOKIE_NAME}={csrf_cookie}",
+            "X-CSRFToken": csrf,
+            "Content-Type": "application/x-www-form-urlencoded",
+        }
+        total = max(1, options["requests"])
+        concurrency = max(1, options["concurrency"])
+
+        self.stdout.write(f"{'target':<10} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'xato':>6}")
+        for target in options["target"]:
+            name, _, base_url = target.partition("=")
+            url = base_url.rstrip("/") + options["path"]
+
+            def hit(_):
+                request = urllib.request.Request(url, data=body, headers=headers, method="POST")
+                started = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(request, timeout=options["timeout"]) as response:
+                        response.read()
+                        ok = 200 <= response.status < 300
+                except (urllib.error.URLError, OSError):
+                    ok = False
+                return ok, time.perf_counter() - started
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                results = list(pool.map(hit, range(total)))
+            elapsed = time.perf_counter() - started
+            latencies = [duration * 1000 for ok, duration in results if ok]
+            errors = sum(1 for ok, _ in results if not ok)
+            self.stdout.write(
+                f"{name:<10} {total / elapsed:>9.1f} {statistics.median(latencies) if latencies else 0:>8.1f} "
+                f"{_percentile(latencies, 0.95):>8.1f} {errors:>6}"
+            )
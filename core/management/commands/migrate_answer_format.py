@@ -0,0 +1,64 @@
+"""
+UserTestResult.answers_json ni eski formatdan (1 — JSON satrlar) joriy formatga (2 — typed qiymatlar) o'tkazish.
+
+Ishlatish:
+  python manage.py migrate_answer_format --dry-run        # nechta qator o'zgarishini ko'rish
+  python manage.py migrate_answer_format --batch-size 500
+
+Eski qatorlar o'tkazilmasa ham o'qiladi (core.answer_codec.decode_answer); buyruq faqat har so'rovdagi
+parse ni olib tashlaydi. Ballar va SCORING_VERSION o'zgarmaydi. Qayta ishga tushirish xavfsiz.
+Davom etayotgan imtihonlar qatori qulflanib qayta o'qiladi (exam_sync.sync_answers kabi) — autosave yozuvi yo'qolmaydi.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.answer_codec import ANSWER_FORMAT, answers_format, upgrade_answers_json
+from core.models import UserTestResult
+
+
+class Command(BaseCommand):
+    help = "answers_json dagi eski JSON satr javoblarni typed qiymatlarga (format 2) o'tkazadi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true", help="Yozmasdan faqat sanash.")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        scanned = converted = 0
+        after_id = 0
+        while True:
+            batch = list(
+                UserTestResult.objects.filter(pk__gt=after_id)
+                .order_by("pk")
+                .only("pk", "completed_at", "answers_json")[:batch_size]
+            )
+            if not batch:
+                break
+            after_id = batch[-1].pk
+            scanned += len(batch)
+            stale = [r for r in batch if answers_format(r.answers_json) < ANSWER_FORMAT]
+            converted += len(stale)
+            if stale and not options["dry_run"]:
+                self._convert([r for r in stale if r.completed_at], [r.pk for r in stale if not r.completed_at])
+            if options["verbosity"] >= 2:
+                self.stdout.write(f"  id <= {after_id}: {converted}/{scanned}")
+
+        verb = "o'tkaziladi" if options["dry_run"] else "o'tkazildi"
+        self.stdout.write(self.style.SUCCESS(f"{scanned} ta natijadan {converted} tasi format {ANSWER_FORMAT} ga {verb}."))
+
+    def _convert(self, completed, in_progress_ids):
+        """Yakunlanganlar qulfsiz; davom etayotganlar select_for_update bilan qayta o'qiladi."""
+        for result in completed:
+            result.answers_json = upgrade_answers_json(result.answers_json)
+        if completed:
+            UserTestResult.objects.bulk_update(completed, ["answers_json"])
+        if not in_progress_ids:
+            return
+        with transaction.atomic():
+            locked = list(UserTestResult.objects.select_for_update().filter(pk__in=in_progress_ids).only("pk", "answers_json"))
+            locked = [r for r in locked if answers_format(r.answers_json) < ANSWER_FORMAT]
+            for result in locked:
+                result.answers_json = upgrade_answers_json(result.answers_json)
+            if locked:
+                UserTestResult.objects.bulk_update(locked, ["answers_json"])
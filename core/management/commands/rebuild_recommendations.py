@@ -0,0 +1,28 @@
+"""
+Barcha foydalanuvchilar tavsiyalarini (testlar va SAT) qayta qurish.
+
+Natija/progress o'zgarganda shu user qismi signal orqali yangilanadi; yangi yoki o'chirilgan testlar,
+qiyinlik o'zgarishlari esa faqat shu buyruq bilan hisobga olinadi — kechasi cron orqali ishga tushiring.
+
+Ishlatish:
+  python manage.py rebuild_recommendations
+  python manage.py rebuild_recommendations --user 12 --user 15
+"""
+from django.core.management.base import BaseCommand
+
+from core.recommendations import rebuild_all_recommendations
+
+
+class Command(BaseCommand):
+    help = "Foydalanuvchi tavsiyalarini qayta hisoblaydi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--user", type=int, action="append", dest="user_ids", help="Faqat shu user id (takrorlash mumkin).")
+
+    def handle(self, *args, **options):
+        count = rebuild_all_recommendations(
+            batch_size=max(1, options["batch_size"]),
+            user_ids=options["user_ids"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"{count} ta foydalanuvchi tavsiyalari yangilandi."))
@@ -0,0 +1,28 @@
+"""
+Video yig'indilarini (reyting, izohlar, javoblar, playlist hajmi) manba jadvallardan qayta hisoblash.
+
+Yozish yo'llari F() bilan yangilaydi; admin yoki shell orqali qilingan o'zgarishlar chetlanish beradi —
+buyruqni kechasi cron orqali ishga tushiring.
+
+Ishlatish:
+  python manage.py reconcile_video_aggregates
+  python manage.py reconcile_video_aggregates --dry-run
+"""
+from django.core.management.base import BaseCommand
+
+from core.video_aggregates import reconcile_video_aggregates
+
+
+class Command(BaseCommand):
+    help = "Video reyting/izoh/playlist yig'indilarini qayta hisoblaydi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Faqat farqlarni sanash, yozmaslik.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        report = reconcile_video_aggregates(fix=not options["dry_run"], batch_size=max(1, options["batch_size"]))
+        verb = "farq" if options["dry_run"] else "tuzatildi"
+        for model, count in report.items():
+            style = self.style.WARNING if count else self.style.SUCCESS
+            self.stdout.write(style(f"{model}: {verb} {count} ta qator"))
@@ -0,0 +1,102 @@
+"""
+SCORING_VERSION oshgandan keyin yakunlangan natijalarni ommaviy qayta baholash (core.rescoring).
+
+Ishlatish:
+  python manage.py rescore_results --dry-run                       # faqat farqlar hisoboti
+  python manage.py rescore_results --workers 4 --checkpoint /var/tmp/rescore.json
+  python manage.py rescore_results --workers 4 --min-rate 300      # sekin bo'lsa to'xtaydi (checkpoint qoladi)
+  python manage.py rescore_results --enqueue --workers 4           # run_jobs workeriga topshirish
+
+--checkpoint fayli har bo'lakdan keyin yoziladi; buyruq qayta ishga tushsa shu joydan davom etadi.
+Muvaffaqiyatli tugagach fayl o'chiriladi.
+"""
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import jobs
+from core.rescoring import DEFAULT_CHUNK_SIZE, BulkRescorer, ThroughputError, format_report
+from core.test_session_helpers import SCORING_VERSION
+
+
+class Command(BaseCommand):
+    help = "Yakunlangan natijalarni joriy SCORING_VERSION bo'yicha bo'laklab, parallel qayta baholaydi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Yozmasdan farqlar hisobotini chiqarish.")
+        parser.add_argument("--all", action="store_true", help="Joriy versiyadagilarni ham qayta baholash.")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Baholash jarayonlari soni.")
+        parser.add_argument("--after-id", type=int, default=None, help="Shu id dan keyingi natijalardan boshlash.")
+        parser.add_argument("--limit", type=int, default=None, help="Ko'pi bilan shuncha natija.")
+        parser.add_argument("--checkpoint", default="", help="Davom ettirish uchun JSON fayl.")
+        parser.add_argument("--max-rate", type=float, default=None, help="Natija/s dan oshmaslik (bazaga yuk).")
+        parser.add_argument("--min-rate", type=float, default=None, help="Natija/s dan past bo'lsa to'xtash.")
+        parser.add_argument("--enqueue", action="store_true", help="Bu yerda emas, fon vazifasi sifatida.")
+
+    def handle(self, *args, **options):
+        if options["enqueue"]:
+            job = jobs.enqueue("rescore_results", {
+                "after_id": options["after_id"] or 0,
+                "chunk_size": options["chunk_size"],
+                "workers": options["workers"],
+                "dry_run": options["dry_run"],
+                "include_current": options["all"],
+            })
+            self.stdout.write(self.style.SUCCESS(f"Vazifa #{job.pk} navbatga qo'yildi."))
+            return
+
+        checkpoint_path = options["checkpoint"]
+        after_id = options["after_id"]
+        if after_id is None:
+            after_id = self._read_checkpoint(checkpoint_path)
+
+        def on_chunk(last_id, stats):
+            if checkpoint_path and not options["dry_run"]:
+                self._write_checkpoint(checkpoint_path, last_id)
+            if options["verbosity"] >= 2:
+                self.stdout.write(f"  id <= {last_id}: {stats['scanned']} ta, {stats['scanned'] / (stats['elapsed'] or 1):.0f}/s")
+
+        rescorer = BulkRescorer(
+            chunk_size=options["chunk_size"],
+            workers=options["workers"],
+            dry_run=options["dry_run"],
+            include_current=options["all"],
+            max_rate=options["max_rate"],
+            min_rate=options["min_rate"],
+            on_chunk=on_chunk,
+        )
+        remaining = rescorer.remaining(after_id)
+        self.stdout.write(f"SCORING_VERSION={SCORING_VERSION}: {remaining} ta natija (id > {after_id}), workers={rescorer.workers}")
+        try:
+            stats = rescorer.run(after_id=after_id, limit=options["limit"])
+        except ThroughputError as exc:
+            for line in format_report(rescorer.stats, options["dry_run"]):
+                self.stdout.write(line)
+            raise CommandError(str(exc))
+
+        for line in format_report(stats, options["dry_run"]):
+            self.stdout.write(line)
+        if checkpoint_path and not options["dry_run"] and options["limit"] is None and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        self.stdout.write(self.style.SUCCESS("Tayyor."))
+
+    def _read_checkpoint(self, path):
+        if not path or not os.path.exists(path):
+            return 0
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        if data.get("scoring_version") != SCORING_VERSION:
+            raise CommandError(
+                f"Checkpoint SCORING_VERSION={data.get('scoring_version')} uchun yozilgan (joriy: {SCORING_VERSION}). "
+                "Faylni o'chirib boshidan boshlang."
+            )
+        self.stdout.write(f"Checkpoint dan davom: id > {data['after_id']}")
+        return int(data["after_id"])
+
+    def _write_checkpoint(self, path, after_id):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump({"after_id": after_id, "scoring_version": SCORING_VERSION}, fh)
+        os.replace(tmp_path, path)
@@ -0,0 +1,51 @@
+"""
+Fon vazifalari workeri (core.jobs): navbatdagi Job larni olib bajaradi.
+
+Ishlatish:
+  python manage.py run_jobs                  # doimiy ishlaydi (systemd / supervisor ostida)
+  python manage.py run_jobs --once           # navbat bo'shaguncha bajarib chiqadi (cron)
+  python manage.py run_jobs --worker-id w2 --sleep 5
+
+Bir nechta worker parallel ishga tushirilishi mumkin — har bir vazifani faqat bittasi oladi.
+"""
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = "Fon vazifalari navbatini bajaradi (admin amallari: seed, natijalarni qayta hisoblash)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Navbat bo'shaganda chiqish.")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Navbat bo'sh bo'lsa kutish (soniya).")
+        parser.add_argument("--worker-id", default="", help="Standart: host:pid")
+        parser.add_argument("--max-jobs", type=int, default=0, help="Shuncha vazifadan keyin chiqish (0 — cheklovsiz).")
+
+    def handle(self, *args, **options):
+        worker_id = options["worker_id"] or f"{socket.gethostname()}:{os.getpid()}"
+        max_jobs = max(0, options["max_jobs"])
+        processed = 0
+        requeued = jobs.requeue_stale()
+        if requeued:
+            self.stdout.write(f"{requeued} ta osilib qolgan vazifa qayta ko'rildi.")
+        while not max_jobs or processed < max_jobs:
+            close_old_connections()
+            job = jobs.claim_next(worker_id)
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+                jobs.requeue_stale()
+                continue
+            self.stdout.write(f"#{job.pk} {job.kind} boshlandi ({job.attempts}/{job.max_attempts}-urinish)")
+            job = jobs.run_job(job)
+            processed += 1
+            style = self.style.SUCCESS if job.status == job.STATUS_SUCCEEDED else self.style.WARNING
+            self.stdout.write(style(f"#{job.pk} {job.kind}: {job.get_status_display()}"))
+        self.stdout.write(self.style.SUCCESS(f"Bajarilgan vazifalar: {processed}"))
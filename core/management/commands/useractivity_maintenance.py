@@ -0,0 +1,78 @@
+"""
+UserActivity jurnalini parvarishlash (har kuni cron orqali):
+- kunlik yig'indilarni (UserActivityDailyRollup) yangilaydi;
+- PostgreSQL da joriy va keyingi oylar uchun bo'limlarni oldindan yaratadi;
+- saqlash muddatidan o'tgan oylarni .jsonl.gz ga arxivlab, bo'limni ajratadi yoki o'chiradi.
+
+Ishlatish:
+  python manage.py useractivity_maintenance
+  python manage.py useractivity_maintenance --retain-months 12 --archive-dir /backups/useractivity
+  python manage.py useractivity_maintenance --retain-months 0   # arxivlashsiz
+"""
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core import activity_partitions
+
+
+class Command(BaseCommand):
+    help = "UserActivity: kunlik yig'indilar, oylik bo'limlar va eski oylarni arxivlash."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=2,
+            help="Oldindan yaratiladigan oylik bo'limlar soni (PostgreSQL).",
+        )
+        parser.add_argument(
+            "--retain-months",
+            type=int,
+            default=6,
+            help="Xom yozuvlar necha oy saqlanadi (joriy oydan tashqari). 0 — arxivlanmaydi.",
+        )
+        parser.add_argument(
+            "--archive-dir",
+            default=os.path.join(settings.BASE_DIR, "archive", "useractivity"),
+            help="Arxiv fayllari (.jsonl.gz) papkasi.",
+        )
+        parser.add_argument(
+            "--detach-only",
+            action="store_true",
+            help="Eski bo'limni o'chirmasdan faqat ajratish (qo'lda pg_dump uchun).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Arxivlanadigan oylarni ko'rsatish, hech narsa o'zgartirmaslik.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+
+        start_day = activity_partitions.pending_rollup_start()
+        if start_day is not None and not dry_run:
+            rows = activity_partitions.rollup_days(start_day, timezone.localdate())
+            self.stdout.write(f"Kunlik yig'indi: {start_day} dan boshlab {rows} ta qator.")
+
+        if activity_partitions.is_partitioned() and not dry_run:
+            created = activity_partitions.ensure_future_partitions(options["months_ahead"])
+            if created:
+                self.stdout.write(self.style.SUCCESS(f"Yangi bo'limlar: {', '.join(created)}"))
+
+        retain_months = options["retain_months"]
+        if retain_months <= 0:
+            return
+        for month in activity_partitions.expired_months(retain_months):
+            if dry_run:
+                self.stdout.write(f"Arxivlanadi: {month:%Y-%m}")
+                continue
+            path, count = activity_partitions.archive_month(month, options["archive_dir"])
+            activity_partitions.drop_month(month, detach_only=options["detach_only"])
+            if count:
+                self.stdout.write(
+                    self.style.WARNING(f"{month:%Y-%m}: {count} ta yozuv arxivlandi -> {path}")
+                )
@@ -1,5 +1,15 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
 from django.contrib import messages
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
 from django.shortcuts import redirect
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
 
 from core.access import get_user_module_access
 
@@ -20,6 +30,9 @@ class ModuleAccessMiddleware:
     def process_view(self, request, view_func, view_args, view_kwargs):
         if not request.user.is_authenticated:
             return None
+        # core.async_views: ruxsat dekoratorda tekshiriladi (redirect emas, JSON 403)
+        if getattr(view_func, 'lean_asgi', False):
+            return None
 
         match = request.resolver_match
         if not match:
@@ -38,3 +51,75 @@ class ModuleAccessMiddleware:
             return redirect('core:module_selector')
 
         return None
+
+
+# ManifestStaticFilesStorage nomi: main.3f2a9c1b7e4d.css
+HASHED_STATIC_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+UNHASHED_CACHE_CONTROL = 'public, max-age=300'
+# Afzallik tartibida: brotli kichikroq
+PRECOMPRESSED_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(header):
+    """Accept-Encoding dan q=0 bo'lmagan kodlashlar to'plami."""
+    accepted = set()
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if params.replace(' ', '').lower() in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class PrecompressedStaticMiddleware:
+    """
+    STATIC_ROOT dagi (collectstatic) fayllarni sessiya/auth zanjiridan oldin beradi:
+    - Accept-Encoding bo'yicha oldindan siqilgan .br/.gz nusxa (core.static_storage yozadi)
+    - hash li nomlarga bir yillik immutable kesh, qolganlariga qisqa kesh
+    Fayl topilmasa so'rov odatdagidek davom etadi (dev da staticfiles handler).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        static_url = settings.STATIC_URL or ''
+        self.prefix = static_url if '://' not in static_url else ''
+        if self.prefix and not self.prefix.startswith('/'):
+            self.prefix = '/' + self.prefix
+        self.root = str(settings.STATIC_ROOT) if settings.STATIC_ROOT else ''
+
+    def __call__(self, request):
+        if self.prefix and self.root and request.method in ('GET', 'HEAD') and request.path.startswith(self.prefix):
+            response = self.serve(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not name or not os.path.isfile(path):
+            return None
+
+        stat = os.stat(path)
+        if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+            response = HttpResponseNotModified()
+        else:
+            content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            encoding, served_path = None, path
+            accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING'))
+            for coding, suffix in PRECOMPRESSED_ENCODINGS:
+                if coding in accepted and os.path.isfile(path + suffix):
+                    encoding, served_path = coding, path + suffix
+                    break
+            response = FileResponse(open(served_path, 'rb'), content_type=content_type)
+            response['Last-Modified'] = http_date(stat.st_mtime)
+            if encoding:
+                response['Content-Encoding'] = encoding
+            if encoding or any(os.path.isfile(path + suffix) for _, suffix in PRECOMPRESSED_ENCODINGS):
+                response['Vary'] = 'Accept-Encoding'
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if HASHED_STATIC_RE.search(name) else UNHASHED_CACHE_CONTROL
+        return response
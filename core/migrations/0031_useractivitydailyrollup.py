@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-19 11:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0030_adminannouncement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserActivityDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Kun')),
+                ('activity_type', models.CharField(choices=[('login', 'Kirish'), ('test_start', 'Test boshlash'), ('test_complete', 'Test yakunlash'), ('video_watch', "Video ko'rish")], max_length=20, verbose_name='Faollik turi')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Soni')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_rollups', to=settings.AUTH_USER_MODEL, verbose_name='Foydalanuvchi')),
+            ],
+            options={
+                'verbose_name': "Kunlik faollik yig'indisi",
+                'verbose_name_plural': "Kunlik faollik yig'indilari",
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day', 'activity_type'], name='core_userac_day_78ee0e_idx')],
+                'unique_together': {('day', 'user', 'activity_type')},
+            },
+        ),
+    ]
@@ -0,0 +1,108 @@
+"""
+core_useractivity jadvalini PostgreSQL da created_at bo'yicha oylik RANGE bo'limlarga o'tkazish.
+
+Boshqa bazalarda (SQLite) hech narsa qilinmaydi — oddiy jadval qoladi.
+Keyingi oylar uchun bo'limlarni `useractivity_maintenance` buyrug'i yaratadi.
+"""
+from datetime import datetime
+
+from django.db import migrations
+from django.utils import timezone
+
+TABLE = 'core_useractivity'
+SEQUENCE = 'core_useractivity_part_id_seq'
+COLUMNS = 'id, activity_type, related_object_id, related_object_type, metadata, created_at, user_id'
+INDEXES = (
+    ('core_userac_user_id_858224_idx', '(user_id, activity_type, created_at DESC)'),
+    ('core_userac_created_140080_idx', '(created_at)'),
+)
+MONTHS_AHEAD = 2
+
+
+def _month_start(year, month):
+    return timezone.make_aware(datetime(year, month, 1), timezone.get_default_timezone())
+
+
+def _next_month(value):
+    if value.month == 12:
+        return _month_start(value.year + 1, 1)
+    return _month_start(value.year, value.month + 1)
+
+
+def _add_constraints(cursor, primary_key):
+    cursor.execute(f'ALTER TABLE {TABLE} ADD PRIMARY KEY ({primary_key})')
+    cursor.execute(
+        f'ALTER TABLE {TABLE} ADD CONSTRAINT core_useractivity_user_id_fk_auth_user '
+        f'FOREIGN KEY (user_id) REFERENCES auth_user (id) DEFERRABLE INITIALLY DEFERRED'
+    )
+    for name, columns in INDEXES:
+        cursor.execute(f'CREATE INDEX {name} ON {TABLE} {columns}')
+    cursor.execute(f'ALTER SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id')
+
+
+def partition_useractivity(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [TABLE])
+        row = cursor.fetchone()
+        if not row or row[0] == 'p':
+            return
+        cursor.execute(f'SELECT MIN(created_at), COALESCE(MAX(id), 0) FROM {TABLE}')
+        first_at, max_id = cursor.fetchone()
+
+        # Identity/serial eski jadval bilan ketadi — yangi jadval uchun alohida sequence
+        cursor.execute(f'CREATE SEQUENCE {SEQUENCE}')
+        cursor.execute('SELECT setval(%s, %s, false)', [SEQUENCE, max_id + 1])
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {TABLE}_legacy')
+        cursor.execute(f'CREATE TABLE {TABLE} (LIKE {TABLE}_legacy) PARTITION BY RANGE (created_at)')
+        cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+        cursor.execute(f'CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT')
+
+        now = timezone.localtime()
+        start = timezone.localtime(first_at) if first_at else now
+        month = _month_start(start.year, start.month)
+        last = _month_start(now.year, now.month)
+        for _ in range(MONTHS_AHEAD):
+            last = _next_month(last)
+        while month <= last:
+            end = _next_month(month)
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_p{month:%Y%m} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+            )
+            month = end
+
+        cursor.execute(f'INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {TABLE}_legacy')
+        cursor.execute(f'DROP TABLE {TABLE}_legacy')
+        # Bo'limlangan jadvalda PRIMARY KEY bo'lim kalitini ham o'z ichiga olishi shart
+        _add_constraints(cursor, 'id, created_at')
+
+
+def unpartition_useractivity(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [TABLE])
+        row = cursor.fetchone()
+        if not row or row[0] != 'p':
+            return
+        cursor.execute(f'CREATE TABLE {TABLE}_plain (LIKE {TABLE} INCLUDING DEFAULTS)')
+        cursor.execute(f'INSERT INTO {TABLE}_plain ({COLUMNS}) SELECT {COLUMNS} FROM {TABLE}')
+        cursor.execute(f'ALTER SEQUENCE {SEQUENCE} OWNED BY NONE')
+        cursor.execute(f'DROP TABLE {TABLE} CASCADE')
+        cursor.execute(f'ALTER TABLE {TABLE}_plain RENAME TO {TABLE}')
+        _add_constraints(cursor, 'id')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0031_useractivitydailyrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_useractivity, unpartition_useractivity),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 4.2.16 on 2026-10-19 11:52
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def _subquery(model, fk, expression):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{fk: OuterRef('pk')})
+            .order_by()
+            .values(fk)
+            .annotate(value=expression)
+            .values('value')[:1],
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def backfill_aggregates(apps, schema_editor):
+    VideoLesson = apps.get_model('core', 'VideoLesson')
+    VideoRating = apps.get_model('core', 'VideoRating')
+    VideoComment = apps.get_model('core', 'VideoComment')
+    VideoPlaylist = apps.get_model('core', 'VideoPlaylist')
+    PlaylistVideo = apps.get_model('core', 'PlaylistVideo')
+
+    VideoLesson.objects.update(
+        rating_sum=_subquery(VideoRating, 'video', Sum('rating')),
+        rating_count=_subquery(VideoRating, 'video', Count('pk')),
+        comment_count=_subquery(VideoComment, 'video', Count('pk')),
+    )
+    for video in VideoLesson.objects.filter(rating_count__gt=0).only('pk', 'rating_sum', 'rating_count'):
+        VideoLesson.objects.filter(pk=video.pk).update(rating_average=video.rating_sum / video.rating_count)
+    VideoComment.objects.update(reply_count=_subquery(VideoComment, 'parent', Count('pk')))
+    VideoPlaylist.objects.update(video_count=_subquery(PlaylistVideo, 'playlist', Count('pk')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0032_useractivity_partitioning'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='videocomment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Javoblar soni'),
+        ),
+        migrations.AddField(
+            model_name='videolesson',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Izohlar soni'),
+        ),
+        migrations.AddField(
+            model_name='videolesson',
+            name='rating_average',
+            field=models.FloatField(default=0, editable=False, verbose_name="O'rtacha reyting"),
+        ),
+        migrations.AddField(
+            model_name='videolesson',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Reytinglar soni'),
+        ),
+        migrations.AddField(
+            model_name='videolesson',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name="Reytinglar yig'indisi"),
+        ),
+        migrations.AddField(
+            model_name='videoplaylist',
+            name='video_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Videolar soni'),
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
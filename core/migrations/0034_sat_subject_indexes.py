@@ -0,0 +1,21 @@
+# Generated by Django 4.2.16 on 2026-10-19 11:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0033_video_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='satresource',
+            index=models.Index(fields=['subject', 'is_active', 'order'], name='core_satres_subject_ad8461_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='satresourceprogress',
+            index=models.Index(fields=['user', 'watch_percentage'], name='core_satres_user_id_bc1d4c_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-19 11:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0034_sat_subject_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('avg_score', models.FloatField(default=0.0, verbose_name="O'rtacha natija (%)")),
+                ('weak_areas', models.JSONField(blank=True, default=list, verbose_name='Zaif kategoriyalar')),
+                ('test_ids', models.JSONField(blank=True, default=list, verbose_name='Tavsiya testlar (tartib bilan)')),
+                ('sat_resource_ids', models.JSONField(blank=True, default=list, verbose_name='Tavsiya SAT resurslar (tartib bilan)')),
+                ('tests_built_at', models.DateTimeField(blank=True, null=True, verbose_name='Testlar hisoblangan vaqt')),
+                ('sat_built_at', models.DateTimeField(blank=True, null=True, verbose_name='SAT hisoblangan vaqt')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='recommendation', to=settings.AUTH_USER_MODEL, verbose_name='Foydalanuvchi')),
+            ],
+            options={
+                'verbose_name': 'Foydalanuvchi tavsiyasi',
+                'verbose_name_plural': 'Foydalanuvchi tavsiyalari',
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.16 on 2026-10-19 12:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0035_user_recommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=64, verbose_name='Vazifa turi')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Parametrlar')),
+                ('status', models.CharField(choices=[('queued', 'Navbatda'), ('running', 'Bajarilmoqda'), ('succeeded', 'Tugadi'), ('failed', 'Xato')], default='queued', max_length=16, verbose_name='Holat')),
+                ('progress', models.PositiveIntegerField(default=0, verbose_name='Bajarildi')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Jami')),
+                ('log', models.TextField(blank=True, verbose_name='Jurnal')),
+                ('error', models.TextField(blank=True, verbose_name='Oxirgi xato')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Urinishlar')),
+                ('max_attempts', models.PositiveIntegerField(default=3, verbose_name='Maksimal urinish')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Boshlash vaqti')),
+                ('locked_by', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Olingan vaqt')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Yaratilgan')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Boshlangan')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Tugagan')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to=settings.AUTH_USER_MODEL, verbose_name="Kim qo'ydi")),
+            ],
+            options={
+                'verbose_name': 'Fon vazifasi',
+                'verbose_name_plural': 'Fon vazifalari',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='core_job_claim_idx')],
+            },
+        ),
+    ]
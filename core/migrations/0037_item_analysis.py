@@ -0,0 +1,51 @@
+# Generated by Django 4.2.16 on 2026-10-19 12:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0036_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestItemAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('analyzed_until', models.DateTimeField(blank=True, null=True, verbose_name='Hisoblangan vaqtgacha')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Urinishlar')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Yangilangan')),
+                ('test', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='item_analysis', to='core.test', verbose_name='Test')),
+            ],
+            options={
+                'verbose_name': 'Test item-analizi',
+                'verbose_name_plural': 'Test item-analizlari',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionItemStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Urinishlar')),
+                ('answered', models.PositiveIntegerField(default=0, verbose_name='Javob berilgan')),
+                ('sum_x', models.FloatField(default=0.0)),
+                ('sum_x2', models.FloatField(default=0.0)),
+                ('sum_y', models.FloatField(default=0.0)),
+                ('sum_y2', models.FloatField(default=0.0)),
+                ('sum_xy', models.FloatField(default=0.0)),
+                ('p_value', models.FloatField(blank=True, null=True, verbose_name='Qiyinlik (p)')),
+                ('discrimination', models.FloatField(blank=True, null=True, verbose_name='Ajrata olish (r_pb)')),
+                ('distractors', models.JSONField(blank=True, default=dict, verbose_name='Tanlovlar')),
+                ('blank_correct', models.JSONField(blank=True, default=list, verbose_name="Bo'sh joylar (to'g'ri)")),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Yangilangan')),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='item_stats', to='core.question', verbose_name='Savol')),
+            ],
+            options={
+                'verbose_name': 'Savol statistikasi',
+                'verbose_name_plural': 'Savol statistikalari',
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.16 on 2026-10-19 12:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def flag_ungraded_essays(apps, schema_editor):
+    """Mavjud essaylarni navbatga qo'yish. is_correct=True lar eski usulda ko'rib chiqilgan deb olinadi."""
+    UserTestAnswer = apps.get_model('core', 'UserTestAnswer')
+    UserTestAnswer.objects.filter(question__question_type='essay', is_correct=False).exclude(
+        user_answer='',
+    ).update(needs_grading=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0037_item_analysis'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usertestanswer',
+            name='band_score',
+            field=models.DecimalField(blank=True, decimal_places=1, max_digits=3, null=True, verbose_name='Band'),
+        ),
+        migrations.AddField(
+            model_name='usertestanswer',
+            name='graded_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Baholangan vaqt'),
+        ),
+        migrations.AddField(
+            model_name='usertestanswer',
+            name='graded_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='graded_answers', to=settings.AUTH_USER_MODEL, verbose_name='Baholovchi'),
+        ),
+        migrations.AddField(
+            model_name='usertestanswer',
+            name='needs_grading',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Baholash kutilmoqda'),
+        ),
+        migrations.AddIndex(
+            model_name='usertestanswer',
+            index=models.Index(condition=models.Q(('needs_grading', True)), fields=['id'], name='core_answer_grading_queue'),
+        ),
+        migrations.RunPython(flag_ungraded_essays, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 4.2.16 on 2026-10-19 12:45
+
+from django.db import migrations, models
+
+import re
+
+# core.question_text kompilyatorining v1 nusxasi — migratsiya keyingi o'zgarishlardan mustaqil bo'lishi uchun.
+# Kompilyator o'zgarsa TEXT_TEMPLATE_VERSION oshadi va eski qatorlar o'qilganda qayta quriladi.
+PLACEHOLDER_RE = re.compile(r'\[([^\]]+)\]')
+
+
+def detect_max_words(instruction, question_text):
+    inst = (instruction or '').upper()
+    if ('ONE WORD' in inst) and ('AND/OR' in inst) and ('NUMBER' in inst):
+        return 1
+    if 'NO MORE THAN TWO WORDS' in inst or ('TWO WORDS' in inst and 'THREE' not in inst):
+        return 2
+    if 'NO MORE THAN THREE WORDS' in inst or 'THREE WORDS' in inst:
+        return 3
+    if 'ONE WORD ONLY' in inst or ('ONE WORD' in inst and 'TWO' not in inst and 'THREE' not in inst):
+        return 1
+    qt = (question_text or '')[:800].upper()
+    if ('ONE WORD' in qt) and ('AND/OR' in qt) and ('NUMBER' in qt):
+        return 1
+    if 'NO MORE THAN TWO WORDS' in qt or ('TWO WORDS' in qt and 'THREE' not in qt):
+        return 2
+    if 'NO MORE THAN THREE WORDS' in qt or 'THREE WORDS' in qt:
+        return 3
+    if 'ONE WORD ONLY' in qt:
+        return 1
+    return None
+
+
+def compile_question_text(question):
+    text = question.question_text or ''
+    opts = question.options_json if isinstance(question.options_json, dict) else {}
+    max_words = None
+    if opts.get('max_words_per_blank') is not None:
+        try:
+            max_words = max(1, int(opts['max_words_per_blank']))
+        except (TypeError, ValueError):
+            pass
+    if max_words is None:
+        max_words = detect_max_words(opts.get('instruction'), text)
+    items = opts.get('short_answer_items') if question.question_type == 'short_answer' else None
+    item_max_words = []
+    for item in items if isinstance(items, list) else []:
+        try:
+            mw = int(item.get('max_words')) if isinstance(item, dict) else None
+        except (TypeError, ValueError):
+            mw = None
+        item_max_words.append(mw if mw in (1, 2, 3) else None)
+    parts = []
+    last = 0
+    slots = 0
+    numbered = False
+    for m in PLACEHOLDER_RE.finditer(text):
+        if m.start() > last:
+            parts.append({'text': text[last:m.start()]})
+        slots += 1
+        numbered = numbered or m.group(1).isdigit()
+        limit = item_max_words[slots - 1] if slots <= len(item_max_words) else None
+        parts.append({'slot': slots, 'label': m.group(1).strip(), 'max_words': limit or max_words})
+        last = m.end()
+    if last < len(text):
+        parts.append({'text': text[last:]})
+    return {
+        'v': 1,
+        'parts': parts,
+        'slots': slots,
+        'numbered': numbered,
+        'max_words': max_words,
+        'item_max_words': item_max_words,
+    }
+
+
+def compile_existing_questions(apps, schema_editor):
+    """Mavjud savollar uchun text_template ni bir marta qurish (bo'laklab)."""
+    Question = apps.get_model('core', 'Question')
+    batch = []
+    for question in Question.objects.only('pk', 'question_type', 'question_text', 'options_json').iterator(chunk_size=500):
+        question.text_template = compile_question_text(question)
+        batch.append(question)
+        if len(batch) >= 500:
+            Question.objects.bulk_update(batch, ['text_template'])
+            batch = []
+    if batch:
+        Question.objects.bulk_update(batch, ['text_template'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0038_essay_grading_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='text_template',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(compile_existing_questions, migrations.RunPython.noop),
+    ]
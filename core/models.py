@@ -2,10 +2,30 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.urls import reverse
-import json
+from django.utils.functional import cached_property
+import contextvars
 import re
 import unicodedata
 
+from .answer_codec import answer_text, decode_answer
+
+
+# UserTestResult.recalculate_from_answers javoblarni yozayotganda True
+_recalculating_results = contextvars.ContextVar('recalculating_results', default=False)
+
+
+# Video / SAT resurs: shu foizdan boshlab ko'rilgan (yakunlangan) hisoblanadi
+WATCHED_THRESHOLD = 90
+
+
+def apply_watch_progress(progress, percentage):
+    """UserVideoProgress/SATResourceProgress uchun umumiy qoida: foiz 0–100, chegaradan keyin yakunlangan (save siz)."""
+    progress.watch_percentage = min(100, max(0, int(percentage or 0)))
+    if progress.watch_percentage >= WATCHED_THRESHOLD:
+        progress.watched = True
+        if not progress.completed_at:
+            progress.completed_at = timezone.now()
+
 
 def normalize_answer_text(value):
     """Fill/matching uchun: katta-kichik, bo'shliq, apostrof va oxiridagi tinish belgilar."""
@@ -119,6 +139,11 @@ class VideoLesson(models.Model):
     duration = models.IntegerField(default=0, verbose_name="Davomiyligi (soniya)")
     order = models.IntegerField(default=0, verbose_name="Tartib")
     views_count = models.IntegerField(default=0, verbose_name="Ko'rilganlar soni")
+    # Yig'indilar yozish paytida F() bilan yangilanadi (core.video_aggregates), o'qishda aggregate yo'q
+    rating_sum = models.PositiveIntegerField(default=0, editable=False, verbose_name="Reytinglar yig'indisi")
+    rating_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Reytinglar soni")
+    rating_average = models.FloatField(default=0, editable=False, verbose_name="O'rtacha reyting")
+    comment_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Izohlar soni")
     is_active = models.BooleanField(default=True, verbose_name="Faol")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -126,14 +151,12 @@ class VideoLesson(models.Model):
     @property
     def average_rating(self):
         """O'rtacha reyting"""
-        from django.db.models import Avg
-        rating = self.ratings.aggregate(Avg('rating'))['rating__avg']
-        return round(rating, 1) if rating else 0
+        return round(self.rating_average, 1) if self.rating_count else 0
     
     @property
     def total_ratings(self):
         """Jami reytinglar soni"""
-        return self.ratings.count()
+        return self.rating_count
 
     class Meta:
         verbose_name = "Video Dars"
@@ -319,7 +342,13 @@ class Test(models.Model):
 
     def get_reading_passages(self):
         """Reading: bitta ro'yxat yoki ko'p variantda [v1_list, v2_list, ...].
-        Har bir dict da 'order' bo'ladi — test sahifasida Part N ↔ order==N."""
+        Har bir dict da 'order' va 'word_count' bo'ladi — test sahifasida Part N ↔ order==N.
+        Natija test versiyasi bo'yicha keshlanadi (core.reading_passages)."""
+        from .reading_passages import resolve_reading_passages
+        return resolve_reading_passages(self)['passages']
+
+    def _build_reading_passages(self, objs=None):
+        """get_reading_passages ning keshsiz hisobi. objs — oldindan o'qilgan ReadingPassage lar."""
         def _row(p, fallback_order):
             if isinstance(p, dict):
                 o = p.get('order', fallback_order)
@@ -342,7 +371,8 @@ class Test(models.Model):
             n_var = 1
 
         # 1) Inline model (eng qulay)
-        objs = list(self.reading_passages.all().order_by('variant', 'order', 'pk'))
+        if objs is None:
+            objs = list(self.reading_passages.all().order_by('variant', 'order', 'pk'))
         if objs:
             if n_var >= 2:
                 buckets = [[] for _ in range(n_var)]
@@ -522,6 +552,8 @@ class Question(models.Model):
     )
     # correct_answer_json: ["jackals", "diseases", "food", "foxes"] - fill_blank/summary/notes uchun
     correct_answer_json = models.JSONField(default=list, blank=True, verbose_name="To'g'ri javoblar ro'yxati (JSON)")
+    # question_text ning kompilyatsiya qilingan shakli (core.question_text) — save() da yangilanadi
+    text_template = models.JSONField(default=dict, blank=True, editable=False)
     explanation = models.TextField(blank=True, verbose_name="Tushuntirish")
     points = models.IntegerField(default=1, verbose_name="Ball")
     order = models.IntegerField(default=0, verbose_name="Tartib")
@@ -538,6 +570,29 @@ class Question(models.Model):
     def __str__(self):
         return f"{self.test.title} - Savol #{self.order}"
 
+    def save(self, *args, **kwargs):
+        from core.question_text import SOURCE_FIELDS, compile_question_text
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or SOURCE_FIELDS.intersection(update_fields):
+            self.text_template = compile_question_text(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'text_template'}
+        if self.pk and not self._state.adding:
+            from core.answer_key import ANSWER_KEY_FIELDS, stored_answer_key
+            # Kalit saqlanayotgan bo'lsa — bazadagi eski kalit (post_save dagi qayta baholash uchun)
+            if update_fields is None or set(ANSWER_KEY_FIELDS).intersection(update_fields):
+                self._stored_answer_key = stored_answer_key(self.pk)
+        super().save(*args, **kwargs)
+
+    @property
+    def compiled_text(self):
+        """text_template (eski yoki bo'sh bo'lsa — shu yerda quriladi, saqlanmaydi)."""
+        from core.question_text import TEXT_TEMPLATE_VERSION, compile_question_text
+        template = self.text_template
+        if not isinstance(template, dict) or template.get('v') != TEXT_TEMPLATE_VERSION:
+            template = self.text_template = compile_question_text(self)
+        return template
+
     @property
     def question_instruction(self):
         """Ko'rsatma matni (options_json.instruction)"""
@@ -555,35 +610,9 @@ class Question(models.Model):
         """
         Har bir bo'sh joy uchun maksimal so'z soni.
         options_json.max_words_per_blank yoki instruction matnidan (ONE WORD / TWO / THREE).
-        None = cheklov yo'q.
+        None = cheklov yo'q. Kompilyatsiya qilingan shablondan o'qiladi (core.question_text).
         """
-        opts = self.options_json or {}
-        mw = opts.get('max_words_per_blank')
-        if mw is not None:
-            try:
-                return max(1, int(mw))
-            except (TypeError, ValueError):
-                pass
-        inst = (opts.get('instruction') or '').upper()
-        # Listening (Notes/Summary completion) odatda: "ONE WORD AND/OR A NUMBER"
-        if ('ONE WORD' in inst) and ('AND/OR' in inst) and ('NUMBER' in inst):
-            return 1
-        if 'NO MORE THAN TWO WORDS' in inst or ('TWO WORDS' in inst and 'THREE' not in inst):
-            return 2
-        if 'NO MORE THAN THREE WORDS' in inst or 'THREE WORDS' in inst:
-            return 3
-        if 'ONE WORD ONLY' in inst or ('ONE WORD' in inst and 'TWO' not in inst and 'THREE' not in inst):
-            return 1
-        qt = (self.question_text or '')[:800].upper()
-        if ('ONE WORD' in qt) and ('AND/OR' in qt) and ('NUMBER' in qt):
-            return 1
-        if 'NO MORE THAN TWO WORDS' in qt or ('TWO WORDS' in qt and 'THREE' not in qt):
-            return 2
-        if 'NO MORE THAN THREE WORDS' in qt or 'THREE WORDS' in qt:
-            return 3
-        if 'ONE WORD ONLY' in qt:
-            return 1
-        return None
+        return self.compiled_text['max_words']
 
     def fill_blanks_count(self):
         """To'ldirish turidagi savolda nechta alohida javob o'rni."""
@@ -600,32 +629,17 @@ class Question(models.Model):
         cl = self.get_correct_answers_list()
         if cl:
             return len(cl)
-        import re
-        text = self.question_text or ''
         # IELTS map/notes: [15], [16] kabi savol raqamlari — bo'sh joylar soni qavs juftlari soni bilan bir xil.
         # max(15..20)=20 bo'lib ketardi va ortiqcha slotlar UI/POST ni buzardi.
-        bracket_placeholders = re.findall(r'\[[^\]]+\]', text)
-        if bracket_placeholders:
-            return len(bracket_placeholders)
-        nums = re.findall(r'\[(\d+)\]', text)
-        if nums:
-            return max(int(n) for n in nums)
-        return 1
+        return self.compiled_text['slots'] or 1
 
     def get_max_words_for_blank_index(self, idx):
         """short_answer_items da har band uchun alohida 1/2/3 so'z cheklovi."""
-        opts = self.options_json or {}
-        if self.question_type == 'short_answer':
-            sa = opts.get('short_answer_items') or []
-            if isinstance(sa, list) and 0 <= idx < len(sa) and isinstance(sa[idx], dict):
-                mw = sa[idx].get('max_words')
-                try:
-                    mw = int(mw)
-                    if mw in (1, 2, 3):
-                        return mw
-                except (TypeError, ValueError):
-                    pass
-        return self.get_max_words_per_blank()
+        compiled = self.compiled_text
+        limits = compiled['item_max_words']
+        if 0 <= idx < len(limits) and limits[idx]:
+            return limits[idx]
+        return compiled['max_words']
 
     def get_task_images(self, request=None):
         """Writing task uchun rasmlar ro'yxati (carousel). question_image + options_json.images"""
@@ -652,16 +666,10 @@ class Question(models.Model):
         if self.question_type in single_choice:
             opts = {'a': self.option_a, 'b': self.option_b, 'c': self.option_c, 'd': self.option_d}
             if getattr(self, 'max_choices', 1) >= 2 and user_answer:
-                try:
-                    import json
-                    raw = user_answer if isinstance(user_answer, str) else str(user_answer)
-                    if raw.strip().startswith('['):
-                        letters = json.loads(raw)
-                        letters = letters if isinstance(letters, list) else [letters]
-                        parts = [f"{str(l).upper()}) {opts.get(str(l).lower(), '')}" for l in letters if str(l).lower() in opts]
-                        return '; '.join(parts) if parts else raw
-                except (TypeError, ValueError, json.JSONDecodeError):
-                    pass
+                letters = decode_answer(user_answer)
+                if isinstance(letters, list):
+                    parts = [f"{str(l).upper()}) {opts.get(str(l).lower(), '')}" for l in letters if str(l).lower() in opts]
+                    return '; '.join(parts) if parts else answer_text(letters)
             return opts.get(str(user_answer).lower(), user_answer)
         return str(user_answer) if user_answer else ''
 
@@ -733,7 +741,6 @@ class Question(models.Model):
     
     def check_user_answer(self, user_answer):
         """Foydalanuvchi javobi to'g'rimi tekshirish"""
-        import json
         if self.question_type == 'essay':
             #mmm
             # Essay avtomatik baholanmaydi – faqat bo'sh emasligi tekshiriladi
@@ -745,7 +752,7 @@ class Question(models.Model):
             mc = int(getattr(self, 'max_choices', 1) or 1)
             if mc >= 2:
                 try:
-                    ua = user_answer if isinstance(user_answer, list) else (json.loads(user_answer) if isinstance(user_answer, str) and user_answer.strip().startswith('[') else [user_answer])
+                    ua = decode_answer(user_answer)
                     u_list = ua if isinstance(ua, list) else [ua]
                     u_set = set(norm(x) for x in u_list if x)
                     if len(u_set) != mc or len(u_list) != mc:
@@ -756,7 +763,7 @@ class Question(models.Model):
                         parts = [p.strip().lower() for p in (self.correct_answer or '').replace(',', ' ').split() if p.strip()]
                         c_set = set(parts[:mc])
                     return u_set == c_set and len(c_set) == mc
-                except (TypeError, json.JSONDecodeError):
+                except TypeError:
                     return False
             return norm(user_answer) == norm(self.correct_answer)
         
@@ -769,16 +776,13 @@ class Question(models.Model):
         
         norm = lambda x: normalize_answer_text(x)
         
-        def parse_user_json(text):
-            if not text:
+        def parse_user_json(value):
+            data = decode_answer(value)
+            if isinstance(data, (list, dict)):
+                return data
+            if not data:
                 return [] if self.question_type in fill_types else {}
-            t = str(text).strip()
-            if t.startswith('[') or t.startswith('{'):
-                try:
-                    return json.loads(t)
-                except json.JSONDecodeError:
-                    return [t] if self.question_type in fill_types else {}
-            return [t]
+            return [data]
         
         # Matching (dict format: {"1":"ii", "2":"v"})
         if self.question_type in matching_types:
@@ -825,16 +829,8 @@ class Question(models.Model):
     def _parse_letter_list(self, user_answer):
         """JSON yoki ro'yxatdan harflar to'plami."""
         norm = lambda x: str(x).strip().lower() if x else ''
-        if isinstance(user_answer, list):
-            ua = user_answer
-        elif isinstance(user_answer, str) and user_answer.strip().startswith('['):
-            try:
-                ua = json.loads(user_answer)
-            except (TypeError, json.JSONDecodeError):
-                return set()
-        elif user_answer:
-            ua = [user_answer]
-        else:
+        ua = decode_answer(user_answer)
+        if not ua:
             return set()
         if not isinstance(ua, list):
             ua = [ua]
@@ -874,9 +870,16 @@ class Question(models.Model):
         if self.question_type not in fill_types:
             return (1 if self.check_user_answer(user_answer) else 0, 1)
 
+        marks = self.fill_slot_marks(user_answer)
+        if marks is None:
+            return (0, max(self.gradable_answer_slots(), 1))
+        return (sum(marks), len(marks))
+
+    def fill_slot_marks(self, user_answer):
+        """Fill turlar: har bo'sh joy uchun True/False ro'yxati (kalit bo'sh bo'lsa None). Item-analiz ham ishlatadi."""
         correct_list = list(self.get_correct_answers_list())
         if not correct_list:
-            return (0, max(self.gradable_answer_slots(), 1))
+            return None
 
         total_slots = self.gradable_answer_slots() or len(correct_list)
         if len(correct_list) < total_slots:
@@ -885,18 +888,9 @@ class Question(models.Model):
             correct_list = correct_list[:total_slots]
         total = len(correct_list)
 
-        def parse_user_json(text):
-            if not text:
-                return []
-            t = str(text).strip()
-            if t.startswith('[') or t.startswith('{'):
-                try:
-                    return json.loads(t)
-                except json.JSONDecodeError:
-                    return [t]
-            return [t]
-
-        user_raw = parse_user_json(user_answer)
+        user_raw = decode_answer(user_answer)
+        if not user_raw:
+            user_raw = []
         if isinstance(user_raw, dict):
             user_answers = [user_raw.get(str(i + 1), '') for i in range(total)]
         elif isinstance(user_raw, list):
@@ -909,15 +903,15 @@ class Question(models.Model):
 
         max_w = self.get_max_words_per_blank()
 
-        got = 0
+        marks = []
         for i, (ua, ca) in enumerate(zip(user_answers, correct_list)):
             slot_mw = self.get_max_words_for_blank_index(i) if self.question_type == 'short_answer' else max_w
             if slot_mw is not None and ua and str(ua).strip():
                 if self.count_answer_words(ua) > slot_mw:
+                    marks.append(False)
                     continue
-            if blank_answers_match(ua, ca):
-                got += 1
-        return (got, total)
+            marks.append(blank_answers_match(ua, ca))
+        return marks
 
     def score_matching_answer(self, user_answer):
         """
@@ -934,15 +928,7 @@ class Question(models.Model):
             # matching emas yoki noto'g'ri format — oddiy True/False ga tushiramiz
             return (1 if self.check_user_answer(user_answer) else 0, 1)
 
-        try:
-            if not user_answer:
-                user_map = {}
-            else:
-                t = str(user_answer).strip()
-                user_map = json.loads(t) if t.startswith('{') else {}
-        except json.JSONDecodeError:
-            user_map = {}
-
+        user_map = decode_answer(user_answer)
         if not isinstance(user_map, dict):
             user_map = {}
 
@@ -1031,9 +1017,7 @@ class Question(models.Model):
             c = self.correct_answer_json if isinstance(self.correct_answer_json, dict) else {}
             if c:
                 return len(c)
-            import re
-            n = len(re.findall(r'\[[^\]]+\]', self.question_text or ''))
-            return n if n else 1
+            return self.compiled_text['slots'] or 1
         matching_types = (
             'matching_headings', 'matching_features', 'matching_info',
             'matching_sentences', 'classification',
@@ -1113,8 +1097,8 @@ class UserTestResult(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.test.title} ({self.percentage}%)"
 
-    def calculate_score(self, writing_manual=False):
-        """Natijani hisoblash"""
+    def calculate_score(self, writing_manual=False, writing_band=None):
+        """Natijani hisoblash (writing: band qo'yilmaguncha foiz 0)"""
         if self.total_questions == 0 and self.test_id:
             self.total_questions = self.test.total_questions
 
@@ -1128,7 +1112,9 @@ class UserTestResult(models.Model):
         correct = self.correct_answers
         self.score = correct
         if writing_manual:
-            self.percentage = 0.0
+            from core.test_session_helpers import band_percentage
+
+            self.percentage = band_percentage(writing_band) if writing_band is not None else 0.0
             self.wrong_answers = max(0, total - correct)
             self.save()
             return
@@ -1145,7 +1131,6 @@ class UserTestResult(models.Model):
             compute_session_scores,
             exam_variant_from_answers,
             filter_questions_by_exam_variant,
-            score_question_points,
             stamp_answers_meta,
         )
 
@@ -1158,17 +1143,34 @@ class UserTestResult(models.Model):
         if scores['writing_only']:
             self.total_questions = scores['essay_total'] or 1
             self.correct_answers = scores['essays_submitted']
-            self.calculate_score(writing_manual=True)
+            self.calculate_score(writing_manual=True, writing_band=scores['writing_band'])
         else:
             self.total_questions = scores['total_slots'] or len(questions)
             self.correct_answers = scores['correct_pts']
             self.calculate_score(writing_manual=False)
 
+        # Javoblarni yozish post_save orqali yana shu metodni chaqirmasin (recalc_result_on_answer_save)
+        token = _recalculating_results.set(True)
+        try:
+            self._save_recalculated_answers(questions, answers_json, answers_by_q)
+        finally:
+            _recalculating_results.reset(token)
+
+        self.answers_json = stamp_answers_meta(answers_json, exam_variant)
+        self.save(update_fields=[
+            'total_questions', 'correct_answers', 'wrong_answers',
+            'score', 'percentage', 'answers_json',
+        ])
+
+    def _save_recalculated_answers(self, questions, answers_json, answers_by_q):
+        from core.test_session_helpers import score_question_points
+
         for q in questions:
+            value = decode_answer(answers_json.get(str(q.pk)))
+            if not value and answers_by_q.get(q.pk):
+                value = answers_by_q[q.pk].parsed_answer
+            ua = answer_text(value)
             if q.question_type == 'essay':
-                ua = (answers_json.get(str(q.pk), '') or '').strip()
-                if not ua and answers_by_q.get(q.pk):
-                    ua = (answers_by_q[q.pk].user_answer or '').strip()
                 if ua:
                     UserTestAnswer.objects.update_or_create(
                         test_result=self,
@@ -1176,10 +1178,7 @@ class UserTestResult(models.Model):
                         defaults={'user_answer': ua, 'is_correct': False},
                     )
                 continue
-            ua = (answers_json.get(str(q.pk), '') or '').strip()
-            if not ua and answers_by_q.get(q.pk):
-                ua = (answers_by_q[q.pk].user_answer or '').strip()
-            pts, tot = score_question_points(q, ua)
+            pts, tot = score_question_points(q, value)
             UserTestAnswer.objects.update_or_create(
                 test_result=self,
                 question=q,
@@ -1189,12 +1188,6 @@ class UserTestResult(models.Model):
                 },
             )
 
-        self.answers_json = stamp_answers_meta(answers_json, exam_variant)
-        self.save(update_fields=[
-            'total_questions', 'correct_answers', 'wrong_answers',
-            'score', 'percentage', 'answers_json',
-        ])
-
     def is_passed(self):
         """Test o'tildimi?"""
         return self.percentage >= self.test.passing_score
@@ -1249,6 +1242,13 @@ class UserTestAnswer(models.Model):
     user_answer = models.TextField(blank=True, verbose_name="Foydalanuvchi javobi")
     is_correct = models.BooleanField(default=False, verbose_name="To'g'ri")
     answered_at = models.DateTimeField(auto_now_add=True, verbose_name="Javob berilgan vaqt")
+    # Essay: qo'lda baholash (IELTS band 0–9, 0.5 qadam)
+    band_score = models.DecimalField(max_digits=3, decimal_places=1, null=True, blank=True, verbose_name="Band")
+    needs_grading = models.BooleanField(default=False, editable=False, verbose_name="Baholash kutilmoqda")
+    graded_at = models.DateTimeField(null=True, blank=True, verbose_name="Baholangan vaqt")
+    graded_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='graded_answers', verbose_name="Baholovchi",
+    )
 
     class Meta:
         verbose_name = "Test Javobi"
@@ -1256,11 +1256,32 @@ class UserTestAnswer(models.Model):
         ordering = ['test_result', 'question__order']
         indexes = [
             models.Index(fields=['test_result', 'question']),
+            # Essay baholash navbati: faqat baholanmaganlar (pk bo'yicha keyset)
+            models.Index(fields=['id'], condition=models.Q(needs_grading=True), name='core_answer_grading_queue'),
         ]
 
     def __str__(self):
         return f"{self.test_result.user.username} - {self.question} - {self.user_answer}"
 
+    def save(self, *args, **kwargs):
+        pending = self.band_score is None and bool((self.user_answer or '').strip())
+        if self._state.adding or 'question' in self._state.fields_cache:
+            self.needs_grading = pending and self.question.question_type == 'essay'
+        else:
+            # update_or_create topgan qator: savol yuklanmagan — har qator uchun SELECT qilmaslik uchun
+            # belgi faqat o'chiriladi (savol turi yaratilganda hisobga olingan)
+            self.needs_grading = self.needs_grading and pending
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            # update_or_create faqat defaults maydonlarini yozadi
+            kwargs['update_fields'] = {*update_fields, 'needs_grading'}
+        super().save(*args, **kwargs)
+
+    @cached_property
+    def parsed_answer(self):
+        """user_answer typed ko'rinishda (str/list/dict) — so'rov davomida bir marta parse qilinadi."""
+        return decode_answer(self.user_answer)
+
     def check_answer(self):
         """Javobni tekshirish — savol turiga qarab Question.check_user_answer ishlatiladi."""
         self.is_correct = self.question.check_user_answer(self.user_answer)
@@ -1300,11 +1321,7 @@ class UserVideoProgress(models.Model):
 
     def update_progress(self, percentage):
         """Progress yangilash"""
-        self.watch_percentage = min(100, max(0, percentage))
-        if self.watch_percentage >= 90:
-            self.watched = True
-            if not self.completed_at:
-                self.completed_at = timezone.now()
+        apply_watch_progress(self, percentage)
         self.save()
 
 
@@ -1337,6 +1354,26 @@ class UserActivity(models.Model):
         return f"{self.user.username} - {self.get_activity_type_display()} - {self.created_at}"
 
 
+class UserActivityDailyRollup(models.Model):
+    """Faollikning kunlik yig'indisi — xom yozuvlar arxivlangandan keyin ham uzoq muddatli grafiklar uchun"""
+    day = models.DateField(verbose_name="Kun")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activity_rollups', verbose_name="Foydalanuvchi")
+    activity_type = models.CharField(max_length=20, choices=UserActivity.ACTIVITY_TYPES, verbose_name="Faollik turi")
+    count = models.PositiveIntegerField(default=0, verbose_name="Soni")
+
+    class Meta:
+        verbose_name = "Kunlik faollik yig'indisi"
+        verbose_name_plural = "Kunlik faollik yig'indilari"
+        ordering = ['-day']
+        unique_together = ['day', 'user', 'activity_type']
+        indexes = [
+            models.Index(fields=['day', 'activity_type']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} - {self.user_id} - {self.activity_type}: {self.count}"
+
+
 class AdminAnnouncement(models.Model):
     """Admin tomonidan beriladigan umumiy e'lonlar."""
     title = models.CharField(max_length=200, verbose_name="Sarlavha")
@@ -1516,6 +1553,7 @@ class VideoComment(models.Model):
     video = models.ForeignKey(VideoLesson, on_delete=models.CASCADE, related_name='comments', verbose_name="Video")
     comment_text = models.TextField(verbose_name="Izoh matni")
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies', verbose_name="Javob")
+    reply_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Javoblar soni")
     is_edited = models.BooleanField(default=False, verbose_name="Tahrirlangan")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan vaqt")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Yangilangan vaqt")
@@ -1535,8 +1573,8 @@ class VideoComment(models.Model):
 
     @property
     def replies_count(self):
-        """Javoblar soni"""
-        return self.replies.count()
+        """Javoblar soni (bevosita javoblar)"""
+        return self.reply_count
 
 
 class VideoPlaylist(models.Model):
@@ -1546,6 +1584,7 @@ class VideoPlaylist(models.Model):
     description = models.TextField(blank=True, verbose_name="Tavsif")
     is_public = models.BooleanField(default=False, verbose_name="Ochiq")
     videos = models.ManyToManyField(VideoLesson, through='PlaylistVideo', related_name='playlists', verbose_name="Videolar")
+    video_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Videolar soni")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan vaqt")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Yangilangan vaqt")
 
@@ -1564,7 +1603,7 @@ class VideoPlaylist(models.Model):
     @property
     def videos_count(self):
         """Videolar soni"""
-        return self.videos.count()
+        return self.video_count
 
 
 class PlaylistVideo(models.Model):
@@ -1694,6 +1733,7 @@ class SATResource(models.Model):
         ordering = ['subject', 'order', '-created_at']
         indexes = [
             models.Index(fields=['subject', 'is_active']),
+            models.Index(fields=['subject', 'is_active', 'order']),
         ]
 
     def __str__(self):
@@ -1725,19 +1765,29 @@ class SATResourceProgress(models.Model):
         indexes = [
             models.Index(fields=['user', 'resource']),
             models.Index(fields=['user', 'watched']),
+            models.Index(fields=['user', 'watch_percentage']),
         ]
 
     def __str__(self):
         return f"{self.user.username} - {self.resource.title} ({self.watch_percentage}%)"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Yuklangan holat eslab qolinadi — tavsiyalar faqat holat o'zgarganda qayta quriladi (signal)."""
+        instance = super().from_db(db, field_names, values)
+        if 'watch_percentage' in field_names and 'watched' in field_names:
+            instance._loaded_status = instance.recommendation_status
+        return instance
+
+    @property
+    def recommendation_status(self):
+        """Tavsiyaga ta'sir qiluvchi holat: (boshlangan, yakunlangan)."""
+        return (self.watch_percentage > 0, self.watched)
+
     def update_progress(self, percentage, position_seconds=None):
-        self.watch_percentage = min(100, max(0, int(percentage or 0)))
+        apply_watch_progress(self, percentage)
         if position_seconds is not None:
             self.last_position_seconds = max(0, int(position_seconds or 0))
-        if self.watch_percentage >= 90:
-            self.watched = True
-            if not self.completed_at:
-                self.completed_at = timezone.now()
         self.save()
 
 
@@ -1791,15 +1841,226 @@ class SATResourceNote(models.Model):
         return f"{self.user.username} - {self.resource.title}"
 
 
+class UserRecommendation(models.Model):
+    """Foydalanuvchi uchun oldindan hisoblangan tavsiyalar (core.recommendations quradi)."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='recommendation', verbose_name="Foydalanuvchi")
+    avg_score = models.FloatField(default=0.0, verbose_name="O'rtacha natija (%)")
+    # [{"category_id", "avg_score", "count"}, ...] — eng zaifidan
+    weak_areas = models.JSONField(default=list, blank=True, verbose_name="Zaif kategoriyalar")
+    test_ids = models.JSONField(default=list, blank=True, verbose_name="Tavsiya testlar (tartib bilan)")
+    sat_resource_ids = models.JSONField(default=list, blank=True, verbose_name="Tavsiya SAT resurslar (tartib bilan)")
+    tests_built_at = models.DateTimeField(null=True, blank=True, verbose_name="Testlar hisoblangan vaqt")
+    sat_built_at = models.DateTimeField(null=True, blank=True, verbose_name="SAT hisoblangan vaqt")
+
+    class Meta:
+        verbose_name = "Foydalanuvchi tavsiyasi"
+        verbose_name_plural = "Foydalanuvchi tavsiyalari"
+
+    def __str__(self):
+        return f"{self.user.username} tavsiyalari"
+
+
+class TestItemAnalysis(models.Model):
+    """Test bo'yicha item-analiz holati: qaysi vaqtgacha yakunlangan urinishlar hisobga olingan (core.item_analysis)."""
+    test = models.OneToOneField(Test, on_delete=models.CASCADE, related_name='item_analysis', verbose_name="Test")
+    analyzed_until = models.DateTimeField(null=True, blank=True, verbose_name="Hisoblangan vaqtgacha")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Urinishlar")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Yangilangan")
+
+    class Meta:
+        verbose_name = "Test item-analizi"
+        verbose_name_plural = "Test item-analizlari"
+
+    def __str__(self):
+        return f"{self.test.title} item-analizi"
+
+
+class QuestionItemStats(models.Model):
+    """Savol statistikasi: qiyinlik (p), ajrata olish (point-biserial), distraktorlar, bo'sh joylar aniqligi.
+
+    Yig'indilar saqlanadi — yangi urinishlar qo'shilganda qayta o'qish shart emas.
+    """
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, related_name='item_stats', verbose_name="Savol")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Urinishlar")
+    answered = models.PositiveIntegerField(default=0, verbose_name="Javob berilgan")
+    # x — savol balli (0..1), y — qolgan savollar yig'indisi
+    sum_x = models.FloatField(default=0.0)
+    sum_x2 = models.FloatField(default=0.0)
+    sum_y = models.FloatField(default=0.0)
+    sum_y2 = models.FloatField(default=0.0)
+    sum_xy = models.FloatField(default=0.0)
+    p_value = models.FloatField(null=True, blank=True, verbose_name="Qiyinlik (p)")
+    discrimination = models.FloatField(null=True, blank=True, verbose_name="Ajrata olish (r_pb)")
+    # {"a": 120, "b": 14, ...} — MCQ/T-F tanlovlari
+    distractors = models.JSONField(default=dict, blank=True, verbose_name="Tanlovlar")
+    # [to'g'ri_soni_1, to'g'ri_soni_2, ...] — fill turlarida har bo'sh joy
+    blank_correct = models.JSONField(default=list, blank=True, verbose_name="Bo'sh joylar (to'g'ri)")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Yangilangan")
+
+    class Meta:
+        verbose_name = "Savol statistikasi"
+        verbose_name_plural = "Savol statistikalari"
+
+    def __str__(self):
+        return f"{self.question} statistikasi"
+
+    @property
+    def blank_accuracy(self):
+        if not self.attempts:
+            return []
+        return [round(count * 100 / self.attempts, 1) for count in self.blank_correct]
+
+
+class Job(models.Model):
+    """Uzoq davom etadigan admin amali — navbatga qo'yiladi, run_jobs worker bajaradi (core.jobs)."""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Navbatda'),
+        (STATUS_RUNNING, 'Bajarilmoqda'),
+        (STATUS_SUCCEEDED, 'Tugadi'),
+        (STATUS_FAILED, 'Xato'),
+    ]
+
+    kind = models.CharField(max_length=64, verbose_name="Vazifa turi")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="Parametrlar")
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED, verbose_name="Holat")
+    progress = models.PositiveIntegerField(default=0, verbose_name="Bajarildi")
+    total = models.PositiveIntegerField(default=0, verbose_name="Jami")
+    log = models.TextField(blank=True, verbose_name="Jurnal")
+    error = models.TextField(blank=True, verbose_name="Oxirgi xato")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Urinishlar")
+    max_attempts = models.PositiveIntegerField(default=3, verbose_name="Maksimal urinish")
+    run_after = models.DateTimeField(default=timezone.now, verbose_name="Boshlash vaqti")
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name="Worker")
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name="Olingan vaqt")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs', verbose_name="Kim qo'ydi")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Boshlangan")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Tugagan")
+
+    class Meta:
+        verbose_name = "Fon vazifasi"
+        verbose_name_plural = "Fon vazifalari"
+        ordering = ['-created_at']
+        indexes = [
+            # Worker navbatdan olishi: status='queued' AND run_after <= now ORDER BY run_after, id
+            models.Index(fields=['status', 'run_after'], name='core_job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.kind} ({self.get_status_display()})"
+
+    @property
+    def percent(self):
+        if self.status == self.STATUS_SUCCEEDED:
+            return 100
+        if not self.total:
+            return 0
+        return min(100, int(self.progress * 100 / self.total))
+
+
 # Signal: UserTestAnswer o'zgarganda natijani qayta hisoblash (admin essay baholaganda)
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 
 @receiver(post_save, sender=UserTestAnswer)
 def recalc_result_on_answer_save(sender, instance, created, **kwargs):
     """UserTestAnswerAdmin orqali is_correct o'zgartirilganda natijani yangilash"""
-    if created:
-        return  # finish_test da view o'zi hisoblaydi
+    if created or _recalculating_results.get():
+        return  # finish_test da view o'zi hisoblaydi; recalculate_from_answers ichidagi yozuvlar
     if instance.test_result_id:
         instance.test_result.recalculate_from_answers()
+
+
+@receiver([post_save, post_delete], sender=Test)
+@receiver([post_save, post_delete], sender=Question)
+@receiver([post_save, post_delete], sender=ReadingPassage)
+def bump_test_content_version(sender, instance, **kwargs):
+    """Test, savol yoki passage o'zgarganda imtihon fragmentlari keshini eskirtirish"""
+    from core.content_versions import bump_content_version
+
+    test_id = instance.pk if sender is Test else instance.test_id
+    if test_id:
+        bump_content_version('test', test_id)
+
+
+@receiver(post_save, sender=Question)
+def enqueue_answer_key_rescore(sender, instance, created, **kwargs):
+    """Javob kaliti o'zgarganda shu savol javoblarini fon vazifasida qayta baholash (commit dan keyin)"""
+    from django.db import transaction
+    from core.answer_key import answer_key_snapshot
+
+    old_key = instance.__dict__.pop('_stored_answer_key', None)
+    new_key = answer_key_snapshot(instance)
+    if created or old_key is None or old_key == new_key:
+        return
+
+    def enqueue():
+        from core import jobs
+
+        if UserTestAnswer.objects.filter(question_id=instance.pk).exists():
+            jobs.enqueue('rescore_question', {'question_id': instance.pk, 'old_key': old_key, 'new_key': new_key})
+
+    transaction.on_commit(enqueue)
+
+
+@receiver([post_save, post_delete], sender=VideoLesson)
+@receiver([post_save, post_delete], sender=SATResource)
+def bump_resource_content_version(sender, instance, **kwargs):
+    """Video yoki SAT resurs o'zgarganda uning kartasi (fragment keshi) eskiradi"""
+    from core.content_versions import bump_content_version
+
+    bump_content_version('video' if sender is VideoLesson else 'sat_resource', instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Category)
+def bump_category_tree_version(sender, instance, **kwargs):
+    """Kategoriya o'zgarganda jarayonlardagi daraxtni eskirtirish.
+    Commit dan keyin yana bir bor — tranzaksiya davomida boshqa jarayon eski qatorlarni yangi versiya bilan saqlamasin."""
+    from django.db import transaction
+    from core.category_tree import VERSION_ID, VERSION_NAMESPACE
+    from core.content_versions import bump_content_version
+
+    bump_content_version(VERSION_NAMESPACE, VERSION_ID)
+    transaction.on_commit(lambda: bump_content_version(VERSION_NAMESPACE, VERSION_ID))
+
+
+@receiver([post_save, post_delete], sender=VideoComment)
+def invalidate_video_comments_page(sender, instance, **kwargs):
+    """Izoh yozilganda/o'chirilganda birinchi sahifa keshini eskirtirish (commit dan keyin ham — reply_count yangilanadi)"""
+    from django.db import transaction
+    from core.video_comments import invalidate_first_page
+
+    video_id = instance.video_id
+    invalidate_first_page(video_id)
+    transaction.on_commit(lambda: invalidate_first_page(video_id))
+
+
+@receiver([post_save, post_delete], sender=UserTestResult)
+def refresh_test_recommendations_on_result(sender, instance, **kwargs):
+    """Yakunlangan natija qo'shilganda/o'chirilganda foydalanuvchining test tavsiyalarini commit dan keyin qayta qurish"""
+    if instance.completed_at is None:
+        return
+    from core.recommendations import schedule_recommendation_rebuild
+
+    schedule_recommendation_rebuild('tests', instance.user_id)
+
+
+@receiver(post_save, sender=SATResourceProgress)
+def refresh_sat_recommendations_on_progress(sender, instance, created, **kwargs):
+    """
+    Yangi resurs ochilganda yoki holat (boshlandi / yakunlandi) o'zgarganda SAT tavsiyalarini commit dan keyin
+    qayta qurish. Oddiy progress yangilanishlari (har necha soniyada) qayta qurmaydi — eski resursga qaytib
+    bo'lim almashtirilishi kechki rebuild_recommendations da hisobga olinadi.
+    """
+    from core.recommendations import schedule_recommendation_rebuild
+
+    status = instance.recommendation_status
+    if not created and getattr(instance, '_loaded_status', None) == status:
+        return
+    instance._loaded_status = status
+    schedule_recommendation_rebuild('sat', instance.user_id)
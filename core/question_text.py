@@ -0,0 +1,98 @@
+"""
+Savol matni shabloni: question_text bir marta tokenlarga kompilyatsiya qilinadi va Question.text_template da saqlanadi.
+
+    {"v": 1,
+     "parts": [{"text": "The "}, {"slot": 1, "label": "15", "max_words": 2}, {"text": " is ..."}],
+     "slots": 1,            # [..] qavslar soni (fill / summary_box o'rinlari)
+     "numbered": true,      # matnda [15] kabi raqamli qavs bor (inline input)
+     "max_words": 2,        # bitta bo'sh joy uchun so'z cheklovi (None — cheklov yo'q)
+     "item_max_words": []}  # short_answer_items bo'yicha alohida cheklovlar
+
+Question.save() shablonni yangilaydi; slot sanash, inline input/select qurish va so'z cheklovi regex o'rniga shu
+shakldan o'qiladi. Kompilyator o'zgarsa TEXT_TEMPLATE_VERSION oshiriladi — eski qatorlar o'qilganda qayta quriladi.
+"""
+import re
+
+TEXT_TEMPLATE_VERSION = 1
+PLACEHOLDER_RE = re.compile(r'\[([^\]]+)\]')
+# Kompilyatsiyaga ta'sir qiluvchi maydonlar (save(update_fields=...) uchun)
+SOURCE_FIELDS = frozenset({'question_text', 'question_type', 'options_json'})
+
+
+def detect_max_words(instruction, question_text):
+    """Ko'rsatma yoki savol matnidagi ONE WORD / TWO WORDS / THREE WORDS dan cheklov (None — topilmadi)."""
+    inst = (instruction or '').upper()
+    # Listening (Notes/Summary completion) odatda: "ONE WORD AND/OR A NUMBER"
+    if ('ONE WORD' in inst) and ('AND/OR' in inst) and ('NUMBER' in inst):
+        return 1
+    if 'NO MORE THAN TWO WORDS' in inst or ('TWO WORDS' in inst and 'THREE' not in inst):
+        return 2
+    if 'NO MORE THAN THREE WORDS' in inst or 'THREE WORDS' in inst:
+        return 3
+    if 'ONE WORD ONLY' in inst or ('ONE WORD' in inst and 'TWO' not in inst and 'THREE' not in inst):
+        return 1
+    qt = (question_text or '')[:800].upper()
+    if ('ONE WORD' in qt) and ('AND/OR' in qt) and ('NUMBER' in qt):
+        return 1
+    if 'NO MORE THAN TWO WORDS' in qt or ('TWO WORDS' in qt and 'THREE' not in qt):
+        return 2
+    if 'NO MORE THAN THREE WORDS' in qt or 'THREE WORDS' in qt:
+        return 3
+    if 'ONE WORD ONLY' in qt:
+        return 1
+    return None
+
+
+def _max_words(opts, question_text):
+    mw = opts.get('max_words_per_blank')
+    if mw is not None:
+        try:
+            return max(1, int(mw))
+        except (TypeError, ValueError):
+            pass
+    return detect_max_words(opts.get('instruction'), question_text)
+
+
+def _item_max_words(opts, question_type):
+    """short_answer_items[i].max_words (1/2/3) yoki None."""
+    items = opts.get('short_answer_items') if question_type == 'short_answer' else None
+    if not isinstance(items, list):
+        return []
+    limits = []
+    for item in items:
+        try:
+            mw = int(item.get('max_words')) if isinstance(item, dict) else None
+        except (TypeError, ValueError):
+            mw = None
+        limits.append(mw if mw in (1, 2, 3) else None)
+    return limits
+
+
+def compile_question_text(question):
+    """Question → text_template lug'ati (yuqoridagi tuzilma)."""
+    text = question.question_text or ''
+    opts = question.options_json if isinstance(question.options_json, dict) else {}
+    max_words = _max_words(opts, text)
+    item_max_words = _item_max_words(opts, question.question_type)
+    parts = []
+    last = 0
+    slots = 0
+    numbered = False
+    for m in PLACEHOLDER_RE.finditer(text):
+        if m.start() > last:
+            parts.append({'text': text[last:m.start()]})
+        slots += 1
+        numbered = numbered or m.group(1).isdigit()
+        limit = item_max_words[slots - 1] if slots <= len(item_max_words) else None
+        parts.append({'slot': slots, 'label': m.group(1).strip(), 'max_words': limit or max_words})
+        last = m.end()
+    if last < len(text):
+        parts.append({'text': text[last:]})
+    return {
+        'v': TEXT_TEMPLATE_VERSION,
+        'parts': parts,
+        'slots': slots,
+        'numbered': numbered,
+        'max_words': max_words,
+        'item_max_words': item_max_words,
+    }
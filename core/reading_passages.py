@@ -0,0 +1,106 @@
+"""
+Reading passage lar uchun yagona manba: test versiyasi bo'yicha bir marta hisoblanadi va keshda turadi.
+
+Tarkib (hammasi oddiy dict/list — keshga pickle qilinadi):
+- passages: Test.get_reading_passages() natijasi (flat yoki [[v1...], [v2...]]), har dictda word_count;
+- ordered: DB dagi barcha passage lar order bo'yicha (variantdan qat'i nazar);
+- count: partlar soni uchun passage soni (ko'p variantda — birinchi variantdagi);
+- by_part / ordered_by_part: Part N → passage (flat ro'yxat va ordered uchun).
+
+Test yoki ReadingPassage saqlanganda/o'chirilganda kontent versiyasi yangilanadi (models.py signal),
+shuning uchun eski struktura hech qachon qaytmaydi.
+"""
+from django.core.cache import cache
+
+from .content_versions import get_content_version
+
+CACHE_TIMEOUT = 60 * 60 * 24
+_INSTANCE_ATTR = '_reading_passages_resolved'
+
+
+def _cache_key(test_id, version):
+    return f'core:reading_passages:{test_id}:{version}'
+
+
+def _word_count(text):
+    return len((text or '').split())
+
+
+def _with_word_count(row):
+    row = dict(row)
+    row['word_count'] = _word_count(row.get('text'))
+    return row
+
+
+def _part_map(items):
+    """Part N → passage: order==N bo'lgan matn, bo'lmasa ro'yxatdagi N-o'rindagisi."""
+    if not items:
+        return {}
+    by_order = {}
+    for row in items:
+        try:
+            by_order.setdefault(int(row.get('order')), row)
+        except (TypeError, ValueError):
+            continue
+    out = {}
+    for n in range(1, max([len(items)] + list(by_order)) + 1):
+        row = by_order.get(n)
+        if row is None and n <= len(items):
+            row = items[n - 1]
+        if row is not None:
+            out[n] = row
+    return out
+
+
+def _ordered_inline(objs):
+    out = []
+    for i, p in enumerate(sorted(objs, key=lambda x: (x.order, x.pk))):
+        o = p.order
+        if o is None:
+            o = i + 1
+        try:
+            o = int(o)
+        except (TypeError, ValueError):
+            o = i + 1
+        title = (p.title or '').strip() or f'Passage {o}'
+        out.append(_with_word_count({'title': title, 'text': p.text or '', 'order': o}))
+    return out
+
+
+def build_reading_passages(test):
+    """Keshsiz hisoblash: passage jadvali bir marta o'qiladi."""
+    objs = list(test.reading_passages.all().order_by('variant', 'order', 'pk'))
+    raw = test._build_reading_passages(objs)
+    if raw and isinstance(raw[0], list):
+        passages = [[_with_word_count(p) for p in sub] for sub in raw]
+        count = len(passages[0])
+        by_part = {}
+    else:
+        passages = [_with_word_count(p) for p in raw]
+        count = len(passages)
+        by_part = _part_map(passages)
+    ordered = _ordered_inline(objs)
+    return {
+        'passages': passages,
+        'ordered': ordered,
+        'ordered_by_part': _part_map(ordered),
+        'by_part': by_part,
+        'count': count,
+    }
+
+
+def resolve_reading_passages(test):
+    """Normallashtirilgan passage strukturasi: instansiyada (so'rov ichida) va keshda (versiya bo'yicha)."""
+    if test.pk is None:
+        return build_reading_passages(test)
+    version = get_content_version('test', test.pk)
+    memo = getattr(test, _INSTANCE_ATTR, None)
+    if memo is not None and memo[0] == version:
+        return memo[1]
+    key = _cache_key(test.pk, version)
+    data = cache.get(key)
+    if data is None:
+        data = build_reading_passages(test)
+        cache.set(key, data, CACHE_TIMEOUT)
+    setattr(test, _INSTANCE_ATTR, (version, data))
+    return data
@@ -0,0 +1,255 @@
+"""
+Foydalanuvchi tavsiyalari: har so'rovda hisoblash o'rniga oldindan qurilgan ro'yxat (UserRecommendation).
+
+Natija yakunlanganda yoki SAT progress holati o'zgarganda faqat shu foydalanuvchi qismi qayta quriladi (models.py
+signal, bitta tranzaksiyada bir marta), yangi testlar/resurslar uchun esa `rebuild_recommendations` buyrug'i kechasi
+hammasini yangilaydi.
+Sahifalar bitta qatorni o'qiydi; reyting Python da, katalog (id, kategoriya, qiyinlik) bitta so'rov bilan olinadi.
+"""
+import threading
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import SATResource, SATResourceProgress, Test, UserRecommendation, UserTestResult
+
+# Serve vaqtida filtrlar (joriy ro'yxat, nofaol testlar) uchun zaxira bilan saqlanadi
+TEST_RECOMMENDATION_LIMIT = 24
+SAT_RECOMMENDATION_LIMIT = 6
+WEAK_SCORE_THRESHOLD = 50
+WEAK_MIN_RESULTS = 2
+# Commit dan keyin qayta qurilishi kutilayotgan (kind, user_id) kalitlari (har thread — o'z ulanishi)
+_pending_rebuilds = threading.local()
+
+
+def recommended_difficulty(avg_score):
+    if avg_score < 50:
+        return 'easy'
+    if avg_score < 70:
+        return 'medium'
+    return 'hard'
+
+
+def load_test_catalogue():
+    """Faol testlar: (id, category_id, difficulty, created_at)."""
+    return list(
+        Test.objects.filter(is_active=True)
+        .order_by()
+        .values_list('id', 'category_id', 'difficulty', 'created_at')
+    )
+
+
+def load_sat_catalogue():
+    """Faol SAT resurslar sahifadagi tartibda: (id, subject)."""
+    return list(
+        SATResource.objects.filter(is_active=True)
+        .order_by('order', '-created_at', 'pk')
+        .values_list('id', 'subject')
+    )
+
+
+def rank_tests(catalogue, category_stats, completed_ids, limit=TEST_RECOMMENDATION_LIMIT):
+    """category_stats: {category_id: (foizlar yig'indisi, natijalar soni)}. (avg_score, weak_areas, test_ids) qaytaradi.
+
+    Daraja o'rtacha natija bo'yicha; zaif kategoriyalar oldinda (eskisidan), aks holda eng yangilari.
+    """
+    total = sum(count for _, count in category_stats.values())
+    avg_score = (sum(score for score, _ in category_stats.values()) / total) if total else 0.0
+    weak_areas = sorted(
+        (
+            {'category_id': cid, 'avg_score': round(score / count, 1), 'count': count}
+            for cid, (score, count) in category_stats.items()
+            if count >= WEAK_MIN_RESULTS and score / count < WEAK_SCORE_THRESHOLD
+        ),
+        key=lambda area: (area['avg_score'], area['category_id']),
+    )
+    weak_ids = {area['category_id'] for area in weak_areas}
+    difficulty = recommended_difficulty(avg_score)
+    candidates = [row for row in catalogue if row[2] == difficulty and row[0] not in completed_ids]
+    if weak_ids:
+        candidates.sort(key=lambda row: (0 if row[1] in weak_ids else 1, row[3], row[0]))
+    else:
+        candidates.sort(key=lambda row: (row[3], row[0]), reverse=True)
+    return avg_score, weak_areas, [row[0] for row in candidates[:limit]]
+
+
+def rank_sat_resources(catalogue, last_subject, started_ids, limit=SAT_RECOMMENDATION_LIMIT):
+    """Oxirgi ko'rilgan bo'limdagi boshlanmaganlar; bo'lmasa istalgan boshlanmagan; bo'lmasa boshidan."""
+    unstarted = [row for row in catalogue if row[0] not in started_ids]
+    ranked = [row for row in unstarted if row[1] == last_subject] if last_subject else unstarted
+    ranked = ranked or unstarted or catalogue
+    return [row[0] for row in ranked[:limit]]
+
+
+def _test_inputs(user_ids):
+    """Foydalanuvchilar partiyasi uchun kategoriya statistikasi va ishlangan testlar — 2 ta so'rov."""
+    stats = {uid: {} for uid in user_ids}
+    completed = {uid: set() for uid in user_ids}
+    rows = (
+        UserTestResult.objects.filter(user_id__in=user_ids, completed_at__isnull=False)
+        .values('user_id', 'test__category_id')
+        .annotate(score=Sum('percentage'), count=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        stats[row['user_id']][row['test__category_id']] = (row['score'] or 0.0, row['count'])
+    pairs = (
+        UserTestResult.objects.filter(user_id__in=user_ids, completed_at__isnull=False)
+        .values_list('user_id', 'test_id')
+        .distinct()
+        .order_by()
+    )
+    for uid, test_id in pairs:
+        completed[uid].add(test_id)
+    return stats, completed
+
+
+def _sat_inputs(user_ids):
+    """Oxirgi ko'rilgan bo'lim va boshlangan resurslar — bitta so'rov."""
+    last_subject = {}
+    started = {uid: set() for uid in user_ids}
+    rows = (
+        SATResourceProgress.objects.filter(user_id__in=user_ids)
+        .order_by('user_id', '-last_accessed_at')
+        .values_list('user_id', 'resource_id', 'resource__subject', 'watch_percentage')
+    )
+    for uid, resource_id, subject, percentage in rows:
+        last_subject.setdefault(uid, subject)
+        if percentage > 0:
+            started[uid].add(resource_id)
+    return last_subject, started
+
+
+def _store(user_id, fields):
+    UserRecommendation.objects.update_or_create(user_id=user_id, defaults=fields)
+
+
+def _test_fields(user_id, catalogue, stats, completed, now):
+    avg_score, weak_areas, test_ids = rank_tests(catalogue, stats.get(user_id, {}), completed.get(user_id, set()))
+    return {'avg_score': avg_score, 'weak_areas': weak_areas, 'test_ids': test_ids, 'tests_built_at': now}
+
+
+def _sat_fields(user_id, catalogue, last_subject, started, now):
+    ids = rank_sat_resources(catalogue, last_subject.get(user_id), started.get(user_id, set()))
+    return {'sat_resource_ids': ids, 'sat_built_at': now}
+
+
+def rebuild_test_recommendations(user_id, catalogue=None):
+    if catalogue is None:
+        catalogue = load_test_catalogue()
+    stats, completed = _test_inputs([user_id])
+    fields = _test_fields(user_id, catalogue, stats, completed, timezone.now())
+    _store(user_id, fields)
+    return fields
+
+
+def rebuild_sat_recommendations(user_id, catalogue=None):
+    if catalogue is None:
+        catalogue = load_sat_catalogue()
+    last_subject, started = _sat_inputs([user_id])
+    fields = _sat_fields(user_id, catalogue, last_subject, started, timezone.now())
+    _store(user_id, fields)
+    return fields
+
+
+def schedule_recommendation_rebuild(kind, user_id):
+    """
+    kind ('tests' / 'sat') qismini commit dan keyin qayta qurish. Bir tranzaksiyada bir necha marta chaqirilsa ham
+    commit da bir marta quriladi: kalit _pending_rebuilds da, birinchi callback uni olib tashlab quradi, qolganlari
+    o'tkazib yuboradi. Rollback bo'lsa callback lar Django bilan birga tashlanadi, qolgan kalit zararsiz.
+    """
+    key = (kind, user_id)
+    pending = _pending_rebuilds.__dict__.setdefault('keys', set())
+    pending.add(key)
+    rebuild = rebuild_test_recommendations if kind == 'tests' else rebuild_sat_recommendations
+
+    def callback():
+        if key in pending:
+            pending.discard(key)
+            rebuild(user_id)
+
+    transaction.on_commit(callback)
+
+
+def rebuild_all_recommendations(batch_size=500, user_ids=None):
+    """Kechki to'liq qayta qurish: kataloglar bir marta, statistika har partiya uchun bir necha so'rov. Userlar soni qaytadi."""
+    test_catalogue = load_test_catalogue()
+    sat_catalogue = load_sat_catalogue()
+    users = User.objects.filter(is_active=True).order_by('pk')
+    if user_ids:
+        users = users.filter(pk__in=user_ids)
+    all_ids = list(users.values_list('pk', flat=True))
+    for start in range(0, len(all_ids), batch_size):
+        batch = all_ids[start:start + batch_size]
+        stats, completed = _test_inputs(batch)
+        last_subject, started = _sat_inputs(batch)
+        now = timezone.now()
+        existing = {r.user_id: r for r in UserRecommendation.objects.filter(user_id__in=batch)}
+        fresh = []
+        for uid in batch:
+            fields = _test_fields(uid, test_catalogue, stats, completed, now)
+            fields.update(_sat_fields(uid, sat_catalogue, last_subject, started, now))
+            obj = existing.get(uid) or UserRecommendation(user_id=uid)
+            for name, value in fields.items():
+                setattr(obj, name, value)
+            if obj.pk is None:
+                fresh.append(obj)
+        UserRecommendation.objects.bulk_create(fresh, batch_size=batch_size)
+        UserRecommendation.objects.bulk_update(
+            list(existing.values()),
+            ['avg_score', 'weak_areas', 'test_ids', 'sat_resource_ids', 'tests_built_at', 'sat_built_at'],
+            batch_size=batch_size,
+        )
+    return len(all_ids)
+
+
+def get_user_recommendations(user):
+    """Bitta qator; hali qurilmagan qism (yangi user) shu yerda quriladi."""
+    rec = UserRecommendation.objects.filter(user=user).first() or UserRecommendation(user=user)
+    fields = {}
+    now = timezone.now()
+    if rec.tests_built_at is None:
+        stats, completed = _test_inputs([user.pk])
+        fields.update(_test_fields(user.pk, load_test_catalogue(), stats, completed, now))
+    if rec.sat_built_at is None:
+        last_subject, started = _sat_inputs([user.pk])
+        fields.update(_sat_fields(user.pk, load_sat_catalogue(), last_subject, started, now))
+    if fields:
+        _store(user.pk, fields)
+        for name, value in fields.items():
+            setattr(rec, name, value)
+    return rec
+
+
+def _in_stored_order(objects, ids):
+    position = {pk: i for i, pk in enumerate(ids)}
+    return sorted(objects, key=lambda obj: position[obj.pk])
+
+
+def recommended_tests_for(rec, tree, exclude_ids=(), limit=6):
+    """Saqlangan tartibda faol, saytda ko'rinadigan testlar (exclude_ids — joriy ro'yxatdagilar)."""
+    ids = [pk for pk in rec.test_ids if pk not in exclude_ids]
+    if not ids:
+        return []
+    tests = Test.objects.filter(pk__in=ids, is_active=True, category_id__in=tree.site_visible_ids).select_related('category')
+    return _in_stored_order(tests, ids)[:limit]
+
+
+def weak_areas_for(rec, tree):
+    """Shablon uchun: kategoriya nomi va slug daraxtdan (so'rovsiz)."""
+    areas = []
+    for area in rec.weak_areas:
+        category = tree.by_id.get(area['category_id'])
+        if category is None:
+            continue
+        areas.append({**area, 'category_slug': category.slug, 'category_name': category.name})
+    return areas
+
+
+def recommended_sat_resources_for(rec, limit=3):
+    if not rec.sat_resource_ids:
+        return []
+    resources = SATResource.objects.filter(pk__in=rec.sat_resource_ids, is_active=True)
+    return _in_stored_order(resources, rec.sat_resource_ids)[:limit]
@@ -0,0 +1,324 @@
+"""
+Ommaviy qayta baholash: SCORING_VERSION oshganda yakunlangan natijalarni tunda bir yo'la yangilash.
+
+Aks holda needs_scoring_refresh har bir eski natijani birinchi ochilganda (sekin) qayta hisoblaydi.
+Bu yerda natijalar pk bo'yicha keyset bo'laklarda (pk > after_id) o'qiladi, har test savollari bir marta
+yuklanadi, bo'laklar ProcessPoolExecutor da baholanadi (faqat sof Python — bolalar bazaga tegmaydi)
+va natija bulk_update / bulk_create bilan yoziladi. Natija UserTestResult.recalculate_from_answers
+bilan bir xil: ballar, UserTestAnswer.is_correct va answers_json._meta.scoring_version.
+
+Har bo'lakdan keyin on_chunk(after_id, stats) chaqiriladi — checkpoint (fayl yoki Job payload),
+undan davom ettirish mumkin. dry_run — hech narsa yozilmaydi, faqat farqlar hisoboti.
+"""
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import transaction
+from django.db.models import Q
+
+from .answer_codec import answer_text, decode_answer
+from .models import Question, Test, UserTestAnswer, UserTestResult
+from .test_session_helpers import (
+    SCORING_VERSION,
+    band_percentage,
+    compute_session_scores,
+    exam_variant_from_answers,
+    normalize_exam_variant,
+    score_question_points,
+    stamp_answers_meta,
+)
+
+DEFAULT_CHUNK_SIZE = 500
+# Tezlik o'lchashdan oldin shuncha bo'lak (birinchi bo'laklarda savollar yuklanadi)
+WARMUP_CHUNKS = 3
+REPORT_SAMPLE_SIZE = 20
+RESULT_FIELDS = ['total_questions', 'correct_answers', 'wrong_answers', 'score', 'percentage', 'answers_json']
+
+
+class ThroughputError(RuntimeError):
+    """O'rtacha tezlik min_rate dan past — checkpoint saqlangan, worker qo'shib davom ettirish mumkin."""
+
+
+def rescoring_queryset(include_current=False):
+    """Yakunlangan natijalar; standart — faqat eski SCORING_VERSION bilan baholanganlari."""
+    qs = UserTestResult.objects.filter(completed_at__isnull=False)
+    if not include_current:
+        qs = qs.filter(
+            Q(answers_json___meta__scoring_version__isnull=True)
+            | Q(answers_json___meta__scoring_version__lt=SCORING_VERSION)
+        )
+    return qs
+
+
+class _Answer:
+    """compute_session_scores uchun UserTestAnswer o'rnini bosadi (pickle qilinadigan)."""
+    __slots__ = ('user_answer', 'band_score')
+
+    def __init__(self, user_answer, band_score=None):
+        self.user_answer = user_answer
+        self.band_score = band_score
+
+
+def _test_total(questions):
+    """Test.total_questions bilan bir xil — savollar qayta so'ralmaydi."""
+    slots = sum(q.gradable_answer_slots() for q in questions if q.question_type != 'essay')
+    return slots or len(questions)
+
+
+def _variant_questions(questions, max_variants, exam_variant):
+    """filter_questions_by_exam_variant ning xotiradagi varianti."""
+    if max_variants < 2:
+        return questions
+    variant = normalize_exam_variant(exam_variant, max_variants)
+    return [q for q in questions if q.variant is None or q.variant == variant]
+
+
+def score_result(questions, test_total, answers_json, stored_answers, bands=None):
+    """
+    Bitta natija: (maydonlar, {question_id: (user_answer, is_correct)}).
+    recalculate_from_answers + calculate_score mantig'i, bazasiz. bands — essaylarning band_score lari.
+    """
+    answers_json = answers_json if isinstance(answers_json, dict) else {}
+    bands = bands or {}
+    answers_by_q = {qid: _Answer(ua, bands.get(qid)) for qid, ua in stored_answers.items()}
+    scores = compute_session_scores(questions, answers_json, answers_by_q)
+    writing_manual = scores['writing_only']
+    if writing_manual:
+        total, correct = scores['essay_total'] or 1, scores['essays_submitted']
+    else:
+        total, correct = scores['total_slots'] or len(questions), scores['correct_pts']
+    if total == 0:
+        total = test_total
+    fields = {'total_questions': total, 'correct_answers': correct}
+    if total == 0:
+        fields.update(percentage=0.0, score=0)
+    else:
+        if not writing_manual:
+            percentage = round((correct / total) * 100, 2)
+        elif scores['writing_band'] is not None:
+            percentage = band_percentage(scores['writing_band'])
+        else:
+            percentage = 0.0
+        fields.update(score=correct, percentage=percentage, wrong_answers=max(0, total - correct))
+
+    rows = {}
+    for q in questions:
+        value = decode_answer(answers_json.get(str(q.pk)))
+        if not value and q.pk in stored_answers:
+            value = decode_answer(stored_answers[q.pk])
+        ua = answer_text(value)
+        if q.question_type == 'essay':
+            if ua:
+                rows[q.pk] = (ua, False)
+            continue
+        pts, tot = score_question_points(q, value)
+        rows[q.pk] = (ua, bool(tot) and pts >= tot)
+    return fields, rows
+
+
+def score_chunk(question_sets, items):
+    """ProcessPoolExecutor ichida: items = [(result_id, set_key, answers_json, stored_answers, bands, exam_variant)]."""
+    scored = []
+    for result_id, set_key, answers_json, stored_answers, bands, exam_variant in items:
+        questions, test_total = question_sets[set_key]
+        fields, rows = score_result(questions, test_total, answers_json, stored_answers, bands)
+        fields['answers_json'] = stamp_answers_meta(answers_json if isinstance(answers_json, dict) else {}, exam_variant)
+        scored.append((result_id, fields, rows))
+    return scored
+
+
+class BulkRescorer:
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, dry_run=False, include_current=False,
+                 max_rate=None, min_rate=None, on_chunk=None, queryset=None):
+        self.queryset = queryset if queryset is not None else rescoring_queryset(include_current)
+        self.chunk_size = max(1, chunk_size)
+        self.workers = max(1, workers)
+        self.dry_run = dry_run
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.on_chunk = on_chunk
+        self._tests = {}
+        self.stats = {
+            'scanned': 0, 'changed': 0, 'up': 0, 'down': 0, 'pass_flips': 0,
+            'max_delta': 0.0, 'delta_sum': 0.0, 'answers_updated': 0, 'answers_created': 0,
+            'after_id': 0, 'elapsed': 0.0, 'samples': [],
+        }
+
+    def remaining(self, after_id=0):
+        return self.queryset.filter(pk__gt=after_id).count()
+
+    def _load_tests(self, test_ids):
+        missing = set(test_ids) - set(self._tests)
+        if not missing:
+            return
+        by_test = {pk: [] for pk in missing}
+        for question in Question.objects.filter(test_id__in=missing).order_by('test_id', 'order', 'pk'):
+            by_test[question.test_id].append(question)
+        for pk, variants, passing in Test.objects.filter(pk__in=missing).values_list('pk', 'variants_to_select', 'passing_score'):
+            questions = by_test[pk]
+            self._tests[pk] = {
+                'questions': questions,
+                'essay_ids': {q.pk for q in questions if q.question_type == 'essay'},
+                'total': _test_total(questions),
+                'max_variants': int(variants or 1),
+                'passing_score': passing,
+            }
+
+    def _next_chunk(self, after_id, size):
+        results = list(
+            self.queryset
+            .filter(pk__gt=after_id)
+            .order_by('pk')
+            .only('pk', 'test_id', *RESULT_FIELDS)[:size]
+        )
+        if not results:
+            return None
+        self._load_tests({r.test_id for r in results})
+        stored, answers_by_result, bands_by_result = {}, {}, {}
+        for pk, result_id, question_id, user_answer, is_correct, band in UserTestAnswer.objects.filter(
+            test_result_id__in=[r.pk for r in results],
+        ).values_list('pk', 'test_result_id', 'question_id', 'user_answer', 'is_correct', 'band_score'):
+            stored[(result_id, question_id)] = (pk, user_answer, is_correct)
+            answers_by_result.setdefault(result_id, {})[question_id] = user_answer
+            if band is not None:
+                bands_by_result.setdefault(result_id, {})[question_id] = band
+
+        question_sets, items = {}, []
+        for result in results:
+            info = self._tests[result.test_id]
+            exam_variant = exam_variant_from_answers(result.answers_json)
+            set_key = (result.test_id, normalize_exam_variant(exam_variant, info['max_variants']) if info['max_variants'] >= 2 else 0)
+            if set_key not in question_sets:
+                question_sets[set_key] = (_variant_questions(info['questions'], info['max_variants'], exam_variant), info['total'])
+            items.append((
+                result.pk, set_key, result.answers_json,
+                answers_by_result.get(result.pk, {}), bands_by_result.get(result.pk, {}), exam_variant,
+            ))
+        return {'results': results, 'stored': stored, 'question_sets': question_sets, 'items': items}
+
+    def _record_diff(self, result, fields):
+        old, new = result.percentage or 0.0, fields['percentage']
+        if (result.total_questions, result.correct_answers, round(old, 2)) == (fields['total_questions'], fields['correct_answers'], new):
+            return
+        stats = self.stats
+        delta = new - old
+        stats['changed'] += 1
+        if delta > 0:
+            stats['up'] += 1
+        elif delta < 0:
+            stats['down'] += 1
+        stats['delta_sum'] += delta
+        stats['max_delta'] = max(stats['max_delta'], abs(delta))
+        passing = self._tests[result.test_id]['passing_score']
+        if (old >= passing) != (new >= passing):
+            stats['pass_flips'] += 1
+        if len(stats['samples']) < REPORT_SAMPLE_SIZE:
+            stats['samples'].append({
+                'result_id': result.pk, 'test_id': result.test_id,
+                'old_percentage': old, 'new_percentage': new,
+                'old_correct': result.correct_answers, 'new_correct': fields['correct_answers'],
+            })
+
+    def _apply(self, chunk, scored):
+        by_pk = {r.pk: r for r in chunk['results']}
+        answer_updates, answer_creates = [], []
+        for result_id, fields, rows in scored:
+            result = by_pk[result_id]
+            self._record_diff(result, fields)
+            for name, value in fields.items():
+                setattr(result, name, value)
+            essay_ids = self._tests[result.test_id]['essay_ids']
+            for question_id, (user_answer, is_correct) in rows.items():
+                existing = chunk['stored'].get((result_id, question_id))
+                if existing is None:
+                    # bulk_create save() ni chaqirmaydi — essay navbat belgisini shu yerda qo'yamiz
+                    answer_creates.append(UserTestAnswer(
+                        test_result_id=result_id, question_id=question_id, user_answer=user_answer, is_correct=is_correct,
+                        needs_grading=question_id in essay_ids,
+                    ))
+                elif (existing[1], existing[2]) != (user_answer, is_correct):
+                    answer_updates.append(UserTestAnswer(pk=existing[0], user_answer=user_answer, is_correct=is_correct))
+        self.stats['scanned'] += len(scored)
+        self.stats['answers_updated'] += len(answer_updates)
+        self.stats['answers_created'] += len(answer_creates)
+        if self.dry_run:
+            return
+        with transaction.atomic():
+            UserTestResult.objects.bulk_update(chunk['results'], RESULT_FIELDS, batch_size=500)
+            UserTestAnswer.objects.bulk_update(answer_updates, ['user_answer', 'is_correct'], batch_size=500)
+            UserTestAnswer.objects.bulk_create(answer_creates, batch_size=500)
+
+    def _finish_chunk(self, chunk, scored, started, chunks_done):
+        self._apply(chunk, scored)
+        self.stats['after_id'] = chunk['results'][-1].pk
+        self.stats['elapsed'] = time.monotonic() - started
+        if self.on_chunk:
+            self.on_chunk(self.stats['after_id'], self.stats)
+        rate = self.rate
+        if self.max_rate and rate > self.max_rate:
+            # Bazaga yuk bir tekis bo'lsin: maqsaddan tez bo'lsa kutamiz
+            time.sleep(self.stats['scanned'] / self.max_rate - self.stats['elapsed'])
+        if self.min_rate and chunks_done >= WARMUP_CHUNKS and rate < self.min_rate:
+            raise ThroughputError(
+                f"Tezlik {rate:.0f}/s < {self.min_rate}/s (after_id={self.stats['after_id']}). "
+                "Worker sonini oshirib shu joydan davom ettiring."
+            )
+
+    @property
+    def rate(self):
+        elapsed = self.stats['elapsed']
+        return self.stats['scanned'] / elapsed if elapsed else 0.0
+
+    def run(self, after_id=0, limit=None):
+        """Navbatdagi natijalarni baholash; limit — ko'pi bilan shuncha natija (None — hammasi)."""
+        started = time.monotonic()
+        self.stats['after_id'] = after_id
+        cursor, taken, chunks_done = after_id, 0, 0
+
+        def take_chunk():
+            nonlocal cursor, taken
+            size = self.chunk_size if limit is None else min(self.chunk_size, limit - taken)
+            chunk = self._next_chunk(cursor, size) if size > 0 else None
+            if chunk is not None:
+                cursor = chunk['results'][-1].pk
+                taken += len(chunk['results'])
+            return chunk
+
+        if self.workers == 1:
+            while (chunk := take_chunk()) is not None:
+                chunks_done += 1
+                self._finish_chunk(chunk, score_chunk(chunk['question_sets'], chunk['items']), started, chunks_done)
+            return self.stats
+
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            # Bolalar baholayotganda keyingi bo'laklar o'qiladi; yozish tartib bilan (checkpoint monoton)
+            while True:
+                while len(pending) < self.workers * 2 and (chunk := take_chunk()) is not None:
+                    pending.append((chunk, pool.submit(score_chunk, chunk['question_sets'], chunk['items'])))
+                if not pending:
+                    break
+                chunk, future = pending.popleft()
+                chunks_done += 1
+                self._finish_chunk(chunk, future.result(), started, chunks_done)
+        return self.stats
+
+
+def format_report(stats, dry_run):
+    """Buyruq va Job jurnali uchun qisqa hisobot qatorlari."""
+    changed = stats['changed']
+    lines = [
+        f"{'[dry-run] ' if dry_run else ''}Ko'rildi: {stats['scanned']}, o'zgardi: {changed} "
+        f"(oshdi {stats['up']}, kamaydi {stats['down']}), o'tdi/o'tmadi almashdi: {stats['pass_flips']}",
+        f"O'rtacha farq: {stats['delta_sum'] / changed if changed else 0:+.2f}%, eng katta: {stats['max_delta']:.2f}%; "
+        f"javoblar: {stats['answers_updated']} yangilandi, {stats['answers_created']} qo'shildi",
+        f"Tezlik: {stats['scanned'] / stats['elapsed'] if stats['elapsed'] else 0:.0f} natija/s, "
+        f"oxirgi id: {stats['after_id']}",
+    ]
+    for row in stats['samples']:
+        lines.append(
+            f"  #{row['result_id']} (test {row['test_id']}): {row['old_percentage']:.2f}% -> {row['new_percentage']:.2f}% "
+            f"({row['old_correct']} -> {row['new_correct']})"
+        )
+    return lines
@@ -0,0 +1,200 @@
+/**
+ * Katta test (TestAdmin): savollar ro'yxati — forma "Tahrirlash" bosilganda yuklanadi va alohida saqlanadi,
+ * tartib / part / variant o'zgarishlari esa bitta batch so'rovda yuboriladi.
+ * Yuklangan forma .inline-related — question_admin.js uni MutationObserver orqali o'zi bog'laydi.
+ */
+(function() {
+    'use strict';
+
+    var root = document.getElementById('lazy-question-editor');
+    if (!root) return;
+
+    var batchButton = root.querySelector('[data-lqe-batch-save]');
+    var message = root.querySelector('.lqe-message');
+    var newFormBox = root.querySelector('.lqe-new-form');
+    var dirty = {};
+
+    function csrfToken() {
+        var input = document.querySelector('input[name="csrfmiddlewaretoken"]');
+        if (input) return input.value;
+        var match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+        return match ? decodeURIComponent(match[1]) : '';
+    }
+
+    function say(text, isError) {
+        if (!message) return;
+        message.textContent = text || '';
+        message.classList.toggle('lqe-message--error', !!isError);
+    }
+
+    function editUrl(id) {
+        return root.dataset.editUrlTemplate.replace(/\/0\/$/, '/' + id + '/');
+    }
+
+    function rowFor(id) {
+        return root.querySelector('.lqe-row[data-question-id="' + id + '"]');
+    }
+
+    function renderRow(row, data) {
+        row.dataset.questionId = data.id;
+        row.querySelector('.lqe-order').value = data.order;
+        row.querySelector('.lqe-part').value = data.part == null ? '' : data.part;
+        row.querySelector('.lqe-variant').value = data.variant == null ? '' : String(data.variant);
+        row.querySelector('.lqe-type').textContent = data.question_type_display;
+        var status = row.querySelector('.lqe-status');
+        status.className = 'lqe-status lqe-status--' + data.status;
+        status.textContent = data.status_label;
+        row.querySelector('.lqe-preview').textContent = data.preview;
+        row.classList.remove('lqe-row--dirty');
+    }
+
+    function newRow(data) {
+        var template = root.querySelector('.lqe-row');
+        var row;
+        if (template) {
+            row = template.cloneNode(true);
+        } else {
+            row = document.createElement('tr');
+            row.className = 'lqe-row';
+            row.innerHTML = '<td><input type="number" class="lqe-order" data-field="order"></td><td class="lqe-type"></td>' +
+                '<td><input type="number" class="lqe-part" min="1" max="4" data-field="part"></td>' +
+                '<td><select class="lqe-variant" data-field="variant"><option value="">—</option>' +
+                '<option value="1">Variant 1</option><option value="2">Variant 2</option><option value="3">Variant 3</option></select></td>' +
+                '<td><span class="lqe-status"></span></td><td class="lqe-preview"></td>' +
+                '<td><button type="button" class="button" data-lqe-edit>Tahrirlash</button></td>';
+        }
+        root.querySelector('.lqe-table tbody').appendChild(row);
+        renderRow(row, data);
+        return row;
+    }
+
+    function closeEditor(row) {
+        var next = row && row.nextElementSibling;
+        if (next && next.classList.contains('lqe-form-row')) next.remove();
+    }
+
+    function mountForm(box, html) {
+        box.innerHTML = html;
+        var form = box.querySelector('form');
+        if (form) form.addEventListener('submit', submitForm);
+        return form;
+    }
+
+    function openEditor(row) {
+        var existing = row.nextElementSibling;
+        if (existing && existing.classList.contains('lqe-form-row')) {
+            existing.remove();
+            return;
+        }
+        var formRow = document.createElement('tr');
+        formRow.className = 'lqe-form-row';
+        formRow.innerHTML = '<td colspan="7"><div class="lqe-form-box">Yuklanmoqda…</div></td>';
+        row.parentNode.insertBefore(formRow, row.nextSibling);
+        fetch(editUrl(row.dataset.questionId), { credentials: 'same-origin', headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+            .then(function(response) { return response.json(); })
+            .then(function(data) { mountForm(formRow.querySelector('.lqe-form-box'), data.html); })
+            .catch(function() { formRow.querySelector('.lqe-form-box').textContent = "Formani yuklab bo'lmadi."; });
+    }
+
+    function submitForm(event) {
+        event.preventDefault();
+        var form = event.target;
+        var box = form.parentNode;
+        fetch(form.action, {
+            method: 'POST',
+            body: new FormData(form),
+            credentials: 'same-origin',
+            headers: { 'X-CSRFToken': csrfToken(), 'X-Requested-With': 'XMLHttpRequest' }
+        })
+            .then(function(response) { return response.json(); })
+            .then(function(data) {
+                if (!data.ok) {
+                    mountForm(box, data.html);
+                    say("Formada xatolik bor — maydonlarni tekshiring.", true);
+                    return;
+                }
+                if (data.created) {
+                    newRow(data.row);
+                    box.innerHTML = '';
+                    say("Savol qo'shildi.");
+                } else {
+                    var row = rowFor(data.row.id);
+                    renderRow(row, data.row);
+                    delete dirty[data.row.id];
+                    closeEditor(row);
+                    say('Savol saqlandi.');
+                }
+                updateBatchButton();
+            })
+            .catch(function() { say("Saqlab bo'lmadi — tarmoqni tekshiring.", true); });
+    }
+
+    function updateBatchButton() {
+        if (batchButton) batchButton.disabled = Object.keys(dirty).length === 0;
+    }
+
+    function saveBatch() {
+        var changes = Object.keys(dirty).map(function(id) {
+            var change = dirty[id];
+            change.id = Number(id);
+            return change;
+        });
+        if (!changes.length) return;
+        batchButton.disabled = true;
+        fetch(root.dataset.batchUrl, {
+            method: 'POST',
+            body: JSON.stringify({ changes: changes }),
+            credentials: 'same-origin',
+            headers: { 'Content-Type': 'application/json', 'X-CSRFToken': csrfToken() }
+        })
+            .then(function(response) { return response.json(); })
+            .then(function(data) {
+                if (!data.ok) {
+                    say(data.error || "Saqlab bo'lmadi.", true);
+                    updateBatchButton();
+                    return;
+                }
+                data.rows.forEach(function(item) {
+                    var row = rowFor(item.id);
+                    if (row) renderRow(row, item);
+                    delete dirty[item.id];
+                });
+                updateBatchButton();
+                say(data.rows.length + ' ta savol yangilandi.');
+            })
+            .catch(function() {
+                say("Saqlab bo'lmadi — tarmoqni tekshiring.", true);
+                updateBatchButton();
+            });
+    }
+
+    root.addEventListener('change', function(event) {
+        var input = event.target;
+        var row = input.closest('.lqe-row');
+        if (!row || !input.dataset.field) return;
+        var id = row.dataset.questionId;
+        dirty[id] = dirty[id] || {};
+        dirty[id][input.dataset.field] = input.value;
+        row.classList.add('lqe-row--dirty');
+        updateBatchButton();
+    });
+
+    root.addEventListener('click', function(event) {
+        var target = event.target;
+        if (target.matches('[data-lqe-edit]')) {
+            openEditor(target.closest('.lqe-row'));
+        } else if (target.matches('[data-lqe-close]')) {
+            var formRow = target.closest('.lqe-form-row');
+            if (formRow) formRow.remove();
+            else newFormBox.innerHTML = '';
+        } else if (target.matches('[data-lqe-add]')) {
+            newFormBox.textContent = 'Yuklanmoqda…';
+            fetch(root.dataset.addUrl, { credentials: 'same-origin', headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+                .then(function(response) { return response.json(); })
+                .then(function(data) { mountForm(newFormBox, data.html); })
+                .catch(function() { newFormBox.textContent = "Formani yuklab bo'lmadi."; });
+        } else if (target === batchButton) {
+            saveBatch();
+        }
+    });
+})();
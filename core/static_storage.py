@@ -0,0 +1,68 @@
+"""
+Statik fayllar: nomida kontent hash (main.3f2a9c1b7e4d.css) va collectstatic paytida oldindan siqilgan nusxalar.
+
+Hash li nom o'zgarmaydi — brauzer uni bir yil keshlaydi (core.middleware.PrecompressedStaticMiddleware),
+fayl o'zgarsa nom ham o'zgaradi; qo'lda versiya (?v=) oshirish shart emas.
+Har bir matnli fayl yoniga .gz va (brotli o'rnatilgan bo'lsa) .br yoziladi — so'rovda qayta siqilmaydi.
+"""
+import gzip
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # ixtiyoriy: faqat .gz yoziladi
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.map', '.html', '.xml')
+# Kichik fayllarda siqish foyda bermaydi (sarlavhalar kattaroq)
+MIN_COMPRESS_SIZE = 512
+
+
+def compress_bytes(data):
+    """{'.gz': bytes, '.br': bytes} — faqat asl fayldan kichik chiqqanlari."""
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data, quality=11)
+    return {suffix: body for suffix, body in variants.items() if len(body) < len(data)}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Faqat DEBUG yoki collectstatic qilinmagan muhitda (manifest yo'q — dev, testlar) hash siz nom;
+            # manifest bor bo'lsa (production) yo'q fayl xato — hash siz URL keshdan hech qachon yangilanmaydi
+            if settings.DEBUG or not self.hashed_files:
+                return name
+            raise
+
+    def post_process(self, paths, dry_run=False, **options):
+        written = []
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                written.extend((name, hashed_name))
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in dict.fromkeys(written):
+            self.write_compressed(name)
+
+    def write_compressed(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS) or not self.exists(name):
+            return []
+        with self.open(name) as source:
+            data = source.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return []
+        written = []
+        for suffix, body in compress_bytes(data).items():
+            path = self.path(name + suffix)
+            with open(path, 'wb') as target:
+                target.write(body)
+            written.append(name + suffix)
+        return written
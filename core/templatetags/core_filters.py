@@ -1,9 +1,10 @@
 from django import template
 from django.utils.html import escape
 from django.utils.safestring import mark_safe
-import json
 import re
 
+from core.answer_codec import decode_answer
+
 register = template.Library()
 
 
@@ -71,18 +72,7 @@ def format_user_answer(value):
     """Foydalanuvchi javobini ko'rsatish uchun formatlash (JSON ro'yxat/dict bo'lsa)"""
     if value is None:
         return ''
-    if isinstance(value, str):
-        s = value.strip()
-        if s.startswith('['):
-            try:
-                data = json.loads(s)
-                if isinstance(data, list):
-                    return ', '.join(str(x) for x in data)
-                if isinstance(data, dict):
-                    return '; '.join(f'{k}:{v}' for k, v in sorted(data.items()))
-            except (json.JSONDecodeError, TypeError):
-                pass
-        return s
+    value = decode_answer(value)
     if isinstance(value, list):
         return ', '.join(str(x) for x in value)
     if isinstance(value, dict):
@@ -285,12 +275,9 @@ def _answer_value_to_parts(value):
     s = str(value).strip()
     if not s:
         return []
-    if s.startswith('[') or s.startswith('{'):
-        try:
-            data = json.loads(s)
-            return _answer_value_to_parts(data)
-        except (json.JSONDecodeError, TypeError):
-            pass
+    data = decode_answer(s)
+    if isinstance(data, (list, dict)):
+        return _answer_value_to_parts(data)
     if ';' in s and len(s) > 20:
         parts = [p.strip() for p in s.split(';') if p.strip()]
         if len(parts) > 1:
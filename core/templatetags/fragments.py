@@ -0,0 +1,53 @@
+from django import template
+
+from core import fragment_cache
+
+register = template.Library()
+
+
+class VersionedCacheNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        if fragment_cache.is_bypassed(context.get('request')):
+            fragment_cache.record(name, 'bypass')
+            return self.nodelist.render(context)
+        # Bir render ichida bir xil obyekt versiyasi keshdan bir marta o'qiladi
+        versions = context.render_context.get('fragment_versions')
+        if versions is None:
+            versions = context.render_context['fragment_versions'] = {}
+        tokens = fragment_cache.vary_tokens([var.resolve(context) for var in self.vary_on], versions)
+        key = fragment_cache.fragment_key(name, tokens)
+        html = fragment_cache.get_fragment(key)
+        if html is not None:
+            fragment_cache.record(name, 'hit')
+            return html
+        html = self.nodelist.render(context)
+        fragment_cache.store_fragment(key, html)
+        fragment_cache.record(name, 'miss')
+        return html
+
+
+@register.tag('versioned_cache')
+def do_versioned_cache(parser, token):
+    """
+    Umumiy HTML qismini obyekt versiyalari bo'yicha keshlash (core.fragment_cache):
+
+        {% versioned_cache "test_card" test test.category %} ... {% endversioned_cache %}
+
+    Ichida foydalanuvchiga xos ma'lumot bo'lmasligi kerak — u blokdan tashqarida chiziladi.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' kamida fragment nomini talab qiladi.")
+    nodelist = parser.parse(('endversioned_cache',))
+    parser.delete_first_token()
+    return VersionedCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
@@ -1,9 +1,10 @@
 """Test yechish: javoblarni yig'ish, merge, imtihon varianti filtri."""
-import json
-import re
+import math
 
 from django.db.models import Q
 
+from .answer_codec import ANSWER_FORMAT, answer_text, decode_answer, decode_answers
+
 SUMMARY_BOX_TYPE = 'summary_box'
 MATCHING_TYPES = (
     'matching_headings', 'matching_features', 'matching_info',
@@ -66,15 +67,15 @@ def filter_questions_by_exam_variant(test, exam_variant):
 
 
 def _summary_box_slot_count(question):
-    n = len(re.findall(r'\[[^\]]+\]', question.question_text or ''))
+    n = question.compiled_text['slots']
     if n:
         return n
     c = question.correct_answer_json if isinstance(question.correct_answer_json, dict) else {}
     return len(c) if c else 0
 
 
-def collect_answer_from_post(request, question):
-    """Bitta savol uchun POST dan javob (bo'sh bo'lsa '')."""
+def collect_answer(data, question):
+    """Bitta savol uchun forma maydonlaridan (request.POST yoki jurnal op.f lug'ati) javob: satr, ro'yxat yoki lug'at (bo'sh bo'lsa '')."""
     q = question
     val = ''
     if q.question_type in SINGLE_CHOICE:
@@ -91,30 +92,30 @@ def collect_answer_from_post(request, question):
             else:
                 letters = ['a', 'b', 'c', 'd']
             for letter in letters:
-                if letter and request.POST.get(f'answer_{q.pk}_{letter}'):
+                if letter and data.get(f'answer_{q.pk}_{letter}'):
                     selected.append(letter)
             if selected:
-                val = json.dumps(sorted(selected))
+                val = sorted(selected)
         else:
-            val = (request.POST.get(f'answer_{q.pk}') or '').strip()
+            val = (data.get(f'answer_{q.pk}') or '').strip()
     elif q.question_type in FILL_TYPES:
         expected = q.fill_blanks_count()
         vals = []
         for i in range(1, expected + 1):
-            vals.append((request.POST.get(f'answer_{q.pk}_{i}') or '').strip())
+            vals.append((data.get(f'answer_{q.pk}_{i}') or '').strip())
         if vals and not any(vals[1:]) and vals[0] and ',' in vals[0]:
             vals = [v.strip() for v in vals[0].split(',')]
         if any(v for v in vals):
-            val = json.dumps(vals)
+            val = vals
     elif q.question_type == SUMMARY_BOX_TYPE:
         match_dict = {}
         n_slots = _summary_box_slot_count(q)
         for i in range(1, n_slots + 1):
-            mval = (request.POST.get(f'match_{q.pk}_{i}') or '').strip()
+            mval = (data.get(f'match_{q.pk}_{i}') or '').strip()
             if mval:
                 match_dict[str(i)] = mval
         if match_dict:
-            val = json.dumps(match_dict)
+            val = match_dict
     elif q.question_type in MATCHING_TYPES:
         match_dict = {}
         opts = q.options_json or {}
@@ -123,26 +124,31 @@ def collect_answer_from_post(request, question):
             items = [{'num': i + 1} for i in range(len((q.correct_answer_json or {})))]
         for idx, it in enumerate(items):
             num = str(it.get('num', idx + 1))
-            mval = (request.POST.get(f'match_{q.pk}_{num}') or '').strip()
+            mval = (data.get(f'match_{q.pk}_{num}') or '').strip()
             if mval:
                 match_dict[num] = mval
         if match_dict:
-            val = json.dumps(match_dict)
+            val = match_dict
     elif q.question_type == 'list_selection':
         selected = []
         for opt in (q.options_json or {}).get('options', []):
             letter = str(opt.get('letter', '')).strip()
-            if letter and request.POST.get(f'list_{q.pk}_{letter}'):
+            if letter and data.get(f'list_{q.pk}_{letter}'):
                 selected.append(letter)
         if selected:
-            val = json.dumps(sorted(selected))
+            val = sorted(selected)
     elif q.question_type == 'essay':
-        val = (request.POST.get(f'answer_{q.pk}') or '').strip()
+        val = (data.get(f'answer_{q.pk}') or '').strip()
     else:
-        val = (request.POST.get(f'answer_{q.pk}') or '').strip()
+        val = (data.get(f'answer_{q.pk}') or '').strip()
     return val
 
 
+def collect_answer_from_post(request, question):
+    """Bitta savol uchun POST dan javob."""
+    return collect_answer(request.POST, question)
+
+
 def collect_answers_from_post(request, questions):
     """POST dan barcha savollar javoblari: {str(pk): value} (bo'sh = tozalash)."""
     return {str(q.pk): collect_answer_from_post(request, q) for q in questions}
@@ -160,11 +166,12 @@ def exam_variant_from_answers(answers_json, default=1):
 
 
 def stamp_answers_meta(answers_json, exam_variant):
-    """Javoblar JSON ichida sessiya meta (variant, baholash versiyasi)."""
-    merged = dict(answers_json or {})
-    meta = get_answers_meta(merged)
+    """Javoblar JSON ichida sessiya meta (variant, baholash versiyasi); javoblar typed shaklga o'tkaziladi."""
+    merged = decode_answers(answers_json)
+    meta = dict(get_answers_meta(merged))
     meta['exam_variant'] = normalize_exam_variant(exam_variant)
     meta['scoring_version'] = SCORING_VERSION
+    meta['answer_format'] = ANSWER_FORMAT
     merged['_meta'] = meta
     return merged
 
@@ -180,41 +187,50 @@ def merge_answers_json(existing, posted_updates, active_question_pks, exam_varia
     Serverda saqlangan javoblarni yangilash.
     Faqat joriy sessiyadagi savollar yangilanadi (boshqa variant javoblari saqlanadi).
     """
-    merged = dict(existing or {})
+    old_meta = get_answers_meta(existing)
+    merged = decode_answers(existing)
     merged.pop('_meta', None)
     active = {str(pk) for pk in active_question_pks}
     for key in active:
         if key in posted_updates:
-            if posted_updates[key]:
-                merged[key] = posted_updates[key]
+            value = decode_answer(posted_updates[key])
+            if value:
+                merged[key] = value
             else:
                 merged.pop(key, None)
     for key, val in posted_updates.items():
         if key.startswith('_') or key in active:
             continue
+        val = decode_answer(val)
         if val:
             merged[key] = val
     ev = exam_variant if exam_variant is not None else old_meta.get('exam_variant', 1)
     return stamp_answers_meta(merged, ev)
 
 
-def user_answer_text(question, answers_json, answers_by_id=None):
-    """UserTestAnswer yoki answers_json dan javob matni."""
+def user_answer_value(question, answers_json, answers_by_id=None):
+    """UserTestAnswer yoki answers_json dan javob qiymati (str/list/dict); UserTestAnswer bir marta parse qilinadi."""
     if answers_by_id:
         ans = answers_by_id.get(question.pk)
         if ans is not None:
-            return (getattr(ans, 'user_answer', None) or '').strip()
+            parsed = getattr(ans, 'parsed_answer', None)
+            return parsed if parsed is not None else decode_answer(getattr(ans, 'user_answer', None))
     if isinstance(answers_json, dict):
-        return (answers_json.get(str(question.pk), '') or '').strip()
+        return decode_answer(answers_json.get(str(question.pk)))
     return ''
 
 
+def user_answer_text(question, answers_json, answers_by_id=None):
+    """UserTestAnswer yoki answers_json dan javob matni."""
+    return answer_text(user_answer_value(question, answers_json, answers_by_id))
+
+
 def score_question_points(question, user_answer):
     """
     Bitta savol uchun (to'g'ri_ball, jami_ball).
-    Javob bo'sh bo'lsa (0, jami).
+    Javob bo'sh bo'lsa (0, jami). user_answer — matn yoki allaqachon parse qilingan qiymat.
     """
-    ua = (user_answer or '').strip()
+    ua = decode_answer(user_answer)
     if question.question_type == 'essay':
         return (0, 0)
     tot = question.gradable_answer_slots() or 1
@@ -231,22 +247,38 @@ def score_question_points(question, user_answer):
     return (1, 1) if question.check_user_answer(ua) else (0, 1)
 
 
+def overall_band(bands):
+    """Band'lar o'rtachasi, IELTS kabi eng yaqin 0.5 ga yaxlitlanadi (6.25 → 6.5, 6.75 → 7.0)."""
+    bands = [float(b) for b in bands]
+    if not bands:
+        return None
+    return math.floor(sum(bands) / len(bands) * 2 + 0.5) / 2
+
+
+def band_percentage(band):
+    """Writing natijasi foizi: band / 9."""
+    return round(float(band) / 9 * 100, 2)
+
+
 def compute_session_scores(questions, answers_json, answers_by_id=None):
     """
     Test yakunlash / qayta hisoblash: ball, slot, writing holati.
+    writing_band — yuborilgan essaylarning hammasi baholangan bo'lsa umumiy band, aks holda None.
     """
     answers_by_id = answers_by_id or {}
     correct_pts = 0
     total_slots = 0
     essay_total = 0
     essays_submitted = 0
+    bands = []
 
     for q in questions:
-        ua = user_answer_text(q, answers_json, answers_by_id)
+        ua = user_answer_value(q, answers_json, answers_by_id)
         if q.question_type == 'essay':
             essay_total += 1
             if ua:
                 essays_submitted += 1
+                bands.append(getattr(answers_by_id.get(q.pk), 'band_score', None))
             continue
         pts, tot = score_question_points(q, ua)
         correct_pts += pts
@@ -259,6 +291,7 @@ def compute_session_scores(questions, answers_json, answers_by_id=None):
         'essay_total': essay_total,
         'essays_submitted': essays_submitted,
         'writing_only': writing_only,
+        'writing_band': overall_band(bands) if bands and None not in bands else None,
     }
 
 
@@ -285,7 +318,7 @@ def build_type_stats(questions, answers_json, answers_by_id, question_type_label
             }
         entry = type_stats_map[q_type]
         entry['total'] += 1
-        ua = user_answer_text(q, answers_json, answers_by_id)
+        ua = user_answer_value(q, answers_json, answers_by_id)
         pts, tot = score_question_points(q, ua)
         entry['max_points'] += tot
         entry['points'] += pts
@@ -325,19 +358,7 @@ def _sorted_dict_keys(keys):
 
 
 def _parse_answer_value(user_answer):
-    if user_answer is None:
-        return None
-    if isinstance(user_answer, (list, dict)):
-        return user_answer
-    s = str(user_answer).strip()
-    if not s:
-        return None
-    if s.startswith('[') or s.startswith('{'):
-        try:
-            return json.loads(s)
-        except (json.JSONDecodeError, TypeError):
-            return s
-    return s
+    return decode_answer(user_answer) or None
 
 
 def _mcq_letter_display(question, letter):
@@ -377,7 +398,7 @@ def build_review_items(questions, user_answers):
 
     for question in questions:
         answer = user_answers.get(question.pk)
-        ua = (getattr(answer, 'user_answer', None) or '') if answer else ''
+        ua = user_answer_value(question, None, user_answers)
         qt = question.question_type
 
         if qt == 'essay':
@@ -388,9 +409,9 @@ def build_review_items(questions, user_answers):
                 'answer': answer,
                 'slot_label': '',
                 'show_question_text': True,
-                'user_part': ua,
+                'user_part': answer_text(ua),
                 'correct_part': '',
-                'state': 'pending' if str(ua).strip() else 'empty',
+                'state': 'pending' if ua else 'empty',
             })
             continue
 
@@ -534,7 +555,7 @@ def build_review_items(questions, user_answers):
             continue
 
         display_num += 1
-        any_answer = bool(str(ua).strip())
+        any_answer = bool(ua)
         if not any_answer:
             st = 'empty'
         else:
@@ -547,7 +568,7 @@ def build_review_items(questions, user_answers):
             up = question.get_user_answer_display(ua) or ''
             cp = question.get_correct_answer_display_for_review() or ''
         else:
-            up = str(ua).strip()
+            up = answer_text(ua)
             cp = question.get_correct_answer_review_text()
         if cp == '—':
             cp = ''
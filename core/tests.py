@@ -1,11 +1,26 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
 from datetime import timedelta
-
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection, connections, router, transaction
+from django.conf import settings
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.utils import timezone
 
 from core.admin.forms import QuestionAdminForm
+from core.admin.site_custom import build_active_users_monthly_trend
 from core.models import (
     AdminAnnouncement,
     blank_answers_match,
@@ -18,9 +33,24 @@ from core.models import (
     SATResourceProgress,
     Test,
     StudyStreak,
+    UserActivity,
+    UserActivityDailyRollup,
+    UserTestAnswer,
     UserTestResult,
     UserModuleAccess,
+    UserRecommendation,
+    VideoComment,
+    VideoLesson,
+    VideoPlaylist,
+    VideoRating,
 )
+from core.category_tree import get_category_tree
+from core import fragment_cache
+from core.db_routing import RECENT_WRITE_SESSION_KEY, has_recent_write, mark_recent_write, read_from_replica, use_replica
+from core.video_comments import comment_page, invalidate_first_page
+from core.reading_passages import resolve_reading_passages
+from core.recommendations import get_user_recommendations
+from core.views import _reading_passage_count
 
 
 class GetReadingPassagesTests(TestCase):
@@ -149,6 +179,43 @@ class GetReadingPassagesTests(TestCase):
         self.assertEqual(out[0]["title"], "db")
 
 
+class ReadingPassageResolverTests(TestCase):
+    """core.reading_passages: keshlangan passage strukturasi, word_count va Part → passage."""
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Cat", slug="cat-reading-resolver")
+        self.exam = Test.objects.create(
+            title="R", category=self.category, test_type="reading", variants_to_select=1,
+        )
+        ReadingPassage.objects.create(test=self.exam, order=1, title="P1", text="one two three", variant=1)
+        ReadingPassage.objects.create(test=self.exam, order=3, title="P3", text="four", variant=1)
+
+    def test_word_count_and_part_mapping(self):
+        data = resolve_reading_passages(self.exam)
+        self.assertEqual(data["count"], 2)
+        self.assertEqual([p["word_count"] for p in data["passages"]], [3, 1])
+        # order==N bo'lsa o'sha, bo'lmasa ro'yxatdagi N-chi
+        self.assertEqual(data["by_part"][1]["title"], "P1")
+        self.assertEqual(data["by_part"][2]["title"], "P3")
+        self.assertEqual(data["by_part"][3]["title"], "P3")
+        self.assertNotIn(4, data["by_part"])
+
+    def test_cached_across_instances(self):
+        self.exam.get_reading_passages()
+        fresh = Test.objects.get(pk=self.exam.pk)
+        with self.assertNumQueries(0):
+            out = fresh.get_reading_passages()
+            _reading_passage_count(fresh)
+        self.assertEqual([p["title"] for p in out], ["P1", "P3"])
+
+    def test_passage_save_invalidates(self):
+        self.exam.get_reading_passages()
+        ReadingPassage.objects.create(test=self.exam, order=2, title="P2", text="x y", variant=1)
+        fresh = Test.objects.get(pk=self.exam.pk)
+        self.assertEqual([p["title"] for p in fresh.get_reading_passages()], ["P1", "P2", "P3"])
+        self.assertEqual(_reading_passage_count(fresh), 3)
+
+
 class McqMaxChoicesThreeTests(TestCase):
     """Tanlash soni = 3: to‘liq javob, qisman ball, gradable slotlar."""
 
@@ -406,6 +473,64 @@ class QuestionAdminFormInitialTests(TestCase):
         self.assertEqual(form["max_choices"].value(), 3)
 
 
+class LazyQuestionEditorAdminTests(TestCase):
+    """TestAdmin: katta testda savollar inline emas — ro'yxat, bitta savol formasi va batch o'zgarishlar."""
+
+    def setUp(self):
+        from core.admin.test_admins import LAZY_QUESTION_EDITOR_THRESHOLD
+
+        self.admin = get_user_model().objects.create_superuser("lazy_admin", "a@example.com", "secret123")
+        self.client.force_login(self.admin)
+        self.category = Category.objects.create(name="Lazy", slug="cat-lazy-admin")
+        self.test = Test.objects.create(title="Big", category=self.category, test_type="listening")
+        Question.objects.bulk_create([
+            Question(test=self.test, order=i, question_type="mcq", question_text=f"Q{i}", correct_answer="a")
+            for i in range(1, LAZY_QUESTION_EDITOR_THRESHOLD + 2)
+        ])
+        self.first = Question.objects.get(test=self.test, order=1)
+        self.change_url = reverse("admin:core_test_change", args=[self.test.pk])
+
+    def test_change_page_lists_questions_without_inline_forms(self):
+        response = self.client.get(self.change_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'id="lazy-question-editor"')
+        self.assertNotContains(response, "questions-TOTAL_FORMS")
+        self.assertEqual(len(response.context["lazy_question_index"]), Question.objects.filter(test=self.test).count())
+
+        form_html = self.client.get(reverse("admin:core_test_question_edit", args=[self.test.pk, self.first.pk])).json()["html"]
+        self.assertIn(f'name="q-{self.first.pk}-question_text"', form_html)
+
+    def test_single_question_save_and_batch_deltas(self):
+        url = reverse("admin:core_test_question_edit", args=[self.test.pk, self.first.pk])
+        prefix = f"q-{self.first.pk}"
+        response = self.client.post(url, {
+            f"{prefix}-order": "1", f"{prefix}-question_type": "mcq", f"{prefix}-question_text": "Updated",
+            f"{prefix}-option_a": "A", f"{prefix}-option_b": "B", f"{prefix}-correct_answer": "b",
+            f"{prefix}-points": "1", f"{prefix}-max_choices": "1",
+        })
+        self.assertTrue(response.json()["ok"], response.content)
+        self.first.refresh_from_db()
+        self.assertEqual((self.first.question_text, self.first.correct_answer), ("Updated", "b"))
+
+        response = self.client.post(
+            reverse("admin:core_test_question_batch", args=[self.test.pk]),
+            data=json.dumps({"changes": [{"id": self.first.pk, "order": 50, "part": "2", "variant": ""}]}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.json()["rows"][0]["part"], 2)
+        self.first.refresh_from_db()
+        self.assertEqual((self.first.order, self.first.options_json.get("part")), (50, 2))
+
+        other_test = Test.objects.create(title="Other", category=self.category)
+        foreign = Question.objects.create(test=other_test, order=1)
+        response = self.client.post(
+            reverse("admin:core_test_question_batch", args=[self.test.pk]),
+            data=json.dumps({"changes": [{"id": foreign.pk, "order": 9}]}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+
 class ModuleSelectorViewTests(TestCase):
     def setUp(self):
         self.user = get_user_model().objects.create_user(
@@ -557,6 +682,39 @@ class SatExperienceTests(TestCase):
         self.assertTrue(len(response.context['recent_progress_items']) >= 1)
         self.assertTrue(len(response.context['recommended_resources']) >= 1)
 
+    def _subject_query_count(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('sat:sat_subject', kwargs={'subject': 'math'}), params)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_sat_subject_query_count_independent_of_catalogue_size(self):
+        for i in range(8):
+            SATResource.objects.create(title=f'Math item {i}', subject=SATResource.SUBJECT_MATH, is_active=True)
+        small = self._subject_query_count()
+        for i in range(40):
+            resource = SATResource.objects.create(
+                title=f'More math {i}', subject=SATResource.SUBJECT_MATH, is_active=True
+            )
+            SATResourceNote.objects.create(user=self.user, resource=resource, note_text='n')
+        self.assertEqual(self._subject_query_count(), small)
+
+    def test_sat_subject_progress_filters_and_latest_notes(self):
+        SATResourceProgress.objects.create(user=self.user, resource=self.math_1, watch_percentage=100, watched=True)
+        SATResourceProgress.objects.create(user=self.user, resource=self.math_2, watch_percentage=40)
+        url = reverse('sat:sat_subject', kwargs={'subject': 'math'})
+        completed = self.client.get(url, {'progress_status': 'completed'}).context['items']
+        self.assertEqual([row['obj'].pk for row in completed], [self.math_1.pk])
+        in_progress = self.client.get(url, {'progress_status': 'in_progress'}).context['items']
+        self.assertEqual([row['obj'].pk for row in in_progress], [self.math_2.pk])
+        self.assertEqual(self.client.get(url, {'progress_status': 'not_started'}).context['results_count'], 0)
+
+        for i in range(7):
+            SATResourceNote.objects.create(user=self.user, resource=self.math_1, note_text=f'note {i}')
+        rows = self.client.get(url, {'q': 'Algebra'}).context['items']
+        self.assertEqual(len(rows[0]['notes']), 5)
+        self.assertEqual(rows[0]['notes'][0].note_text, 'note 6')
+
 
 class NotificationContextTests(TestCase):
     def setUp(self):
@@ -596,3 +754,1473 @@ class NotificationContextTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Bildirishnomalar")
         self.assertContains(response, "fa-bullhorn")
+
+
+class UserActivityRetentionTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="activity_user", password="secret123")
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir, ignore_errors=True)
+
+    def _activity_at(self, created_at, activity_type='login'):
+        activity = UserActivity.objects.create(user=self.user, activity_type=activity_type)
+        UserActivity.objects.filter(pk=activity.pk).update(created_at=created_at)
+        return activity
+
+    def test_maintenance_rolls_up_and_archives_expired_months(self):
+        old_at = timezone.now() - timedelta(days=400)
+        self._activity_at(old_at)
+        self._activity_at(old_at, 'test_start')
+        self._activity_at(timezone.now())
+
+        call_command('useractivity_maintenance', retain_months=6, archive_dir=self.archive_dir, stdout=StringIO())
+
+        self.assertEqual(UserActivity.objects.count(), 1)
+        old_rollups = UserActivityDailyRollup.objects.filter(day=timezone.localdate(old_at))
+        self.assertEqual(old_rollups.count(), 2)
+        archived = os.listdir(self.archive_dir)
+        self.assertEqual(len(archived), 1)
+        with gzip.open(os.path.join(self.archive_dir, archived[0]), 'rt', encoding='utf-8') as fh:
+            self.assertEqual(len(fh.readlines()), 2)
+
+        # Ikkinchi ishga tushirish yig'indilarni buzmasligi kerak
+        call_command('useractivity_maintenance', retain_months=6, archive_dir=self.archive_dir, stdout=StringIO())
+        self.assertEqual(old_rollups.count(), 2)
+
+    def test_monthly_trend_uses_rollups_after_archive(self):
+        old_at = timezone.now() - timedelta(days=200)
+        self._activity_at(old_at)
+        call_command('useractivity_maintenance', retain_months=3, archive_dir=self.archive_dir, stdout=StringIO())
+        self.assertFalse(UserActivity.objects.exists())
+
+        labels, counts = build_active_users_monthly_trend()
+        self.assertIn(timezone.localtime(old_at).strftime('%b %Y'), labels)
+        self.assertEqual(sum(counts), 1)
+
+
+class LazyExamPartTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="lazy_part_user", password="secret123")
+        self.client.force_login(self.user)
+        self.category = Category.objects.create(name="Lazy Cat", slug="lazy-cat")
+        self.test = Test.objects.create(
+            title="Two part listening",
+            category=self.category,
+            test_type="listening",
+            reading_text="",
+            reading_passages_json=[],
+        )
+        self.questions = [
+            Question.objects.create(
+                test=self.test,
+                order=i,
+                question_type="mcq",
+                question_text=f"Savol matni {i}",
+                option_a="A",
+                option_b="B",
+                correct_answer="a",
+            )
+            for i in range(1, 15)
+        ]
+
+    def test_take_renders_only_first_part(self):
+        response = self.client.get(reverse('core:test_take', args=[self.test.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Savol matni 3")
+        self.assertNotContains(response, "Savol matni 12")
+        self.assertContains(response, reverse('core:test_take_part', args=[self.test.pk, 2]))
+
+    def test_part_fragment_and_etag(self):
+        self.client.get(reverse('core:test_take', args=[self.test.pk]))
+        url = reverse('core:test_take_part', args=[self.test.pk, 2])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Savol matni 12")
+        self.assertNotContains(response, "Savol matni 3")
+
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+        self.questions[11].question_text = "Yangilangan savol"
+        self.questions[11].save()
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertContains(fresh, "Yangilangan savol")
+
+    def test_part_fragment_builds_only_its_questions(self):
+        from core import views
+
+        self.client.get(reverse('core:test_take', args=[self.test.pk]))
+        url = reverse('core:test_take_part', args=[self.test.pk, 2])
+        with mock.patch.object(views, "_get_question_context_extra", wraps=views._get_question_context_extra) as extra:
+            response = self.client.get(url)
+        self.assertEqual(extra.call_count, 4)
+        # Raqamlash to'liq imtihondagidek davom etadi (11–14)
+        self.assertContains(response, "savollar 11-14")
+
+        cache.clear()
+        self.assertContains(self.client.get(url), "savollar 11-14")
+
+    def test_part_fragment_hidden_category(self):
+        self.client.get(reverse('core:test_take', args=[self.test.pk]))
+        Category.objects.filter(pk=self.category.pk).update(show_on_site=False)
+        response = self.client.get(reverse('core:test_take_part', args=[self.test.pk, 2]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_autosave_keeps_answers_of_unloaded_parts(self):
+        take_url = reverse('core:test_take', args=[self.test.pk])
+        self.client.get(take_url)
+        result = UserTestResult.objects.get(user=self.user, test=self.test)
+        last = self.questions[-1]
+        result.answers_json = {str(last.pk): 'b'}
+        result.save(update_fields=['answers_json'])
+
+        first = self.questions[0]
+        self.client.post(take_url, {
+            'autosave': '1',
+            'loaded_q': [str(first.pk)],
+            f'answer_{first.pk}': 'a',
+        })
+        result.refresh_from_db()
+        self.assertEqual(result.answers_json.get(str(first.pk)), 'a')
+        self.assertEqual(result.answers_json.get(str(last.pk)), 'b')
+
+
+class CategoryTreeTests(TestCase):
+    """core.category_tree: avlodlar, ko'rinish va versiya bo'yicha yangilanish."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="tree_user", password="x")
+        self.client.force_login(self.user)
+        self.grammar = Category.objects.create(name="Grammar", slug="tree-grammar", order=1)
+        self.tenses = Category.objects.create(name="Tenses", slug="tree-tenses", parent=self.grammar)
+        self.perfect = Category.objects.create(name="Perfect", slug="tree-perfect", parent=self.tenses)
+        self.hidden = Category.objects.create(name="Hidden", slug="tree-hidden", show_on_site=False)
+        self.old = Category.objects.create(name="Old", slug="tree-old", parent=self.grammar, is_active=False)
+        VideoLesson.objects.create(title="Past perfect", category=self.perfect, youtube_url="https://youtu.be/aaaaaaaaaaa")
+        VideoLesson.objects.create(title="Secret", category=self.hidden, youtube_url="https://youtu.be/bbbbbbbbbbb")
+        VideoLesson.objects.create(title="Archived", category=self.old, youtube_url="https://youtu.be/ccccccccccc")
+
+    def test_descendants_and_visibility(self):
+        tree = get_category_tree()
+        self.assertEqual(
+            tree.descendant_ids(self.grammar.pk), {self.grammar.pk, self.tenses.pk, self.perfect.pk}
+        )
+        self.assertIn(self.grammar, tree.top_level)
+        self.assertNotIn(self.hidden, tree.top_level)
+        self.assertFalse(tree.is_site_visible(self.hidden.pk))
+        self.assertEqual(tree.children(self.grammar.pk), [self.tenses])
+
+    def test_tree_loaded_once_and_rebuilt_on_save(self):
+        tree = get_category_tree()
+        with self.assertNumQueries(0):
+            self.assertIs(get_category_tree(), tree)
+        self.perfect.name = "Perfect tenses"
+        self.perfect.save()
+        with self.assertNumQueries(1):
+            rebuilt = get_category_tree()
+        self.assertEqual(rebuilt.by_id[self.perfect.pk].name, "Perfect tenses")
+
+    def test_version_expires_without_shared_cache(self):
+        from core.content_versions import version_timeout
+
+        with override_settings(SHARED_CACHE=True):
+            self.assertIsNone(version_timeout())
+        with override_settings(SHARED_CACHE=False, CONTENT_VERSION_LOCAL_TTL=30):
+            self.assertEqual(version_timeout(), 30)
+            cache.clear()
+            tree = get_category_tree()
+            # Boshqa worker bump qilgani bu workerga yetmaydi — versiya muddati tugagach daraxt qayta quriladi
+            later = time.time() + 31
+            with mock.patch("django.core.cache.backends.locmem.time.time", return_value=later):
+                with self.assertNumQueries(1):
+                    self.assertIsNot(get_category_tree(), tree)
+
+    def test_video_list_filters_by_subtree(self):
+        response = self.client.get(reverse("core:video_list"), {"category": "tree-grammar"})
+        self.assertContains(response, "Past perfect")
+        self.assertNotContains(response, "Archived")
+        self.assertNotContains(response, "Secret")
+        self.assertContains(response, "tree-tenses")
+
+
+class VideoListGroupedBlocksTests(TestCase):
+    """video_list: bloklar bitta so'rovda — so'rovlar soni kategoriyalar soniga bog'liq emas."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="video_blocks_user", password="x")
+        self.client.force_login(self.user)
+
+    def _add_block(self, n, videos=2):
+        top = Category.objects.create(name=f"Top {n}", slug=f"blocks-top-{n}", order=n)
+        child = Category.objects.create(name=f"Child {n}", slug=f"blocks-child-{n}", parent=top)
+        for i in range(videos):
+            VideoLesson.objects.create(
+                title=f"Video {n}-{i}", category=child if i % 2 else top, order=i,
+                youtube_url=f"https://youtu.be/{n:05d}{i:06d}",
+            )
+        return top
+
+    def _query_count(self):
+        get_category_tree()  # daraxt versiyasi yangilangandan keyingi bir martalik yuklash hisobga kirmasin
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("core:video_list"))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_constant_queries_and_block_limit(self):
+        self._add_block(1)
+        few, _ = self._query_count()
+        for n in range(2, 6):
+            self._add_block(n, videos=8 if n == 5 else 2)
+        many, response = self._query_count()
+        self.assertEqual(few, many)
+
+        blocks = response.context["videos_by_category"]
+        self.assertEqual([b["category"].slug for b in blocks], [f"blocks-top-{n}" for n in range(1, 6)])
+        self.assertEqual(len(blocks[-1]["videos"]), 6)
+        self.assertEqual(blocks[-1]["total"], 8)
+        self.assertEqual([v.title for v in blocks[0]["videos"]], ["Video 1-0", "Video 1-1"])
+        self.assertContains(response, "8 ta video")
+
+
+class VideoAggregateTests(TestCase):
+    """Reyting/izoh/playlist yig'indilari yozish yo'llarida yangilanadi, o'qishda aggregate yo'q."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="agg_user", password="x")
+        self.other = get_user_model().objects.create_user(username="agg_other", password="x")
+        self.client.force_login(self.user)
+        category = Category.objects.create(name="Agg", slug="agg-videos")
+        self.video = VideoLesson.objects.create(title="Agg video", category=category, youtube_url="https://youtu.be/ddddddddddd")
+
+    def test_rating_updates_sum_count_average(self):
+        url = reverse("core:rate_video", args=[self.video.pk])
+        self.client.post(url, {"rating": 5})
+        other = self.client_class()
+        other.force_login(self.other)
+        other.post(url, {"rating": 2})
+        data = self.client.post(url, {"rating": 3}).json()
+        self.assertEqual(data["total_ratings"], 2)
+        self.assertEqual(data["average_rating"], 2.5)
+        self.video.refresh_from_db()
+        self.assertEqual((self.video.rating_sum, self.video.rating_count), (5, 2))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.video.average_rating, 2.5)
+
+    def test_comment_and_reply_counts_with_cascade(self):
+        add = reverse("core:add_video_comment", args=[self.video.pk])
+        parent_id = self.client.post(add, {"comment_text": "Salom"}).json()["comment"]["id"]
+        self.client.post(add, {"comment_text": "Javob 1", "parent_id": parent_id})
+        self.client.post(add, {"comment_text": "Javob 2", "parent_id": parent_id})
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.comment_count, 3)
+        self.assertEqual(VideoComment.objects.get(pk=parent_id).replies_count, 2)
+
+        self.client.post(reverse("core:delete_video_comment", args=[parent_id]))
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.comment_count, 0)
+
+    def test_playlist_size_and_reconcile(self):
+        playlist = VideoPlaylist.objects.create(user=self.user, name="PL")
+        add = reverse("core:add_video_to_playlist", args=[self.video.pk])
+        self.client.post(add, {"playlist_id": playlist.pk})
+        self.client.post(add, {"playlist_id": playlist.pk})  # takror — hisob o'zgarmaydi
+        playlist.refresh_from_db()
+        self.assertEqual(playlist.videos_count, 1)
+        self.client.post(reverse("core:remove_video_from_playlist", args=[self.video.pk]), {"playlist_id": playlist.pk})
+        playlist.refresh_from_db()
+        self.assertEqual(playlist.videos_count, 0)
+
+        # Admin orqali qo'shilgan reyting — reconcile tuzatadi
+        VideoRating.objects.create(user=self.other, video=self.video, rating=4)
+        out = StringIO()
+        call_command("reconcile_video_aggregates", "--dry-run", stdout=out)
+        self.assertIn("VideoLesson: farq 1", out.getvalue())
+        call_command("reconcile_video_aggregates", stdout=StringIO())
+        self.video.refresh_from_db()
+        self.assertEqual((self.video.rating_count, self.video.average_rating), (1, 4.0))
+        out = StringIO()
+        call_command("reconcile_video_aggregates", "--dry-run", stdout=out)
+        self.assertIn("VideoLesson: farq 0", out.getvalue())
+
+    def test_first_rating_race_retries_as_update(self):
+        # Parallel so'rov qatorni birinchi tekshiruvdan keyin yaratgan holat
+        VideoRating.objects.create(user=self.user, video=self.video, rating=5)
+        self.video.rating_sum, self.video.rating_count = 5, 1
+        self.video.save(update_fields=["rating_sum", "rating_count"])
+        real = VideoRating.objects.select_for_update
+        with mock.patch.object(
+            VideoRating.objects, "select_for_update", side_effect=[VideoRating.objects.none(), real()]
+        ):
+            response = self.client.post(reverse("core:rate_video", args=[self.video.pk]), {"rating": 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["total_ratings"], 1)
+        self.video.refresh_from_db()
+        self.assertEqual((self.video.rating_sum, self.video.rating_count), (3, 1))
+
+
+class VideoCommentsPaginationTests(TestCase):
+    """Izohlar: keyset sahifalash, keshlangan birinchi sahifa va javoblar alohida."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="comments_user", password="x")
+        self.client.force_login(self.user)
+        category = Category.objects.create(name="Comments", slug="comments-videos")
+        self.video = VideoLesson.objects.create(title="Popular", category=category, youtube_url="https://youtu.be/eeeeeeeeeee")
+        same_time = timezone.now()
+        self.comments = [
+            VideoComment.objects.create(user=self.user, video=self.video, comment_text=f"Izoh {i}")
+            for i in range(25)
+        ]
+        # Bir xil created_at — tartib id bo'yicha davom etishi kerak
+        VideoComment.objects.filter(pk__in=[c.pk for c in self.comments]).update(created_at=same_time)
+        invalidate_first_page(self.video.pk)
+
+    def test_keyset_pages_cover_all_comments_once(self):
+        first = comment_page(self.video.pk)
+        self.assertEqual(len(first["comments"]), 20)
+        self.assertIsNotNone(first["next_cursor"])
+        second = self.client.get(
+            reverse("core:video_comment_list", args=[self.video.pk]), {"cursor": first["next_cursor"]}
+        ).json()
+        self.assertIsNone(second["next_cursor"])
+        ids = [c["id"] for c in first["comments"]] + [c["id"] for c in second["comments"]]
+        self.assertEqual(ids, sorted((c.pk for c in self.comments), reverse=True))
+
+    def test_first_page_cached_and_invalidated_on_write(self):
+        comment_page(self.video.pk)
+        with self.assertNumQueries(0):
+            comment_page(self.video.pk)
+        self.client.post(
+            reverse("core:add_video_comment", args=[self.video.pk]), {"comment_text": "Eng yangi"}
+        )
+        self.assertEqual(comment_page(self.video.pk)["comments"][0]["text"], "Eng yangi")
+
+    def test_replies_paginated_separately_as_fragment(self):
+        parent = self.comments[-1]
+        add = reverse("core:add_video_comment", args=[self.video.pk])
+        for i in range(12):
+            self.client.post(add, {"comment_text": f"Javob {i}", "parent_id": parent.pk})
+
+        detail = self.client.get(reverse("core:video_detail", args=[self.video.pk]))
+        self.assertContains(detail, "Javoblarni ko'rsatish (12)")
+        self.assertNotContains(detail, "Javob 0")
+
+        url = reverse("core:video_comment_replies", args=[parent.pk])
+        fragment = self.client.get(url, HTTP_HX_REQUEST="true")
+        self.assertContains(fragment, "Javob 0")
+        self.assertContains(fragment, "Javob 9")
+        self.assertNotContains(fragment, "Javob 10")
+        self.assertContains(fragment, "Yana javoblar")
+
+
+class RecommendationTests(TestCase):
+    """core.recommendations: oldindan qurilgan tavsiyalar va ularning yangilanishi."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="rec_user", password="secret123")
+        self.client.force_login(self.user)
+        self.weak = Category.objects.create(name="Weak", slug="rec-weak")
+        self.other = Category.objects.create(name="Other", slug="rec-other")
+        self.done_1 = Test.objects.create(title="Done 1", category=self.weak, difficulty="hard")
+        self.done_2 = Test.objects.create(title="Done 2", category=self.weak, difficulty="hard")
+        self.easy_other = Test.objects.create(title="Easy other", category=self.other, difficulty="easy")
+        self.easy_weak = Test.objects.create(title="Easy weak", category=self.weak, difficulty="easy")
+        self.medium = Test.objects.create(title="Medium", category=self.other, difficulty="medium")
+        # bulk_create: signal yo'q — TestCase da bajarilmaydigan on_commit navbati qolmaydi
+        UserTestResult.objects.bulk_create([
+            UserTestResult(user=self.user, test=test, percentage=pct, completed_at=timezone.now())
+            for test, pct in ((self.done_1, 20.0), (self.done_2, 30.0))
+        ])
+
+    def test_weak_category_first_and_completed_excluded(self):
+        rec = get_user_recommendations(self.user)
+        self.assertEqual(rec.avg_score, 25.0)
+        self.assertEqual(rec.test_ids, [self.easy_weak.pk, self.easy_other.pk])
+        self.assertEqual([a["category_id"] for a in rec.weak_areas], [self.weak.pk])
+        self.assertEqual(UserRecommendation.objects.filter(user=self.user).count(), 1)
+
+    def test_test_list_serves_stored_list(self):
+        get_user_recommendations(self.user)
+        response = self.client.get(reverse("core:test_list"), {"category": self.other.slug})
+        self.assertEqual(response.status_code, 200)
+        # Joriy ro'yxatdagi (Other) testlar tavsiyadan chiqariladi
+        self.assertEqual([t.pk for t in response.context["recommended_tests"]], [self.easy_weak.pk])
+        self.assertEqual(response.context["weak_areas"][0]["category_slug"], self.weak.slug)
+        self.assertEqual(response.context["user_avg_score"], 25.0)
+
+    def test_completed_result_rebuilds_on_commit(self):
+        get_user_recommendations(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            UserTestResult.objects.create(
+                user=self.user, test=self.easy_weak, percentage=100.0, completed_at=timezone.now(),
+            )
+        rec = UserRecommendation.objects.get(user=self.user)
+        self.assertNotIn(self.easy_weak.pk, rec.test_ids)
+
+    def test_sat_progress_rebuilds_and_command_rebuilds_all(self):
+        math = SATResource.objects.create(title="M1", subject=SATResource.SUBJECT_MATH)
+        english = SATResource.objects.create(title="E1", subject=SATResource.SUBJECT_ENGLISH)
+        english_2 = SATResource.objects.create(title="E2", subject=SATResource.SUBJECT_ENGLISH)
+        with self.captureOnCommitCallbacks(execute=True):
+            SATResourceProgress.objects.create(user=self.user, resource=english, watch_percentage=30)
+        rec = UserRecommendation.objects.get(user=self.user)
+        self.assertEqual(rec.sat_resource_ids, [english_2.pk])
+
+        UserRecommendation.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_recommendations", stdout=out)
+        rec = UserRecommendation.objects.get(user=self.user)
+        self.assertEqual(rec.sat_resource_ids, [english_2.pk])
+        self.assertEqual(rec.test_ids, [self.easy_weak.pk, self.easy_other.pk])
+        self.assertIn("1 ta", out.getvalue())
+        self.assertNotIn(math.pk, rec.sat_resource_ids)
+
+        # Oddiy progress yangilanishi qayta qurmaydi; yakunlash — bir tranzaksiyada bir marta
+        with self.captureOnCommitCallbacks() as callbacks:
+            progress = SATResourceProgress.objects.get(user=self.user, resource=english)
+            progress.update_progress(50)
+        self.assertEqual(callbacks, [])
+        with mock.patch("core.recommendations.rebuild_sat_recommendations") as rebuild:
+            with self.captureOnCommitCallbacks(execute=True):
+                progress.update_progress(95)
+                SATResourceProgress.objects.create(user=self.user, resource=english_2, watch_percentage=10)
+        rebuild.assert_called_once_with(self.user.pk)
+
+        # Rollback qilingan tranzaksiyadan qolgan kalit keyingi qayta qurishni to'smaydi
+        from core.recommendations import schedule_recommendation_rebuild
+
+        with mock.patch("core.recommendations.rebuild_sat_recommendations") as rebuild:
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertRaises(RuntimeError), transaction.atomic():
+                    schedule_recommendation_rebuild("sat", self.user.pk)
+                    raise RuntimeError
+                schedule_recommendation_rebuild("sat", self.user.pk)
+        rebuild.assert_called_once_with(self.user.pk)
+
+
+class ReplicaRoutingTests(TestCase):
+    """core.db_routing: replikaga faqat use_replica() ichida, lag/yo'qlikda va yozgan userga — primary."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="replica_user", password="secret123")
+        self.client.force_login(self.user)
+
+    @override_settings(REPLICA_DATABASE_ALIAS="missing_replica")
+    def test_missing_replica_falls_back_to_primary(self):
+        with use_replica():
+            self.assertEqual(Test.objects.all().db, "default")
+        response = self.client.get(reverse("core:leaderboard"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_finishing_test_makes_reads_sticky(self):
+        category = Category.objects.create(name="Replica", slug="replica-cat")
+        exam = Test.objects.create(title="Sticky", category=category, test_type="reading")
+        Question.objects.create(
+            test=exam, question_text="Q?", question_type="fill_blank", correct_answer="yes", order=1,
+        )
+        result = UserTestResult.objects.create(user=self.user, test=exam, answers_json={})
+        response = self.client.get(reverse("core:test_result", kwargs={"pk": result.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(RECENT_WRITE_SESSION_KEY, self.client.session)
+        self.assertTrue(has_recent_write(response.wsgi_request))
+
+
+REPLICA_MIRROR = {**settings.DATABASES["default"], "TEST": {"MIRROR": "default"}}
+
+
+@override_settings(DATABASES={**settings.DATABASES, "replica": REPLICA_MIRROR})
+class ReplicaMirrorRoutingTests(TestCase):
+    """Replika alias (TEST.MIRROR='default') bilan: use_replica() va read_from_replica yo'naltirishi."""
+
+    @classmethod
+    def setUpClass(cls):
+        # connections sozlamalari birinchi murojaatda keshlanadi — override_settings aliasni ulamaydi.
+        # Alias runner test bazalarini tayyorlagandan keyin qo'shiladi, shuning uchun databases ham shu yerda.
+        # Mirror sifatida primary ulanishining o'zi beriladi: test tranzaksiyasidagi ma'lumotlar ko'rinadi.
+        if "replica" not in connections:
+            connections.settings["replica"] = REPLICA_MIRROR
+            cls.addClassCleanup(connections.settings.pop, "replica")
+        cls.databases = {"default", "replica"}
+        previous = getattr(connections._connections, "replica", None)
+        connections["replica"] = connections["default"]
+        if previous is None:
+            cls.addClassCleanup(delattr, connections._connections, "replica")
+        else:
+            cls.addClassCleanup(connections.__setitem__, "replica", previous)
+        super().setUpClass()
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Mirror", slug="replica-mirror")
+        self.exam = Test.objects.create(title="Mirror test", category=self.category)
+
+    def test_reads_routed_only_inside_block(self):
+        from django.contrib.sessions.models import Session
+
+        self.assertEqual(Test.objects.all().db, "default")
+        with use_replica():
+            self.assertEqual(Test.objects.all().db, "replica")
+            self.assertTrue(Test.objects.filter(pk=self.exam.pk).exists())
+            self.assertEqual(Session.objects.all().db, "default")
+            self.assertEqual(router.db_for_write(Test), "default")
+        self.assertEqual(Test.objects.all().db, "default")
+
+    def test_view_reads_replica_until_user_writes(self):
+        @read_from_replica
+        def view(request):
+            return Test.objects.all().db
+
+        request = RequestFactory().get("/")
+        request.session = self.client.session
+        self.assertEqual(view(request), "replica")
+        mark_recent_write(request)
+        self.assertEqual(view(request), "default")
+
+
+class AsyncJsonEndpointTests(TestCase):
+    """core.async_views: async ORM bilan JSON endpointlar va ASGI yengil yo'li."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="async_user", password="secret123")
+        self.client.force_login(self.user)
+        category = Category.objects.create(name="Async", slug="async-cat")
+        self.exam = Test.objects.create(title="Async test", category=category, test_type="reading")
+        self.question = Question.objects.create(
+            test=self.exam, question_text="Q?", question_type="fill_blank", correct_answer="yes", order=1,
+        )
+        self.result = UserTestResult.objects.create(user=self.user, test=self.exam, answers_json={"999": "old"})
+
+    def test_update_time_and_autosave(self):
+        response = self.client.post(
+            reverse("core:test_update_time", args=[self.exam.pk]),
+            {"elapsed_time": "75", "timer_seconds_left": "bad"},
+        )
+        self.assertEqual(response.json()["elapsed_time"], 75)
+        response = self.client.post(
+            reverse("core:test_autosave", args=[self.exam.pk]),
+            {"loaded_q": [str(self.question.pk)], f"answer_{self.question.pk}_1": "yes"},
+        )
+        self.assertTrue(response.json()["ok"])
+        self.result.refresh_from_db()
+        self.assertEqual(self.result.time_taken, 75)
+        self.assertEqual(self.result.timer_seconds_left, 0)
+        self.assertEqual(self.result.answers_json[str(self.question.pk)], ["yes"])
+        self.assertEqual(self.result.answers_json["999"], "old")
+
+    def test_json_errors_instead_of_redirects(self):
+        url = reverse("core:toggle_bookmark")
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertTrue(self.client.post(url, {"test_id": self.exam.pk}).json()["bookmarked"])
+        self.assertFalse(self.client.post(url, {"test_id": self.exam.pk}).json()["bookmarked"])
+
+        UserModuleAccess.objects.update_or_create(user=self.user, defaults={"can_access_sat": False})
+        resource = SATResource.objects.create(title="S", subject=SATResource.SUBJECT_MATH)
+        response = self.client.post(reverse("sat:sat_update_progress", args=[resource.pk]), {"progress": "10"})
+        self.assertEqual(response.status_code, 403)
+
+        self.client.logout()
+        self.assertEqual(self.client.post(url, {"test_id": self.exam.pk}).status_code, 401)
+
+    def test_lean_asgi_path_only_for_marked_views(self):
+        from config.asgi import is_lean_path
+
+        self.assertTrue(is_lean_path(reverse("core:test_update_time", args=[self.exam.pk])))
+        self.assertTrue(is_lean_path(reverse("sat:sat_update_progress", args=[1])))
+        self.assertFalse(is_lean_path(reverse("core:test_take", args=[self.exam.pk])))
+        self.assertFalse(is_lean_path("/no-such-page/"))
+
+    def test_lean_handler_does_not_touch_global_middleware(self):
+        from config.asgi import LeanASGIHandler
+
+        before = list(settings.MIDDLEWARE)
+        handler = LeanASGIHandler()
+        self.assertEqual(settings.MIDDLEWARE, before)
+        # Zanjirda faqat sessiya + CSRF: process_view faqat CsrfViewMiddleware da
+        self.assertEqual(len(handler._view_middleware), 1)
+
+
+class FragmentCacheTests(TestCase):
+    """core.fragment_cache: versiyalangan fragmentlar, hit/miss statistikasi va staff chetlab o'tishi."""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Frag", slug="frag")
+        self.exam = Test.objects.create(title="Original", category=self.category)
+        self.template = Template(
+            '{% load fragments %}{% versioned_cache "card" test test.category %}{{ test.title }}{% endversioned_cache %}'
+        )
+
+    def _render(self, request=None):
+        test = Test.objects.select_related("category").get(pk=self.exam.pk)
+        return self.template.render(Context({"test": test, "request": request}))
+
+    def test_fragment_reused_until_object_version_changes(self):
+        self.assertEqual(self._render(), "Original")
+        # Signalsiz o'zgarish — versiya o'zgarmagan, keshdagi HTML qaytadi
+        Test.objects.filter(pk=self.exam.pk).update(title="Silent")
+        self.assertEqual(self._render(), "Original")
+        self.exam.title = "Saved"
+        self.exam.save()
+        self.assertEqual(self._render(), "Saved")
+
+        # locmem: hisoblagichlar yuritilmaydi (har worker o'z qismini ko'rardi)
+        self.assertIsNone(fragment_cache.fragment_stats())
+
+    @override_settings(SHARED_CACHE=True)
+    def test_stats_counted_with_shared_cache(self):
+        self._render()
+        self._render()
+        Test.objects.get(pk=self.exam.pk).save()
+        self._render()
+        stats = {row["name"]: row for row in fragment_cache.fragment_stats()}
+        self.assertEqual((stats["card"]["hit"], stats["card"]["miss"]), (1, 2))
+
+    def test_staff_toggle_bypasses_cache_for_own_session(self):
+        staff = get_user_model().objects.create_user(username="frag_staff", password="x", is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self._render(), "Original")
+        Test.objects.filter(pk=self.exam.pk).update(title="Silent")
+
+        response = self.client.post(reverse("fragment_cache_toggle"), {"next": "https://evil.example/"})
+        self.assertRedirects(response, reverse("admin:index"), fetch_redirect_response=False)
+        request = RequestFactory().get("/")
+        request.user = staff
+        request.session = self.client.session
+        self.assertEqual(self._render(request), "Silent")
+
+        self.client.post(reverse("fragment_cache_toggle"))
+        request.session = self.client.session
+        self.assertEqual(self._render(request), "Original")
+
+
+class StaticAssetPipelineTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+    def _write(self, name, content):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(content)
+
+    def test_post_process_writes_hashed_and_gzip_siblings(self):
+        from core.static_storage import CompressedManifestStaticFilesStorage
+
+        self._write("css/site.css", "body { color: #123456; }\n" * 100)
+        self._write("css/tiny.css", "a{}")
+        storage = CompressedManifestStaticFilesStorage(location=self.root)
+        paths = {name: (storage, name) for name in ("css/site.css", "css/tiny.css")}
+        list(storage.post_process(paths))
+
+        hashed = storage.hashed_files["css/site.css"]
+        self.assertRegex(hashed, r"^css/site\.[0-9a-f]{12}\.css$")
+        with gzip.open(os.path.join(self.root, hashed + ".gz"), "rt", encoding="utf-8") as fh:
+            self.assertIn("#123456", fh.read())
+        self.assertFalse(os.path.exists(os.path.join(self.root, "css/tiny.css.gz")))
+        # Manifest yo'q muhitda URL hash siz quriladi, manifest bor bo'lsa yo'q fayl xato
+        empty_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, empty_root, ignore_errors=True)
+        self.assertEqual(CompressedManifestStaticFilesStorage(location=empty_root).stored_name("js/none.js"), "js/none.js")
+        storage.save_manifest()
+        with self.assertRaises(ValueError):
+            CompressedManifestStaticFilesStorage(location=self.root).stored_name("js/none.js")
+
+    def test_middleware_serves_precompressed_with_cache_headers(self):
+        self._write("js/app.0123456789ab.js", "console.log(1);")
+        with open(os.path.join(self.root, "js/app.0123456789ab.js.gz"), "wb") as fh:
+            fh.write(gzip.compress(b"console.log(1);"))
+        self._write("js/plain.js", "console.log(2);")
+
+        with override_settings(STATIC_ROOT=self.root, STATIC_URL="/static/"):
+            response = self.client.get("/static/js/app.0123456789ab.js", HTTP_ACCEPT_ENCODING="br, gzip")
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            self.assertEqual(response["Vary"], "Accept-Encoding")
+            self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+            self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), b"console.log(1);")
+
+            response = self.client.get("/static/js/app.0123456789ab.js", HTTP_ACCEPT_ENCODING="gzip;q=0")
+            self.assertFalse(response.has_header("Content-Encoding"))
+            self.assertIn("javascript", response["Content-Type"])
+
+            response = self.client.get("/static/js/plain.js")
+            self.assertEqual(response["Cache-Control"], "public, max-age=300")
+            self.assertEqual(self.client.get("/static/../secret.txt").status_code, 404)
+
+
+class JobQueueTests(TestCase):
+    """core.jobs: admin amali navbatga qo'yadi, run_jobs bajaradi; xato bo'lsa qayta urinish."""
+
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser("job_admin", "j@example.com", "secret123")
+        self.client.force_login(self.admin)
+        self.category = Category.objects.create(name="Jobs", slug="cat-jobs")
+        self.test = Test.objects.create(title="Job test", category=self.category)
+        self.result = UserTestResult.objects.create(user=self.admin, test=self.test, percentage=77.0, completed_at=timezone.now())
+
+    def test_admin_action_enqueues_and_worker_runs_it(self):
+        from core.models import Job
+
+        response = self.client.post(reverse("admin:core_usertestresult_changelist"), {
+            "action": "recalculate_selected_results",
+            "_selected_action": [self.result.pk],
+        }, follow=True)
+        self.assertEqual(response.status_code, 200)
+        job = Job.objects.get()
+        self.assertEqual((job.kind, job.status, job.created_by), ("recalculate_results", Job.STATUS_QUEUED, self.admin))
+        self.assertEqual(job.payload, {"result_ids": [self.result.pk]})
+
+        out = StringIO()
+        call_command("run_jobs", "--once", "--worker-id", "w1", stdout=out)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+        self.assertEqual((job.progress, job.total, job.percent), (1, 1, 100))
+        self.assertIn("1 ta natija qayta hisoblandi", job.log)
+        self.assertIn("Bajarilgan vazifalar: 1", out.getvalue())
+
+        page = self.client.get(reverse("admin:core_job_change", args=[job.pk]))
+        self.assertContains(page, "qayta hisoblandi")
+
+    def test_claim_is_exclusive_and_failures_are_retried(self):
+        from core import jobs
+        from core.models import Job
+
+        calls = []
+
+        @jobs.register("test_flaky")
+        def flaky(ctx, fail_times):
+            calls.append(1)
+            if len(calls) <= fail_times:
+                raise RuntimeError("vaqtinchalik")
+
+        self.addCleanup(jobs._handlers.pop, "test_flaky", None)
+        job = jobs.enqueue("test_flaky", {"fail_times": 1}, max_attempts=2)
+        claimed = jobs.claim_next("w1")
+        self.assertEqual((claimed.pk, claimed.attempts, claimed.locked_by), (job.pk, 1, "w1"))
+        self.assertIsNone(jobs.claim_next("w2"))
+
+        jobs.run_job(claimed)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_QUEUED)
+        self.assertIn("vaqtinchalik", job.error)
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIsNone(jobs.claim_next("w1"))
+
+        retry_at = job.run_after + timedelta(seconds=1)
+        jobs.run_job(jobs.claim_next("w1", now=retry_at))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, len(calls)), (Job.STATUS_SUCCEEDED, 2, 2))
+
+    def test_stale_running_job_is_requeued(self):
+        from core import jobs
+        from core.models import Job
+
+        job = jobs.enqueue("recalculate_results", {"result_ids": []})
+        jobs.claim_next("dead-worker")
+        self.assertEqual(jobs.requeue_stale(now=timezone.now() + jobs.STALE_AFTER + timedelta(minutes=1)), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), (Job.STATUS_QUEUED, ""))
+
+    def test_long_running_job_heartbeat_prevents_requeue(self):
+        from core import jobs
+        from core.models import Job
+
+        requeued = []
+
+        @jobs.register("test_long")
+        def long_job(ctx):
+            ctx.log("bosqich 1")
+            requeued.append(jobs.requeue_stale())
+
+        self.addCleanup(jobs._handlers.pop, "test_long", None)
+        job = jobs.enqueue("test_long")
+        # Vazifa STALE_AFTER dan oldin boshlangan — heartbeat bo'lmasa navbatga qaytgan bo'lardi
+        claimed = jobs.claim_next("w1")
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - jobs.STALE_AFTER - timedelta(minutes=5))
+        jobs.run_job(claimed)
+        job.refresh_from_db()
+        self.assertEqual(requeued, [0])
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_SUCCEEDED, 1))
+
+    def test_worker_that_lost_lock_does_not_finalize(self):
+        from core import jobs
+        from core.models import Job
+
+        @jobs.register("test_lost")
+        def lost_job(ctx):
+            # Heartbeat kechikdi: requeue_stale vazifani qaytardi va boshqa worker oldi
+            Job.objects.filter(pk=ctx.job.pk).update(locked_by="w2")
+            self.assertFalse(ctx.flush())
+
+        self.addCleanup(jobs._handlers.pop, "test_lost", None)
+        job = jobs.enqueue("test_lost")
+        finished = jobs.run_job(jobs.claim_next("w1"))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), (Job.STATUS_RUNNING, "w2"))
+        self.assertEqual(finished.status, Job.STATUS_RUNNING)
+
+
+class BulkRescoringTests(TestCase):
+    """core.rescoring: eski SCORING_VERSION natijalari recalculate_from_answers bilan bir xil qayta baholanadi."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("rescore_user", password="secret123")
+        self.category = Category.objects.create(name="Rescore", slug="cat-rescore")
+        self.test = Test.objects.create(title="Rescore", category=self.category, test_type="reading")
+        self.questions = [
+            Question.objects.create(test=self.test, order=i, question_type="mcq", question_text=f"Q{i}", correct_answer="a")
+            for i in range(1, 5)
+        ]
+        self.results = []
+        for answers in (["a", "a", "b", ""], ["a", "a", "a", "a"], ["b", "", "", ""]):
+            answers_json = {str(q.pk): ans for q, ans in zip(self.questions, answers) if ans}
+            answers_json["_meta"] = {"exam_variant": 1, "scoring_version": 1}
+            self.results.append(UserTestResult.objects.create(
+                user=self.user, test=self.test, completed_at=timezone.now(), answers_json=answers_json,
+                total_questions=4, correct_answers=0, percentage=0.0,
+            ))
+
+    def _snapshot(self):
+        from core.models import UserTestAnswer
+
+        return [
+            (r.total_questions, r.correct_answers, r.wrong_answers, r.score, r.percentage, r.answers_json,
+             sorted(UserTestAnswer.objects.filter(test_result=r).values_list("question_id", "user_answer", "is_correct")))
+            for r in UserTestResult.objects.order_by("pk")
+        ]
+
+    def test_dry_run_reports_without_writing(self):
+        before = self._snapshot()
+        out = StringIO()
+        call_command("rescore_results", "--dry-run", "--workers", "1", stdout=out)
+        self.assertEqual(self._snapshot(), before)
+        self.assertIn("[dry-run] Ko'rildi: 3, o'zgardi: 2", out.getvalue())
+
+    def test_matches_recalculate_from_answers_and_resumes_from_checkpoint(self):
+        from core.rescoring import rescoring_queryset
+
+        for result in UserTestResult.objects.all():
+            result.recalculate_from_answers()
+        expected = self._snapshot()
+        for result in self.results:
+            result.save()  # eski holat: 0 ball, scoring_version=1
+        self.assertEqual(rescoring_queryset().count(), 3)
+
+        checkpoint = os.path.join(tempfile.mkdtemp(), "rescore.json")
+        self.addCleanup(shutil.rmtree, os.path.dirname(checkpoint), ignore_errors=True)
+        call_command("rescore_results", "--workers", "1", "--chunk-size", "1", "--limit", "1",
+                     "--checkpoint", checkpoint, stdout=StringIO())
+        with open(checkpoint) as fh:
+            self.assertEqual(json.load(fh)["after_id"], self.results[0].pk)
+        self.assertEqual(rescoring_queryset().count(), 2)
+
+        call_command("rescore_results", "--workers", "2", "--chunk-size", "1", "--checkpoint", checkpoint, stdout=StringIO())
+        self.assertFalse(os.path.exists(checkpoint))
+        self.assertEqual(rescoring_queryset().count(), 0)
+        self.assertEqual(self._snapshot(), expected)
+
+
+class AnswerKeyRescoreTests(TestCase):
+    """core.answer_key: kalit o'zgarsa faqat shu savol javoblari qayta baholanadi, natijalarga delta qo'shiladi."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("key_user", password="secret123")
+        self.category = Category.objects.create(name="Key", slug="cat-answer-key")
+        self.test = Test.objects.create(title="Key", category=self.category, test_type="reading")
+        self.q1 = Question.objects.create(test=self.test, order=1, question_type="mcq", question_text="Q1", correct_answer="a")
+        self.q2 = Question.objects.create(test=self.test, order=2, question_type="mcq", question_text="Q2", correct_answer="b")
+        self.results = []
+        for first, second in (("a", "b"), ("c", "b"), ("c", "a")):
+            result = UserTestResult.objects.create(
+                user=self.user, test=self.test, completed_at=timezone.now(),
+                answers_json={str(self.q1.pk): first, str(self.q2.pk): second},
+            )
+            result.recalculate_from_answers()
+            self.results.append(result)
+
+    def _scores(self):
+        return [(r.correct_answers, r.wrong_answers, r.percentage) for r in UserTestResult.objects.order_by("pk")]
+
+    def test_key_change_enqueues_job_that_matches_full_recalculation(self):
+        from core.models import Job, UserTestAnswer
+
+        question = Question.objects.get(pk=self.q1.pk)
+        question.correct_answer = "c"
+        with self.captureOnCommitCallbacks(execute=True):
+            question.save()
+        job = Job.objects.get(kind="rescore_question")
+        self.assertEqual(job.payload["old_key"]["correct_answer"], "a")
+
+        call_command("run_jobs", "--once", stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED, job.error)
+        self.assertIn("correct_answer", job.log)
+        self.assertEqual(
+            list(UserTestAnswer.objects.filter(question=self.q1).order_by("test_result_id").values_list("is_correct", flat=True)),
+            [False, True, True],
+        )
+        delta_scores = self._scores()
+        for result in UserTestResult.objects.all():
+            result.recalculate_from_answers()
+        self.assertEqual(delta_scores, self._scores())
+        self.assertEqual(delta_scores[0], (1, 1, 50.0))
+
+    def test_unchanged_key_does_not_enqueue(self):
+        from core.models import Job
+
+        question = Question.objects.get(pk=self.q1.pk)
+        question.question_text = "Q1 tahrir"
+        with self.captureOnCommitCallbacks(execute=True):
+            question.save()
+        self.assertFalse(Job.objects.exists())
+
+    def test_loading_questions_does_not_snapshot_key(self):
+        question = Question.objects.get(pk=self.q1.pk)
+        self.assertNotIn("_stored_answer_key", question.__dict__)
+        question.correct_answer = "c"
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            question.save(update_fields=["question_text"])
+        self.assertEqual(callbacks, [])
+
+    def test_preview_counts_only_completed_results(self):
+        from core.answer_key import AnswerKeyRescore, answer_key_snapshot
+
+        draft = UserTestResult.objects.create(
+            user=self.user, test=self.test, answers_json={str(self.q1.pk): "c", str(self.q2.pk): "b"},
+        )
+        draft.recalculate_from_answers()
+        question = Question.objects.get(pk=self.q1.pk)
+        old_key = answer_key_snapshot(question)
+        question.correct_answer = "c"
+        self.assertEqual(AnswerKeyRescore(question, old_key).preview()["results"], 3)
+
+    def test_admin_form_shows_preview_and_requires_confirmation(self):
+        from django.forms.models import model_to_dict
+
+        question = Question.objects.get(pk=self.q1.pk)
+        data = {k: v for k, v in model_to_dict(question).items() if v is not None and k != "question_image"}
+        data.update(correct_answer="c", correct_answer_json="null", options_json=json.dumps(question.options_json or {}))
+        form = QuestionAdminForm(data=data, instance=question)
+        self.assertFalse(form.is_valid())
+        self.assertIn("3 ta javobdan 3 tasining bahosi o'zgaradi, 3 ta natija", form.errors["confirm_answer_key_change"][0])
+
+        form = QuestionAdminForm(data={**data, "confirm_answer_key_change": "on"}, instance=Question.objects.get(pk=self.q1.pk))
+        self.assertTrue(form.is_valid(), form.errors)
+
+
+class ItemAnalysisTests(TestCase):
+    """core.item_analysis: p, point-biserial, distraktorlar, bo'sh joylar; tungi ishga tushirish faqat yangilarni qo'shadi."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("item_user", password="secret123")
+        self.category = Category.objects.create(name="Items", slug="cat-item-analysis")
+        self.test = Test.objects.create(title="Items", category=self.category, test_type="reading")
+        self.mcq = Question.objects.create(test=self.test, order=1, question_type="mcq", question_text="Q1", correct_answer="a")
+        self.tf = Question.objects.create(test=self.test, order=2, question_type="true_false", question_text="Q2", correct_answer="true")
+        self.fill = Question.objects.create(
+            test=self.test, order=3, question_type="sentence_completion",
+            question_text="The [1] and the [2].", correct_answer_json=["cat", "dog"],
+        )
+
+    def _attempt(self, mcq, tf, fill, completed_at=None):
+        result = UserTestResult.objects.create(
+            user=self.user, test=self.test, completed_at=completed_at or timezone.now(),
+            answers_json={str(self.mcq.pk): mcq, str(self.tf.pk): tf, str(self.fill.pk): json.dumps(fill)},
+        )
+        result.recalculate_from_answers()
+        return result
+
+    def test_statistics_and_incremental_run(self):
+        import numpy as np
+        from core.item_analysis import analyze_test
+        from core.models import QuestionItemStats, TestItemAnalysis
+
+        earlier = timezone.now() - timedelta(days=1)
+        attempts = [("a", "true", ["cat", "dog"]), ("a", "false", ["cat", "x"]), ("b", "false", ["x", "x"]), ("c", "true", ["cat", "dog"])]
+        for mcq, tf, fill in attempts[:3]:
+            self._attempt(mcq, tf, fill, completed_at=earlier)
+        self.assertEqual(analyze_test(self.test, until=earlier + timedelta(minutes=1)), 3)
+        self._attempt(*attempts[3])
+        self.assertEqual(analyze_test(self.test), 1)
+        self.assertEqual(analyze_test(self.test), 0)
+        self.assertEqual(TestItemAnalysis.objects.get(test=self.test).attempts, 4)
+
+        incremental = {s.question_id: s for s in QuestionItemStats.objects.all()}
+        mcq = incremental[self.mcq.pk]
+        self.assertEqual(mcq.attempts, 4)
+        self.assertAlmostEqual(mcq.p_value, 0.5)
+        self.assertEqual(mcq.distractors, {"a": 2, "b": 1, "c": 1})
+        self.assertEqual(incremental[self.fill.pk].blank_accuracy, [75.0, 50.0])
+
+        x = np.array([1, 1, 0, 0], dtype=float)
+        rest = np.array([1 + 1, 0 + 0.5, 0 + 0, 1 + 1], dtype=float)
+        self.assertAlmostEqual(mcq.discrimination, round(float(np.corrcoef(x, rest)[0, 1]), 4))
+
+        analyze_test(self.test, full=True)
+        for stats in QuestionItemStats.objects.all():
+            before = incremental[stats.question_id]
+            self.assertEqual((stats.attempts, stats.distractors, stats.blank_correct), (before.attempts, before.distractors, before.blank_correct))
+            self.assertAlmostEqual(stats.discrimination or 0, before.discrimination or 0)
+
+    def test_skipped_questions_count_as_zero_within_variant(self):
+        from core.item_analysis import analyze_test
+        from core.models import QuestionItemStats, UserTestAnswer
+
+        self.test.variants_to_select = 2
+        self.test.save(update_fields=["variants_to_select"])
+        Question.objects.filter(pk=self.fill.pk).update(variant=2)
+        for i in range(4):
+            # Yakunlashda bo'sh javob uchun qator yozilmaydi — faqat birinchi urinish tf ga javob bergan
+            result = UserTestResult.objects.create(
+                user=self.user, test=self.test, completed_at=timezone.now(),
+                answers_json={"_meta": {"exam_variant": 1}},
+            )
+            UserTestAnswer.objects.create(test_result=result, question=self.mcq, user_answer="a", is_correct=True)
+            if i == 0:
+                UserTestAnswer.objects.create(test_result=result, question=self.tf, user_answer="true", is_correct=True)
+        self.assertEqual(analyze_test(self.test), 4)
+
+        stats = {s.question_id: s for s in QuestionItemStats.objects.all()}
+        self.assertEqual((stats[self.tf.pk].attempts, stats[self.tf.pk].answered), (4, 1))
+        self.assertAlmostEqual(stats[self.tf.pk].p_value, 0.25)
+        self.assertEqual(stats[self.fill.pk].attempts, 0)  # variant 2 — bu urinishlarda ko'rsatilmagan
+
+    def test_concurrent_run_does_not_count_window_twice(self):
+        from core import item_analysis
+        from core.models import QuestionItemStats, TestItemAnalysis
+
+        self._attempt("a", "true", ["cat", "dog"])
+        real = item_analysis.accumulate_matrix
+        calls = []
+
+        def accumulate_then_race(*args):
+            real(*args)
+            if not calls:
+                calls.append(1)
+                self.assertEqual(item_analysis.analyze_test(self.test), 1)  # parallel ishga tushirish
+
+        with mock.patch.object(item_analysis, "accumulate_matrix", side_effect=accumulate_then_race):
+            self.assertEqual(item_analysis.analyze_test(self.test), 0)
+        self.assertEqual(TestItemAnalysis.objects.get(test=self.test).attempts, 1)
+        self.assertEqual(QuestionItemStats.objects.get(question=self.mcq).attempts, 1)
+
+    def test_admin_report_and_question_columns(self):
+        from core.item_analysis import analyze_test
+
+        admin_user = get_user_model().objects.create_superuser("item_admin", "i@example.com", "secret123")
+        self.client.force_login(admin_user)
+        self._attempt("a", "true", ["cat", "dog"])
+        analyze_test(self.test)
+
+        response = self.client.get(reverse("admin:core_test_item_analysis", args=[self.test.pk]))
+        self.assertContains(response, "Item-analiz")
+        self.assertContains(response, "<strong>1</strong> ta yakunlangan urinish")
+        response = self.client.get(reverse("admin:core_question_changelist"))
+        self.assertContains(response, "Qiyinlik (p)")
+        self.assertContains(response, "1.00")
+
+
+class EssayGradingQueueTests(TestCase):
+    """Essay baholash navbati: needs_grading belgisi, keyset sahifalash, bir POST — har natija bir marta."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("essay_user", password="secret123")
+        self.category = Category.objects.create(name="Writing", slug="cat-essay-grading")
+        self.test = Test.objects.create(title="Writing", category=self.category, test_type="writing")
+        self.task1 = Question.objects.create(test=self.test, order=1, question_type="essay", question_text="Describe the chart.")
+        self.task2 = Question.objects.create(test=self.test, order=2, question_type="essay", question_text="Discuss both views.")
+
+    def _attempt(self, task1="Chart essay", task2="Opinion essay"):
+        result = UserTestResult.objects.create(
+            user=self.user, test=self.test, completed_at=timezone.now(),
+            answers_json={str(self.task1.pk): task1, str(self.task2.pk): task2},
+        )
+        result.recalculate_from_answers()
+        return result
+
+    def test_queue_flag_and_keyset_pages(self):
+        from core.essay_grading import grading_queue, parse_band
+
+        first, second = self._attempt(), self._attempt(task2="")
+        self.assertEqual(UserTestAnswer.objects.filter(needs_grading=True).count(), 3)
+        page, next_after = grading_queue(limit=2)
+        self.assertEqual([a.test_result_id for a in page], [first.pk, first.pk])
+        page, next_after = grading_queue(after=next_after, limit=2)
+        self.assertEqual([a.test_result_id for a in page], [second.pk])
+        self.assertIsNone(next_after)
+
+        self.assertEqual(parse_band("6,5"), parse_band("6.5"))
+        self.assertIsNone(parse_band(""))
+        for bad in ("6.3", "9.5", "x"):
+            with self.assertRaises(ValueError):
+                parse_band(bad)
+
+    def test_recalculate_does_not_load_question_per_answer(self):
+        result = self._attempt()
+        with CaptureQueriesContext(connection) as ctx:
+            result.recalculate_from_answers()
+        question_lookups = [q["sql"] for q in ctx.captured_queries if 'FROM "core_question" WHERE "core_question"."id" =' in q["sql"]]
+        self.assertEqual(question_lookups, [])
+        self.assertEqual(UserTestAnswer.objects.filter(test_result=result, needs_grading=True).count(), 2)
+
+    def test_bulk_submit_recalculates_each_result_once(self):
+        from unittest import mock
+
+        admin_user = get_user_model().objects.create_superuser("essay_admin", "e@example.com", "secret123")
+        self.client.force_login(admin_user)
+        first, second = self._attempt(), self._attempt()
+        self.assertEqual(first.percentage, 0.0)
+        answers = {(a.test_result_id, a.question_id): a.pk for a in UserTestAnswer.objects.all()}
+        url = reverse("admin:core_usertestanswer_grading_queue")
+        self.assertContains(self.client.get(url), "Discuss both views.")
+        self.assertContains(self.client.get(reverse("admin:core_usertestanswer_changelist")), "Essay baholash navbati (4)")
+
+        post = {
+            f"band_{answers[(first.pk, self.task1.pk)]}": "6",
+            f"band_{answers[(first.pk, self.task2.pk)]}": "6.5",
+            f"band_{answers[(second.pk, self.task1.pk)]}": "7",
+        }
+        with mock.patch.object(UserTestResult, "recalculate_from_answers", autospec=True,
+                               side_effect=UserTestResult.recalculate_from_answers) as recalc:
+            response = self.client.post(url, post)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(sorted(call.args[0].pk for call in recalc.call_args_list), [first.pk, second.pk])
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertAlmostEqual(first.percentage, round(6.5 / 9 * 100, 2))  # (6 + 6.5) / 2 → 6.5
+        self.assertEqual(second.percentage, 0.0)  # Task 2 hali baholanmagan
+        graded = UserTestAnswer.objects.get(pk=answers[(first.pk, self.task2.pk)])
+        self.assertEqual((str(graded.band_score), graded.needs_grading, graded.graded_by), ("6.5", False, admin_user))
+        self.assertEqual(UserTestAnswer.objects.filter(needs_grading=True).count(), 1)
+
+        # Qayta hisoblash (recalculate / ommaviy rescoring) bandni saqlab qoladi
+        first.recalculate_from_answers()
+        self.assertFalse(UserTestAnswer.objects.get(pk=graded.pk).needs_grading)
+        response = self.client.post(url, {f"band_{answers[(second.pk, self.task2.pk)]}": "4.2"})
+        self.assertContains(response, "0.5 qadam")
+        self.assertTrue(UserTestAnswer.objects.get(pk=answers[(second.pk, self.task2.pk)]).needs_grading)
+
+
+class LeanChangeListTests(TestCase):
+    """Katta jadvallar admini: taxminiy son, og'ir JSON siz ro'yxat, autocomplete filtr, keyset sahifa."""
+
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser("lean_admin", "l@example.com", "secret123")
+        self.client.force_login(self.admin_user)
+        category = Category.objects.create(name="Lean", slug="cat-lean-changelist")
+        self.test_a = Test.objects.create(title="Lean A", category=category, test_type="reading")
+        self.test_b = Test.objects.create(title="Lean B", category=category, test_type="reading")
+        self.results = [
+            UserTestResult.objects.create(user=self.admin_user, test=self.test_a if i % 2 else self.test_b, answers_json={"x": i})
+            for i in range(5)
+        ]
+
+    def test_estimated_count_paginator(self):
+        from unittest import mock
+        from core.admin.changelist import EstimatedCountPaginator
+
+        qs = UserTestResult.objects.all()
+        self.assertEqual(EstimatedCountPaginator(qs, 2).count, 5)
+        with mock.patch("core.admin.changelist.planner_estimate", return_value=2_500_000):
+            self.assertEqual(EstimatedCountPaginator(qs, 2).count, 2_500_000)
+        with mock.patch("core.admin.changelist.planner_estimate", return_value=40):
+            self.assertEqual(EstimatedCountPaginator(qs, 2).count, 5)
+
+    def test_results_changelist_is_lean(self):
+        from unittest import mock
+        from core.admin.user_admins import UserTestResultAdmin
+
+        url = reverse("admin:core_usertestresult_changelist")
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, {"test__id__exact": self.test_a.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["cl"].result_list), 2)
+        self.assertContains(response, 'data-lookup="test__id__exact"')
+        self.assertContains(response, "admin/js/autocomplete.js")
+        self.assertContains(response, reverse("admin:core_usertestresult_export"))
+        rows_sql = [q["sql"] for q in ctx.captured_queries if 'ORDER BY "core_usertestresult"."id" DESC' in q["sql"]]
+        self.assertEqual(len(rows_sql), 1)
+        self.assertNotIn('"core_usertestresult"."answers_json"', rows_sql[0])
+        self.assertNotIn('"core_test"."reading_text"', rows_sql[0])
+        # Filtr barcha testlarni sanab chiqmaydi (faqat tanlangan test nomi so'raladi)
+        self.assertFalse([q["sql"] for q in ctx.captured_queries if q["sql"].startswith('SELECT "core_test"') and "WHERE" not in q["sql"]])
+
+        with mock.patch.object(UserTestResultAdmin, "list_per_page", 2):
+            first = self.client.get(url)
+            next_after = first.context["cl"].next_after
+            self.assertEqual(next_after, self.results[3].pk)
+            self.assertContains(first, "Keyingi sahifa")
+            second = self.client.get(url, {"after": next_after})
+        self.assertEqual([r.pk for r in second.context["cl"].result_list], [self.results[2].pk, self.results[1].pk])
+
+        change = self.client.get(reverse("admin:core_usertestresult_change", args=[self.results[0].pk]))
+        self.assertContains(change, "answers_json")
+
+    def test_other_large_changelists_render(self):
+        for name in ("usertestanswer", "uservideoprogress", "useractivity"):
+            response = self.client.get(reverse(f"admin:core_{name}_changelist"), {"after": 10})
+            self.assertEqual(response.status_code, 200, name)
+
+
+class AnswerCodecTests(TestCase):
+    """core.answer_codec: answers_json typed qiymatlar (format 2), eski JSON satr qatorlar ham bir xil baholanadi."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("codec_user", password="secret123")
+        category = Category.objects.create(name="Codec", slug="cat-codec")
+        self.test = Test.objects.create(title="Codec", category=category, test_type="reading")
+        self.fill = Question.objects.create(
+            test=self.test, order=1, question_type="fill_blank", question_text="[1] and [2]", correct_answer_json=["cat", "dog"],
+        )
+        self.choose_two = Question.objects.create(
+            test=self.test, order=2, question_type="mcq", max_choices=2, correct_answer_json=["a", "c"],
+            option_a="A", option_b="B", option_c="C", option_d="D",
+        )
+        self.matching = Question.objects.create(
+            test=self.test, order=3, question_type="matching_headings", question_text="Match",
+            correct_answer_json={"1": "i", "2": "ii"},
+        )
+        self.mcq = Question.objects.create(test=self.test, order=4, question_type="mcq", correct_answer="b", option_a="A", option_b="B")
+        self.typed = {
+            str(self.fill.pk): ["cat", "x"],
+            str(self.choose_two.pk): ["a", "c"],
+            str(self.matching.pk): {"1": "i", "2": "iii"},
+            str(self.mcq.pk): "b",
+        }
+        self.legacy = {key: json.dumps(value) if isinstance(value, (list, dict)) else value for key, value in self.typed.items()}
+
+    def _result(self, answers_json):
+        return UserTestResult.objects.create(
+            user=self.user, test=self.test, completed_at=timezone.now(), answers_json=dict(answers_json),
+        )
+
+    def test_decode_and_text_round_trip(self):
+        from core.answer_codec import answer_text, decode_answer, decode_answers
+
+        self.assertEqual(decode_answer('["a", "c"]'), ["a", "c"])
+        self.assertEqual(decode_answer('{"1": "i"}'), {"1": "i"})
+        self.assertEqual(decode_answer("  yes "), "yes")
+        self.assertEqual(decode_answer("[broken"), "[broken")
+        self.assertEqual(decode_answer(None), "")
+        self.assertEqual(answer_text(["a", "c"]), json.dumps(["a", "c"]))
+        self.assertEqual(answer_text([]), "")
+        self.assertEqual(decode_answers({**self.legacy, "9": "", "_meta": {"exam_variant": 1}}), {**self.typed, "_meta": {"exam_variant": 1}})
+
+    def test_legacy_and_typed_rows_score_identically(self):
+        legacy = self._result(self.legacy)
+        typed = self._result(self.typed)
+        for result in (legacy, typed):
+            result.recalculate_from_answers()
+        rows = [
+            sorted(UserTestAnswer.objects.filter(test_result=r).values_list("question_id", "user_answer", "is_correct"))
+            for r in (legacy, typed)
+        ]
+        self.assertEqual(rows[0], rows[1])
+        self.assertIn((self.choose_two.pk, json.dumps(["a", "c"]), True), rows[0])
+        legacy.refresh_from_db()
+        typed.refresh_from_db()
+        self.assertEqual((legacy.correct_answers, legacy.score), (typed.correct_answers, typed.score))
+        self.assertEqual(legacy.answers_json[str(self.fill.pk)], ["cat", "x"])
+        self.assertEqual(legacy.answers_json["_meta"]["answer_format"], 2)
+
+    def test_collect_and_merge_store_native_values(self):
+        from core.test_session_helpers import collect_answers_from_post, merge_answers_json
+
+        request = RequestFactory().post("/", {
+            f"answer_{self.fill.pk}_1": "cat", f"answer_{self.fill.pk}_2": "dog", f"answer_{self.mcq.pk}": "b",
+        })
+        posted = collect_answers_from_post(request, [self.fill, self.mcq])
+        self.assertEqual(posted[str(self.fill.pk)], ["cat", "dog"])
+        merged = merge_answers_json(
+            {**self.legacy, "_meta": {"exam_variant": 1, "scoring_version": 1}}, posted, [self.fill.pk, self.mcq.pk],
+        )
+        self.assertEqual(merged[str(self.fill.pk)], ["cat", "dog"])
+        self.assertEqual(merged[str(self.matching.pk)], {"1": "i", "2": "iii"})
+        self.assertEqual(merged["_meta"]["answer_format"], 2)
+
+    def test_migrate_answer_format_command(self):
+        legacy = self._result({**self.legacy, "_meta": {"exam_variant": 2, "scoring_version": 1}})
+        current = self._result({**self.typed, "_meta": {"answer_format": 2}})
+        out = StringIO()
+        call_command("migrate_answer_format", "--dry-run", stdout=out)
+        self.assertIn("2 ta natijadan 1 tasi", out.getvalue())
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.answers_json[str(self.fill.pk)], json.dumps(["cat", "x"]))
+
+        call_command("migrate_answer_format", "--batch-size", "1", stdout=StringIO())
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.answers_json, {**self.typed, "_meta": {"exam_variant": 2, "scoring_version": 1, "answer_format": 2}})
+        with CaptureQueriesContext(connection) as ctx:
+            call_command("migrate_answer_format", stdout=StringIO())
+        self.assertFalse([q for q in ctx.captured_queries if q["sql"].startswith("UPDATE")])
+        current.refresh_from_db()
+        self.assertEqual(current.answers_json[str(self.choose_two.pk)], ["a", "c"])
+
+    def test_migrate_answer_format_keeps_autosave_of_running_exam(self):
+        from core.management.commands.migrate_answer_format import Command
+
+        running = self._result(self.legacy)
+        UserTestResult.objects.filter(pk=running.pk).update(completed_at=None)
+        autosaved = {**self.legacy, str(self.fill.pk): json.dumps(["cat", "dog"])}
+        real_convert = Command._convert
+
+        def autosave_then_convert(command, *args):
+            # Buyruq o'qigandan keyin kelgan autosave
+            UserTestResult.objects.filter(pk=running.pk).update(answers_json=autosaved)
+            real_convert(command, *args)
+
+        with mock.patch.object(Command, "_convert", autosave_then_convert):
+            call_command("migrate_answer_format", stdout=StringIO())
+        running.refresh_from_db()
+        self.assertEqual(running.answers_json[str(self.fill.pk)], ["cat", "dog"])
+        self.assertEqual(running.answers_json["_meta"]["answer_format"], 2)
+
+
+class QuestionTextTemplateTests(TestCase):
+    """core.question_text: question_text saqlashda tokenlarga kompilyatsiya qilinadi, slot va so'z cheklovi shundan o'qiladi."""
+
+    def setUp(self):
+        category = Category.objects.create(name="Tpl", slug="cat-text-template")
+        self.test = Test.objects.create(title="Tpl", category=category, test_type="listening")
+        self.notes = Question.objects.create(
+            test=self.test, order=1, question_type="notes_completion",
+            question_text="Bring a [15] and [16 17] to the [18].",
+            options_json={"instruction": "Write NO MORE THAN TWO WORDS"},
+        )
+
+    def test_compiled_on_save(self):
+        template = Question.objects.get(pk=self.notes.pk).text_template
+        self.assertEqual(template["slots"], 3)
+        self.assertTrue(template["numbered"])
+        self.assertEqual(template["max_words"], 2)
+        self.assertEqual(template["parts"][:2], [{"text": "Bring a "}, {"slot": 1, "label": "15", "max_words": 2}])
+        self.assertEqual(template["parts"][-1], {"text": "."})
+        self.assertEqual(self.notes.fill_blanks_count(), 3)
+        self.assertEqual(self.notes.gradable_answer_slots(), 3)
+
+        self.notes.question_text = "Only [1] here"
+        self.notes.options_json = {"max_words_per_blank": 1}
+        self.notes.save(update_fields=["question_text", "options_json"])
+        reloaded = Question.objects.get(pk=self.notes.pk)
+        self.assertEqual((reloaded.fill_blanks_count(), reloaded.get_max_words_per_blank()), (1, 1))
+
+    def test_stale_template_is_rebuilt_and_rendering_uses_tokens(self):
+        from core.views import _build_inline_fill_parts, _build_summary_box_inline_parts
+
+        Question.objects.filter(pk=self.notes.pk).update(text_template={})
+        question = Question.objects.get(pk=self.notes.pk)
+        fields = [{"num": 1, "value": "pen"}, {"num": 2, "value": ""}]
+        parts = _build_inline_fill_parts(question, fields)
+        self.assertEqual(
+            [(p["type"], p.get("label") or p.get("content")) for p in parts],
+            [("text", "Bring a "), ("input", "15"), ("text", " and "), ("input", "16 17"), ("text", " to the "), ("text", "[18].")],
+        )
+        self.assertEqual(parts[1]["value"], "pen")
+
+        box = Question.objects.create(
+            test=self.test, order=2, question_type="summary_box", question_text="A [1] b [2]",
+            options_json={"options": [{"letter": "A", "text": "x"}, {"letter": "B", "text": "y"}]},
+        )
+        selects = [p for p in _build_summary_box_inline_parts(box, {"2": "B"}) if p["type"] == "select"]
+        self.assertEqual([(p["num"], p["value"]) for p in selects], [(1, ""), (2, "b")])
+        self.assertEqual(box.gradable_answer_slots(), 2)
+
+    def test_short_answer_item_word_limits(self):
+        question = Question.objects.create(
+            test=self.test, order=3, question_type="short_answer", question_text="Answer:",
+            options_json={"instruction": "ONE WORD ONLY", "short_answer_items": [{"prompt": "a", "max_words": 3}, {"prompt": "b"}]},
+        )
+        self.assertEqual(question.fill_blanks_count(), 2)
+        self.assertEqual([question.get_max_words_for_blank_index(i) for i in range(3)], [3, 1, 1])
+
+
+class ExamSyncTests(TestCase):
+    """core.exam_sync: jurnal paketlari seq bo'yicha bir marta qo'llanadi, commit testni bir marta yakunlaydi."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("sync_user", password="secret123")
+        self.client.force_login(self.user)
+        category = Category.objects.create(name="Sync", slug="cat-exam-sync")
+        self.exam = Test.objects.create(title="Sync", category=category, test_type="listening")
+        self.fill = Question.objects.create(
+            test=self.exam, order=1, question_type="fill_blank", question_text="[1] [2]", correct_answer_json=["cat", "dog"],
+        )
+        self.mcq = Question.objects.create(test=self.exam, order=2, question_type="mcq", correct_answer="b", option_a="A", option_b="B")
+        self.result = UserTestResult.objects.create(user=self.user, test=self.exam, answers_json={})
+        self.sync_url = reverse("core:test_sync", args=[self.exam.pk])
+        self.commit_url = reverse("core:test_sync_commit", args=[self.exam.pk])
+
+    def _post(self, url, payload, compress=False):
+        body = json.dumps(payload).encode("utf-8")
+        extra = {}
+        if compress:
+            body = gzip.compress(body)
+            extra["HTTP_CONTENT_ENCODING"] = "gzip"
+        return self.client.post(url, body, content_type="application/json", **extra)
+
+    def _ops(self, *ops):
+        return {"result": self.result.pk, "client": "tab-1", "ops": [{"seq": s, "q": q, "f": f} for s, q, f in ops]}
+
+    def test_batches_apply_once_by_sequence(self):
+        payload = self._ops(
+            (1, self.fill.pk, {f"answer_{self.fill.pk}_1": "ca"}),
+            (2, self.mcq.pk, {f"answer_{self.mcq.pk}": "a"}),
+            (3, self.fill.pk, {f"answer_{self.fill.pk}_1": "cat", f"answer_{self.fill.pk}_2": "dog"}),
+            (4, 999999, {"answer_999999": "x"}),
+        )
+        response = self._post(self.sync_url, payload, compress=True)
+        self.assertEqual(response.json(), {"ok": True, "acked": 4, "applied": 2})
+        self.result.refresh_from_db()
+        self.assertEqual(self.result.answers_json[str(self.fill.pk)], ["cat", "dog"])
+        self.assertEqual(self.result.answers_json[str(self.mcq.pk)], "a")
+        self.assertEqual(self.result.answers_json["_meta"]["sync"], {"client": "tab-1", "seq": 4})
+
+        # Javobi yo'qolgan paket qayta keldi — hech narsa o'zgarmaydi
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._post(self.sync_url, payload)
+        self.assertEqual(response.json(), {"ok": True, "acked": 4, "applied": 0})
+        self.assertFalse([q for q in ctx.captured_queries if q["sql"].startswith("UPDATE")])
+
+        response = self._post(self.sync_url, self._ops((4, self.mcq.pk, {}), (5, self.mcq.pk, {f"answer_{self.mcq.pk}": "b"})))
+        self.assertEqual(response.json()["applied"], 1)
+        self.result.refresh_from_db()
+        self.assertEqual(self.result.answers_json[str(self.mcq.pk)], "b")
+
+        self.assertEqual(self._post(self.sync_url, {"client": "tab-1", "ops": "x"}).status_code, 400)
+        bad = self.client.post(self.sync_url, b"not gzip", content_type="application/json", HTTP_CONTENT_ENCODING="gzip")
+        self.assertEqual(bad.status_code, 400)
+
+    def test_commit_finishes_once(self):
+        payload = self._ops(
+            (1, self.fill.pk, {f"answer_{self.fill.pk}_1": "cat", f"answer_{self.fill.pk}_2": "dog"}),
+            (2, self.mcq.pk, {f"answer_{self.mcq.pk}": "b"}),
+        )
+        payload["commit"] = True
+        response = self._post(self.commit_url, payload)
+        redirect_url = reverse("core:test_result", args=[self.result.pk])
+        self.assertEqual(response.json(), {"ok": True, "redirect": redirect_url, "acked": 2})
+        self.result.refresh_from_db()
+        self.assertIsNotNone(self.result.completed_at)
+        self.assertEqual((self.result.correct_answers, self.result.total_questions), (3, 3))
+
+        again = self._post(self.commit_url, payload)
+        self.assertEqual(again.json(), {"ok": True, "redirect": redirect_url})
+        self.assertEqual(UserActivity.objects.filter(user=self.user, activity_type="test_complete").count(), 1)
+        late = self._post(self.sync_url, self._ops((3, self.mcq.pk, {})))
+        self.assertEqual(late.status_code, 409)
+        self.assertTrue(late.json()["completed"])
+
+    def test_service_worker_and_take_page(self):
+        response = self.client.get(reverse("core:exam_service_worker"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/javascript; charset=utf-8")
+        self.assertEqual(response["Service-Worker-Allowed"], "/tests/")
+        self.assertContains(response, "exam-offline")
+
+        page = self.client.get(reverse("core:test_take", args=[self.exam.pk]))
+        self.assertContains(page, self.sync_url)
+        self.assertContains(page, "resultPk: %d" % self.result.pk)
@@ -1,10 +1,11 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'core'
 
 urlpatterns = [
     path('', views.module_selector, name='module_selector'),
+    path('exam-sw.js', views.exam_service_worker, name='exam_service_worker'),
     path('ielts/', views.dashboard, name='dashboard'),
     path('videos/', views.video_list, name='video_list'),
     path('videos/<int:pk>/', views.video_detail, name='video_detail'),
@@ -12,10 +13,14 @@ urlpatterns = [
     path('tests/collection/<str:test_type>/', views.test_collection_by_type, name='test_collection_by_type'),
     path('tests/<int:pk>/', views.test_detail, name='test_detail'),
     path('tests/<int:pk>/take/', views.test_take, name='test_take'),
+    path('tests/<int:pk>/take/part/<int:part_number>/', views.test_take_part, name='test_take_part'),
     path('tests/<int:pk>/retake/', views.test_retake, name='test_retake'),
     path('tests/<int:pk>/pause/', views.test_pause, name='test_pause'),
     path('tests/<int:pk>/resume/', views.test_resume, name='test_resume'),
-    path('tests/<int:pk>/update-time/', views.test_update_time, name='test_update_time'),
+    path('tests/<int:pk>/update-time/', async_views.test_update_time, name='test_update_time'),
+    path('tests/<int:pk>/autosave/', async_views.test_autosave, name='test_autosave'),
+    path('tests/<int:pk>/sync/', async_views.test_sync, name='test_sync'),
+    path('tests/<int:pk>/sync/commit/', views.test_sync_commit, name='test_sync_commit'),
     path('tests/<int:pk>/flashcard/add/', views.add_test_flashcard, name='add_test_flashcard'),
     path('test-results/<int:pk>/', views.test_result, name='test_result'),
     path('profile/', views.profile, name='profile'),
@@ -27,13 +32,15 @@ urlpatterns = [
     path('weekly-summary/', views.weekly_summary, name='weekly_summary'),
     path('monthly-report/', views.monthly_report, name='monthly_report'),
     path('export/excel/', views.export_to_excel, name='export_to_excel'),
-    path('bookmark/toggle/', views.toggle_bookmark, name='toggle_bookmark'),
+    path('bookmark/toggle/', async_views.toggle_bookmark, name='toggle_bookmark'),
     path('export/results/', views.export_results, name='export_results'),
-    path('video/<int:pk>/update-progress/', views.update_video_progress, name='update_video_progress'),
+    path('video/<int:pk>/update-progress/', async_views.update_video_progress, name='update_video_progress'),
     path('video/<int:pk>/note/add/', views.add_video_note, name='add_video_note'),
     path('video/note/<int:note_id>/delete/', views.delete_video_note, name='delete_video_note'),
-    path('video/<int:pk>/rate/', views.rate_video, name='rate_video'),
+    path('video/<int:pk>/rate/', async_views.rate_video, name='rate_video'),
     path('video/<int:pk>/comment/add/', views.add_video_comment, name='add_video_comment'),
+    path('video/<int:pk>/comments/', views.video_comment_list, name='video_comment_list'),
+    path('video/comment/<int:comment_id>/replies/', views.video_comment_replies, name='video_comment_replies'),
     path('video/comment/<int:comment_id>/delete/', views.delete_video_comment, name='delete_video_comment'),
     path('playlist/create/', views.create_playlist, name='create_playlist'),
     path('video/<int:pk>/playlist/add/', views.add_video_to_playlist, name='add_video_to_playlist'),
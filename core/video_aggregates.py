@@ -0,0 +1,115 @@
+"""
+Video reyting, izoh va playlist yig'indilari: yozish paytida atomik F() yangilanishlar.
+
+O'qish sahifalari (ro'yxat, detal) faqat tayyor maydonlarni o'qiydi — Avg/COUNT yo'q.
+Qo'lda (admin, shell) o'zgartirilgan yozuvlar sabab chetlanish `reconcile_video_aggregates` bilan tuzatiladi.
+"""
+from django.db.models import Count, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Greatest, NullIf
+
+from .models import PlaylistVideo, VideoComment, VideoLesson, VideoPlaylist, VideoRating
+
+
+def apply_rating_change(video_id, sum_delta, count_delta=0):
+    """Reyting qo'shildi (count_delta=1) yoki o'zgardi (sum_delta = yangi - eski). UPDATE da o'ng tomon eski qiymatlar."""
+    new_sum = F('rating_sum') + sum_delta
+    new_count = F('rating_count') + count_delta
+    VideoLesson.objects.filter(pk=video_id).update(
+        rating_sum=new_sum,
+        rating_count=new_count,
+        rating_average=Coalesce(
+            Cast(new_sum, FloatField()) / NullIf(Cast(new_count, FloatField()), Value(0.0)),
+            Value(0.0),
+        ),
+    )
+
+
+def apply_comment_added(comment):
+    VideoLesson.objects.filter(pk=comment.video_id).update(comment_count=F('comment_count') + 1)
+    if comment.parent_id:
+        VideoComment.objects.filter(pk=comment.parent_id).update(reply_count=F('reply_count') + 1)
+
+
+def apply_comments_deleted(video_id, parent_id, deleted_total):
+    """Izoh o'chirildi: deleted_total — kaskad bilan o'chgan javoblar ham."""
+    if deleted_total:
+        VideoLesson.objects.filter(pk=video_id).update(
+            comment_count=Greatest(F('comment_count') - deleted_total, Value(0))
+        )
+    if parent_id:
+        VideoComment.objects.filter(pk=parent_id).update(reply_count=Greatest(F('reply_count') - 1, Value(0)))
+
+
+def apply_playlist_size_change(playlist_id, delta):
+    if delta:
+        VideoPlaylist.objects.filter(pk=playlist_id).update(
+            video_count=Greatest(F('video_count') + delta, Value(0))
+        )
+
+
+def _count_subquery(model, fk, expression=None):
+    expression = expression or Count('pk')
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{fk: OuterRef('pk')})
+            .order_by()
+            .values(fk)
+            .annotate(value=expression)
+            .values('value')[:1],
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def _differs(stored, true_value):
+    if isinstance(true_value, float):
+        return abs((stored or 0.0) - true_value) > 1e-9
+    return stored != true_value
+
+
+def _reconcile(queryset, fields, fix, batch_size):
+    """fields: {maydon: haqiqiy qiymat ifodasi}. Farq qilgan qatorlar soni qaytariladi."""
+    annotated = queryset.annotate(**{f'true_{name}': expr for name, expr in fields.items()})
+    stale = []
+    for obj in annotated.iterator(chunk_size=batch_size):
+        changed = False
+        for name in fields:
+            true_value = getattr(obj, f'true_{name}')
+            if _differs(getattr(obj, name), true_value):
+                setattr(obj, name, true_value)
+                changed = True
+        if changed:
+            stale.append(obj)
+    if fix and stale:
+        queryset.model.objects.bulk_update(stale, list(fields), batch_size=batch_size)
+    return len(stale)
+
+
+def reconcile_video_aggregates(fix=True, batch_size=500):
+    """Barcha yig'indilarni manba jadvallardan qayta hisoblash. {model: tuzatilgan qatorlar} qaytaradi."""
+    rating_sum = _count_subquery(VideoRating, 'video', Sum('rating'))
+    rating_count = _count_subquery(VideoRating, 'video')
+    rating_average = Coalesce(
+        Cast(rating_sum, FloatField()) / NullIf(Cast(rating_count, FloatField()), Value(0.0)),
+        Value(0.0),
+    )
+    return {
+        'VideoLesson': _reconcile(
+            VideoLesson.objects.all(),
+            {
+                'rating_sum': rating_sum,
+                'rating_count': rating_count,
+                'rating_average': rating_average,
+                'comment_count': _count_subquery(VideoComment, 'video'),
+            },
+            fix,
+            batch_size,
+        ),
+        'VideoComment': _reconcile(
+            VideoComment.objects.all(), {'reply_count': _count_subquery(VideoComment, 'parent')}, fix, batch_size
+        ),
+        'VideoPlaylist': _reconcile(
+            VideoPlaylist.objects.all(), {'video_count': _count_subquery(PlaylistVideo, 'playlist')}, fix, batch_size
+        ),
+    }
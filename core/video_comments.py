@@ -0,0 +1,94 @@
+"""
+Video izohlari: (created_at, id) bo'yicha keyset (cursor) sahifalash.
+
+Asosiy izohlar — eng yangisidan, javoblar — eng eskisidan, alohida sahifalanadi; OFFSET yo'q, shuning uchun
+minglab izohli videoda ham har bir sahifa bir xil narxda. Javoblar soni VideoComment.reply_count dan.
+Videoning birinchi sahifasi keshda (versiya — content_versions 'video_comments'), izoh yozilganda/o'chirilganda yangilanadi.
+"""
+import base64
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from .content_versions import bump_content_version, get_content_version
+from .models import VideoComment
+
+COMMENTS_PAGE_SIZE = 20
+REPLIES_PAGE_SIZE = 10
+FIRST_PAGE_TIMEOUT = 60 * 60
+VERSION_NAMESPACE = 'video_comments'
+
+
+def encode_cursor(comment):
+    raw = f"{comment['created_at'].isoformat()}|{comment['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Noto'g'ri cursor — None (birinchi sahifa)."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _serialize(comment):
+    user = comment.user
+    return {
+        'id': comment.pk,
+        'parent_id': comment.parent_id,
+        'user_id': comment.user_id,
+        'user_name': user.first_name or user.username,
+        'text': comment.comment_text,
+        'is_edited': comment.is_edited,
+        'reply_count': comment.reply_count,
+        'created_at': comment.created_at,
+    }
+
+
+def _page(queryset, cursor, newest_first, page_size):
+    position = decode_cursor(cursor)
+    if position is not None:
+        created_at, pk = position
+        if newest_first:
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+        else:
+            queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+    ordering = ('-created_at', '-pk') if newest_first else ('created_at', 'pk')
+    rows = list(
+        queryset.select_related('user')
+        .only(
+            'pk', 'parent_id', 'user_id', 'comment_text', 'is_edited', 'reply_count', 'created_at',
+            'user__username', 'user__first_name',
+        )
+        .order_by(*ordering)[:page_size + 1]
+    )
+    items = [_serialize(c) for c in rows[:page_size]]
+    next_cursor = encode_cursor(items[-1]) if len(rows) > page_size else None
+    return {'comments': items, 'next_cursor': next_cursor}
+
+
+def comment_page(video_id, cursor=None, page_size=COMMENTS_PAGE_SIZE):
+    """Asosiy izohlar sahifasi; birinchi sahifa keshdan."""
+    queryset = VideoComment.objects.filter(video_id=video_id, parent__isnull=True)
+    if cursor or page_size != COMMENTS_PAGE_SIZE:
+        return _page(queryset, cursor, True, page_size)
+    key = f'core:video_comments:{video_id}:{get_content_version(VERSION_NAMESPACE, video_id)}'
+    page = cache.get(key)
+    if page is None:
+        page = _page(queryset, None, True, page_size)
+        cache.set(key, page, FIRST_PAGE_TIMEOUT)
+    return page
+
+
+def reply_page(parent_id, cursor=None, page_size=REPLIES_PAGE_SIZE):
+    return _page(VideoComment.objects.filter(parent_id=parent_id), cursor, False, page_size)
+
+
+def invalidate_first_page(video_id):
+    bump_content_version(VERSION_NAMESPACE, video_id)
@@ -3,28 +3,47 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse, FileResponse
-from django.db.models import Count, Avg, Q, Sum, Max, Min, Case, When, IntegerField, F
-from django.db.models.functions import Coalesce
+from django.http import JsonResponse, HttpResponse, FileResponse, Http404
+from django.db.models import Count, Avg, Q, Sum, Max, Min, Case, When, IntegerField, F, Window, Exists, OuterRef
+from django.db.models.functions import Coalesce, RowNumber
 from django.db.models import Value
 from django.core.paginator import Paginator
 from django.utils import timezone
 from django.urls import reverse
+from django.utils.http import url_has_allowed_host_and_scheme
 from django.db import transaction
+from django.core.cache import cache
 from django.views.decorators.http import require_POST
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.templatetags.static import static
 from datetime import timedelta, datetime
 from calendar import monthrange
+import hashlib
 import json
 import re
 from .models import (
-    Category, VideoLesson, Test, Question,
+    VideoLesson, Test, Question,
     UserTestResult, UserTestAnswer, UserVideoProgress, UserActivity,
     Bookmark, StudyStreak, VideoNote, VideoRating,
     VideoComment, VideoPlaylist, PlaylistVideo, FlashcardSet, Flashcard,
     SATResource, SATResourceProgress, SATResourceBookmark, SATResourceNote,
 )
 from .access import get_user_module_access
+from .content_versions import get_content_version
+from . import fragment_cache
+from .db_routing import mark_recent_write, read_from_replica
+from . import video_aggregates, video_comments
+from .category_tree import get_category_tree
+from .reading_passages import resolve_reading_passages
+from .recommendations import (
+    get_user_recommendations,
+    recommended_sat_resources_for,
+    recommended_tests_for,
+    weak_areas_for,
+)
 from .context_processors import build_notification_items
+from . import exam_sync
+from .answer_codec import answer_text, decode_answer, decode_answers
 from .test_session_helpers import (
     build_type_stats,
     collect_answers_from_post,
@@ -68,18 +87,7 @@ def sat_home(request):
     bookmarks_qs = SATResourceBookmark.objects.filter(user=request.user)
     last_progress = progress_qs.select_related('resource').order_by('-last_accessed_at').first()
     recent_progress_items = progress_qs.filter(watch_percentage__gt=0).select_related('resource').order_by('-last_accessed_at')[:5]
-    started_resource_ids = set(progress_qs.filter(watch_percentage__gt=0).values_list('resource_id', flat=True))
-
-    recommendation_qs = resources
-    if last_progress and last_progress.resource_id:
-        recommendation_qs = recommendation_qs.filter(subject=last_progress.resource.subject)
-    recommendations = list(
-        recommendation_qs.exclude(pk__in=started_resource_ids).order_by('order', '-created_at')[:3]
-    )
-    if not recommendations:
-        recommendations = list(resources.exclude(pk__in=started_resource_ids).order_by('order', '-created_at')[:3])
-    if not recommendations:
-        recommendations = list(resources.order_by('order', '-created_at')[:3])
+    recommendations = recommended_sat_resources_for(get_user_recommendations(request.user))
     sat_summary = progress_qs.aggregate(
         avg_progress=Avg('watch_percentage'),
         completed=Count('id', filter=Q(watched=True)),
@@ -108,6 +116,11 @@ def sat_home(request):
     return render(request, 'core/sat/home.html', context)
 
 
+SAT_PAGE_SIZE = 6
+# Kartada ko'rsatiladigan oxirgi eslatmalar soni
+SAT_NOTES_PER_CARD = 5
+
+
 @login_required
 def sat_subject(request, subject):
     """SAT bo'limi: matematika yoki ingliz tili."""
@@ -122,60 +135,71 @@ def sat_subject(request, subject):
     base_qs = SATResource.objects.filter(is_active=True, subject=subject)
     if search_query:
         base_qs = base_qs.filter(Q(title__icontains=search_query) | Q(description__icontains=search_query))
+    # JOIN + distinct() o'rniga EXISTS: (user, resource) indekslari bo'yicha, dublikat qatorlarsiz
     if bookmarked_only:
-        base_qs = base_qs.filter(bookmarks__user=request.user).distinct()
+        base_qs = base_qs.filter(
+            Exists(SATResourceBookmark.objects.filter(user=request.user, resource_id=OuterRef('pk')))
+        )
     if content_type == 'video':
         base_qs = base_qs.filter(
             (Q(video_file__isnull=False) & ~Q(video_file=''))
             | Q(youtube_id__gt='')
             | Q(youtube_url__gt='')
-        ).distinct()
+        )
     elif content_type == 'pdf':
-        base_qs = base_qs.filter(Q(pdf_file__isnull=False) & ~Q(pdf_file='')).distinct()
+        base_qs = base_qs.filter(Q(pdf_file__isnull=False) & ~Q(pdf_file=''))
 
+    user_progress = SATResourceProgress.objects.filter(user=request.user, resource_id=OuterRef('pk'))
     if progress_status == 'completed':
-        base_qs = base_qs.filter(progress__user=request.user, progress__watched=True).distinct()
+        base_qs = base_qs.filter(Exists(user_progress.filter(watched=True)))
     elif progress_status == 'in_progress':
         base_qs = base_qs.filter(
-            progress__user=request.user,
-            progress__watch_percentage__gt=0,
-            progress__watch_percentage__lt=90,
-        ).distinct()
+            Exists(user_progress.filter(watch_percentage__gt=0, watch_percentage__lt=90))
+        )
     elif progress_status == 'not_started':
-        started_ids = SATResourceProgress.objects.filter(
-            user=request.user,
-            watch_percentage__gt=0,
-        ).values_list('resource_id', flat=True)
-        base_qs = base_qs.exclude(pk__in=started_ids)
-
-    items = list(base_qs.order_by('order', '-created_at'))
-    resource_ids = [x.pk for x in items]
-    progress_map = {
-        x.resource_id: x
-        for x in SATResourceProgress.objects.filter(user=request.user, resource_id__in=resource_ids)
-    }
-    bookmark_map = {
-        (x.resource_id, x.bookmark_type): x
-        for x in SATResourceBookmark.objects.filter(user=request.user, resource_id__in=resource_ids)
-    }
+        base_qs = base_qs.filter(~Exists(user_progress.filter(watch_percentage__gt=0)))
+
+    # COUNT va LIMIT/OFFSET bazada; qolgan ma'lumotlar faqat sahifadagi 6 ta resurs uchun
+    paginator = Paginator(base_qs.order_by('order', '-created_at', 'pk'), SAT_PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    page_items = list(page_obj.object_list)
+    resource_ids = [x.pk for x in page_items]
+    progress_map = {}
+    bookmark_map = {}
     notes_map = {}
-    for n in SATResourceNote.objects.filter(user=request.user, resource_id__in=resource_ids).order_by('-created_at'):
-        notes_map.setdefault(n.resource_id, []).append(n)
+    if resource_ids:
+        progress_map = {
+            x.resource_id: x
+            for x in SATResourceProgress.objects.filter(user=request.user, resource_id__in=resource_ids)
+        }
+        bookmark_map = {
+            (x.resource_id, x.bookmark_type): x
+            for x in SATResourceBookmark.objects.filter(user=request.user, resource_id__in=resource_ids)
+        }
+        latest_notes = (
+            SATResourceNote.objects.filter(user=request.user, resource_id__in=resource_ids)
+            .annotate(note_rank=Window(
+                expression=RowNumber(),
+                partition_by=[F('resource_id')],
+                order_by=[F('created_at').desc(), F('pk').desc()],
+            ))
+            .filter(note_rank__lte=SAT_NOTES_PER_CARD)
+            .order_by('resource_id', 'note_rank')
+        )
+        for n in latest_notes:
+            notes_map.setdefault(n.resource_id, []).append(n)
 
-    enriched_items = []
-    for x in items:
-        enriched_items.append({
+    page_obj.object_list = [
+        {
             'obj': x,
             'progress': progress_map.get(x.pk),
             'bookmark_video': bookmark_map.get((x.pk, SATResourceBookmark.TYPE_VIDEO)),
             'bookmark_pdf': bookmark_map.get((x.pk, SATResourceBookmark.TYPE_PDF)),
             'bookmark_general': bookmark_map.get((x.pk, SATResourceBookmark.TYPE_GENERAL)),
             'notes': notes_map.get(x.pk, []),
-        })
-
-    paginator = Paginator(enriched_items, 6)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+        }
+        for x in page_items
+    ]
 
     subject_label = dict(SATResource.SUBJECT_CHOICES).get(subject, subject)
     return render(
@@ -262,28 +286,6 @@ def sat_statistics(request):
     return render(request, 'core/sat/statistics.html', context)
 
 
-@login_required
-@require_POST
-def sat_update_progress(request, pk):
-    resource = get_object_or_404(SATResource, pk=pk, is_active=True)
-    try:
-        progress = int(request.POST.get('progress', 0))
-    except (TypeError, ValueError):
-        progress = 0
-    try:
-        position_seconds = int(float(request.POST.get('position_seconds', 0)))
-    except (TypeError, ValueError):
-        position_seconds = 0
-    obj, _ = SATResourceProgress.objects.get_or_create(user=request.user, resource=resource)
-    obj.update_progress(progress, position_seconds=position_seconds)
-    return JsonResponse({
-        'success': True,
-        'progress': obj.watch_percentage,
-        'watched': obj.watched,
-        'position_seconds': obj.last_position_seconds,
-    })
-
-
 @login_required
 @require_POST
 def sat_toggle_bookmark(request, pk):
@@ -393,13 +395,8 @@ def _reading_passage_count(test):
     """Reading: DB dagi passage soni (2 variantli testda birinchi variantdagi passage lar)."""
     if not hasattr(test, 'get_reading_passages'):
         return 0
-    pl = test.get_reading_passages() or []
-    if not pl:
-        return 0
-    # 2 variant: [[{passage},...], [{passage},...]]
-    if isinstance(pl[0], list):
-        return len(pl[0])
-    return len(pl)
+    # 2 variant: [[{passage},...], [{passage},...]] — birinchi variantdagi soni
+    return resolve_reading_passages(test)['count']
 
 
 def _reading_uniform_variant(test, questions):
@@ -497,59 +494,14 @@ def _listening_flat_dock_buttons(question_cards):
     return out
 
 
-def _passage_dict_for_reading_part(passage_items, part_number):
-    """
-    Part N → ReadingPassage tartibi (order) bilan mos: order==N bo'lgan matn.
-    Bunday yozuv bo'lmasa, 'order' bo'yicha saralangan ro'yxatdan N-o'rindagi (1-based).
-    """
-    if not passage_items:
-        return None
-    items = [d for d in passage_items if isinstance(d, dict)]
-    if not items:
-        return None
+def _passage_for_part(part_map, part_number):
+    """Oldindan hisoblangan Part N → passage xaritasidan nusxa (core.reading_passages)."""
     try:
         pn = int(part_number)
     except (TypeError, ValueError):
         pn = 1
-
-    def _same_part(d, n):
-        try:
-            return int(d.get('order')) == int(n)
-        except (TypeError, ValueError):
-            return False
-
-    exact = next((d for d in items if _same_part(d, pn)), None)
-    if exact is not None:
-        return dict(exact)
-    # order==N yo'q (masalan hammasi 1): get_reading_passages tartibi = DB (order, pk) — N-chi yozuv
-    idx = pn - 1
-    if 0 <= idx < len(items):
-        return dict(items[idx])
-    return None
-
-
-def _all_reading_passage_dicts_ordered(test):
-    """
-    DB dagi barcha passage lar order bo'yicha.
-    «2 variant» testda ham savollar hammasi bir xil exam variantida bo'lsa, admin bitta passage ni
-    noto'g'ri «Variant 2» qo'ygan bo'lsa, get_reading_passages() dagi faqat v1 ro'yxatida order=2 yo'qolib,
-    Part 2 ga Passage 3 tushib qolardi — shuning uchun uniform holda shu ro'yxat ishlatiladi.
-    """
-    if not hasattr(test, 'reading_passages'):
-        return []
-    objs = list(test.reading_passages.all().order_by('order', 'pk'))
-    out = []
-    for i, p in enumerate(objs):
-        o = p.order
-        if o is None:
-            o = i + 1
-        try:
-            o = int(o)
-        except (TypeError, ValueError):
-            o = i + 1
-        title = (p.title or '').strip() or f'Passage {o}'
-        out.append({'title': title, 'text': p.text or '', 'order': o})
-    return out
+    row = part_map.get(pn)
+    return dict(row) if row is not None else None
 
 
 def _get_fill_blank_count(question):
@@ -561,25 +513,25 @@ def _build_inline_fill_parts(question, ans_fields):
     """question_text ichidagi [1], [2], [3 4]... ni inline input. [3 4] — bitta yacheyka, label [3 4] ko'rsatiladi."""
     if not ans_fields:
         return None
-    text = question.question_text or ''
     parts = []
-    last = 0
     placed_nums = set()
-    # Qavs ichidagi ixtiyoriy matn: [1], [2], [3 4] (2 ta so'z uchun bitta yacheyka)
-    for idx, m in enumerate(re.finditer(r'\[([^\]]+)\]', text)):
-        num = idx + 1
+    fields_by_num = {f.get('num'): f for f in ans_fields}
+    # Qavs ichidagi ixtiyoriy matn: [1], [2], [3 4] (2 ta so'z uchun bitta yacheyka) — tokenlar question.text_template da
+    tokens = question.compiled_text['parts']
+    for i, token in enumerate(tokens):
+        num = token.get('slot')
+        if num is None:
+            parts.append({'type': 'text', 'content': token['text']})
+            continue
         if num > len(ans_fields):
+            # Ortiqcha qavslar oddiy matn bo'lib qoladi
+            rest = ''.join(t['text'] if t.get('slot') is None else f"[{t['label']}]" for t in tokens[i:])
+            parts.append({'type': 'text', 'content': rest})
             break
-        label_raw = m.group(1).strip()
-        if m.start() > last:
-            parts.append({'type': 'text', 'content': text[last:m.start()]})
-        field = next((f for f in ans_fields if f['num'] == num), None)
+        field = fields_by_num.get(num)
         if field:
-            parts.append({'type': 'input', 'num': num, 'value': field.get('value', ''), 'label': label_raw})
+            parts.append({'type': 'input', 'num': num, 'value': field.get('value', ''), 'label': token['label']})
             placed_nums.add(num)
-        last = m.end()
-    if last < len(text):
-        parts.append({'type': 'text', 'content': text[last:]})
     for f in ans_fields:
         num = f.get('num')
         if num and num not in placed_nums:
@@ -589,7 +541,6 @@ def _build_inline_fill_parts(question, ans_fields):
 
 def _build_summary_box_inline_parts(question, cur_dict):
     """summary_box: matn ichidagi [36], [1] qavslar uchun inline <select> (A–H ro'yxati)."""
-    text = question.question_text or ''
     opts = question.options_json or {}
     raw_options = opts.get('options') or opts.get('headings') or []
     opts_list = []
@@ -603,32 +554,29 @@ def _build_summary_box_inline_parts(question, cur_dict):
     opts_list = [x for x in opts_list if x.get('letter')]
     if not opts_list:
         return None
+    compiled = question.compiled_text
+    if not compiled['slots']:
+        return None
     cur_dict = cur_dict if isinstance(cur_dict, dict) else {}
     parts = []
-    last = 0
-    slot = 0
-    for m in re.finditer(r'\[([^\]]+)\]', text):
-        slot += 1
-        if m.start() > last:
-            parts.append({'type': 'text', 'content': text[last:m.start()]})
+    for token in compiled['parts']:
+        slot = token.get('slot')
+        if slot is None:
+            parts.append({'type': 'text', 'content': token['text']})
+            continue
         raw_val = cur_dict.get(str(slot), '')
         parts.append({
             'type': 'select',
             'num': slot,
-            'label': m.group(1).strip(),
+            'label': token['label'],
             'value': str(raw_val).strip().lower() if raw_val is not None else '',
             'options': opts_list,
         })
-        last = m.end()
-    if last < len(text):
-        parts.append({'type': 'text', 'content': text[last:]})
-    if not parts or not any(p.get('type') == 'select' for p in parts):
-        return None
     return parts
 
 
 def _summary_box_slot_count(question):
-    n = len(re.findall(r'\[[^\]]+\]', question.question_text or ''))
+    n = question.compiled_text['slots']
     if n:
         return n
     c = question.correct_answer_json if isinstance(question.correct_answer_json, dict) else {}
@@ -649,8 +597,20 @@ def _card_fill_input_count(card):
     return len(af) if af else 1
 
 
+def _answer_blanks(value, n):
+    """Typed javobdan bo'sh joylar qiymatlari (ro'yxat, {"1": ...} yoki vergulli satr)."""
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return [str(value.get(str(i + 1), '')) for i in range(n)]
+    if value:
+        return [x.strip() for x in str(value).split(',')]
+    return []
+
+
 def _get_question_context_extra(question, current_answer):
     """Savol turiga qarab answer_fields, matching_fields, list_options, box_inline_parts qaytarish"""
+    current_answer = decode_answer(current_answer)
     ans_fields, matching_fields, list_options = [], [], []
     box_inline_parts = None
     opts = question.options_json or {}
@@ -668,13 +628,7 @@ def _get_question_context_extra(question, current_answer):
             cl = question.get_correct_answers_list()
             if len(cl) < n_blanks:
                 cl = list(cl) + [''] * (n_blanks - len(cl))
-            ca_blanks = []
-            if current_answer:
-                try:
-                    d = json.loads(current_answer)
-                    ca_blanks = d if isinstance(d, list) else [str(d.get(str(i + 1), '')) for i in range(len(cl))]
-                except (json.JSONDecodeError, TypeError):
-                    ca_blanks = [x.strip() for x in str(current_answer).split(',')]
+            ca_blanks = _answer_blanks(current_answer, len(cl))
             while len(ca_blanks) < n_blanks:
                 ca_blanks.append('')
             ans_fields = []
@@ -699,16 +653,10 @@ def _get_question_context_extra(question, current_answer):
             cl = question.get_correct_answers_list()
             if len(cl) < n_blanks:
                 cl = list(cl) + [''] * (n_blanks - len(cl))
-            ca_blanks = []
-            if current_answer:
-                if len(cl) > 1:
-                    try:
-                        d = json.loads(current_answer)
-                        ca_blanks = d if isinstance(d, list) else [str(d.get(str(i+1), '')) for i in range(len(cl))]
-                    except (json.JSONDecodeError, TypeError):
-                        ca_blanks = [x.strip() for x in str(current_answer).split(',')]
-                else:
-                    ca_blanks = [current_answer]
+            if len(cl) > 1 or isinstance(current_answer, (list, dict)):
+                ca_blanks = _answer_blanks(current_answer, len(cl))
+            else:
+                ca_blanks = [current_answer] if current_answer else []
             while len(ca_blanks) < len(cl):
                 ca_blanks.append('')
             ans_fields = [{'num': i + 1, 'value': ca_blanks[i] if i < len(ca_blanks) else ''} for i in range(len(cl))]
@@ -725,12 +673,7 @@ def _get_question_context_extra(question, current_answer):
             all_letters = sorted(set(str(v) for v in correct.values()))
             options = [{'letter': l, 'text': l} for l in all_letters]
         if isinstance(items, list) and (items or correct):
-            cur_dict = {}
-            if current_answer:
-                try:
-                    cur_dict = json.loads(current_answer) if isinstance(current_answer, str) and current_answer.startswith('{') else {}
-                except json.JSONDecodeError:
-                    pass
+            cur_dict = current_answer if isinstance(current_answer, dict) else {}
             opts_list = options if isinstance(options, list) else []
             for i, it in enumerate(items):
                 num = it.get('num', i + 1) if isinstance(it, dict) else (i + 1)
@@ -742,25 +685,14 @@ def _get_question_context_extra(question, current_answer):
                 })
     
     elif question.question_type == SUMMARY_BOX_TYPE:
-        cur_dict = {}
-        if current_answer:
-            try:
-                if isinstance(current_answer, str) and current_answer.strip().startswith('{'):
-                    cur_dict = json.loads(current_answer)
-            except json.JSONDecodeError:
-                cur_dict = {}
+        cur_dict = current_answer if isinstance(current_answer, dict) else {}
         box_inline_parts = _build_summary_box_inline_parts(question, cur_dict)
     
     elif question.question_type == 'list_selection':
         options = opts.get('options', [])
         if not options:
             options = [{'letter': c, 'text': c} for c in (correct if isinstance(correct, list) else [])]
-        cur_list = []
-        if current_answer:
-            try:
-                cur_list = json.loads(current_answer) if isinstance(current_answer, str) and current_answer.startswith('[') else []
-            except json.JSONDecodeError:
-                cur_list = [current_answer]
+        cur_list = current_answer if isinstance(current_answer, list) else []
         cur_set = set(str(x).lower() for x in cur_list)
         for o in options:
             letter = o.get('letter', o) if isinstance(o, dict) else o
@@ -798,12 +730,13 @@ def module_selector(request):
 @login_required
 def dashboard(request):
     """Asosiy sahifa"""
+    tree = get_category_tree()
     # Testlar uchun faqat yuqori darajadagi kategoriyalar (videodagi subkategoriyalar aralashmasin)
-    categories = Category.objects.filter(is_active=True, show_on_site=True, parent__isnull=True).order_by('order', 'name')
+    categories = tree.top_level
     
     # Statistika (faqat interfeysda ko'rinadigan kategoriyalardagi testlar)
-    total_videos = VideoLesson.objects.filter(is_active=True, category__show_on_site=True).count()
-    total_tests = Test.objects.filter(is_active=True, category__show_on_site=True).count()
+    total_videos = VideoLesson.objects.filter(is_active=True, category_id__in=tree.site_visible_ids).count()
+    total_tests = Test.objects.filter(is_active=True, category_id__in=tree.site_visible_ids).count()
     
     # Foydalanuvchi statistikasi
     user_test_results = UserTestResult.objects.filter(user=request.user)
@@ -824,6 +757,7 @@ def dashboard(request):
 
     context = {
         'categories': categories,
+        'category_tree': tree,
         'total_videos': total_videos,
         'total_tests': total_tests,
         'user_stats': user_stats,
@@ -834,6 +768,58 @@ def dashboard(request):
     return render(request, 'core/dashboard.html', context)
 
 
+VIDEO_SORT_ORDERING = {
+    'newest': ('-created_at', '-pk'),
+    'oldest': ('created_at', 'pk'),
+    'title_asc': ('title', 'pk'),
+    'title_desc': ('-title', '-pk'),
+    'views': ('-views_count', 'pk'),
+    'order': ('order', 'created_at', 'pk'),
+}
+VIDEO_BLOCK_LIMIT = 6
+
+
+def _grouped_video_blocks(videos, tree, top_categories, ordering, per_block=VIDEO_BLOCK_LIMIT):
+    """
+    Video index bloklari bitta so'rovda: har bir video top-level kategoriyasiga (blok) bog'lanadi,
+    blok ichida ROW_NUMBER() bilan tartiblanadi va faqat birinchi per_block tasi olinadi; blokdagi jami
+    videolar soni ham shu so'rovdan (COUNT() OVER). Bo'sh bloklar chiqmaydi.
+    """
+    block_whens = [
+        When(category_id__in=tree.descendant_ids(c.pk), then=Value(c.pk))
+        for c in top_categories
+    ]
+    if not block_whens:
+        return []
+    block = Case(*block_whens, default=Value(None), output_field=IntegerField())
+    window_order = [
+        F(name[1:]).desc() if name.startswith('-') else F(name).asc()
+        for name in ordering
+    ]
+    rows = (
+        videos.annotate(block_id=block)
+        .filter(block_id__isnull=False)
+        .annotate(
+            block_rank=Window(RowNumber(), partition_by=[F('block_id')], order_by=window_order),
+            block_total=Window(Count('pk'), partition_by=[F('block_id')]),
+        )
+        .filter(block_rank__lte=per_block)
+    )
+    grouped = {}
+    for video in rows:
+        grouped.setdefault(video.block_id, []).append(video)
+    blocks = []
+    for category in top_categories:
+        block_videos = grouped.get(category.pk)
+        if block_videos:
+            blocks.append({
+                'category': category,
+                'videos': block_videos,
+                'total': block_videos[0].block_total,
+            })
+    return blocks
+
+
 @login_required
 def video_list(request):
     """Video darslar ro'yxati"""
@@ -842,104 +828,79 @@ def video_list(request):
     search_query = request.GET.get('search', '')
     sort_by = request.GET.get('sort', 'order')
     
-    videos = VideoLesson.objects.filter(is_active=True, category__show_on_site=True)
+    tree = get_category_tree()
+    videos = VideoLesson.objects.filter(is_active=True, category_id__in=tree.site_visible_ids)
     
     selected_category = None
     selected_subcategory = None
+    subcategories = []
     if category_slug:
-        selected_category = Category.objects.filter(slug=category_slug, is_active=True).first()
+        selected_category = tree.get_active(category_slug)
+        if selected_category:
+            subcategories = tree.children(selected_category.pk)
         if subcategory_slug and selected_category:
             # Faqat shu otaning bolalaridan birini tanlash
-            selected_subcategory = Category.objects.filter(
-                slug=subcategory_slug, is_active=True, parent=selected_category
-            ).first()
+            selected_subcategory = next((c for c in subcategories if c.slug == subcategory_slug), None)
             if selected_subcategory:
-                videos = videos.filter(category=selected_subcategory)
+                videos = videos.filter(category_id=selected_subcategory.pk)
         elif selected_category:
             # Ota kategoriyadagi videolar ham, bolalar (subkategoriya) dagi videolar ham
-            child_ids = list(
-                Category.objects.filter(parent=selected_category, is_active=True).values_list('id', flat=True)
-            )
-            category_ids = [selected_category.id] + child_ids
-            videos = videos.filter(category_id__in=category_ids)
+            videos = videos.filter(category_id__in=tree.descendant_ids(selected_category.pk))
     
     if search_query:
         videos = videos.filter(
             Q(title__icontains=search_query) | 
             Q(description__icontains=search_query) |
-            Q(category__name__icontains=search_query)
+            Q(category_id__in=tree.ids_matching_name(search_query))
         )
     
-    # Sort
-    if sort_by == 'newest':
-        videos = videos.order_by('-created_at')
-    elif sort_by == 'oldest':
-        videos = videos.order_by('created_at')
-    elif sort_by == 'title_asc':
-        videos = videos.order_by('title')
-    elif sort_by == 'title_desc':
-        videos = videos.order_by('-title')
-    elif sort_by == 'views':
-        videos = videos.order_by('-views_count')
-    else:  # order (default)
-        videos = videos.order_by('order', 'created_at')
-    
-    videos = videos.select_related('category')
-    
-    # Foydalanuvchi progress va bookmarks
-    user_progress = {}
-    bookmarked_videos = set()
-    if request.user.is_authenticated:
-        progress_qs = UserVideoProgress.objects.filter(
-            user=request.user,
-            video__in=videos
-        )
-        for progress in progress_qs:
-            user_progress[progress.video_id] = progress
-        
-        # Bookmarked videos
-        bookmarks = Bookmark.objects.filter(user=request.user, video__in=videos)
-        bookmarked_videos = {b.video_id for b in bookmarks}
+    ordering = VIDEO_SORT_ORDERING.get(sort_by, VIDEO_SORT_ORDERING['order'])
+    videos = videos.order_by(*ordering).select_related('category')
     
     # Kategoriyalarga bo'lib ko'rsatish
-    videos_by_category = {}
+    videos_by_category = None
     page_obj = None
     # Yuqori darajadagi kategoriyalar (masalan: Grammar, Reading, Listening, Writing)
-    top_categories = Category.objects.filter(
-        is_active=True,
-        show_on_site=True,
-        parent__isnull=True,
-    ).order_by('order', 'name')
+    top_categories = tree.top_level
 
     if not category_slug and not search_query:
         # Agar ota kategoriya tanlanmagan va qidiruv bo'lmasa, har bir top-level kategoriya uchun blok (ota + bolalar)
-        for category in top_categories:
-            child_ids = list(
-                Category.objects.filter(parent=category, is_active=True).values_list('id', flat=True)
-            )
-            category_ids = [category.id] + child_ids
-            qs = videos.filter(category_id__in=category_ids)
-            if qs.exists():
-                videos_by_category[category] = qs
+        videos_by_category = _grouped_video_blocks(videos, tree, top_categories, ordering)
+        shown_videos = [v for block in videos_by_category for v in block['videos']]
     else:
         # Agar kategoriya tanlangan yoki qidiruv bo'lsa, oddiy ro'yxat
         paginator = Paginator(videos, 12)
         page_number = request.GET.get('page')
         page_obj = paginator.get_page(page_number)
-        videos_by_category = None
+        shown_videos = list(page_obj)
+    
+    # Foydalanuvchi progress va bookmarks — faqat sahifadagi videolar uchun, bittadan so'rov
+    user_progress = {}
+    bookmarked_videos = set()
+    shown_ids = [v.pk for v in shown_videos]
+    if request.user.is_authenticated and shown_ids:
+        user_progress = {
+            p.video_id: p
+            for p in UserVideoProgress.objects.filter(user=request.user, video_id__in=shown_ids)
+        }
+        bookmarked_videos = set(
+            Bookmark.objects.filter(user=request.user, video_id__in=shown_ids).values_list('video_id', flat=True)
+        )
     
     context = {
         'videos': page_obj if (category_slug or search_query) else None,
         'videos_by_category': videos_by_category,
         'categories': top_categories,
+        'category_tree': tree,
         'selected_category': category_slug,
         'selected_subcategory': subcategory_slug,
+        'subcategories': subcategories,
         'search_query': search_query,
         'sort_by': sort_by,
         'user_progress': user_progress,
         'bookmarked_videos': bookmarked_videos,
         'total_videos_count': VideoLesson.objects.filter(
-            is_active=True, category__show_on_site=True
+            is_active=True, category_id__in=tree.site_visible_ids
         ).count(),
         'user_watched_count': (
             UserVideoProgress.objects.filter(user=request.user, watched=True).count()
@@ -1011,11 +972,8 @@ def video_detail(request, pk):
         video=video
     ).exists()
     
-    # Video comments (parent comments - javobsiz izohlar)
-    video_comments = VideoComment.objects.filter(
-        video=video,
-        parent__isnull=True
-    ).select_related('user').prefetch_related('replies__user').order_by('-created_at')[:20]
+    # Video comments: birinchi sahifa (keshdan), javoblar alohida yuklanadi
+    comments_page = video_comments.comment_page(video.pk)
     
     # User playlists
     user_playlists = VideoPlaylist.objects.filter(user=request.user).order_by('-created_at')
@@ -1033,7 +991,8 @@ def video_detail(request, pk):
         'video_notes': video_notes,
         'user_rating': user_rating,
         'is_bookmarked': is_bookmarked,
-        'video_comments': video_comments,
+        'video_comments': comments_page['comments'],
+        'comments_next_cursor': comments_page['next_cursor'],
         'user_playlists': user_playlists,
         'video_in_playlists': list(video_in_playlists),
     }
@@ -1049,10 +1008,12 @@ def test_list(request):
     search_query = request.GET.get('search', '')
     sort_by = request.GET.get('sort', 'newest')
     
-    tests = Test.objects.filter(is_active=True, category__show_on_site=True)
+    tree = get_category_tree()
+    tests = Test.objects.filter(is_active=True, category_id__in=tree.site_visible_ids)
     
     if category_slug:
-        tests = tests.filter(category__slug=category_slug)
+        selected = tree.by_slug.get(category_slug)
+        tests = tests.filter(category_id=selected.pk) if selected else tests.none()
     
     if test_type:
         tests = tests.filter(test_type=test_type)
@@ -1064,7 +1025,7 @@ def test_list(request):
         tests = tests.filter(
             Q(title__icontains=search_query) | 
             Q(description__icontains=search_query) |
-            Q(category__name__icontains=search_query)
+            Q(category_id__in=tree.ids_matching_name(search_query))
         )
     
     # Sort
@@ -1081,7 +1042,8 @@ def test_list(request):
     else:  # newest (default)
         tests = tests.order_by('-created_at')
     
-    tests = tests.select_related('category').prefetch_related('questions')
+    # Savollar oldindan yuklanmaydi: total_questions faqat "test_card" fragmenti keshda bo'lmaganda hisoblanadi
+    tests = tests.select_related('category')
     
     # Foydalanuvchi natijalari va bookmarks
     user_results = {}
@@ -1107,87 +1069,26 @@ def test_list(request):
         bookmarked_tests = {b.test_id for b in bookmarks}
     
     # Testlar uchun faqat top-level kategoriyalar (videodagi subkategoriyalar aralashmasin)
-    categories = Category.objects.filter(is_active=True, show_on_site=True, parent__isnull=True).order_by('order', 'name')
+    categories = tree.top_level
     test_types = Test.TEST_TYPES
     difficulty_levels = Test.DIFFICULTY_LEVELS
     
-    # Adaptive Testing - yaxshilangan tavsiyalar
+    # Adaptive Testing: oldindan hisoblangan tavsiyalar (core.recommendations) — bitta qator
     recommended_tests = []
     weak_areas = []
+    user_avg_score = 0
     if request.user.is_authenticated:
-        # Foydalanuvchining o'rtacha natijasini hisoblash
-        user_avg_score = UserTestResult.objects.filter(
-            user=request.user,
-            completed_at__isnull=False
-        ).aggregate(Avg('percentage'))['percentage__avg'] or 0
-        
-        # Kategoriya bo'yicha natijalar
-        category_scores = UserTestResult.objects.filter(
-            user=request.user,
-            completed_at__isnull=False
-        ).values('test__category__name', 'test__category__id').annotate(
-            avg_score=Avg('percentage'),
-            count=Count('id')
-        ).order_by('avg_score')
-        
-        # Zaif tomonlarni aniqlash (50% dan past kategoriyalar)
-        weak_category_ids = [item['test__category__id'] for item in category_scores if item['avg_score'] < 50 and item['count'] >= 2]
-        weak_categories = Category.objects.filter(id__in=weak_category_ids).values('id', 'name', 'slug')
-        weak_categories_dict = {cat['id']: cat for cat in weak_categories}
-        
-        weak_areas = [
-            {
-                'category_id': item['test__category__id'],
-                'category_slug': weak_categories_dict.get(item['test__category__id'], {}).get('slug', ''),
-                'category_name': item['test__category__name'],
-                'avg_score': round(item['avg_score'], 1),
-                'count': item['count']
-            }
-            for item in category_scores if item['avg_score'] < 50 and item['count'] >= 2
-        ]
-        
-        # Foydalanuvchi darajasiga mos testlar
-        if user_avg_score < 50:
-            recommended_difficulty = 'easy'
-        elif user_avg_score < 70:
-            recommended_difficulty = 'medium'
-        else:
-            recommended_difficulty = 'hard'
-        
-        # Tavsiya qilingan testlar - zaif tomonlar bo'yicha
-        recommended_query = Test.objects.filter(is_active=True, category__show_on_site=True)
-        
-        # Agar zaif tomonlar bo'lsa, ularni ustuvor qilish
-        if weak_areas:
-            weak_category_ids = [area['category_id'] for area in weak_areas]
-            recommended_query = recommended_query.filter(
-                Q(category_id__in=weak_category_ids, difficulty=recommended_difficulty) |
-                Q(difficulty=recommended_difficulty)
-            ).annotate(
-                priority=Case(
-                    When(category_id__in=weak_category_ids, then=1),
-                    default=2,
-                    output_field=IntegerField()
-                )
-            ).order_by('priority', 'created_at')
-        else:
-            recommended_query = recommended_query.filter(difficulty=recommended_difficulty).order_by('-created_at')
-        
-        # Foydalanuvchi ishlagan testlarni olib tashlash
-        completed_for_recommended = UserTestResult.objects.filter(
-            user=request.user,
-            completed_at__isnull=False
-        ).values_list('test_id', flat=True).distinct()
-        
-        recommended_tests = recommended_query.exclude(
-            id__in=completed_for_recommended
-        ).exclude(
-            id__in=tests.values_list('id', flat=True)
-        ).select_related('category')[:6]
-    
+        rec = get_user_recommendations(request.user)
+        user_avg_score = rec.avg_score
+        weak_areas = weak_areas_for(rec, tree)
+        # Joriy ro'yxatdagi testlar tavsiya qilinmaydi; ro'yxat shablonda baribir o'qiladi (natija keshi qayta ishlatiladi)
+        listed_ids = {t.pk for t in tests}
+        recommended_tests = recommended_tests_for(rec, tree, exclude_ids=listed_ids)
+
     context = {
         'tests': tests,
         'categories': categories,
+        'category_tree': tree,
         'test_types': test_types,
         'difficulty_levels': difficulty_levels,
         'selected_category': category_slug,
@@ -1200,7 +1101,7 @@ def test_list(request):
         'bookmarked_tests': bookmarked_tests,
         'recommended_tests': recommended_tests,
         'weak_areas': weak_areas,
-        'user_avg_score': round(user_avg_score, 1) if request.user.is_authenticated else 0,
+        'user_avg_score': round(user_avg_score, 1),
     }
     
     # HTMX request bo'lsa faqat test list qaytarish
@@ -1222,8 +1123,9 @@ def test_collection_by_type(request, test_type):
     length_filter = request.GET.get('length', '').strip()  # full | parts
     module_filter = request.GET.get('module', '').strip()  # academic | general
 
+    tree = get_category_tree()
     tests = (
-        Test.objects.filter(is_active=True, test_type=test_type, category__show_on_site=True)
+        Test.objects.filter(is_active=True, test_type=test_type, category_id__in=tree.site_visible_ids)
         .select_related('category')
         .prefetch_related('questions')
         .annotate(questions_count=Count('questions', distinct=True))
@@ -1233,7 +1135,7 @@ def test_collection_by_type(request, test_type):
         tests = tests.filter(
             Q(title__icontains=search_query)
             | Q(description__icontains=search_query)
-            | Q(category__name__icontains=search_query)
+            | Q(category_id__in=tree.ids_matching_name(search_query))
         )
 
     if question_type:
@@ -1246,11 +1148,11 @@ def test_collection_by_type(request, test_type):
 
     if module_filter == 'academic':
         tests = tests.filter(
-            Q(title__icontains='academic') | Q(category__name__icontains='academic')
+            Q(title__icontains='academic') | Q(category_id__in=tree.ids_matching_name('academic'))
         )
     elif module_filter == 'general':
         tests = tests.filter(
-            Q(title__icontains='general') | Q(category__name__icontains='general')
+            Q(title__icontains='general') | Q(category_id__in=tree.ids_matching_name('general'))
         )
 
     tests = tests.order_by('-created_at')
@@ -1352,247 +1254,182 @@ def test_detail(request, pk):
     return render(request, 'core/tests/detail.html', context)
 
 
-@login_required
-def test_take(request, pk):
-    """Test ishlash"""
-    test = get_object_or_404(Test.objects.select_related('category'), pk=pk, is_active=True)
-    if not getattr(test.category, 'show_on_site', True):
-        return redirect('core:test_list')
-    
-    # Test natijasi yaratish
-    test_result, created = UserTestResult.objects.get_or_create(
-        user=request.user,
-        test=test,
-        completed_at__isnull=True
-    )
-    
-    if request.GET.get('exam_variant') is not None:
-        set_exam_variant(request, test, request.GET.get('exam_variant'))
+def _answered_slots_for_question(q, raw):
+    """Savol uchun to'ldirilgan javob slotlari soni (progress va "N/M answered"). raw — typed yoki eski satr."""
+    if q.question_type == 'essay':
+        return 0
+    value = decode_answer(raw)
+    if not value:
+        return 0
+    if q.uses_choose_two_letter_scoring():
+        arr = value if isinstance(value, list) else []
+        mc = int(getattr(q, 'max_choices', 2) or 2)
+        return min(len([x for x in arr if str(x).strip()]), mc)
+    if q.question_type in FILL_TYPES:
+        if isinstance(value, dict):
+            return 1
+        vals = value if isinstance(value, list) else [value]
+        slots = q.gradable_answer_slots()
+        filled = sum(1 for v in vals if str(v).strip())
+        if slots > 1:
+            return min(filled, slots)
+        return 1 if filled else 0
+    if q.question_type in MATCHING_TYPES or q.question_type == SUMMARY_BOX_TYPE:
+        if not isinstance(value, dict):
+            return 0 if isinstance(value, list) else 1
+        slots = q.gradable_answer_slots()
+        filled = sum(1 for v in value.values() if str(v).strip())
+        if slots > 1:
+            return min(filled, slots)
+        return 1 if filled else 0
+    if q.question_type == 'list_selection':
+        if isinstance(value, list):
+            slots = q.gradable_answer_slots()
+            return min(len([x for x in value if str(x).strip()]), slots if slots else 1)
+        return 0
+    return 1
 
-    exam_variant = get_exam_variant(request, test)
-    questions = filter_questions_by_exam_variant(test, exam_variant)
 
-    if created:
-        test_result.total_questions = total_gradable_slots_for_questions(questions) or len(questions)
-        # Urinish raqamini aniqlash
-        previous_attempts = UserTestResult.objects.filter(
-            user=request.user,
-            test=test,
-            completed_at__isnull=False
-        ).count()
-        test_result.attempt_number = previous_attempts + 1
-        # Timer boshlash
-        if test.duration_minutes:
-            test_result.timer_started_at = timezone.now()
-            test_result.timer_seconds_left = test.duration_minutes * 60
-        test_result.save()
-        
-        # Faollik yozish
-        UserActivity.objects.create(
-            user=request.user,
-            activity_type='test_start',
-            related_object_id=test.pk,
-            related_object_type='Test',
-            metadata={'test_title': test.title}
-        )
-        # Study streak yangilash
-        StudyStreak.update_streak(request.user)
-    else:
-        # Agar test to'xtatilgan bo'lsa, davom ettirish
-        if test_result.is_paused:
-            test_result.resume_test()
-    
-    # Javoblar
-    answers = {}
-    if test_result.answers_json:
-        answers = test_result.answers_json
-    
+def _take_part_indexes(test, questions, question_cards, total_display_slots):
+    """Har bir savol kartasi qaysi partga tegishli (1, 2, …) — _build_take_part_groups uchun."""
     total_questions = len(questions)
-    total_answer_slots = total_gradable_slots_for_questions(questions)
+    # Part bloklari: 2+ variantli testda odatda part = exam variant (1, 2, 3…).
+    # Reading + barcha savollar bir xil variant: passage bo'linishi (13/14) uchun quyidagi tarmoq ishlaydi.
+    part_indexes = []
+    explicit_parts = []
+    # Listening: Part 1–4 alohida (10+10+10+10 yoki options_json.part). Ko'p variant faqat qaysi
+    # imtihon qog‘ozini tanlash uchun; variantni «listening part» deb ishlatmaslik kerak.
+    if getattr(test, 'variants_to_select', 1) >= 2 and test.test_type != 'listening':
+        if _reading_uniform_variant(test, questions):
+            part_indexes = []
+        else:
+            part_indexes = [getattr(q, 'variant', None) or 1 for q in questions]
+    else:
+        for idx, q in enumerate(questions):
+            opts = q.options_json or {}
+            raw_part = opts.get('part', opts.get('section'))
+            if raw_part is None:
+                explicit_parts = []
+                break
+            try:
+                explicit_parts.append(int(raw_part))
+            except (TypeError, ValueError):
+                explicit_parts = []
+                break
 
-    if total_questions == 0:
-        messages.warning(request, "Bu testda hali savollar qo'shilmagan. Admin orqali savollar qo'shing.")
-        return redirect('core:test_detail', pk=test.pk)
+    if not part_indexes and explicit_parts and len(explicit_parts) == len(questions):
+        min_part = min(explicit_parts) if explicit_parts else 1
+        part_indexes = [max(1, p - min_part + 1) for p in explicit_parts]
+    elif not part_indexes:
+        # Part raqami belgilanmagan: Reading da passage + savollar soniga qarab (13 ta = 1 part)
+        default_parts = 1
+        if test.test_type == 'reading':
+            passage_count = _reading_passage_count(test)
+            # Savollar soni bo'yicha (passage yo'q bo'lsa): 1–13 → 1 part, 14–26 → 2, 27+ → 3
+            if total_questions <= 13:
+                parts_by_questions = 1
+            elif total_questions <= 26:
+                parts_by_questions = 2
+            else:
+                parts_by_questions = 3
+            # 2+ ta passage — partlar soni passage ga mos. 0 yoki 1 passage bo'lsa ham 14+ savolda
+            # IELTS bo'linishi (1–13 | 14–26 | 27–40) saqlanadi; aks holda 14-savol ham "Part 1"da qolib,
+            # chapda faqat birinchi matn ko'rinadi (server yangilanganda ham xuddi shu muammo bo'lardi).
+            if passage_count >= 2:
+                default_parts = min(passage_count, 3)
+            else:
+                default_parts = max(1, min(3, parts_by_questions))
+        elif test.test_type == 'listening':
+            # IELTS: har partda 10 ta raqamli savol (1–10, 11–20, …) — DB yozuvlari emas, slotlar bo'yicha
+            default_parts = min(4, max(1, ((total_display_slots or 0) + 9) // 10))
+        elif test.test_type == 'writing':
+            default_parts = 2
+        if test.test_type != 'listening':
+            default_parts = max(1, min(default_parts, total_questions or 1))
+        #mmm
 
-    # Barcha javoblarni bir POST bilan saqlash (merge — avvalgi javoblar saqlanadi)
-    if request.method == 'POST':
-        posted = collect_answers_from_post(request, questions)
-        active_pks = [q.pk for q in questions]
-        answers = merge_answers_json(
-            test_result.answers_json, posted, active_pks, exam_variant=exam_variant
-        )
-        test_result.answers_json = answers
-        test_result.save(update_fields=['answers_json'])
+        if test.test_type == 'reading':
+            # Bo'linish savol yozuvlari emas, ko'rsatiladigan raqamlar bo'yicha (14 ta slot → 13+1 part)
+            ranges = _reading_part_ranges(total_display_slots)
+        elif test.test_type == 'listening':
+            # 0-based slot indeksi = ko'rsatiladigan savol raqami - 1 (har partda 10 slot)
+            t = total_display_slots or 0
+            ranges = []
+            if t > 0:
+                ranges.append((0, min(10, t)))
+            if t > 10:
+                ranges.append((10, min(20, t)))
+            if t > 20:
+                ranges.append((20, min(30, t)))
+            if t > 30:
+                ranges.append((30, t))
+        else:
+            base_size = total_questions // default_parts if default_parts else total_questions
+            extra = total_questions % default_parts if default_parts else 0
+            ranges = []
+            start = 0
+            for p in range(default_parts):
+                size = base_size + (1 if p < extra else 0)
+                end = start + size
+                ranges.append((start, end))
+                start = end
 
-        is_autosave = request.POST.get('autosave') == '1'
-        if is_autosave:
-            return JsonResponse({
-                'ok': True,
-                'saved_keys': len([k for k, v in posted.items() if v]),
-            })
-
-        if request.POST.get('finish_test') == '1':
-            with transaction.atomic():
-                total_slots_target = total_gradable_slots_for_questions(questions)
-                correct_count = 0
-                for q in questions:
-                    user_answer = (answers.get(str(q.pk), '') or '').strip()
-                    if q.question_type == 'essay':
-                        if user_answer:
-                            UserTestAnswer.objects.update_or_create(
-                                test_result=test_result,
-                                question=q,
-                                defaults={'user_answer': user_answer, 'is_correct': False},
-                            )
-                        continue
-                    if q.uses_choose_two_letter_scoring():
-                        pts, tot = q.score_mcq_choose_two_dual(user_answer)
-                        correct_count += pts
-                        UserTestAnswer.objects.update_or_create(
-                            test_result=test_result,
-                            question=q,
-                            defaults={
-                                'user_answer': user_answer,
-                                'is_correct': bool(tot) and pts >= tot,
-                            },
-                        )
-                        continue
-                    if user_answer:
-                        if q.question_type in MATCHING_SCORE_TYPES:
-                            slots_ok, slots_tot = q.score_matching_answer(user_answer)
-                            correct_count += slots_ok
-                            is_correct = bool(slots_tot and slots_ok >= slots_tot)
-                        elif q.question_type in FILL_TYPES:
-                            slots_ok, slots_tot = q.score_fill_answer(user_answer)
-                            correct_count += slots_ok
-                            is_correct = bool(slots_tot and slots_ok >= slots_tot)
-                        elif q.question_type == 'list_selection':
-                            slots_ok, slots_tot = q.score_list_selection(user_answer)
-                            correct_count += slots_ok
-                            is_correct = bool(slots_tot and slots_ok >= slots_tot)
-                        else:
-                            is_correct = q.check_user_answer(user_answer)
-                            if is_correct:
-                                correct_count += 1
-                        UserTestAnswer.objects.update_or_create(
-                            test_result=test_result,
-                            question=q,
-                            defaults={'user_answer': user_answer, 'is_correct': is_correct},
-                        )
-
-                session_scores = compute_session_scores(questions, answers)
-                if session_scores['writing_only']:
-                    test_result.total_questions = session_scores['essay_total'] or 1
-                    test_result.correct_answers = session_scores['essays_submitted']
-                    test_result.completed_at = timezone.now()
-                    test_result.attempt_number = test_result.attempt_number or 1
-                    test_result.time_taken = test_result.get_elapsed_time()
-                    test_result.calculate_score(writing_manual=True)
-                else:
-                    test_result.total_questions = total_slots_target or total_questions
-                    test_result.correct_answers = correct_count
-                    test_result.wrong_answers = max(0, test_result.total_questions - correct_count)
-                    test_result.completed_at = timezone.now()
-                    test_result.attempt_number = test_result.attempt_number or 1
-                    test_result.time_taken = test_result.get_elapsed_time()
-                    test_result.calculate_score(writing_manual=False)
-                test_result.refresh_from_db()
+        if test.test_type == 'reading':
+            # Har bir savol kartasi: birinchi ko'rsatiladigan raqam qaysi part oralig'ida (0-based slot)
+            for card in question_cards:
+                d0 = card.get('display_order')
+                try:
+                    slot_idx = max(0, int(d0) - 1) if d0 is not None else 0
+                except (TypeError, ValueError):
+                    slot_idx = 0
+                assigned = 1
+                for p_idx, (s, e) in enumerate(ranges, start=1):
+                    if s <= slot_idx < e:
+                        assigned = p_idx
+                        break
+                part_indexes.append(assigned)
+        elif test.test_type == 'listening':
+            # Reading bilan bir xil: kartaning birinchi savol raqami qaysi 10 lik blokka kirsa
+            for card in question_cards:
+                d0 = card.get('display_order')
+                try:
+                    slot_idx = max(0, int(d0) - 1) if d0 is not None else 0
+                except (TypeError, ValueError):
+                    slot_idx = 0
+                assigned = 1
+                for p_idx, (s, e) in enumerate(ranges, start=1):
+                    if s <= slot_idx < e:
+                        assigned = p_idx
+                        break
+                part_indexes.append(assigned)
+        else:
+            for idx in range(total_questions):
+                assigned = 1
+                for p_idx, (s, e) in enumerate(ranges, start=1):
+                    if s <= idx < e:
+                        assigned = p_idx
+                        break
+                part_indexes.append(assigned)
+    return part_indexes
 
-                UserActivity.objects.create(
-                    user=request.user,
-                    activity_type='test_complete',
-                    related_object_id=test.pk,
-                    related_object_type='Test',
-                    metadata={'test_title': test.title, 'score': correct_count, 'total': total_questions}
-                )
-                StudyStreak.update_streak(request.user)
 
-            return redirect('core:test_result', pk=test_result.pk)
-        else:
-            messages.success(request, "Javoblar saqlandi.")
-            return redirect(request.path)
+TAKE_LAYOUT_TIMEOUT = 60 * 60
 
-    answered_questions = [int(q_id) for q_id in answers.keys() if str(q_id).isdigit()]
 
-    total_answer_slots = total_gradable_slots_for_questions(questions)
-    answered_answer_slots = 0
-    for q in questions:
-        if q.question_type == 'essay':
-            continue
-        raw = answers.get(str(q.pk), '')
-        if not raw or not str(raw).strip():
-            continue
-        if q.uses_choose_two_letter_scoring():
-            try:
-                arr = json.loads(raw) if str(raw).strip().startswith('[') else []
-                arr = arr if isinstance(arr, list) else []
-                mc = int(getattr(q, 'max_choices', 2) or 2)
-                answered_answer_slots += min(len([x for x in arr if str(x).strip()]), mc)
-            except (json.JSONDecodeError, TypeError):
-                pass
-        elif q.question_type in FILL_TYPES:
-            try:
-                vals = json.loads(raw) if str(raw).strip().startswith('[') else [raw]
-                if isinstance(vals, list):
-                    slots = q.gradable_answer_slots()
-                    filled = sum(1 for v in vals if str(v).strip())
-                    if slots > 1:
-                        answered_answer_slots += min(filled, slots)
-                    else:
-                        answered_answer_slots += 1 if filled else 0
-                elif str(raw).strip():
-                    answered_answer_slots += 1
-            except (json.JSONDecodeError, TypeError):
-                answered_answer_slots += 1
-        elif q.question_type in MATCHING_TYPES or q.question_type == SUMMARY_BOX_TYPE:
-            try:
-                d = json.loads(raw) if str(raw).strip().startswith('{') else {}
-                if isinstance(d, dict):
-                    slots = q.gradable_answer_slots()
-                    filled = sum(1 for v in d.values() if str(v).strip())
-                    if slots > 1:
-                        answered_answer_slots += min(filled, slots)
-                    else:
-                        answered_answer_slots += 1 if filled else 0
-                elif str(raw).strip():
-                    answered_answer_slots += 1
-            except (json.JSONDecodeError, TypeError):
-                answered_answer_slots += 1 if str(raw).strip() else 0
-        elif q.question_type == 'list_selection':
-            try:
-                arr = json.loads(raw) if str(raw).strip().startswith('[') else []
-                if isinstance(arr, list) and len(arr) > 0:
-                    slots = q.gradable_answer_slots()
-                    answered_answer_slots += min(len([x for x in arr if str(x).strip()]), slots if slots else 1)
-            except (json.JSONDecodeError, TypeError):
-                pass
-        else:
-            answered_answer_slots += 1
+def _take_layout_key(test, exam_variant):
+    """Part bo'linishi kontent versiyasiga bog'langan — savol o'zgarsa yangi kalit."""
+    return f"core:take_layout:{test.pk}:{get_content_version('test', test.pk)}:{exam_variant}"
 
-    mcq_dual_question_pks = [q.pk for q in questions if q.mcq_dual_question_slots_enabled()]
 
-    # Timer va vaqt ma'lumotlari
-    timer_seconds_left = None
-    timer_minutes = None
-    timer_seconds = None
-    if test.duration_minutes:
-        timer_seconds_left = test_result.get_timer_seconds_left()
-        # Timer ma'lumotlarini yangilash
-        if timer_seconds_left is not None:
-            test_result.timer_seconds_left = timer_seconds_left
-            test_result.save(update_fields=['timer_seconds_left'])
-            # Minutes va seconds ga ajratish
-            timer_minutes = int(timer_seconds_left // 60)
-            timer_seconds = int(timer_seconds_left % 60)
-    
-    elapsed_time = test_result.get_elapsed_time()
-    answered_count = len(answered_questions)
-    progress_percentage = (
-        int((answered_answer_slots / max(total_answer_slots, 1)) * 100)
-        if total_answer_slots > 0
-        else 0
-    )
+def _build_take_part_groups(request, test, questions, answers, part=None):
+    """
+    test_take uchun savol kartalari va part bloklari (dock tugmalari, passage, audio boshlanishi).
+    To'liq sahifa ham, alohida part fragmenti ham shu tuzilmadan foydalanadi.
 
+    part — faqat bitta part savollari berilganda (test_take_part): to'liq qurilishdagi 'layout' yozuvi
+    (part_number, display_start, uniform_variant); raqamlash va bo'linish shundan olinadi.
+    """
+    uniform_variant = part['uniform_variant'] if part else _reading_uniform_variant(test, questions)
     question_cards = []
     single_choice = ('mcq', 'true_false', 'true_false_not_given', 'yes_no_not_given')
     for q in questions:
@@ -1619,7 +1456,7 @@ def test_take(request, pk):
                         if txt:
                             mcq_opts.append({'letter': letter, 'text': txt})
         inline_parts = None
-        if q.question_type in FILL_TYPES and ans_fields and re.search(r'\[\d+\]', q.question_text or ''):
+        if q.question_type in FILL_TYPES and ans_fields and q.compiled_text['numbered']:
             inline_parts = _build_inline_fill_parts(q, ans_fields)
         task_images = []
         if test.test_type == 'writing' and hasattr(q, 'get_task_images'):
@@ -1695,14 +1532,10 @@ def test_take(request, pk):
                 )
         current_answer_list = []
         if mcq_choose_two and current_answer_val:
-            try:
-                raw = current_answer_val.strip()
-                if raw.startswith('['):
-                    current_answer_list = [str(x).strip().lower() for x in json.loads(raw) if x]
-                else:
-                    current_answer_list = [raw.lower()] if raw else []
-            except (TypeError, json.JSONDecodeError):
-                current_answer_list = [current_answer_val.lower()] if current_answer_val else []
+            if isinstance(current_answer_val, list):
+                current_answer_list = [str(x).strip().lower() for x in current_answer_val if x]
+            else:
+                current_answer_list = [str(current_answer_val).lower()]
         max_w = q.get_max_words_per_blank()
         # IELTS uslubidagi banner matni (Engnovate’ga yaqin)
         if q.question_type in FILL_TYPES:
@@ -1742,7 +1575,7 @@ def test_take(request, pk):
         fill_slots_same = sa_standalone and slot_mws and len(set(slot_mws)) == 1
         question_cards.append({
             'question': q,
-            'current_answer': current_answer_val,
+            'current_answer': answer_text(current_answer_val),
             'current_answer_list': current_answer_list,
             'mcq_choose_two': mcq_choose_two,
             'answer_fields': ans_fields,
@@ -1767,7 +1600,7 @@ def test_take(request, pk):
         })
 
     # Savol raqamlari: MCQ 2 tanlov → 21,22; bir nechta bo'sh joy → 23–26; boshqa → bittadan
-    running_display = 1
+    running_display = part['display_start'] if part else 1
     for card in question_cards:
         q = card['question']
         card['fill_multi_slots'] = False
@@ -1861,124 +1694,13 @@ def test_take(request, pk):
 
     # Ko'rsatiladigan savol raqamlari soni (DB yozuvlari emas — bitta TFNG 9 ta raqam berishi mumkin)
     total_display_slots = max(0, running_display - 1)
+    if part:
+        total_display_slots -= part['display_start'] - 1
 
-    # Part bloklari: 2+ variantli testda odatda part = exam variant (1, 2, 3…).
-    # Reading + barcha savollar bir xil variant: passage bo'linishi (13/14) uchun quyidagi tarmoq ishlaydi.
-    part_indexes = []
-    explicit_parts = []
-    # Listening: Part 1–4 alohida (10+10+10+10 yoki options_json.part). Ko'p variant faqat qaysi
-    # imtihon qog‘ozini tanlash uchun; variantni «listening part» deb ishlatmaslik kerak.
-    if getattr(test, 'variants_to_select', 1) >= 2 and test.test_type != 'listening':
-        if _reading_uniform_variant(test, questions):
-            part_indexes = []
-        else:
-            part_indexes = [getattr(q, 'variant', None) or 1 for q in questions]
+    if part is None:
+        part_indexes = _take_part_indexes(test, questions, question_cards, total_display_slots)
     else:
-        for idx, q in enumerate(questions):
-            opts = q.options_json or {}
-            raw_part = opts.get('part', opts.get('section'))
-            if raw_part is None:
-                explicit_parts = []
-                break
-            try:
-                explicit_parts.append(int(raw_part))
-            except (TypeError, ValueError):
-                explicit_parts = []
-                break
-
-    if not part_indexes and explicit_parts and len(explicit_parts) == len(questions):
-        min_part = min(explicit_parts) if explicit_parts else 1
-        part_indexes = [max(1, p - min_part + 1) for p in explicit_parts]
-    elif not part_indexes:
-        # Part raqami belgilanmagan: Reading da passage + savollar soniga qarab (13 ta = 1 part)
-        default_parts = 1
-        if test.test_type == 'reading':
-            passage_count = _reading_passage_count(test)
-            # Savollar soni bo'yicha (passage yo'q bo'lsa): 1–13 → 1 part, 14–26 → 2, 27+ → 3
-            if total_questions <= 13:
-                parts_by_questions = 1
-            elif total_questions <= 26:
-                parts_by_questions = 2
-            else:
-                parts_by_questions = 3
-            # 2+ ta passage — partlar soni passage ga mos. 0 yoki 1 passage bo'lsa ham 14+ savolda
-            # IELTS bo'linishi (1–13 | 14–26 | 27–40) saqlanadi; aks holda 14-savol ham "Part 1"da qolib,
-            # chapda faqat birinchi matn ko'rinadi (server yangilanganda ham xuddi shu muammo bo'lardi).
-            if passage_count >= 2:
-                default_parts = min(passage_count, 3)
-            else:
-                default_parts = max(1, min(3, parts_by_questions))
-        elif test.test_type == 'listening':
-            # IELTS: har partda 10 ta raqamli savol (1–10, 11–20, …) — DB yozuvlari emas, slotlar bo'yicha
-            default_parts = min(4, max(1, ((total_display_slots or 0) + 9) // 10))
-        elif test.test_type == 'writing':
-            default_parts = 2
-        if test.test_type != 'listening':
-            default_parts = max(1, min(default_parts, total_questions or 1))
-        #mmm
-
-        if test.test_type == 'reading':
-            # Bo'linish savol yozuvlari emas, ko'rsatiladigan raqamlar bo'yicha (14 ta slot → 13+1 part)
-            ranges = _reading_part_ranges(total_display_slots)
-        elif test.test_type == 'listening':
-            # 0-based slot indeksi = ko'rsatiladigan savol raqami - 1 (har partda 10 slot)
-            t = total_display_slots or 0
-            ranges = []
-            if t > 0:
-                ranges.append((0, min(10, t)))
-            if t > 10:
-                ranges.append((10, min(20, t)))
-            if t > 20:
-                ranges.append((20, min(30, t)))
-            if t > 30:
-                ranges.append((30, t))
-        else:
-            base_size = total_questions // default_parts if default_parts else total_questions
-            extra = total_questions % default_parts if default_parts else 0
-            ranges = []
-            start = 0
-            for p in range(default_parts):
-                size = base_size + (1 if p < extra else 0)
-                end = start + size
-                ranges.append((start, end))
-                start = end
-
-        if test.test_type == 'reading':
-            # Har bir savol kartasi: birinchi ko'rsatiladigan raqam qaysi part oralig'ida (0-based slot)
-            for card in question_cards:
-                d0 = card.get('display_order')
-                try:
-                    slot_idx = max(0, int(d0) - 1) if d0 is not None else 0
-                except (TypeError, ValueError):
-                    slot_idx = 0
-                assigned = 1
-                for p_idx, (s, e) in enumerate(ranges, start=1):
-                    if s <= slot_idx < e:
-                        assigned = p_idx
-                        break
-                part_indexes.append(assigned)
-        elif test.test_type == 'listening':
-            # Reading bilan bir xil: kartaning birinchi savol raqami qaysi 10 lik blokka kirsa
-            for card in question_cards:
-                d0 = card.get('display_order')
-                try:
-                    slot_idx = max(0, int(d0) - 1) if d0 is not None else 0
-                except (TypeError, ValueError):
-                    slot_idx = 0
-                assigned = 1
-                for p_idx, (s, e) in enumerate(ranges, start=1):
-                    if s <= slot_idx < e:
-                        assigned = p_idx
-                        break
-                part_indexes.append(assigned)
-        else:
-            for idx in range(total_questions):
-                assigned = 1
-                for p_idx, (s, e) in enumerate(ranges, start=1):
-                    if s <= idx < e:
-                        assigned = p_idx
-                        break
-                part_indexes.append(assigned)
+        part_indexes = [part['part_number']] * len(question_cards)
 
     part_groups = []
     for idx, card in enumerate(question_cards):
@@ -2011,7 +1733,7 @@ def test_take(request, pk):
         pg['question_count'] = len(pg['cards'])
         pg['slug'] = f"part-{pg['part_number']}"
         if getattr(test, 'variants_to_select', 1) >= 2 and test.test_type != 'listening':
-            if _reading_uniform_variant(test, questions):
+            if uniform_variant:
                 vnum = getattr(questions[0], 'variant', None) or 1 if questions else 1
                 pg['title'] = f"Variant {vnum} · Part {pg['part_number']}"
             else:
@@ -2126,74 +1848,315 @@ def test_take(request, pk):
             else:
                 pg['range_label'] = f"{pg['start_order']}-{pg['end_order']}" if pg['start_order'] != pg['end_order'] else str(pg['start_order'])
 
-        # Savol turi bo'yicha guruhlash (shart_text bo'sh — admin qoidalari test interfeysida ko'rinmaydi)
-        type_blocks = []
-        for card in pg['cards']:
-            q_type = card['question'].question_type
-            d0 = card['display_order']
-            d1 = card.get('display_order_end', d0)
-            if type_blocks and type_blocks[-1]['question_type'] == q_type:
-                type_blocks[-1]['cards'].append(card)
-                type_blocks[-1]['end_order'] = max(type_blocks[-1]['end_order'], d1)
-            else:
-                type_blocks.append({
-                    'question_type': q_type,
-                    'shart_text': '',
-                    'cards': [card],
-                    'start_order': d0,
-                    'end_order': d1,
-                })
-        if not type_blocks and pg['cards']:
-            c0, c1 = pg['cards'][0], pg['cards'][-1]
-            type_blocks = [{
-                'question_type': '', 'shart_text': '', 'cards': pg['cards'],
-                'start_order': c0['display_order'],
-                'end_order': c1.get('display_order_end', c1['display_order']),
-            }]
-        pg['type_blocks'] = type_blocks
+        # Savol turi bo'yicha guruhlash (shart_text bo'sh — admin qoidalari test interfeysida ko'rinmaydi)
+        type_blocks = []
+        for card in pg['cards']:
+            q_type = card['question'].question_type
+            d0 = card['display_order']
+            d1 = card.get('display_order_end', d0)
+            if type_blocks and type_blocks[-1]['question_type'] == q_type:
+                type_blocks[-1]['cards'].append(card)
+                type_blocks[-1]['end_order'] = max(type_blocks[-1]['end_order'], d1)
+            else:
+                type_blocks.append({
+                    'question_type': q_type,
+                    'shart_text': '',
+                    'cards': [card],
+                    'start_order': d0,
+                    'end_order': d1,
+                })
+        if not type_blocks and pg['cards']:
+            c0, c1 = pg['cards'][0], pg['cards'][-1]
+            type_blocks = [{
+                'question_type': '', 'shart_text': '', 'cards': pg['cards'],
+                'start_order': c0['display_order'],
+                'end_order': c1.get('display_order_end', c1['display_order']),
+            }]
+        pg['type_blocks'] = type_blocks
+
+    # Reading: passage tayinlash — flat ro'yxat yoki 2-variant [[v1...], [v2...]]
+    if test.test_type == 'reading':
+        resolved = resolve_reading_passages(test)
+        passages_list = resolved['passages']
+        if passages_list and isinstance(passages_list[0], list):
+            # [[variant1 passage'lari], [variant2 passage'lari]]
+            if uniform_variant:
+                # Savollar hammasi bir xil variant: passage larni variant bo'yicha ajratmasdan, order bo'yicha
+                for pg in part_groups:
+                    pg['passage'] = _passage_for_part(resolved['ordered_by_part'], pg['part_number'])
+            else:
+                for pg in part_groups:
+                    q0 = pg['cards'][0]['question'] if pg.get('cards') else None
+                    var = getattr(q0, 'variant', None) or 1 if q0 else 1
+                    sub = passages_list[var - 1] if 0 <= var - 1 < len(passages_list) else []
+                    if not isinstance(sub, list):
+                        sub = []
+                    pg['passage'] = sub[0] if sub else None
+        else:
+            for pg in part_groups:
+                pg['passage'] = _passage_for_part(resolved['by_part'], pg['part_number'])
+
+    # Listening: har bir part uchun "Listen From Here" da boshlash vaqti (birinchi savolning audio_timestamp)
+    if test.test_type == 'listening':
+        for pg in part_groups:
+            first_ts = None
+            if pg.get('cards'):
+                q = pg['cards'][0].get('question')
+                if q and getattr(q, 'audio_timestamp', None) is not None:
+                    first_ts = float(q.audio_timestamp)
+            pg['audio_start_time'] = first_ts if first_ts is not None else 0
+
+    listening_parts_overview = []
+    if test.test_type == 'listening' and part_groups:
+        for pg in part_groups:
+            listening_parts_overview.append({
+                'part_number': pg['part_number'],
+                'title': pg.get('title') or f"Part {pg['part_number']}",
+                'range_label': pg.get('range_label') or '',
+                'question_count': pg.get('question_count') or 0,
+            })
+
+    # Lazy yuklash uchun: har part bo'yicha saqlangan javoblar (hali yuklanmagan partlar hisobda qolsin)
+    for pg in part_groups:
+        answered_slots = 0
+        answered_questions = 0
+        for card in pg['cards']:
+            q = card['question']
+            raw = answers.get(str(q.pk), '')
+            answered_slots += _answered_slots_for_question(q, raw)
+            if raw and str(raw).strip():
+                answered_questions += 1
+        pg['answered_slots'] = answered_slots
+        pg['answered_questions'] = answered_questions
+
+    # test_take_part uchun: har part savollari va birinchi raqami (javoblarga bog'liq emas, keshlanadi)
+    layout = {'uniform_variant': uniform_variant, 'part_count': len(part_groups), 'parts': {}}
+    for pg in part_groups:
+        layout['parts'].setdefault(pg['part_number'], {
+            'part_number': pg['part_number'],
+            'question_ids': [card['question'].pk for card in pg['cards']],
+            'display_start': pg['cards'][0]['display_order'] if pg['cards'] else 1,
+            'uniform_variant': uniform_variant,
+        })
+
+    return {
+        'question_cards': question_cards,
+        'part_groups': part_groups,
+        'total_display_slots': total_display_slots,
+        'listening_parts_overview': listening_parts_overview,
+        'layout': layout,
+    }
+
+
+def _finish_test_result(request, test, test_result, questions, answers):
+    """Urinishni yakunlash: UserTestAnswer lar, ball, faollik va streak (test_take finish va offline commit)."""
+    total_questions = len(questions)
+    with transaction.atomic():
+        total_slots_target = total_gradable_slots_for_questions(questions)
+        correct_count = 0
+        for q in questions:
+            value = answers.get(str(q.pk), '')
+            user_answer = answer_text(value)
+            if q.question_type == 'essay':
+                if user_answer:
+                    UserTestAnswer.objects.update_or_create(
+                        test_result=test_result,
+                        question=q,
+                        defaults={'user_answer': user_answer, 'is_correct': False},
+                    )
+                continue
+            if q.uses_choose_two_letter_scoring():
+                pts, tot = q.score_mcq_choose_two_dual(value)
+                correct_count += pts
+                UserTestAnswer.objects.update_or_create(
+                    test_result=test_result,
+                    question=q,
+                    defaults={
+                        'user_answer': user_answer,
+                        'is_correct': bool(tot) and pts >= tot,
+                    },
+                )
+                continue
+            if user_answer:
+                if q.question_type in MATCHING_SCORE_TYPES:
+                    slots_ok, slots_tot = q.score_matching_answer(value)
+                    correct_count += slots_ok
+                    is_correct = bool(slots_tot and slots_ok >= slots_tot)
+                elif q.question_type in FILL_TYPES:
+                    slots_ok, slots_tot = q.score_fill_answer(value)
+                    correct_count += slots_ok
+                    is_correct = bool(slots_tot and slots_ok >= slots_tot)
+                elif q.question_type == 'list_selection':
+                    slots_ok, slots_tot = q.score_list_selection(value)
+                    correct_count += slots_ok
+                    is_correct = bool(slots_tot and slots_ok >= slots_tot)
+                else:
+                    is_correct = q.check_user_answer(value)
+                    if is_correct:
+                        correct_count += 1
+                UserTestAnswer.objects.update_or_create(
+                    test_result=test_result,
+                    question=q,
+                    defaults={'user_answer': user_answer, 'is_correct': is_correct},
+                )
+
+        session_scores = compute_session_scores(questions, answers)
+        if session_scores['writing_only']:
+            test_result.total_questions = session_scores['essay_total'] or 1
+            test_result.correct_answers = session_scores['essays_submitted']
+            test_result.completed_at = timezone.now()
+            test_result.attempt_number = test_result.attempt_number or 1
+            test_result.time_taken = test_result.get_elapsed_time()
+            test_result.calculate_score(writing_manual=True)
+        else:
+            test_result.total_questions = total_slots_target or total_questions
+            test_result.correct_answers = correct_count
+            test_result.wrong_answers = max(0, test_result.total_questions - correct_count)
+            test_result.completed_at = timezone.now()
+            test_result.attempt_number = test_result.attempt_number or 1
+            test_result.time_taken = test_result.get_elapsed_time()
+            test_result.calculate_score(writing_manual=False)
+        test_result.refresh_from_db()
+
+        UserActivity.objects.create(
+            user=request.user,
+            activity_type='test_complete',
+            related_object_id=test.pk,
+            related_object_type='Test',
+            metadata={'test_title': test.title, 'score': correct_count, 'total': total_questions}
+        )
+        StudyStreak.update_streak(request.user)
+        mark_recent_write(request)
+
+
+@login_required
+def test_take(request, pk):
+    """Test ishlash"""
+    test = get_object_or_404(Test.objects.select_related('category'), pk=pk, is_active=True)
+    if not getattr(test.category, 'show_on_site', True):
+        return redirect('core:test_list')
+    
+    # Test natijasi yaratish
+    test_result, created = UserTestResult.objects.get_or_create(
+        user=request.user,
+        test=test,
+        completed_at__isnull=True
+    )
+    
+    if request.GET.get('exam_variant') is not None:
+        set_exam_variant(request, test, request.GET.get('exam_variant'))
+
+    exam_variant = get_exam_variant(request, test)
+    questions = filter_questions_by_exam_variant(test, exam_variant)
+
+    if created:
+        test_result.total_questions = total_gradable_slots_for_questions(questions) or len(questions)
+        # Urinish raqamini aniqlash
+        previous_attempts = UserTestResult.objects.filter(
+            user=request.user,
+            test=test,
+            completed_at__isnull=False
+        ).count()
+        test_result.attempt_number = previous_attempts + 1
+        # Timer boshlash
+        if test.duration_minutes:
+            test_result.timer_started_at = timezone.now()
+            test_result.timer_seconds_left = test.duration_minutes * 60
+        test_result.save()
+        
+        # Faollik yozish
+        UserActivity.objects.create(
+            user=request.user,
+            activity_type='test_start',
+            related_object_id=test.pk,
+            related_object_type='Test',
+            metadata={'test_title': test.title}
+        )
+        # Study streak yangilash
+        StudyStreak.update_streak(request.user)
+    else:
+        # Agar test to'xtatilgan bo'lsa, davom ettirish
+        if test_result.is_paused:
+            test_result.resume_test()
+    
+    # Javoblar
+    # Javoblar bir marta typed ko'rinishga (eski satr shakli ham o'qiladi)
+    answers = decode_answers(test_result.answers_json)
+    
+    total_questions = len(questions)
+    total_answer_slots = total_gradable_slots_for_questions(questions)
+
+    if total_questions == 0:
+        messages.warning(request, "Bu testda hali savollar qo'shilmagan. Admin orqali savollar qo'shing.")
+        return redirect('core:test_detail', pk=test.pk)
 
-    # Reading: passage tayinlash — flat ro'yxat yoki 2-variant [[v1...], [v2...]]
-    if test.test_type == 'reading':
-        passages_list = test.get_reading_passages() or []
-        uniform_v = _reading_uniform_variant(test, questions)
-        if passages_list and isinstance(passages_list[0], list):
-            # [[variant1 passage'lari], [variant2 passage'lari]]
-            if uniform_v:
-                # Savollar hammasi bir xil variant: passage larni variant bo'yicha ajratmasdan, order bo'yicha
-                sub_all = _all_reading_passage_dicts_ordered(test)
-                for pg in part_groups:
-                    pg['passage'] = _passage_dict_for_reading_part(sub_all, pg['part_number'])
-            else:
-                for pg in part_groups:
-                    q0 = pg['cards'][0]['question'] if pg.get('cards') else None
-                    var = getattr(q0, 'variant', None) or 1 if q0 else 1
-                    sub = passages_list[var - 1] if 0 <= var - 1 < len(passages_list) else []
-                    if not isinstance(sub, list):
-                        sub = []
-                    pg['passage'] = sub[0] if sub else None
+    # Barcha javoblarni bir POST bilan saqlash (merge — avvalgi javoblar saqlanadi)
+    if request.method == 'POST':
+        # Lazy partlar: faqat sahifaga yuklangan savollar POST da bor — qolganlari serverdagi holicha qoladi
+        loaded_pks = set(request.POST.getlist('loaded_q'))
+        posted_questions = [q for q in questions if str(q.pk) in loaded_pks] if loaded_pks else questions
+        posted = collect_answers_from_post(request, posted_questions)
+        active_pks = [q.pk for q in questions]
+        answers = merge_answers_json(
+            test_result.answers_json, posted, active_pks, exam_variant=exam_variant
+        )
+        test_result.answers_json = answers
+        test_result.save(update_fields=['answers_json'])
+
+        is_autosave = request.POST.get('autosave') == '1'
+        if is_autosave:
+            return JsonResponse({
+                'ok': True,
+                'saved_keys': len([k for k, v in posted.items() if v]),
+            })
+
+        if request.POST.get('finish_test') == '1':
+            _finish_test_result(request, test, test_result, questions, answers)
+            return redirect('core:test_result', pk=test_result.pk)
         else:
-            for pg in part_groups:
-                pg['passage'] = _passage_dict_for_reading_part(passages_list, pg['part_number'])
+            messages.success(request, "Javoblar saqlandi.")
+            return redirect(request.path)
 
-    # Listening: har bir part uchun "Listen From Here" da boshlash vaqti (birinchi savolning audio_timestamp)
-    if test.test_type == 'listening':
-        for pg in part_groups:
-            first_ts = None
-            if pg.get('cards'):
-                q = pg['cards'][0].get('question')
-                if q and getattr(q, 'audio_timestamp', None) is not None:
-                    first_ts = float(q.audio_timestamp)
-            pg['audio_start_time'] = first_ts if first_ts is not None else 0
+    answered_questions = [int(q_id) for q_id in answers.keys() if str(q_id).isdigit()]
 
-    listening_parts_overview = []
-    if test.test_type == 'listening' and part_groups:
-        for pg in part_groups:
-            listening_parts_overview.append({
-                'part_number': pg['part_number'],
-                'title': pg.get('title') or f"Part {pg['part_number']}",
-                'range_label': pg.get('range_label') or '',
-                'question_count': pg.get('question_count') or 0,
-            })
+    total_answer_slots = total_gradable_slots_for_questions(questions)
+    answered_answer_slots = sum(
+        _answered_slots_for_question(q, answers.get(str(q.pk), '')) for q in questions
+    )
+
+    mcq_dual_question_pks = [q.pk for q in questions if q.mcq_dual_question_slots_enabled()]
+
+    # Timer va vaqt ma'lumotlari
+    timer_seconds_left = None
+    timer_minutes = None
+    timer_seconds = None
+    if test.duration_minutes:
+        timer_seconds_left = test_result.get_timer_seconds_left()
+        # Timer ma'lumotlarini yangilash
+        if timer_seconds_left is not None:
+            test_result.timer_seconds_left = timer_seconds_left
+            test_result.save(update_fields=['timer_seconds_left'])
+            # Minutes va seconds ga ajratish
+            timer_minutes = int(timer_seconds_left // 60)
+            timer_seconds = int(timer_seconds_left % 60)
+    
+    elapsed_time = test_result.get_elapsed_time()
+    answered_count = len(answered_questions)
+    progress_percentage = (
+        int((answered_answer_slots / max(total_answer_slots, 1)) * 100)
+        if total_answer_slots > 0
+        else 0
+    )
+
+    take_parts = _build_take_part_groups(request, test, questions, answers)
+    cache.set(_take_layout_key(test, exam_variant), take_parts['layout'], TAKE_LAYOUT_TIMEOUT)
+    question_cards = take_parts['question_cards']
+    part_groups = take_parts['part_groups']
+    total_display_slots = take_parts['total_display_slots']
+    listening_parts_overview = take_parts['listening_parts_overview']
+    # Faqat birinchi (joriy) part to'liq chiziladi; qolganlari test_take_part fragmentidan yuklanadi
+    for idx, pg in enumerate(part_groups):
+        pg['is_loaded'] = idx == 0
 
     current_question = questions[0] if questions else None
     # "Questions 1-10" yoki "Questions 1-7" ko'rsatish uchun
@@ -2220,12 +2183,8 @@ def test_take(request, pk):
             raw = answers.get(str(q.pk), '')
             if not raw:
                 continue
-            try:
-                vals = json.loads(raw) if isinstance(raw, str) and raw.startswith('[') else [raw]
-                answered_blanks += sum(1 for v in vals if str(v).strip())
-            except (json.JSONDecodeError, TypeError):
-                if str(raw).strip():
-                    answered_blanks += 1
+            vals = raw if isinstance(raw, list) else [raw]
+            answered_blanks += sum(1 for v in vals if str(v).strip())
 
     context = {
         'test': test,
@@ -2234,7 +2193,7 @@ def test_take(request, pk):
         'answered_blanks': answered_blanks,
         'test_result': test_result,
         'current_question': current_question,
-        'current_answer': answers.get(str(current_question.pk), '') if current_question else '',
+        'current_answer': answer_text(answers.get(str(current_question.pk), '')) if current_question else '',
         'question_number': answered_count,
         'total_questions': total_questions,
         'total_answer_slots': total_answer_slots,
@@ -2245,6 +2204,7 @@ def test_take(request, pk):
         'answered_questions': answered_questions,
         'question_cards': question_cards,
         'part_groups': part_groups,
+        'part_count': len(part_groups),
         'timer_seconds_left': timer_seconds_left,
         'timer_minutes': timer_minutes,
         'timer_seconds': timer_seconds,
@@ -2260,6 +2220,110 @@ def test_take(request, pk):
     return render(request, 'core/tests/take.html', context)
 
 
+@login_required
+def test_take_part(request, pk, part_number):
+    """Imtihonning bitta parti (savollar + passage) — lazy yuklash uchun HTML fragment, ETag bilan"""
+    test = get_object_or_404(Test.objects.select_related('category'), pk=pk, is_active=True)
+    if not getattr(test.category, 'show_on_site', True):
+        raise Http404("Test topilmadi")
+    test_result = (
+        UserTestResult.objects.filter(user=request.user, test=test, completed_at__isnull=True)
+        .order_by('-started_at')
+        .first()
+    )
+    if test_result is None:
+        raise Http404("Faol test sessiyasi topilmadi")
+
+    exam_variant = get_exam_variant(request, test)
+    answers = decode_answers(test_result.answers_json)
+    # Kontent versiyasi + javoblar o'zgarmagan bo'lsa 304 — qayta chizilmaydi
+    etag_source = json.dumps(
+        [get_content_version('test', test.pk), part_number, exam_variant, answers],
+        sort_keys=True,
+        default=str,
+    )
+    etag = '"%s"' % hashlib.md5(etag_source.encode('utf-8')).hexdigest()
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    questions = filter_questions_by_exam_variant(test, exam_variant)
+    # Bo'linish test_take da keshga yoziladi; topilmasa (boshqa worker / versiya o'zgargan) bir marta to'liq quriladi
+    layout_key = _take_layout_key(test, exam_variant)
+    layout = cache.get(layout_key)
+    if layout is None:
+        layout = _build_take_part_groups(request, test, questions, {})['layout']
+        cache.set(layout_key, layout, TAKE_LAYOUT_TIMEOUT)
+    part = layout['parts'].get(part_number)
+    if part is None:
+        raise Http404("Part topilmadi")
+    part_ids = set(part['question_ids'])
+    part_questions = [q for q in questions if q.pk in part_ids]
+    part_groups = _build_take_part_groups(request, test, part_questions, answers, part=part)['part_groups']
+    if not part_groups:
+        raise Http404("Part topilmadi")
+
+    response = render(request, 'core/tests/partial_take_part.html', {
+        'test': test,
+        'pg': part_groups[0],
+        'part_count': layout['part_count'],
+    })
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@login_required
+@require_POST
+def test_sync_commit(request, pk):
+    """
+    Offline imtihon yakuni: jurnal qoldig'i qo'llanadi va test yakunlanadi (core.exam_sync).
+    Javob yo'qolib qayta yuborilsa — urinish allaqachon yakunlangan, faqat natija manzili qaytadi.
+    """
+    test = get_object_or_404(Test, pk=pk, is_active=True)
+    try:
+        payload = exam_sync.parse_payload(request.body, request.headers.get('Content-Encoding'))
+    except exam_sync.SyncPayloadError as exc:
+        return JsonResponse({'ok': False, 'error': str(exc)}, status=400)
+    exam_variant = get_exam_variant(request, test)
+    with transaction.atomic():
+        test_result = (
+            UserTestResult.objects.select_for_update()
+            .filter(pk=payload['result'], user=request.user, test=test)
+            .first()
+        )
+        if test_result is None:
+            return JsonResponse({'ok': False, 'error': 'Urinish topilmadi'}, status=404)
+        redirect_url = reverse('core:test_result', args=[test_result.pk])
+        if test_result.completed_at:
+            return JsonResponse({'ok': True, 'redirect': redirect_url})
+        questions = filter_questions_by_exam_variant(test, exam_variant)
+        if not questions:
+            return JsonResponse({'ok': False, 'error': "Testda savollar yo'q"}, status=400)
+        acked, _ = exam_sync.apply_ops(test_result, questions, payload['client'], payload['ops'], exam_variant)
+        test_result.save(update_fields=['answers_json'])
+        _finish_test_result(request, test, test_result, questions, decode_answers(test_result.answers_json))
+    return JsonResponse({'ok': True, 'redirect': redirect_url, 'acked': acked})
+
+
+# Imtihon sahifasi ishlatadigan statik fayllar — service worker oldindan keshlaydi
+EXAM_SHELL_ASSETS = (
+    'css/main.css', 'js/main.js', 'js/exam-offline.js', 'js/exam-timer.js', 'js/exam-listening.js', 'js/exam-take.js',
+)
+
+
+def exam_service_worker(request):
+    """Imtihon service worker i: /tests/ scope i uchun ildiz manzildan beriladi; kesh nomi statik hashlardan."""
+    assets = [static(path) for path in EXAM_SHELL_ASSETS]
+    response = render(request, 'core/tests/exam_sw.js', {
+        'assets_json': json.dumps(assets),
+        'cache_version': hashlib.md5('|'.join(assets).encode('utf-8')).hexdigest()[:12],
+    }, content_type='application/javascript; charset=utf-8')
+    response['Service-Worker-Allowed'] = '/tests/'
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
 @login_required
 @require_POST
 def add_test_flashcard(request, pk):
@@ -2376,14 +2440,15 @@ def test_result(request, pk):
         try:
             with transaction.atomic():
                 # Javoblarni tekshirish va natijani hisoblash
-                answers = test_result.answers_json
+                answers = decode_answers(test_result.answers_json)
                 correct = 0
 
                 exam_variant = get_exam_variant(request, test_result.test)
                 questions = filter_questions_by_exam_variant(test_result.test, exam_variant)
                 total_slots_target = total_gradable_slots_for_questions(questions)
                 for question in questions:
-                    user_answer = (answers.get(str(question.pk), '') or '').strip()
+                    value = answers.get(str(question.pk), '')
+                    user_answer = answer_text(value)
                     if question.question_type == 'essay':
                         if user_answer:
                             UserTestAnswer.objects.update_or_create(
@@ -2393,7 +2458,7 @@ def test_result(request, pk):
                             )
                         continue
                     if question.uses_choose_two_letter_scoring():
-                        pts, tot = question.score_mcq_choose_two_dual(user_answer)
+                        pts, tot = question.score_mcq_choose_two_dual(value)
                         correct += pts
                         UserTestAnswer.objects.update_or_create(
                             test_result=test_result,
@@ -2406,19 +2471,19 @@ def test_result(request, pk):
                         continue
                     if user_answer:
                         if question.question_type in MATCHING_SCORE_TYPES:
-                            slots_ok, slots_tot = question.score_matching_answer(user_answer)
+                            slots_ok, slots_tot = question.score_matching_answer(value)
                             correct += slots_ok
                             is_correct = bool(slots_tot and slots_ok >= slots_tot)
                         elif question.question_type in FILL_TYPES:
-                            slots_ok, slots_tot = question.score_fill_answer(user_answer)
+                            slots_ok, slots_tot = question.score_fill_answer(value)
                             correct += slots_ok
                             is_correct = bool(slots_tot and slots_ok >= slots_tot)
                         elif question.question_type == 'list_selection':
-                            slots_ok, slots_tot = question.score_list_selection(user_answer)
+                            slots_ok, slots_tot = question.score_list_selection(value)
                             correct += slots_ok
                             is_correct = bool(slots_tot and slots_ok >= slots_tot)
                         else:
-                            is_correct = question.check_user_answer(user_answer)
+                            is_correct = question.check_user_answer(value)
                             if is_correct:
                                 correct += 1
                         UserTestAnswer.objects.update_or_create(
@@ -2462,6 +2527,7 @@ def test_result(request, pk):
                 )
                 # Study streak yangilash
                 StudyStreak.update_streak(request.user)
+                mark_recent_write(request)
         except Exception as e:
             messages.error(request, f'Xatolik yuz berdi: {str(e)}')
             return redirect('core:test_detail', pk=test_result.test.pk)
@@ -2577,7 +2643,8 @@ def test_result(request, pk):
         test_result.answers_json,
         user_answers,
     )
-    writing_score_pending = session_scores['writing_only']
+    writing_band = session_scores['writing_band'] if session_scores['writing_only'] else None
+    writing_score_pending = session_scores['writing_only'] and writing_band is None
 
     context = {
         'test_result': test_result,
@@ -2592,6 +2659,7 @@ def test_result(request, pk):
         'question_display_num': question_display_num,
         'is_writing_test': test.test_type == 'writing',
         'writing_score_pending': writing_score_pending,
+        'writing_band': writing_band,
         'essays_submitted': session_scores['essays_submitted'],
         'essay_total': session_scores['essay_total'],
         'can_retake': can_retake,
@@ -2724,40 +2792,7 @@ def notifications(request):
 
 
 @login_required
-def toggle_bookmark(request):
-    """Bookmark qo'shish/olib tashlash"""
-    if request.method == 'POST':
-        video_id = request.POST.get('video_id')
-        test_id = request.POST.get('test_id')
-        
-        if video_id:
-            video = get_object_or_404(VideoLesson, pk=video_id)
-            bookmark, created = Bookmark.objects.get_or_create(
-                user=request.user,
-                video=video
-            )
-            if not created:
-                bookmark.delete()
-                return JsonResponse({'bookmarked': False})
-            return JsonResponse({'bookmarked': True})
-        
-        elif test_id:
-            test = get_object_or_404(Test.objects.select_related('category'), pk=test_id)
-            if not getattr(test.category, 'show_on_site', True):
-                return JsonResponse({'error': 'Test mavjud emas.'}, status=404)
-            bookmark, created = Bookmark.objects.get_or_create(
-                user=request.user,
-                test=test
-            )
-            if not created:
-                bookmark.delete()
-                return JsonResponse({'bookmarked': False})
-            return JsonResponse({'bookmarked': True})
-    
-    return JsonResponse({'error': 'Invalid request'}, status=400)
-
-
-@login_required
+@read_from_replica
 def leaderboard(request):
     """Eng yaxshi natijalar ro'yxati"""
     # Eng yaxshi natijalar (o'rtacha ball bo'yicha)
@@ -2806,6 +2841,7 @@ def leaderboard(request):
 
 
 @login_required
+@read_from_replica
 def statistics(request):
     """Batafsil statistika"""
     # Test natijalari statistikasi
@@ -2851,6 +2887,7 @@ def statistics(request):
 
 
 @login_required
+@read_from_replica
 def export_results(request):
     """Test natijalarini CSV'ga export qilish (faqat tugallangan natijalar)"""
     from django.http import HttpResponse
@@ -2887,28 +2924,6 @@ def export_results(request):
     return response
 
 
-@login_required
-def update_video_progress(request, pk):
-    """Video progress yangilash"""
-    if request.method == 'POST':
-        video = get_object_or_404(VideoLesson, pk=pk, is_active=True)
-        progress_percentage = int(request.POST.get('progress', 0))
-        
-        progress, created = UserVideoProgress.objects.get_or_create(
-            user=request.user,
-            video=video
-        )
-        
-        progress.update_progress(progress_percentage)
-        
-        return JsonResponse({
-            'success': True,
-            'progress': progress.watch_percentage
-        })
-    
-    return JsonResponse({'error': 'Invalid request'}, status=400)
-
-
 @login_required
 def add_video_note(request, pk):
     """Video eslatma qo'shish"""
@@ -2993,80 +3008,6 @@ def test_resume(request, pk):
     })
 
 
-@login_required
-def test_update_time(request, pk):
-    """Test vaqtini yangilash (AJAX)"""
-    test = get_object_or_404(Test, pk=pk, is_active=True)
-    test_result = get_object_or_404(
-        UserTestResult,
-        user=request.user,
-        test=test,
-        completed_at__isnull=True
-    )
-    
-    if request.method == 'POST':
-        elapsed_time = int(request.POST.get('elapsed_time', 0))
-        timer_seconds_left = request.POST.get('timer_seconds_left')
-        
-        # Time tracking yangilash
-        test_result.time_taken = elapsed_time
-        if timer_seconds_left is not None:
-            test_result.timer_seconds_left = int(timer_seconds_left)
-        test_result.save(update_fields=['time_taken', 'timer_seconds_left'])
-        
-        return JsonResponse({
-            'success': True,
-            'elapsed_time': elapsed_time,
-            'timer_seconds_left': test_result.timer_seconds_left,
-            'is_paused': test_result.is_paused
-        })
-    
-    return JsonResponse({'error': 'Invalid request'}, status=400)
-
-
-@login_required
-def rate_video(request, pk):
-    """Video reyting qo'yish"""
-    if request.method == 'POST':
-        video = get_object_or_404(VideoLesson, pk=pk, is_active=True)
-        
-        try:
-            rating_value = int(request.POST.get('rating', 0))
-        except (ValueError, TypeError):
-            return JsonResponse({'error': 'Noto\'g\'ri reyting qiymati'}, status=400)
-        
-        if rating_value < 1 or rating_value > 5:
-            return JsonResponse({'error': 'Reyting 1 dan 5 gacha bo\'lishi kerak'}, status=400)
-        
-        rating, created = VideoRating.objects.update_or_create(
-            user=request.user,
-            video=video,
-            defaults={'rating': rating_value}
-        )
-        
-        # Video obyektini refresh qilish - yangi reytinglarni olish uchun
-        video.refresh_from_db()
-        
-        # O'rtacha reyting va jami reytinglarni hisoblash
-        from django.db.models import Avg, Count
-        rating_stats = VideoRating.objects.filter(video=video).aggregate(
-            avg_rating=Avg('rating'),
-            total=Count('id')
-        )
-        
-        average_rating = round(rating_stats['avg_rating'], 1) if rating_stats['avg_rating'] else 0
-        total_ratings = rating_stats['total'] or 0
-        
-        return JsonResponse({
-            'success': True,
-            'rating': rating.rating,
-            'average_rating': average_rating,
-            'total_ratings': total_ratings
-        })
-    
-    return JsonResponse({'error': 'Invalid request'}, status=400)
-
-
 @login_required
 def add_video_comment(request, pk):
     """Video izoh qo'shish"""
@@ -3085,12 +3026,14 @@ def add_video_comment(request, pk):
             except VideoComment.DoesNotExist:
                 return JsonResponse({'error': 'Noto\'g\'ri parent izoh'}, status=400)
         
-        comment = VideoComment.objects.create(
-            user=request.user,
-            video=video,
-            comment_text=comment_text,
-            parent=parent
-        )
+        with transaction.atomic():
+            comment = VideoComment.objects.create(
+                user=request.user,
+                video=video,
+                comment_text=comment_text,
+                parent=parent
+            )
+            video_aggregates.apply_comment_added(comment)
         
         return JsonResponse({
             'success': True,
@@ -3108,12 +3051,65 @@ def add_video_comment(request, pk):
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
 
+@login_required
+def video_comment_list(request, pk):
+    """Asosiy izohlar keyingi sahifasi (?cursor=): HX-Request bo'lsa HTML fragment, aks holda JSON."""
+    video = get_object_or_404(VideoLesson.objects.only('pk'), pk=pk, is_active=True)
+    page = video_comments.comment_page(video.pk, request.GET.get('cursor'))
+    if request.headers.get('HX-Request'):
+        return render(request, 'core/videos/partial_comments.html', {
+            'video': video,
+            'video_comments': page['comments'],
+            'comments_next_cursor': page['next_cursor'],
+        })
+    return JsonResponse(_comment_page_json(page))
+
+
+@login_required
+def video_comment_replies(request, comment_id):
+    """Bitta izohning javoblari (eng eskisidan, ?cursor=)."""
+    parent = get_object_or_404(
+        VideoComment.objects.only('pk', 'video_id'), pk=comment_id, video__is_active=True
+    )
+    page = video_comments.reply_page(parent.pk, request.GET.get('cursor'))
+    if request.headers.get('HX-Request'):
+        return render(request, 'core/videos/partial_comment_replies.html', {
+            'parent': parent,
+            'replies': page['comments'],
+            'replies_next_cursor': page['next_cursor'],
+        })
+    return JsonResponse(_comment_page_json(page))
+
+
+def _comment_page_json(page):
+    return {
+        'comments': [
+            {
+                'id': c['id'],
+                'parent_id': c['parent_id'],
+                'user_first_name': c['user_name'],
+                'text': c['text'],
+                'is_edited': c['is_edited'],
+                'replies_count': c['reply_count'],
+                'created_at': timezone.localtime(c['created_at']).strftime('%d.%m.%Y %H:%M'),
+            }
+            for c in page['comments']
+        ],
+        'next_cursor': page['next_cursor'],
+    }
+
+
 @login_required
 def delete_video_comment(request, comment_id):
     """Video izoh o'chirish"""
     if request.method == 'POST':
         comment = get_object_or_404(VideoComment, pk=comment_id, user=request.user)
-        comment.delete()
+        with transaction.atomic():
+            # Kaskad: javoblar ham o'chadi — ular ham izohlar sonidan ayiriladi
+            _, deleted = comment.delete()
+            video_aggregates.apply_comments_deleted(
+                comment.video_id, comment.parent_id, deleted.get(VideoComment._meta.label, 0)
+            )
         
         return JsonResponse({'success': True})
     
@@ -3167,11 +3163,14 @@ def add_video_to_playlist(request, pk):
             return JsonResponse({'error': 'Playlist topilmadi'}, status=404)
         
         # Videoni playlistga qo'shish
-        playlist_video, created = PlaylistVideo.objects.get_or_create(
-            playlist=playlist,
-            video=video,
-            defaults={'order': playlist.videos_count + 1}
-        )
+        with transaction.atomic():
+            playlist_video, created = PlaylistVideo.objects.get_or_create(
+                playlist=playlist,
+                video=video,
+                defaults={'order': playlist.videos_count + 1}
+            )
+            if created:
+                video_aggregates.apply_playlist_size_change(playlist.pk, 1)
         
         if not created:
             return JsonResponse({'error': 'Video allaqachon playlistda'}, status=400)
@@ -3199,7 +3198,9 @@ def remove_video_from_playlist(request, pk):
         except VideoPlaylist.DoesNotExist:
             return JsonResponse({'error': 'Playlist topilmadi'}, status=404)
         
-        PlaylistVideo.objects.filter(playlist=playlist, video=video).delete()
+        with transaction.atomic():
+            deleted, _ = PlaylistVideo.objects.filter(playlist=playlist, video=video).delete()
+            video_aggregates.apply_playlist_size_change(playlist.pk, -deleted)
         
         return JsonResponse({
             'success': True,
@@ -3251,6 +3252,7 @@ def add_video_bookmark(request, pk):
 
 
 @login_required
+@read_from_replica
 def analytics(request):
     """Batafsil tahlillar"""
     # Vaqt oralig'i
@@ -3383,6 +3385,7 @@ def analytics(request):
 
 
 @login_required
+@read_from_replica
 def export_to_excel(request):
     """Test natijalarini Excel'ga export qilish"""
     try:
@@ -3447,6 +3450,7 @@ def export_to_excel(request):
 
 
 @login_required
+@read_from_replica
 def weekly_summary(request):
     """Haftalik xulosa"""
     now = timezone.now()
@@ -3494,6 +3498,7 @@ def weekly_summary(request):
 
 
 @login_required
+@read_from_replica
 def monthly_report(request):
     """Oylik hisobot"""
     now = timezone.now()
@@ -3552,3 +3557,19 @@ def monthly_report(request):
 def admin_toliq_yoriqnoma(request):
     """Admin uchun bitta sahifada to'liq yo'riqnoma — Test, Part, Savol qo'shish."""
     return render(request, 'admin/core/toliq_yoriqnoma.html')
+
+
+@staff_member_required
+@require_POST
+def fragment_cache_toggle(request):
+    """Staff uchun: o'z sessiyasida fragment keshini o'chirish/yoqish (shablon o'zgarishini darhol ko'rish)."""
+    bypass = not request.session.get(fragment_cache.BYPASS_SESSION_KEY)
+    fragment_cache.set_bypass(request, bypass)
+    if bypass:
+        messages.info(request, "Fragment keshi sizning sessiyangiz uchun o'chirildi.")
+    else:
+        messages.success(request, "Fragment keshi qayta yoqildi.")
+    next_url = request.POST.get('next')
+    if not url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}, require_https=request.is_secure()):
+        next_url = reverse('admin:index')
+    return redirect(next_url)
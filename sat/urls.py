@@ -1,5 +1,5 @@
 from django.urls import path
-from core import views
+from core import async_views, views
 
 app_name = 'sat'
 
@@ -10,7 +10,7 @@ urlpatterns = [
     path('dashboard/', views.sat_dashboard, name='sat_dashboard'),
     path('statistics/', views.sat_statistics, name='sat_statistics'),
     path('<str:subject>/', views.sat_subject, name='sat_subject'),
-    path('resource/<int:pk>/progress/', views.sat_update_progress, name='sat_update_progress'),
+    path('resource/<int:pk>/progress/', async_views.sat_update_progress, name='sat_update_progress'),
     path('resource/<int:pk>/bookmark/', views.sat_toggle_bookmark, name='sat_toggle_bookmark'),
     path('resource/<int:pk>/note/add/', views.sat_add_note, name='sat_add_note'),
     path('resource/<int:pk>/pdf/', views.sat_pdf_viewer, name='sat_pdf_viewer'),
@@ -0,0 +1,80 @@
+/* Listening testlar uchun audio pleyer boshqaruvi. */
+// Global audio funksiyalari
+window.playAudio = function() {
+    const audio = document.getElementById('test-audio');
+    if (audio) {
+        audio.play().catch(error => {
+            console.error('Audio play error:', error);
+        });
+    }
+};
+
+window.pauseAudio = function() {
+    const audio = document.getElementById('test-audio');
+    if (audio) {
+        audio.pause();
+    }
+};
+
+// Global playAudioAt funksiyasi - audio timestamp dan eshitish
+window.playAudioAt = function(timestamp) {
+    const audio = document.getElementById('test-audio');
+    if (audio) {
+        audio.currentTime = timestamp || 0;
+        audio.play().catch(error => {
+            console.error('Audio play error:', error);
+        });
+    } else {
+        console.error('Audio element topilmadi!');
+    }
+};
+
+// Audio element va vaqt ko'rsatish
+const audio = document.getElementById('test-audio');
+const audioTimeDisplay = document.getElementById('audio-time');
+
+// Audio vaqtini ko'rsatish
+if (audio && audioTimeDisplay) {
+    function updateAudioTime() {
+        const current = formatTime(audio.currentTime);
+        const total = formatTime(audio.duration || 0);
+        if (audioTimeDisplay) {
+            audioTimeDisplay.textContent = `${current} / ${total}`;
+        }
+    }
+    
+    function formatTime(seconds) {
+        if (isNaN(seconds)) return '00:00';
+        const mins = Math.floor(seconds / 60);
+        const secs = Math.floor(seconds % 60);
+        return `${mins.toString().padStart(2, '0')}:${secs.toString().padStart(2, '0')}`;
+    }
+    
+    audio.addEventListener('loadedmetadata', function() {
+        updateAudioTime();
+    });
+    
+    audio.addEventListener('timeupdate', function() {
+        updateAudioTime();
+    });
+    
+    // Audio xatoliklarini tutish
+    audio.addEventListener('error', function(e) {
+        console.error('Audio error:', e);
+        if (audioTimeDisplay) {
+            audioTimeDisplay.textContent = 'Audio yuklanmadi';
+            audioTimeDisplay.style.color = 'red';
+        }
+    });
+}
+// "Listen From Here" — Part 2/3/4 da audio_timestamp dan boshlash
+document.addEventListener('click', function(e) {
+    const btn = e.target && e.target.closest('.listening-listen-from-here');
+    if (!btn) return;
+    e.preventDefault();
+    const a = document.getElementById('test-audio');
+    if (!a) return;
+    const start = parseFloat(btn.getAttribute('data-audio-start')) || 0;
+    a.currentTime = start;
+    a.play().catch(function(err) { console.error('Play error:', err); });
+});
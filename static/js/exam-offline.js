@@ -0,0 +1,384 @@
+/* Offline imtihon: javoblar IndexedDB jurnaliga (seq bilan), fon sinxronlash (gzip paketlar) va yakuniy commit.
+ * Server tomoni — core.exam_sync (tests/<pk>/sync/, tests/<pk>/sync/commit/). Sozlamalar — window.EXAM_TAKE.
+ * Tarmoq uzilsa imtihon davom etadi: jurnal qurilmada qoladi va ulanish tiklanganda yuboriladi. */
+(function() {
+    'use strict';
+    if (!window.EXAM_TAKE || !EXAM_TAKE.resultPk || !EXAM_TAKE.urls || !EXAM_TAKE.urls.sync) return;
+
+    const DB_NAME = 'ielts-exam';
+    const SYNC_DELAY = 1500;
+    const MAX_BACKOFF = 60000;
+    const BATCH_SIZE = 200;
+    const INPUT_DEBOUNCE = 400;
+    const FIELD_RE = /^(answer|match|list)_(\d+)(?:_|$)/;
+    const resultPk = EXAM_TAKE.resultPk;
+
+    /* ---------- Saqlash: IndexedDB (bo'lmasa — xotira, sahifa yopilguncha) ---------- */
+
+    function requestPromise(req) {
+        return new Promise(function(resolve, reject) {
+            req.onsuccess = function() { resolve(req.result); };
+            req.onerror = function() { reject(req.error); };
+        });
+    }
+
+    function idbStore(db) {
+        function run(names, mode, fn) {
+            return new Promise(function(resolve, reject) {
+                const tx = db.transaction(names, mode);
+                let value;
+                Promise.resolve(fn(tx)).then(function(v) { value = v; });
+                tx.oncomplete = function() { resolve(value); };
+                tx.onerror = tx.onabort = function() { reject(tx.error); };
+            });
+        }
+        const range = IDBKeyRange.bound([resultPk, -Infinity], [resultPk, Infinity]);
+        return {
+            getSession: function() {
+                return run(['sessions'], 'readonly', function(tx) {
+                    return requestPromise(tx.objectStore('sessions').get(resultPk));
+                });
+            },
+            putSession: function(session) {
+                return run(['sessions'], 'readwrite', function(tx) { tx.objectStore('sessions').put(session); });
+            },
+            append: function(session, op) {
+                return run(['sessions', 'ops', 'answers'], 'readwrite', function(tx) {
+                    tx.objectStore('sessions').put(session);
+                    tx.objectStore('ops').put(op);
+                    tx.objectStore('answers').put({ result: resultPk, q: op.q, f: op.f });
+                });
+            },
+            pendingOps: function(limit) {
+                return run(['ops'], 'readonly', function(tx) {
+                    return requestPromise(tx.objectStore('ops').getAll(range, limit || undefined));
+                });
+            },
+            ackUpTo: function(seq) {
+                return run(['ops'], 'readwrite', function(tx) {
+                    tx.objectStore('ops').delete(IDBKeyRange.bound([resultPk, -Infinity], [resultPk, seq]));
+                });
+            },
+            answers: function() {
+                return run(['answers'], 'readonly', function(tx) {
+                    return requestPromise(tx.objectStore('answers').getAll(range));
+                });
+            },
+            clear: function() {
+                return run(['sessions', 'ops', 'answers'], 'readwrite', function(tx) {
+                    tx.objectStore('sessions').delete(resultPk);
+                    tx.objectStore('ops').delete(range);
+                    tx.objectStore('answers').delete(range);
+                });
+            }
+        };
+    }
+
+    function memoryStore() {
+        let session = null;
+        let ops = [];
+        const answers = {};
+        return {
+            getSession: function() { return Promise.resolve(session); },
+            putSession: function(s) { session = s; return Promise.resolve(); },
+            append: function(s, op) {
+                session = s;
+                ops.push(op);
+                answers[op.q] = { result: resultPk, q: op.q, f: op.f };
+                return Promise.resolve();
+            },
+            pendingOps: function(limit) { return Promise.resolve(limit ? ops.slice(0, limit) : ops.slice()); },
+            ackUpTo: function(seq) { ops = ops.filter(function(op) { return op.seq > seq; }); return Promise.resolve(); },
+            answers: function() { return Promise.resolve(Object.keys(answers).map(function(k) { return answers[k]; })); },
+            clear: function() {
+                session = null;
+                ops = [];
+                Object.keys(answers).forEach(function(k) { delete answers[k]; });
+                return Promise.resolve();
+            }
+        };
+    }
+
+    function openStore() {
+        if (!('indexedDB' in window)) return Promise.resolve(memoryStore());
+        const req = indexedDB.open(DB_NAME, 1);
+        req.onupgradeneeded = function() {
+            const db = req.result;
+            db.createObjectStore('sessions', { keyPath: 'result' });
+            db.createObjectStore('ops', { keyPath: ['result', 'seq'] });
+            db.createObjectStore('answers', { keyPath: ['result', 'q'] });
+        };
+        return requestPromise(req).then(idbStore).catch(function() { return memoryStore(); });
+    }
+
+    function newClientId() {
+        if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+        return Date.now().toString(36) + Math.random().toString(36).slice(2, 12);
+    }
+
+    /* ---------- Holat va status ---------- */
+
+    let store = null;
+    let session = null;
+    const ready = openStore().then(function(s) {
+        store = s;
+        return store.getSession();
+    }).then(function(saved) {
+        session = saved || { result: resultPk, client: newClientId(), seq: 0, commitPending: false };
+        if (!saved) return store.putSession(session);
+    });
+
+    let statusTimer = null;
+    function showStatus(text, sticky) {
+        const el = document.getElementById('autosave-status');
+        if (!el) return;
+        el.textContent = text;
+        el.style.opacity = '1';
+        clearTimeout(statusTimer);
+        if (!sticky) {
+            statusTimer = setTimeout(function() { el.textContent = 'Javoblar serverga avtomatik saqlanadi'; }, 2800);
+        }
+    }
+
+    /* ---------- Forma maydonlari ---------- */
+
+    function examForm() {
+        return document.getElementById('exam-take-form');
+    }
+
+    function questionElements(q) {
+        const form = examForm();
+        if (!form) return [];
+        return Array.prototype.filter.call(form.elements, function(el) {
+            const m = el.name && FIELD_RE.exec(el.name);
+            return m && m[2] === q;
+        });
+    }
+
+    function questionFields(q) {
+        const fields = {};
+        questionElements(q).forEach(function(el) {
+            if ((el.type === 'checkbox' || el.type === 'radio') && !el.checked) return;
+            fields[el.name] = el.value;
+        });
+        return fields;
+    }
+
+    function applyFields(q, fields) {
+        questionElements(q).forEach(function(el) {
+            if (el.type === 'checkbox') el.checked = Object.prototype.hasOwnProperty.call(fields, el.name);
+            else if (el.type === 'radio') el.checked = fields[el.name] === el.value;
+            else if (el.type !== 'hidden') el.value = fields[el.name] || '';
+        });
+    }
+
+    function restoreAnswers() {
+        return ready.then(function() { return store.answers(); }).then(function(rows) {
+            if (!rows.length) return;
+            // Qiymatlar event siz qo'yiladi — jurnalga qayta yozilmaydi
+            rows.forEach(function(row) { applyFields(row.q, row.f); });
+            if (typeof window.__updateAnsweredBadge === 'function') window.__updateAnsweredBadge();
+        });
+    }
+
+    /* ---------- Jurnal ---------- */
+
+    const pendingInputs = {};
+    function record(q) {
+        clearTimeout(pendingInputs[q]);
+        delete pendingInputs[q];
+        return ready.then(function() {
+            session.seq += 1;
+            const op = { result: resultPk, seq: session.seq, q: q, f: questionFields(q) };
+            return store.append(session, op);
+        }).then(function() { scheduleSync(SYNC_DELAY); });
+    }
+
+    function flushInputs() {
+        return Promise.all(Object.keys(pendingInputs).map(record));
+    }
+
+    function onFieldEvent(e) {
+        if (!e.target || !e.target.name) return;
+        const m = FIELD_RE.exec(e.target.name);
+        if (!m || !e.target.form || e.target.form.id !== 'exam-take-form') return;
+        const q = m[2];
+        if (e.type === 'change') {
+            record(q);
+            return;
+        }
+        clearTimeout(pendingInputs[q]);
+        pendingInputs[q] = setTimeout(function() { record(q); }, INPUT_DEBOUNCE);
+    }
+
+    /* Bir savolning eski op lari kerak emas — faqat eng oxirgisi (server ham shunday qiladi) */
+    function coalesce(ops) {
+        const latest = {};
+        ops.forEach(function(op) {
+            if (!latest[op.q] || latest[op.q].seq < op.seq) latest[op.q] = op;
+        });
+        return Object.keys(latest).map(function(q) {
+            return { seq: latest[q].seq, q: Number(q), f: latest[q].f };
+        });
+    }
+
+    /* ---------- Tarmoq ---------- */
+
+    function encode(payload) {
+        const json = JSON.stringify(payload);
+        if (typeof CompressionStream === 'undefined' || json.length < 1024) {
+            return Promise.resolve({ body: json, gzip: false });
+        }
+        const stream = new Blob([json]).stream().pipeThrough(new CompressionStream('gzip'));
+        return new Response(stream).arrayBuffer().then(function(buf) { return { body: buf, gzip: true }; });
+    }
+
+    function send(url, payload) {
+        return encode(payload).then(function(enc) {
+            const headers = { 'Content-Type': 'application/json', 'X-CSRFToken': EXAM_TAKE.csrfToken };
+            if (enc.gzip) headers['Content-Encoding'] = 'gzip';
+            return fetch(url, { method: 'POST', body: enc.body, headers: headers, credentials: 'same-origin' });
+        }).then(function(res) {
+            return res.json().catch(function() { return {}; }).then(function(data) {
+                if (res.status === 409 && data.completed) return data;
+                if (!res.ok || !data.ok) {
+                    const err = new Error(data.error || ('HTTP ' + res.status));
+                    err.status = res.status;
+                    throw err;
+                }
+                return data;
+            });
+        });
+    }
+
+    function offlineMessage() {
+        return navigator.onLine === false
+            ? "Internet yo'q — javoblar qurilmada saqlandi"
+            : 'Saqlash xatosi — qayta uriniladi';
+    }
+
+    let syncTimer = null;
+    let syncing = null;
+    let backoff = SYNC_DELAY;
+
+    function scheduleSync(delay) {
+        if (syncTimer) return;
+        syncTimer = setTimeout(function() {
+            syncTimer = null;
+            syncNow();
+        }, delay);
+    }
+
+    function syncNow() {
+        if (syncing) return syncing;
+        if (session && session.commitPending) return commitNow();
+        syncing = ready.then(function() { return store.pendingOps(BATCH_SIZE); }).then(function(ops) {
+            if (!ops.length) return null;
+            return send(EXAM_TAKE.urls.sync, { result: resultPk, client: session.client, ops: coalesce(ops) })
+                .then(function(data) {
+                    if (data.completed) return finish(EXAM_TAKE.urls.result);
+                    backoff = SYNC_DELAY;
+                    return store.ackUpTo(data.acked).then(function() {
+                        showStatus('Serverga saqlandi');
+                        if (ops.length === BATCH_SIZE) scheduleSync(0);
+                    });
+                });
+        }).catch(function() {
+            backoff = Math.min(backoff * 2, MAX_BACKOFF);
+            showStatus(offlineMessage(), true);
+            scheduleSync(backoff);
+        }).finally(function() {
+            syncing = null;
+        });
+        return syncing;
+    }
+
+    /* ---------- Yakunlash ---------- */
+
+    let committing = null;
+
+    function finish(url) {
+        return store.clear().then(function() {
+            if (navigator.serviceWorker && navigator.serviceWorker.controller) {
+                navigator.serviceWorker.controller.postMessage({ type: 'exam-finished', testPk: EXAM_TAKE.testPk });
+            }
+            window.location.href = url || EXAM_TAKE.urls.result;
+        });
+    }
+
+    function commitNow() {
+        if (committing) return committing;
+        showStatus('Test yuborilmoqda...', true);
+        committing = ready.then(function() { return store.pendingOps(); }).then(function(ops) {
+            return send(EXAM_TAKE.urls.commit, { result: resultPk, client: session.client, ops: coalesce(ops), commit: true });
+        }).then(function(data) {
+            return finish(data.redirect);
+        }).catch(function() {
+            committing = null;
+            backoff = Math.min(backoff * 2, MAX_BACKOFF);
+            showStatus("Internet yo'q — javoblar qurilmada saqlandi, ulanish tiklanishi bilan test yuboriladi", true);
+            setTimeout(commitNow, backoff);
+        });
+        return committing;
+    }
+
+    function commit() {
+        return flushInputs().then(function() { return ready; }).then(function() {
+            session.commitPending = true;
+            return store.putSession(session);
+        }).then(commitNow);
+    }
+
+    window.ExamJournal = { commit: commit, sync: syncNow };
+
+    /* ---------- Service worker va part fragmentlarini oldindan keshlash ---------- */
+
+    function prefetchParts() {
+        const urls = Array.prototype.map.call(
+            document.querySelectorAll('.reading-part-pane[data-part-loaded="0"][data-part-url]'),
+            function(pane) { return pane.getAttribute('data-part-url'); }
+        );
+        urls.reduce(function(chain, url) {
+            return chain.then(function() {
+                return fetch(url, { headers: { 'HX-Request': 'true' }, credentials: 'same-origin' }).catch(function() {});
+            });
+        }, Promise.resolve());
+    }
+
+    function registerServiceWorker() {
+        if (!('serviceWorker' in navigator) || !EXAM_TAKE.urls.serviceWorker) return;
+        navigator.serviceWorker.register(EXAM_TAKE.urls.serviceWorker, { scope: '/tests/' }).then(function() {
+            if (!navigator.serviceWorker.controller) return;
+            if ('requestIdleCallback' in window) window.requestIdleCallback(prefetchParts, { timeout: 5000 });
+            else setTimeout(prefetchParts, 3000);
+        }).catch(function() {});
+    }
+
+    function init() {
+        document.addEventListener('input', onFieldEvent, { passive: true });
+        document.addEventListener('change', onFieldEvent);
+        // Faqat "Submit" (finish_test) ushlanadi; tasdiq oynasida bekor qilingan bo'lsa — defaultPrevented
+        document.addEventListener('submit', function(e) {
+            if (e.defaultPrevented || !e.target || e.target.id !== 'exam-take-form') return;
+            if (!e.submitter || e.submitter.getAttribute('name') !== 'finish_test') return;
+            e.preventDefault();
+            commit();
+        });
+        document.addEventListener('exam:part-loaded', restoreAnswers);
+        window.addEventListener('online', function() {
+            backoff = SYNC_DELAY;
+            syncNow();
+        });
+        document.addEventListener('visibilitychange', function() {
+            if (document.visibilityState === 'hidden') flushInputs().then(syncNow);
+        });
+        restoreAnswers().then(function() {
+            if (session.commitPending) commitNow();
+            else syncNow();
+        });
+        registerServiceWorker();
+    }
+
+    if (document.readyState === 'loading') document.addEventListener('DOMContentLoaded', init);
+    else init();
+})();
@@ -0,0 +1,1379 @@
+/* Imtihon sahifasi: javoblar, autosave, belgilangan savollar, eslatmalar, flashcard. Sozlamalar — window.EXAM_TAKE. */
+
+// 2 ta javob tanlash: checkboxlarda maksimum 2 ta belgilash
+document.addEventListener('DOMContentLoaded', function() {
+    // Delegatsiya: lazy yuklangan partlardagi checkboxlar ham qamrab olinadi
+    document.addEventListener('change', function(e) {
+        var cb = e.target;
+        if (!cb || !cb.classList || !cb.classList.contains('mcq-multi-checkbox')) return;
+        var pk = cb.getAttribute('data-question-pk');
+        var max = parseInt(cb.getAttribute('data-max'), 10) || 2;
+        var group = document.querySelectorAll('.mcq-multi-checkbox[data-question-pk="' + pk + '"]');
+        var checked = Array.prototype.filter.call(group, function(c) { return c.checked; });
+        if (checked.length > max) {
+            checked[0].checked = false;
+        }
+    });
+
+    const examModeToggle = document.getElementById('exam-mode-toggle');
+    const autosaveStatus = document.getElementById('autosave-status');
+    const applyExamMode = (enabled) => {
+        document.body.classList.toggle('exam-mode', enabled);
+        if (examModeToggle) {
+            examModeToggle.innerHTML = enabled
+                ? '<i class="fas fa-compress me-1"></i><span class="d-none d-sm-inline">Exit Mode</span>'
+                : '<i class="fas fa-expand me-1"></i><span class="d-none d-sm-inline">Exam Mode</span>';
+        }
+        localStorage.setItem('examModeEnabled', enabled ? '1' : '0');
+    };
+    if (localStorage.getItem('examModeEnabled') === '1') applyExamMode(true);
+    if (examModeToggle) {
+        examModeToggle.addEventListener('click', function() {
+            applyExamMode(!document.body.classList.contains('exam-mode'));
+        });
+    }
+
+    // Resizable splitter between left and right panes
+    (function initSplitter() {
+        const layout = document.querySelector('.exam-split-layout');
+        const divider = document.querySelector('.exam-split-divider');
+        const leftPane = document.querySelector('.exam-left-pane');
+        const rightPane = document.querySelector('.exam-right-pane');
+        if (!layout || !divider || !leftPane || !rightPane) return;
+        let startX, startLeftW;
+        divider.addEventListener('mousedown', function(e) {
+            if (e.button !== 0) return;
+            e.preventDefault();
+            startX = e.clientX;
+            startLeftW = leftPane.getBoundingClientRect().width;
+            const minLeft = 280, minRight = 280;
+            function move(e) {
+                const dx = e.clientX - startX;
+                const total = layout.getBoundingClientRect().width;
+                const divW = divider.getBoundingClientRect().width;
+                let w = Math.max(minLeft, Math.min(total - divW - minRight, startLeftW + dx));
+                leftPane.style.flex = '0 0 ' + w + 'px';
+                rightPane.style.flex = '1 1 0';
+            }
+            function up() {
+                document.removeEventListener('mousemove', move);
+                document.removeEventListener('mouseup', up);
+                document.body.style.cursor = '';
+                document.body.style.userSelect = '';
+            }
+            document.body.style.cursor = 'col-resize';
+            document.body.style.userSelect = 'none';
+            document.addEventListener('mousemove', move);
+            document.addEventListener('mouseup', up);
+        });
+    })();
+
+    function escapeHtml(str) {
+        return (str || '')
+            .replace(/&/g, '&amp;')
+            .replace(/</g, '&lt;')
+            .replace(/>/g, '&gt;')
+            .replace(/"/g, '&quot;')
+            .replace(/'/g, '&#039;');
+    }
+
+    function markSaved(text) {
+        if (!autosaveStatus) return;
+        autosaveStatus.textContent = text || 'Saved';
+        autosaveStatus.style.opacity = '1';
+        clearTimeout(window.__saveStatusTimer);
+        window.__saveStatusTimer = setTimeout(() => {
+            if (autosaveStatus) autosaveStatus.textContent = 'Javoblar serverga avtomatik saqlanadi';
+        }, 2800);
+    }
+
+    (function initServerAutosave() {
+        const form = document.getElementById('exam-take-form');
+        // exam-offline.js jurnali bor bo'lsa butun formani yubormaymiz — o'zgarishlar paket bilan sinxronlanadi
+        if (!form || window.ExamJournal) return;
+        let saveTimer = null;
+        let saving = false;
+        function scheduleSave() {
+            clearTimeout(saveTimer);
+            saveTimer = setTimeout(runSave, 2200);
+        }
+        function runSave() {
+            if (saving) return;
+            saving = true;
+            const fd = new FormData(form);
+            const csrf = form.querySelector('[name=csrfmiddlewaretoken]');
+            const headers = {};
+            if (csrf && csrf.value) headers['X-CSRFToken'] = csrf.value;
+            fetch(EXAM_TAKE.urls.autosave, { method: 'POST', body: fd, headers: headers, credentials: 'same-origin' })
+                .then(function(res) { return res.json().then(function(data) { return { ok: res.ok, data: data }; }); })
+                .then(function(r) {
+                    if (r.ok && r.data && r.data.ok) markSaved('Serverga saqlandi');
+                    else markSaved('Saqlash xatosi — qayta uriniladi');
+                })
+                .catch(function() { markSaved('Tarmoq xatosi — keyinroq saqlanadi'); })
+                .finally(function() { saving = false; });
+        }
+        form.addEventListener('input', scheduleSave, { passive: true });
+        form.addEventListener('change', function() {
+            clearTimeout(saveTimer);
+            saveTimer = setTimeout(runSave, 600);
+        });
+    })();
+
+    // Flashcard helper (selected text -> modal -> save)
+    const flashcardSelectionBtn = document.getElementById('flashcard-selection-btn');
+    const flashcardTerm = document.getElementById('flashcard-term');
+    const flashcardDefinition = document.getElementById('flashcard-definition');
+    const flashcardSetSelect = document.getElementById('flashcard-set-select');
+    const flashcardNewSet = document.getElementById('flashcard-new-set');
+    const saveFlashcardBtn = document.getElementById('save-flashcard-btn');
+    const flashcardModalEl = document.getElementById('flashcardModal');
+    const flashcardModal = flashcardModalEl && window.bootstrap ? new bootstrap.Modal(flashcardModalEl) : null;
+    let lastSelectedText = '';
+
+    function getSelectionFromExamText() {
+        const sel = window.getSelection();
+        if (!sel || !sel.rangeCount) return '';
+        const selectedText = (sel.toString() || '').trim().replace(/\s+/g, ' ');
+        if (!selectedText) return '';
+        const anchor = sel.anchorNode && sel.anchorNode.nodeType === 1 ? sel.anchorNode : (sel.anchorNode ? sel.anchorNode.parentElement : null);
+        const inReading = anchor && anchor.closest ? anchor.closest('.reading-passages-container, .reading-text') : null;
+        return inReading ? selectedText.slice(0, 255) : '';
+    }
+
+    function hideFlashcardSelectionBtn() {
+        if (!flashcardSelectionBtn) return;
+        flashcardSelectionBtn.style.display = 'none';
+    }
+
+    document.addEventListener('mouseup', function(e) {
+        if (!flashcardSelectionBtn) return;
+        const selectedText = getSelectionFromExamText();
+        if (!selectedText) {
+            hideFlashcardSelectionBtn();
+            return;
+        }
+        lastSelectedText = selectedText;
+        flashcardSelectionBtn.style.display = 'inline-flex';
+        flashcardSelectionBtn.style.alignItems = 'center';
+        flashcardSelectionBtn.style.justifyContent = 'center';
+        flashcardSelectionBtn.style.left = Math.max(12, e.clientX + 8) + 'px';
+        flashcardSelectionBtn.style.top = Math.max(12, e.clientY - 44) + 'px';
+    });
+    document.addEventListener('scroll', hideFlashcardSelectionBtn, true);
+    document.addEventListener('mousedown', function(e) {
+        if (flashcardSelectionBtn && !e.target.closest('#flashcard-selection-btn')) {
+            setTimeout(hideFlashcardSelectionBtn, 0);
+        }
+    });
+
+    if (flashcardSelectionBtn) {
+        flashcardSelectionBtn.addEventListener('click', function() {
+            hideFlashcardSelectionBtn();
+            if (!flashcardModal) return;
+            flashcardTerm.value = lastSelectedText || '';
+            flashcardDefinition.value = '';
+            flashcardNewSet.value = '';
+            flashcardSetSelect.value = flashcardSetSelect.value || '';
+            flashcardModal.show();
+        });
+    }
+
+    if (saveFlashcardBtn) {
+        saveFlashcardBtn.addEventListener('click', function() {
+            const term = (flashcardTerm.value || '').trim();
+            const definition = (flashcardDefinition.value || '').trim();
+            const setId = (flashcardSetSelect.value || '').trim();
+            const newSetName = (flashcardNewSet.value || '').trim();
+            const currentQuestionId = (() => {
+                const blocks = Array.from(document.querySelectorAll('#question-container .part-q-card[data-question-id]'));
+                if (!blocks.length) return '';
+                const anchorLine = window.innerHeight * 0.35;
+                let nearest = blocks[0];
+                let best = Number.POSITIVE_INFINITY;
+                blocks.forEach((el) => {
+                    const r = el.getBoundingClientRect();
+                    const dist = Math.abs(r.top - anchorLine);
+                    if (dist < best) {
+                        best = dist;
+                        nearest = el;
+                    }
+                });
+                return nearest ? (nearest.getAttribute('data-question-id') || '') : '';
+            })();
+
+            if (!term) {
+                alert('Term kiriting');
+                return;
+            }
+            if (!setId && !newSetName) {
+                alert('Set tanlang yoki yangi set kiriting');
+                return;
+            }
+
+            const body = new FormData();
+            body.append('term', term);
+            body.append('definition', definition);
+            body.append('set_id', setId);
+            body.append('new_set_name', newSetName);
+            body.append('question_id', currentQuestionId);
+            body.append('csrfmiddlewaretoken', EXAM_TAKE.csrfToken);
+
+            saveFlashcardBtn.disabled = true;
+            fetch(EXAM_TAKE.urls.addFlashcard, {
+                method: 'POST',
+                body: body,
+                headers: {
+                    'X-CSRFToken': EXAM_TAKE.csrfToken
+                }
+            })
+            .then(async (res) => {
+                const data = await res.json();
+                if (!res.ok || !data.success) {
+                    throw new Error((data && data.error) || 'Saqlashda xatolik');
+                }
+                return data;
+            })
+            .then((data) => {
+                if (data.set_id && data.set_name && !flashcardSetSelect.querySelector('option[value="' + data.set_id + '"]')) {
+                    const opt = document.createElement('option');
+                    opt.value = data.set_id;
+                    opt.textContent = data.set_name;
+                    flashcardSetSelect.appendChild(opt);
+                }
+                if (data.set_id) flashcardSetSelect.value = String(data.set_id);
+                flashcardNewSet.value = '';
+                markSaved('Flashcard saved');
+                if (flashcardModal) flashcardModal.hide();
+            })
+            .catch((err) => {
+                alert(err.message || 'Xatolik yuz berdi');
+            })
+            .finally(() => {
+                saveFlashcardBtn.disabled = false;
+            });
+        });
+    }
+
+    const flaggedStorageKey = 'flagged_questions_test_' + EXAM_TAKE.testPk;
+    const flaggedOnlyStorageKey = 'flagged_only_test_' + EXAM_TAKE.testPk;
+    function getFlaggedQuestions() {
+        try {
+            const parsed = JSON.parse(localStorage.getItem(flaggedStorageKey) || '[]');
+            if (!Array.isArray(parsed)) return [];
+            return parsed.map(v => parseInt(v, 10)).filter(Number.isFinite);
+        } catch (e) {
+            return [];
+        }
+    }
+    function setFlaggedQuestions(arr) {
+        localStorage.setItem(flaggedStorageKey, JSON.stringify(arr));
+    }
+    function isQuestionFlagged(qNumber) {
+        return getFlaggedQuestions().includes(parseInt(qNumber, 10));
+    }
+    function isFlaggedOnlyMode() {
+        return localStorage.getItem(flaggedOnlyStorageKey) === '1';
+    }
+    function setFlaggedOnlyMode(enabled) {
+        localStorage.setItem(flaggedOnlyStorageKey, enabled ? '1' : '0');
+    }
+    function refreshFlagUI() {
+        const flagged = getFlaggedQuestions();
+        const form = document.querySelector('#question-container form');
+        const currentQ = form ? parseInt(form.dataset.questionNumber || '0', 10) : 0;
+        const flaggedOnly = isFlaggedOnlyMode();
+
+        document.querySelectorAll('.question-pagination .part-btn[data-question-number]').forEach((btn) => {
+            const n = parseInt(btn.dataset.questionNumber || '0', 10);
+            if (!n) return;
+            const flaggedNow = flagged.includes(n);
+            btn.classList.toggle('is-flagged', flaggedNow);
+            btn.setAttribute('title', flaggedNow ? ('Question ' + n + ' (Belgilangan)') : ('Question ' + n));
+            const hide = flaggedOnly && !flaggedNow && n !== currentQ;
+            btn.style.display = hide ? 'none' : '';
+        });
+
+        const flagBtn = document.getElementById('flag-question-btn');
+        if (flagBtn) {
+            const active = currentQ && flagged.includes(currentQ);
+            flagBtn.classList.toggle('active', active);
+            flagBtn.dataset.questionNumber = String(currentQ || parseInt(flagBtn.dataset.questionNumber || '0', 10) || 0);
+            flagBtn.innerHTML = active
+                ? '<i class="fas fa-flag me-1"></i><span class="d-none d-sm-inline">Belgilangan</span>'
+                : '<i class="far fa-flag me-1"></i><span class="d-none d-sm-inline">Belgilash</span>';
+        }
+        const flaggedOnlyBtn = document.getElementById('flagged-only-btn');
+        if (flaggedOnlyBtn) {
+            flaggedOnlyBtn.classList.toggle('active', flaggedOnly);
+            flaggedOnlyBtn.innerHTML = flaggedOnly
+                ? '<i class="fas fa-filter me-1"></i><span class="d-none d-sm-inline">All questions</span>'
+                : '<i class="fas fa-filter me-1"></i><span class="d-none d-sm-inline">Flagged only</span>';
+        }
+    }
+    function toggleCurrentQuestionFlag() {
+        const form = document.querySelector('#question-container form');
+        const currentQ = form ? parseInt(form.dataset.questionNumber || '0', 10) : 0;
+        if (!currentQ) return;
+        const flagged = getFlaggedQuestions();
+        const idx = flagged.indexOf(currentQ);
+        if (idx >= 0) {
+            flagged.splice(idx, 1);
+            markSaved('Flag removed');
+        } else {
+            flagged.push(currentQ);
+            markSaved('Question flagged');
+        }
+        setFlaggedQuestions(flagged.sort((a, b) => a - b));
+        refreshFlagUI();
+    }
+    function toggleFlaggedOnlyMode() {
+        setFlaggedOnlyMode(!isFlaggedOnlyMode());
+        refreshFlagUI();
+    }
+
+    function selectionTouchesForbiddenControl(sel) {
+        if (!sel || !sel.rangeCount) return true;
+        function forbiddenAncestor(node) {
+            if (!node) return false;
+            const el = node.nodeType === Node.TEXT_NODE ? node.parentElement : node;
+            if (!el || !el.closest) return false;
+            return !!el.closest('input, textarea, select, button, [role="button"], label.btn');
+        }
+        return forbiddenAncestor(sel.anchorNode) || forbiddenAncestor(sel.focusNode);
+    }
+
+    function getSelectionRangeInRoot(rootEl) {
+        if (!rootEl) return null;
+        const sel = window.getSelection();
+        if (!sel || !sel.rangeCount) return null;
+        const range = sel.getRangeAt(0);
+        const root = range.commonAncestorContainer;
+        if (!rootEl.contains(root)) return null;
+        if (selectionTouchesForbiddenControl(sel)) return null;
+        if (sel.toString().trim().length === 0) return null;
+        return range;
+    }
+
+    function applyHighlightToRange(range) {
+        const mark = document.createElement('span');
+        mark.className = 'reading-mark exam-text-highlight';
+        try {
+            range.surroundContents(mark);
+        } catch (e) {
+            const frag = range.extractContents();
+            mark.appendChild(frag);
+            range.insertNode(mark);
+        }
+        window.getSelection().removeAllRanges();
+    }
+
+    function attachHighlightButton(btn, rootEl) {
+        if (!btn || !rootEl) return;
+        btn.addEventListener('mousedown', function(e) { e.preventDefault(); });
+        btn.addEventListener('click', function() {
+            const range = getSelectionRangeInRoot(rootEl);
+            if (!range) {
+                if (typeof markSaved === 'function') markSaved('Avval matndan tanlang (javob maydoni emas)');
+                else alert('Avval matndan so\'z yoki qismni tanlang.');
+                return;
+            }
+            applyHighlightToRange(range);
+            if (typeof markSaved === 'function') markSaved('Ajratish saqlandi');
+        });
+    }
+
+    function initReadingTools() {
+        const readingPane = document.querySelector('.reading-passages-container') || document.querySelector('.reading-text');
+        const notesPanel = document.getElementById('reading-notes-panel');
+        const hlBtn = document.getElementById('btn-highlight-reading');
+        const hlQuestionsBtn = document.getElementById('btn-highlight-reading-questions');
+        const noteBtn = document.getElementById('btn-note-reading');
+        const hlListeningBtn = document.getElementById('btn-highlight-listening');
+
+        const readingQuestionsRoot = document.querySelector('.exam-right-pane.reading-style #exam-take-form');
+        const listeningQuestionsRoot = document.querySelector('.exam-right-pane.listening-style #exam-take-form');
+
+        const storageKey = 'reading_notes_test_' + EXAM_TAKE.testPk;
+        const getNotes = () => {
+            try { return JSON.parse(localStorage.getItem(storageKey) || '[]'); } catch (e) { return []; }
+        };
+        const setNotes = (arr) => localStorage.setItem(storageKey, JSON.stringify(arr));
+        const renderNotes = () => {
+            if (!notesPanel) return;
+            const notes = getNotes();
+            if (!notes.length) {
+                notesPanel.innerHTML = '<div class="text-muted small">Hozircha note yo\'q.</div>';
+                return;
+            }
+            notesPanel.innerHTML = notes.map(n =>
+                '<div class="reading-note-item"><strong>Text:</strong> ' + escapeHtml(n.text) +
+                '<div class="small text-muted mt-1">' + escapeHtml(n.note) + '</div></div>'
+            ).join('');
+        };
+        if (notesPanel) renderNotes();
+
+        function showSelectFirstTip() {
+            if (typeof markSaved === 'function') markSaved('Avval matndan so\'z yoki qismni tanlang');
+            else alert('Avval matndan so\'z yoki qismni tanlang.');
+        }
+
+        attachHighlightButton(hlBtn, readingPane);
+        attachHighlightButton(hlQuestionsBtn, readingQuestionsRoot);
+        attachHighlightButton(hlListeningBtn, listeningQuestionsRoot);
+
+        if (noteBtn && readingPane && notesPanel) {
+            noteBtn.addEventListener('mousedown', function(e) { e.preventDefault(); });
+            noteBtn.addEventListener('click', function() {
+                const sel = window.getSelection();
+                if (!readingPane || !sel.rangeCount || !readingPane.contains(sel.getRangeAt(0).commonAncestorContainer)) {
+                    showSelectFirstTip();
+                    return;
+                }
+                if (selectionTouchesForbiddenControl(sel)) {
+                    showSelectFirstTip();
+                    return;
+                }
+                const selectedText = sel.toString().trim();
+                if (!selectedText) { showSelectFirstTip(); return; }
+                const note = window.prompt('Qisqa note yozing:');
+                if (!note) return;
+                const notes = getNotes();
+                notes.unshift({ text: selectedText.slice(0, 180), note: note.slice(0, 400), ts: Date.now() });
+                setNotes(notes.slice(0, 30));
+                renderNotes();
+                markSaved('Note saved');
+            });
+        }
+    }
+
+    function syncWritingInlineWithRightForm() {
+        const editor = document.getElementById('writing-inline-editor');
+        if (!editor) return;
+
+        const qType = editor.dataset.qtype || '';
+        const fillTypes = ['fill_blank', 'summary_completion', 'notes_completion', 'sentence_completion', 'table_completion', 'short_answer'];
+        if (!fillTypes.includes(qType)) return;
+
+        const raw = editor.dataset.raw || '';
+        const form = document.querySelector('#question-container form');
+        if (!form) return;
+        if (form.dataset.allQuestions === '1') return;
+
+        const hasNumbered = /\[\d+\]/.test(raw);
+        const hasUnderscore = /____+/.test(raw);
+        if (!hasNumbered && !hasUnderscore) return;
+
+        const rightSingle = form.querySelector('input[name="answer"]');
+
+        const readRightValue = (n) => {
+            const direct = form.querySelector('input[name="answer_' + n + '"], .inline-fill-input[name="answer_' + n + '"]');
+            if (direct) return direct.value || '';
+            if (n === 1 && rightSingle) return rightSingle.value || '';
+            return '';
+        };
+
+        let autoIndex = 0;
+        const parts = raw.split(hasNumbered ? /(\[\d+\])/g : /(____+)/g);
+        const html = parts.map((part) => {
+            const numberedMatch = hasNumbered ? part.match(/^\[(\d+)\]$/) : null;
+            const blankMatch = !hasNumbered ? /^____+$/.test(part) : false;
+
+            if (numberedMatch) {
+                const n = parseInt(numberedMatch[1], 10);
+                return '<input type="text" class="writing-inline-blank" data-blank="' + n + '" autocomplete="off" />';
+            }
+            if (blankMatch) {
+                autoIndex += 1;
+                return '<input type="text" class="writing-inline-blank" data-blank="' + autoIndex + '" autocomplete="off" />';
+            }
+            return escapeHtml(part).replace(/\n/g, '<br>');
+        }).join('');
+
+        editor.innerHTML = '<div>' + html + '</div>';
+
+        const inlineInputs = Array.from(editor.querySelectorAll('.writing-inline-blank[data-blank]'));
+        if (!inlineInputs.length) return;
+
+        const setRightValue = (n, val) => {
+            const enabledTargets = form.querySelectorAll(
+                'input[name="answer_' + n + '"]:not([disabled]), .inline-fill-input[name="answer_' + n + '"]:not([disabled])'
+            );
+            if (enabledTargets.length) {
+                enabledTargets.forEach((el) => { el.value = val; });
+                return;
+            }
+
+            if (n === 1) {
+                const singleEnabled = form.querySelector('input[name="answer"]:not([disabled])');
+                if (singleEnabled) {
+                    singleEnabled.value = val;
+                    return;
+                }
+            }
+
+            const hiddenKey = 'inline-shadow-' + n;
+            let hidden = form.querySelector('input[data-inline-shadow="' + hiddenKey + '"]');
+            if (!hidden) {
+                hidden = document.createElement('input');
+                hidden.type = 'hidden';
+                hidden.name = n === 1 && !form.querySelector('input[name="answer_1"], .inline-fill-input[name="answer_1"]')
+                    ? 'answer'
+                    : ('answer_' + n);
+                hidden.setAttribute('data-inline-shadow', hiddenKey);
+                form.appendChild(hidden);
+            }
+            hidden.value = val;
+        };
+
+        const setInlineValue = (n, val) => {
+            const input = editor.querySelector('.writing-inline-blank[data-blank="' + n + '"]');
+            if (input) input.value = val || '';
+        };
+
+        inlineInputs.forEach((input) => {
+            const n = parseInt(input.getAttribute('data-blank') || '1', 10);
+            input.value = readRightValue(n) || '';
+            input.addEventListener('input', function() {
+                setRightValue(n, this.value);
+            });
+            setRightValue(n, input.value);
+        });
+
+        const rightAllInputs = form.querySelectorAll('input[name="answer"], input[name^="answer_"], .inline-fill-input[name^="answer_"]');
+        rightAllInputs.forEach((el) => {
+            el.addEventListener('input', function() {
+                const match = (this.name || '').match(/^answer_(\d+)$/);
+                const n = match ? parseInt(match[1], 10) : 1;
+                setInlineValue(n, this.value);
+            });
+        });
+
+        form.addEventListener('submit', function() {
+            inlineInputs.forEach((input) => {
+                const n = parseInt(input.getAttribute('data-blank') || '1', 10);
+                setRightValue(n, input.value);
+            });
+        });
+    }
+
+    /* Lazy partlar: sahifa faqat joriy part bilan chiziladi, qolganlari fragment sifatida yuklanadi */
+    const examPartLoads = {};
+
+    function unloadedPartsAnswered(attr) {
+        let n = 0;
+        document.querySelectorAll('.reading-part-pane[data-part-loaded="0"]').forEach(function(pane) {
+            n += parseInt(pane.getAttribute(attr) || '0', 10) || 0;
+        });
+        return n;
+    }
+
+    function initLoadedExamPart() {
+        initWordCount();
+        refreshFlagUI();
+        if (typeof window.__applyReadingFontScale === 'function') window.__applyReadingFontScale();
+        if (typeof window.__updateAnsweredBadge === 'function') window.__updateAnsweredBadge();
+    }
+
+    function ensureExamPartLoaded(partNumber) {
+        const p = String(partNumber);
+        const pane = document.querySelector('.reading-part-pane[data-part-number="' + p + '"]');
+        if (!pane || pane.getAttribute('data-part-loaded') !== '0') return Promise.resolve(pane);
+        if (examPartLoads[p]) return examPartLoads[p];
+        examPartLoads[p] = fetch(pane.getAttribute('data-part-url'), {
+            headers: { 'HX-Request': 'true' },
+            credentials: 'same-origin'
+        })
+            .then(function(res) {
+                if (!res.ok) throw new Error('HTTP ' + res.status);
+                return res.text();
+            })
+            .then(function(html) {
+                const tpl = document.createElement('template');
+                tpl.innerHTML = html;
+                [
+                    ['questions', pane.querySelector('[data-part-fragment-target="questions"]')],
+                    ['passage', document.querySelector('#left-passage-' + p + ' [data-part-fragment-target="passage"]')]
+                ].forEach(function(pair) {
+                    const fragment = tpl.content.querySelector('[data-part-fragment="' + pair[0] + '"]');
+                    if (fragment && pair[1]) pair[1].replaceWith.apply(pair[1], Array.from(fragment.childNodes));
+                });
+                pane.setAttribute('data-part-loaded', '1');
+                // exam-offline.js: qurilmadagi (hali yuborilmagan) javoblarni qayta qo'yadi
+                pane.dispatchEvent(new CustomEvent('exam:part-loaded', { bubbles: true }));
+                initLoadedExamPart();
+                return pane;
+            })
+            .catch(function() {
+                delete examPartLoads[p];
+                markSaved('Part yuklanmadi — qayta urinib ko\'ring');
+                return pane;
+            });
+        return examPartLoads[p];
+    }
+
+    function prefetchNeighbourParts(partNumber) {
+        const n = parseInt(partNumber, 10);
+        if (isNaN(n)) return;
+        const run = function() {
+            [n + 1, n - 1].forEach(function(x) { if (x >= 1) ensureExamPartLoaded(x); });
+        };
+        if ('requestIdleCallback' in window) window.requestIdleCallback(run, { timeout: 2000 });
+        else setTimeout(run, 300);
+    }
+    window.__ensureExamPartLoaded = ensureExamPartLoaded;
+
+    function getPartNumberForQuestionOrder(order) {
+        var card = document.getElementById('question-' + order);
+        if (!card) return null;
+        var pane = card.closest('.reading-part-pane');
+        return pane ? pane.getAttribute('data-part-number') : null;
+    }
+
+    function switchReadingPart(partNumber) {
+        const p = String(partNumber);
+        ensureExamPartLoaded(p);
+        prefetchNeighbourParts(p);
+        /* O'ng: savol bloklari */
+        document.querySelectorAll('.reading-part-pane').forEach(function(pane) {
+            const isActive = pane.getAttribute('data-part-number') === p;
+            pane.classList.toggle('active', isActive);
+            pane.hidden = !isActive;
+        });
+        document.querySelectorAll('.reading-part-tab').forEach(function(tab) {
+            tab.classList.toggle('active', tab.getAttribute('data-part-number') === p);
+            tab.classList.toggle('btn-dark', tab.getAttribute('data-part-number') === p);
+            tab.classList.toggle('btn-outline-dark', tab.getAttribute('data-part-number') !== p);
+            tab.setAttribute('aria-selected', tab.getAttribute('data-part-number') === p ? 'true' : 'false');
+        });
+        /* Chap: faqat tanlangan partning passage'i ko'rinsin (Part 1 → Passage 1, Part 2 → Passage 2) */
+        document.querySelectorAll('.reading-passage-pane-left, .exam-part-pane-left').forEach(function(pane) {
+            const isActive = pane.getAttribute('data-part-number') === p;
+            pane.classList.toggle('active', isActive);
+            pane.hidden = !isActive;
+        });
+        var leftContainer = document.querySelector('.reading-passages-container');
+        if (leftContainer) leftContainer.scrollTop = 0;
+        /* Dock: faol partda savol tugmalari, qolganlarida "Part N: X questions" (dock-active) */
+        document.querySelectorAll('.exam-bottom-dock .dock-part-wrap[data-part-number]').forEach(function(wrap) {
+            wrap.classList.toggle('dock-active', wrap.getAttribute('data-part-number') === p);
+        });
+        document.querySelectorAll('.exam-bottom-dock .part-q-buttons[data-part-number]:not(.dock-part-wrap)').forEach(function(row) {
+            row.classList.toggle('dock-part-hidden', row.getAttribute('data-part-number') !== p);
+        });
+        var liveRegion = document.getElementById('reading-part-announce');
+        if (liveRegion) { liveRegion.textContent = 'Part ' + p; setTimeout(function() { liveRegion.textContent = ''; }, 1000); }
+        const rightScroll = document.querySelector('.reading-questions-scroll')
+            || document.querySelector('.exam-right-pane.reading-style')
+            || document.querySelector('.exam-right-pane.listening-style')
+            || document.querySelector('.exam-right-pane');
+        if (rightScroll) rightScroll.scrollTop = 0;
+    }
+
+    function initReadingPartTabs() {
+        const tabs = document.querySelectorAll('.reading-part-tab');
+        /* Partga o'tish tugmalari: bosilganda yuqoridagi qism (strelkalar + Part 1/2/3 + savol raqamlari, passage, savollar) tanlangan partga almashadi */
+        const footer = document.querySelector('.exam-footer-fullwidth');
+        if (footer && !footer._partTabDelegation) {
+            footer._partTabDelegation = true;
+            footer.addEventListener('click', function(e) {
+                const tab = e.target && e.target.closest('.reading-part-tab');
+                if (tab) {
+                    e.preventDefault();
+                    const partNumber = tab.getAttribute('data-part-number');
+                    if (partNumber && typeof switchReadingPart === 'function') {
+                        switchReadingPart(partNumber);
+                    }
+                }
+            });
+        }
+        /* Klaviatura: 1/2/3 reading part almashish (input/textarea da emas) */
+        if (tabs.length <= 1) return;
+        document.addEventListener('keydown', function(e) {
+            const t = e.target;
+            if (t && (t.tagName === 'INPUT' || t.tagName === 'TEXTAREA' || t.isContentEditable)) return;
+            const key = e.key;
+            if (key === '1' || key === '2' || key === '3' || key === '4') {
+                const num = parseInt(key, 10);
+                if (num <= tabs.length) {
+                    e.preventDefault();
+                    switchReadingPart(num);
+                    const tab = document.querySelector('.reading-part-tab[data-part-number="' + num + '"]');
+                    if (tab) tab.focus();
+                }
+            }
+        });
+    }
+
+    function initPartDock() {
+        if (window.__partDockInitDone) return;
+        const dockButtons = Array.from(document.querySelectorAll('.dock-part[data-part-target]'));
+        const sections = Array.from(document.querySelectorAll('[data-part-section]'));
+        const qNumBtns = Array.from(document.querySelectorAll('.q-num-btn'));
+        const navPrev = document.getElementById('nav-prev');
+        const navNext = document.getElementById('nav-next');
+
+        /** 2 ta passage / Variant 1+2: dockda har bir part alohida — oxirgi savoldan keyingi partga o'tish */
+        function getSortedDockPartNumbers() {
+            var wraps = Array.from(document.querySelectorAll('.exam-bottom-dock .dock-part-wrap[data-part-number]'));
+            var nums = wraps.map(function(w) { return parseInt(w.getAttribute('data-part-number'), 10); }).filter(function(n) { return !isNaN(n); });
+            nums.sort(function(a, b) { return a - b; });
+            return nums;
+        }
+        function getNextPartNum(currentPart) {
+            if (currentPart == null || currentPart === '') return null;
+            var nums = getSortedDockPartNumbers();
+            var p = parseInt(String(currentPart), 10);
+            var i = nums.indexOf(p);
+            return (i >= 0 && i < nums.length - 1) ? nums[i + 1] : null;
+        }
+        function getPrevPartNum(currentPart) {
+            if (currentPart == null || currentPart === '') return null;
+            var nums = getSortedDockPartNumbers();
+            var p = parseInt(String(currentPart), 10);
+            var i = nums.indexOf(p);
+            return i > 0 ? nums[i - 1] : null;
+        }
+        function getFirstQuestionAnchorInPart(partNum) {
+            var row = document.querySelector('.exam-bottom-dock .dock-part-wrap[data-part-number="' + partNum + '"]');
+            if (!row) return null;
+            var btn = row.querySelector('.q-num-btn[data-question-id]');
+            return btn ? (btn.getAttribute('data-card-anchor') || btn.getAttribute('data-order')) : null;
+        }
+        function getLastQuestionAnchorInPart(partNum) {
+            var row = document.querySelector('.exam-bottom-dock .dock-part-wrap[data-part-number="' + partNum + '"]');
+            if (!row) return null;
+            var btns = Array.from(row.querySelectorAll('.q-num-btn[data-question-id]'));
+            if (!btns.length) return null;
+            var last = btns[btns.length - 1];
+            return last.getAttribute('data-card-anchor') || last.getAttribute('data-order');
+        }
+
+        qNumBtns.forEach(function(btn) {
+            btn.addEventListener('click', function() {
+                const blankId = this.getAttribute('data-blank-id');
+                const questionId = this.getAttribute('data-question-id');
+                const order = this.getAttribute('data-order');
+                var partButtons = btn.closest('.part-q-buttons');
+                var partNum = partButtons && partButtons.getAttribute('data-part-number');
+                if (!partNum && order && typeof getPartNumberForQuestionOrder === 'function')
+                    partNum = getPartNumberForQuestionOrder(parseInt(order, 10));
+                if (partNum && typeof switchReadingPart === 'function') switchReadingPart(partNum);
+                const partReady = partNum ? ensureExamPartLoaded(partNum) : Promise.resolve();
+                partReady.then(function() {
+                    if (blankId) {
+                        const input = document.querySelector('input[data-blank-id="' + blankId + '"]');
+                        if (input) {
+                            setTimeout(function() {
+                                input.scrollIntoView({ behavior: 'smooth', block: 'center' });
+                                input.focus();
+                            }, 80);
+                        }
+                    } else if (questionId) {
+                        setTimeout(function() {
+                            const el = document.getElementById(questionId);
+                            if (el) el.scrollIntoView({ behavior: 'smooth', block: 'start' });
+                        }, 80);
+                    }
+                });
+            });
+        });
+
+        let updateQNumActiveFn;
+        const blankInputs = Array.from(document.querySelectorAll('input[data-blank-id]'));
+        const answeredBadge = document.getElementById('answered-badge');
+        const totalBlanks = answeredBadge ? parseInt(answeredBadge.getAttribute('data-total-blanks') || '0', 10) : 0;
+
+        function updateTopProgress(answered, total) {
+            var pct = total > 0 ? Math.round((answered / total) * 100) : 0;
+            var ansEl = document.getElementById('exam-top-answered');
+            var totEl = document.getElementById('exam-top-total');
+            var pctEl = document.getElementById('exam-top-progress-pct');
+            var barEl = document.getElementById('exam-top-progress-bar');
+            if (ansEl) ansEl.textContent = answered;
+            if (totEl) totEl.textContent = total;
+            if (pctEl) pctEl.textContent = pct + '%';
+            if (barEl) {
+                barEl.style.width = pct + '%';
+                barEl.setAttribute('aria-valuenow', String(pct));
+            }
+        }
+
+        function updateAnsweredBadge() {
+            if (!answeredBadge) return 0;
+            const total = parseInt(answeredBadge.getAttribute('data-total-questions') || answeredBadge.getAttribute('data-total-blanks') || '0', 10);
+            if (total <= 0) return 0;
+            const form = document.querySelector('#question-container form');
+            const dualPks = new Set(window.__MCQ_DUAL_PKS || []);
+            let answered = 0;
+            if (form) {
+                dualPks.forEach(function(pk) {
+                    const sel = form.querySelector('.mcq-multi-checkbox[data-question-pk="' + pk + '"]');
+                    const maxPick = sel ? parseInt(sel.getAttribute('data-max'), 10) || 2 : 2;
+                    const n = form.querySelectorAll('.mcq-multi-checkbox[data-question-pk="' + pk + '"]:checked').length;
+                    answered += Math.min(n, maxPick);
+                });
+                form.querySelectorAll('input[data-blank-id]').forEach(function(inp) {
+                    if ((inp.value || '').trim()) answered++;
+                });
+                form.querySelectorAll('select[name^="match_"]').forEach(function(sel) {
+                    if ((sel.value || '').trim()) answered++;
+                });
+                const other = new Set();
+                const blankQuestionPks = new Set();
+                form.querySelectorAll('input[data-blank-id]').forEach(function(inp) {
+                    const pk = inp.getAttribute('data-question-pk');
+                    if (pk) blankQuestionPks.add(pk);
+                });
+                const matchQuestionPks = new Set();
+                form.querySelectorAll('select[name^="match_"]').forEach(function(sel) {
+                    const m = sel.name.match(/match_(\d+)/);
+                    if (m) matchQuestionPks.add(m[1]);
+                });
+                form.querySelectorAll('input[type="radio"]:checked').forEach(function(inp) {
+                    const m = inp.name.match(/^answer_(\d+)$/);
+                    if (m && !dualPks.has(parseInt(m[1], 10)) && !blankQuestionPks.has(m[1]) && !matchQuestionPks.has(m[1])) other.add(m[1]);
+                });
+                form.querySelectorAll('input[type="text"][name^="answer_"], input[name^="answer_"][type="text"], textarea[name^="answer_"]').forEach(function(inp) {
+                    if ((inp.value || '').trim() === '') return;
+                    if (inp.hasAttribute('data-blank-id')) return;
+                    const m = inp.name.match(/answer_(\d+)/);
+                    if (m && !dualPks.has(parseInt(m[1], 10)) && !blankQuestionPks.has(m[1]) && !matchQuestionPks.has(m[1])) other.add(m[1]);
+                });
+                form.querySelectorAll('input[type="checkbox"][name^="list_"]:checked').forEach(function(inp) {
+                    const m = inp.name.match(/^list_(\d+)_/);
+                    if (m && !dualPks.has(parseInt(m[1], 10))) other.add(m[1]);
+                });
+                answered += other.size;
+            }
+            answered += unloadedPartsAnswered('data-answered-slots');
+            answered = Math.min(answered, total);
+            answeredBadge.textContent = answered + '/' + total + ' answered';
+            updateTopProgress(answered, total);
+            return answered;
+        }
+
+        blankInputs.forEach(function(input) {
+            input.addEventListener('focus', function() {
+                if (updateQNumActiveFn) updateQNumActiveFn();
+            });
+            input.addEventListener('blur', function() {
+                setTimeout(function() { if (updateQNumActiveFn) updateQNumActiveFn(); }, 50);
+            });
+            input.addEventListener('input', updateAnsweredBadge);
+        });
+        var mainForm = document.querySelector('#question-container form');
+        if (mainForm) {
+            mainForm.addEventListener('change', updateAnsweredBadge);
+            mainForm.addEventListener('input', updateAnsweredBadge);
+        }
+        window.__updateAnsweredBadge = updateAnsweredBadge;
+
+        function getVisibleQuestionOrder() {
+            const activePane = document.querySelector('.reading-part-pane.active');
+            const cards = activePane
+                ? Array.from(activePane.querySelectorAll('.part-q-card'))
+                : Array.from(document.querySelectorAll('.part-q-card'));
+            const anchor = window.innerHeight * 0.3;
+            let best = null, bestDist = Infinity;
+            cards.forEach(function(c) {
+                const r = c.getBoundingClientRect();
+                const dist = Math.abs(r.top - anchor);
+                if (dist < bestDist) { bestDist = dist; best = c; }
+            });
+            return best ? parseInt(best.getAttribute('data-first-order') || (best.id || '').replace(/^question-/, ''), 10) || 1 : (activePane ? 1 : 1);
+        }
+
+        function updateQNumActive() {
+            const visibleRow = document.querySelector('.exam-bottom-dock .dock-part-wrap.dock-active') || document.querySelector('.exam-bottom-dock .part-q-buttons[data-part-number]:not(.dock-part-hidden)');
+            const visibleBtns = visibleRow ? visibleRow.querySelectorAll('.q-num-btn') : qNumBtns;
+            const activeBtns = visibleRow ? Array.from(visibleBtns) : qNumBtns;
+            const focusedBlank = document.querySelector('input[data-blank-id]:focus');
+            const part1BlankBtns = activeBtns.filter(function(b) { return b.getAttribute('data-blank-id'); });
+            if (focusedBlank && part1BlankBtns.length) {
+                const bid = focusedBlank.getAttribute('data-blank-id');
+                qNumBtns.forEach(function(btn) {
+                    var inVisible = !visibleRow || visibleRow.contains(btn);
+                    btn.classList.toggle('active', inVisible && btn.getAttribute('data-blank-id') === bid);
+                });
+                const idx = part1BlankBtns.findIndex(function(b) { return b.getAttribute('data-blank-id') === bid; });
+                const activePartPaneBlank = document.querySelector('.reading-part-pane.active');
+                const curPartBlank = activePartPaneBlank ? activePartPaneBlank.getAttribute('data-part-number') : null;
+                var canPrevB = idx > 0 || (idx === 0 && curPartBlank && getPrevPartNum(curPartBlank));
+                var canNextB = (idx >= 0 && idx < part1BlankBtns.length - 1) || (idx === part1BlankBtns.length - 1 && curPartBlank && getNextPartNum(curPartBlank));
+                if (navPrev) navPrev.classList.toggle('active', canPrevB);
+                if (navNext) navNext.classList.toggle('active', canNextB);
+            } else {
+                const current = getVisibleQuestionOrder();
+                const curAnchor = String(current);
+                qNumBtns.forEach(function(btn) {
+                    var inVisible = !visibleRow || visibleRow.contains(btn);
+                    const qId = btn.getAttribute('data-question-id');
+                    const anchor = btn.getAttribute('data-card-anchor') || String(parseInt(btn.getAttribute('data-order'), 10));
+                    btn.classList.toggle('active', inVisible && qId && anchor === curAnchor);
+                });
+                const questionBtns = activeBtns.filter(function(b) { return b.getAttribute('data-question-id'); });
+                const anchors = [];
+                questionBtns.forEach(function(b) {
+                    var a = b.getAttribute('data-card-anchor');
+                    if (a && anchors.indexOf(a) < 0) anchors.push(a);
+                });
+                anchors.sort(function(x, y) { return parseInt(x, 10) - parseInt(y, 10); });
+                const idx = anchors.indexOf(curAnchor);
+                const activePartPaneQ = document.querySelector('.reading-part-pane.active');
+                const curPartQ = activePartPaneQ ? activePartPaneQ.getAttribute('data-part-number') : null;
+                var canPrevQ = idx > 0 || (idx === 0 && curPartQ && getPrevPartNum(curPartQ));
+                var canNextQ = (idx >= 0 && idx < anchors.length - 1) || (idx === anchors.length - 1 && curPartQ && getNextPartNum(curPartQ));
+                if (navPrev) navPrev.classList.toggle('active', canPrevQ);
+                if (navNext) navNext.classList.toggle('active', canNextQ);
+            }
+        }
+        updateQNumActiveFn = updateQNumActive;
+
+        if (navPrev) navPrev.addEventListener('click', function() {
+            const focusedBlank = document.querySelector('input[data-blank-id]:focus');
+            const activePartRow = document.querySelector('.exam-bottom-dock .dock-part-wrap.dock-active') || document.querySelector('.exam-bottom-dock .part-q-buttons[data-part-number]:not(.dock-part-hidden)');
+            const part1Btns = activePartRow ? Array.from(activePartRow.querySelectorAll('.q-num-btn[data-blank-id]')) : Array.from(document.querySelectorAll('.part-q-buttons .q-num-btn[data-blank-id]'));
+            if (focusedBlank && part1Btns.length) {
+                const bid = focusedBlank.getAttribute('data-blank-id');
+                const idx = part1Btns.findIndex(function(b) { return b.getAttribute('data-blank-id') === bid; });
+                const prevBtn = idx > 0 ? part1Btns[idx - 1] : null;
+                if (prevBtn) {
+                    const prevId = prevBtn.getAttribute('data-blank-id');
+                    const prevInput = document.querySelector('input[data-blank-id="' + prevId + '"]');
+                    if (prevInput) { prevInput.scrollIntoView({ behavior: 'smooth', block: 'center' }); prevInput.focus(); }
+                }
+            } else {
+                const current = getVisibleQuestionOrder();
+                const activeRow = document.querySelector('.exam-bottom-dock .dock-part-wrap.dock-active') || document.querySelector('.exam-bottom-dock .part-q-buttons[data-part-number]:not(.dock-part-hidden)');
+                const qBtns = activeRow ? Array.from(activeRow.querySelectorAll('.q-num-btn[data-question-id]')) : Array.from(document.querySelectorAll('.q-num-btn[data-question-id]'));
+                const anchors = [];
+                qBtns.forEach(function(b) {
+                    var a = b.getAttribute('data-card-anchor');
+                    if (a && anchors.indexOf(a) < 0) anchors.push(a);
+                });
+                anchors.sort(function(x, y) { return parseInt(x, 10) - parseInt(y, 10); });
+                const idx = anchors.indexOf(String(current));
+                const prevAnchor = idx > 0 ? anchors[idx - 1] : null;
+                const prevCard = prevAnchor ? document.querySelector('.part-q-card[data-first-order="' + prevAnchor + '"]') : null;
+                if (prevCard) {
+                    var prevOrder = parseInt(prevAnchor, 10);
+                    var part = typeof getPartNumberForQuestionOrder === 'function' ? getPartNumberForQuestionOrder(prevOrder) : null;
+                    var activePart = document.querySelector('.reading-part-pane.active');
+                    var curPart = activePart ? activePart.getAttribute('data-part-number') : null;
+                    if (part && curPart !== String(part) && typeof switchReadingPart === 'function') switchReadingPart(part);
+                    setTimeout(function() {
+                        var el = document.getElementById('question-' + prevOrder);
+                        if (el) el.scrollIntoView({ behavior: 'smooth', block: 'start' });
+                    }, part && curPart !== String(part) ? 120 : 0);
+                } else if (idx === 0 && typeof switchReadingPart === 'function') {
+                    var activePartEl = document.querySelector('.reading-part-pane.active');
+                    var curPartNum = activePartEl ? activePartEl.getAttribute('data-part-number') : (activeRow ? activeRow.getAttribute('data-part-number') : null);
+                    var prevPart = getPrevPartNum(curPartNum);
+                    if (prevPart) {
+                        var lastA = getLastQuestionAnchorInPart(prevPart);
+                        if (lastA) {
+                            switchReadingPart(String(prevPart));
+                            setTimeout(function() {
+                                var el = document.getElementById('question-' + lastA);
+                                if (el) el.scrollIntoView({ behavior: 'smooth', block: 'start' });
+                                if (typeof updateQNumActiveFn === 'function') updateQNumActiveFn();
+                            }, 120);
+                        }
+                    }
+                }
+            }
+        });
+        if (navNext) navNext.addEventListener('click', function() {
+            const focusedBlank = document.querySelector('input[data-blank-id]:focus');
+            const activePartRow = document.querySelector('.exam-bottom-dock .dock-part-wrap.dock-active') || document.querySelector('.exam-bottom-dock .part-q-buttons[data-part-number]:not(.dock-part-hidden)');
+            const part1Btns = activePartRow ? Array.from(activePartRow.querySelectorAll('.q-num-btn[data-blank-id]')) : Array.from(document.querySelectorAll('.part-q-buttons .q-num-btn[data-blank-id]'));
+            if (focusedBlank && part1Btns.length) {
+                const bid = focusedBlank.getAttribute('data-blank-id');
+                const idx = part1Btns.findIndex(function(b) { return b.getAttribute('data-blank-id') === bid; });
+                const nextBtn = idx >= 0 && idx < part1Btns.length - 1 ? part1Btns[idx + 1] : null;
+                if (nextBtn) {
+                    const nextId = nextBtn.getAttribute('data-blank-id');
+                    const nextInput = document.querySelector('input[data-blank-id="' + nextId + '"]');
+                    if (nextInput) { nextInput.scrollIntoView({ behavior: 'smooth', block: 'center' }); nextInput.focus(); }
+                }
+            } else {
+                const current = getVisibleQuestionOrder();
+                const activeRow = document.querySelector('.exam-bottom-dock .dock-part-wrap.dock-active') || document.querySelector('.exam-bottom-dock .part-q-buttons[data-part-number]:not(.dock-part-hidden)');
+                const qBtns = activeRow ? Array.from(activeRow.querySelectorAll('.q-num-btn[data-question-id]')) : Array.from(document.querySelectorAll('.q-num-btn[data-question-id]'));
+                const anchors = [];
+                qBtns.forEach(function(b) {
+                    var a = b.getAttribute('data-card-anchor');
+                    if (a && anchors.indexOf(a) < 0) anchors.push(a);
+                });
+                anchors.sort(function(x, y) { return parseInt(x, 10) - parseInt(y, 10); });
+                const idx = anchors.indexOf(String(current));
+                const nextAnchor = idx >= 0 && idx < anchors.length - 1 ? anchors[idx + 1] : null;
+                const nextCard = nextAnchor ? document.querySelector('.part-q-card[data-first-order="' + nextAnchor + '"]') : null;
+                if (nextCard) {
+                    var nextOrder = parseInt(nextAnchor, 10);
+                    var part = typeof getPartNumberForQuestionOrder === 'function' ? getPartNumberForQuestionOrder(nextOrder) : null;
+                    var activePart = document.querySelector('.reading-part-pane.active');
+                    var curPart = activePart ? activePart.getAttribute('data-part-number') : null;
+                    if (part && curPart !== String(part) && typeof switchReadingPart === 'function') switchReadingPart(part);
+                    setTimeout(function() {
+                        var el = document.getElementById('question-' + nextOrder);
+                        if (el) el.scrollIntoView({ behavior: 'smooth', block: 'start' });
+                    }, part && curPart !== String(part) ? 120 : 0);
+                } else if (idx >= 0 && idx === anchors.length - 1 && typeof switchReadingPart === 'function') {
+                    var activePartEl2 = document.querySelector('.reading-part-pane.active');
+                    var curPartNum2 = activePartEl2 ? activePartEl2.getAttribute('data-part-number') : (activeRow ? activeRow.getAttribute('data-part-number') : null);
+                    var nextPart = getNextPartNum(curPartNum2);
+                    if (nextPart) {
+                        var firstA = getFirstQuestionAnchorInPart(nextPart);
+                        if (firstA) {
+                            switchReadingPart(String(nextPart));
+                            setTimeout(function() {
+                                var el = document.getElementById('question-' + firstA);
+                                if (el) el.scrollIntoView({ behavior: 'smooth', block: 'start' });
+                                if (typeof updateQNumActiveFn === 'function') updateQNumActiveFn();
+                            }, 120);
+                        }
+                    }
+                }
+            }
+        });
+
+        const rightPane = document.querySelector('.exam-right-pane');
+        const scrollTarget = rightPane || window;
+        scrollTarget.addEventListener('scroll', function() { updateQNumActive(); }, { passive: true });
+        updateQNumActive();
+        if (!dockButtons.length || !sections.length) return;
+
+        dockButtons.forEach((btn) => {
+            btn.addEventListener('click', function() {
+                const partNum = this.getAttribute('data-part-number');
+                if (partNum && typeof switchReadingPart === 'function') switchReadingPart(partNum);
+                const targetId = this.getAttribute('data-part-target');
+                const target = targetId ? document.getElementById(targetId) : null;
+                if (!target) return;
+                target.scrollIntoView({ behavior: 'smooth', block: 'start' });
+            });
+        });
+
+        const updateActive = () => {
+            const anchor = window.innerHeight * 0.3;
+            let activePart = null;
+            let best = Number.POSITIVE_INFINITY;
+            sections.forEach((sec) => {
+                const r = sec.getBoundingClientRect();
+                const dist = Math.abs(r.top - anchor);
+                if (dist < best) {
+                    best = dist;
+                    activePart = sec.getAttribute('data-part-section');
+                }
+            });
+            dockButtons.forEach((btn) => {
+                const partNo = btn.getAttribute('data-part-number');
+                btn.classList.toggle('active', String(partNo) === String(activePart));
+            });
+        };
+
+        if (rightPane) {
+            rightPane.addEventListener('scroll', updateActive, { passive: true });
+        } else {
+            window.addEventListener('scroll', updateActive, { passive: true });
+        }
+        updateActive();
+        if (typeof updateAnsweredBadge === 'function') updateAnsweredBadge();
+        window.__partDockInitDone = true;
+    }
+
+    function initWritingImageCarousel() {
+        document.querySelectorAll('.writing-image-carousel').forEach(function(car) {
+            const slides = car.querySelectorAll('.writing-img-slide');
+            const prevBtn = car.querySelector('.writing-img-prev');
+            const nextBtn = car.querySelector('.writing-img-next');
+            if (slides.length < 2 || (!prevBtn && !nextBtn)) return;
+            let idx = 0;
+            function show(i) {
+                idx = (i + slides.length) % slides.length;
+                slides.forEach(function(s, j) { s.classList.toggle('active', j === idx); });
+            }
+            if (prevBtn) prevBtn.addEventListener('click', function() { show(idx - 1); });
+            if (nextBtn) nextBtn.addEventListener('click', function() { show(idx + 1); });
+        });
+    }
+
+    function refreshExamQuestionUI() {
+        syncWritingInlineWithRightForm();
+        initReadingPartTabs();
+        /* So'z limiti: qizil border (is-invalid) o'chirildi — foydalanuvchi xato yozganda stress bermaymiz */
+        initPartDock();
+        initWritingImageCarousel();
+        refreshFlagUI();
+        if (typeof initWordCount === 'function') initWordCount();
+        const form = document.querySelector('#question-container form');
+        if (form) {
+            form.addEventListener('input', function() { markSaved('Draft saved'); }, { passive: true });
+        }
+    }
+    window.__refreshExamQuestionUI = refreshExamQuestionUI;
+
+    refreshExamQuestionUI();
+    initReadingTools();
+    (function prefetchInitialNeighbours() {
+        const activePane = document.querySelector('.reading-part-pane.active');
+        if (activePane) prefetchNeighbourParts(activePane.getAttribute('data-part-number'));
+    })();
+
+    function initFontSizeButtons() {
+        const scaleLabel = document.getElementById('font-scale-label');
+        if (!document.querySelector('.reading-passages-container, .reading-text')) return;
+        let scale = 1;
+        const updateScale = () => {
+            document.querySelectorAll('.reading-passages-container .reading-text, .reading-text').forEach(function(el) {
+                el.style.fontSize = (scale * 100) + '%';
+            });
+            if (scaleLabel) scaleLabel.textContent = '(' + scale + 'x)';
+        };
+        window.__applyReadingFontScale = function() { if (scale !== 1) updateScale(); };
+        document.body.addEventListener('click', function(e) {
+            const btn = e.target.closest('.font-size-btn');
+            if (!btn) return;
+            const isPlus = btn.classList.contains('font-size-plus') || btn.id === 'font-size-plus';
+            const isMinus = btn.classList.contains('font-size-minus') || btn.id === 'font-size-minus';
+            if (isPlus) { scale = Math.min(1.5, scale + 0.1); updateScale(); }
+            if (isMinus) { scale = Math.max(0.8, scale - 0.1); updateScale(); }
+        });
+    }
+    initFontSizeButtons();
+
+    function initReadingBackToTop() {
+        const container = document.querySelector('.reading-passages-container');
+        const btn = document.getElementById('reading-back-to-top');
+        if (!container || !btn) return;
+        container.addEventListener('scroll', function() {
+            btn.style.display = container.scrollTop > 200 ? 'inline-flex' : 'none';
+        }, { passive: true });
+        btn.addEventListener('click', function() {
+            container.scrollTo({ top: 0, behavior: 'smooth' });
+        });
+    }
+    initReadingBackToTop();
+
+    function initWordCount() {
+        document.querySelectorAll('.writing-answer-ta[data-word-count-target]').forEach(function(ta) {
+            if (ta.dataset.wordCountBound) return;
+            ta.dataset.wordCountBound = '1';
+            const id = ta.name.replace(/[^0-9]/g, '');
+            const wcEl = document.getElementById('wc-' + id);
+            if (!wcEl) return;
+            const update = () => {
+                const text = (ta.value || '').trim();
+                const words = text ? text.split(/\s+/).filter(Boolean).length : 0;
+                wcEl.textContent = words;
+            };
+            ta.addEventListener('input', update);
+            update();
+        });
+    }
+    initWordCount();
+
+    document.body.addEventListener('click', function(e) {
+        const flagBtn = e.target.closest('#flag-question-btn');
+        if (flagBtn) {
+            e.preventDefault();
+            toggleCurrentQuestionFlag();
+            return;
+        }
+        const flaggedOnlyBtn = e.target.closest('#flagged-only-btn');
+        if (flaggedOnlyBtn) {
+            e.preventDefault();
+            toggleFlaggedOnlyMode();
+        }
+    });
+
+    document.body.addEventListener('htmx:afterSwap', function(evt) {
+        if (evt && evt.detail && evt.detail.target && evt.detail.target.id === 'question-container') {
+            refreshExamQuestionUI();
+        }
+    });
+
+    // Oldingi savolga o'tish
+    const prevLinks = document.querySelectorAll('a[href*="test_take"]');
+    prevLinks.forEach(link => {
+        if (link.textContent.includes('Oldingi')) {
+            link.addEventListener('click', function(e) {
+                e.preventDefault();
+                const url = this.getAttribute('href');
+                fetch(url, {
+                    headers: {
+                        'HX-Request': 'true'
+                    }
+                })
+                .then(response => response.text())
+                .then(html => {
+                    document.getElementById('question-container').innerHTML = html;
+                    // Scroll to top
+                    window.scrollTo({ top: 0, behavior: 'smooth' });
+                });
+            });
+        }
+    });
+
+    function countUnansweredQuestions() {
+        const form = document.querySelector('#question-container form');
+        if (!form) return 0;
+        const totalEl = document.getElementById('answered-badge');
+        const total = totalEl ? parseInt(totalEl.getAttribute('data-total-questions') || totalEl.getAttribute('data-total-blanks') || '0', 10) : 0;
+        if (total <= 0) return 0;
+        const answeredIds = new Set();
+        form.querySelectorAll('input[type="radio"]:checked').forEach(function(inp) {
+            const m = inp.name.match(/answer_(\d+)/);
+            if (m) answeredIds.add(m[1]);
+        });
+        form.querySelectorAll('input[type="text"][name^="answer_"], input[name^="answer_"][type="text"], textarea[name^="answer_"]').forEach(function(inp) {
+            if ((inp.value || '').trim() === '') return;
+            const m = inp.name.match(/answer_(\d+)/);
+            if (m) answeredIds.add(m[1]);
+        });
+        form.querySelectorAll('select[name^="match_"]').forEach(function(sel) {
+            if ((sel.value || '').trim()) {
+                const m = sel.name.match(/match_(\d+)/);
+                if (m) answeredIds.add(m[1]);
+            }
+        });
+        // List selection (multiple checkbox) — kamida 1 ta tanlangan bo'lsa savol answered hisoblanadi
+        form.querySelectorAll('input[type="checkbox"][name^="list_"]:checked').forEach(function(cb) {
+            const m = cb.name.match(/list_(\d+)_/);
+            if (m) answeredIds.add(m[1]);
+        });
+        return Math.max(0, total - answeredIds.size - unloadedPartsAnswered('data-answered-questions'));
+    }
+
+    function initSubmitConfirm() {
+        const form = document.querySelector('#question-container form');
+        if (!form) return;
+        form.addEventListener('submit', function(e) {
+            if (!e.submitter || e.submitter.getAttribute('name') !== 'finish_test') return;
+            const un = countUnansweredQuestions();
+            if (un > 0 && !confirm('Sizda ' + un + ' ta javobsiz savol bor. Baribir testni yuborishni xohlaysizmi?')) {
+                e.preventDefault();
+            }
+        });
+    }
+    initSubmitConfirm();
+
+    // Exam keyboard shortcuts
+    document.addEventListener('keydown', function(e) {
+        const form = document.querySelector('#question-container form');
+        if (!form) return;
+        if (e.altKey && e.key === 'ArrowRight') {
+            e.preventDefault();
+            form.requestSubmit();
+        }
+        if (e.key === 'Home' && !e.ctrlKey && !e.metaKey && !e.altKey) {
+            if (e.target.tagName === 'INPUT' || e.target.tagName === 'TEXTAREA') return;
+            const first = document.querySelector('.part-q-card[id^="question-"]');
+            if (first && (e.target.tagName === 'BODY' || e.target.closest('.exam-container'))) {
+                e.preventDefault();
+                first.scrollIntoView({ behavior: 'smooth', block: 'start' });
+                var order = first.getAttribute('id').replace('question-', '');
+                if (order && typeof getPartNumberForQuestionOrder === 'function' && typeof switchReadingPart === 'function') {
+                    var part = getPartNumberForQuestionOrder(parseInt(order, 10));
+                    if (part) switchReadingPart(part);
+                }
+            }
+        }
+        if (e.key === 'End' && !e.ctrlKey && !e.metaKey && !e.altKey) {
+            if (e.target.tagName === 'INPUT' || e.target.tagName === 'TEXTAREA') return;
+            const cards = document.querySelectorAll('.part-q-card[id^="question-"]');
+            const last = cards.length ? cards[cards.length - 1] : null;
+            if (last && (e.target.tagName === 'BODY' || e.target.closest('.exam-container'))) {
+                e.preventDefault();
+                last.scrollIntoView({ behavior: 'smooth', block: 'start' });
+                var order = last.getAttribute('id').replace('question-', '');
+                if (order && typeof getPartNumberForQuestionOrder === 'function' && typeof switchReadingPart === 'function') {
+                    var part = getPartNumberForQuestionOrder(parseInt(order, 10));
+                    if (part) switchReadingPart(part);
+                }
+            }
+        }
+        if ((e.ctrlKey || e.metaKey) && e.key === 'Enter') {
+            e.preventDefault();
+            form.requestSubmit();
+        }
+        if (e.altKey && e.key === 'ArrowLeft') {
+            e.preventDefault();
+            const prevBtn = document.querySelector('.test-navigation button[onclick*="loadQuestion"]');
+            if (prevBtn) prevBtn.click();
+        }
+    });
+
+    // Image to Text (OCR) - Writing test uchun
+    if (document.querySelector('.btn-image-to-text')) {
+        const s = document.createElement('script');
+        s.src = 'https://cdn.jsdelivr.net/npm/tesseract.js@5/dist/tesseract.min.js';
+        s.onload = initImageToText;
+        document.head.appendChild(s);
+    }
+});
+
+function initImageToText() {
+    const Tesseract = window.Tesseract;
+    if (!Tesseract) return;
+    const modal = new bootstrap.Modal(document.getElementById('imageToTextModal'));
+    const progressEl = document.getElementById('imageToTextProgress');
+    const progressBar = document.getElementById('imageToTextProgressBar');
+    const statusEl = document.getElementById('imageToTextStatus');
+    const resultEl = document.getElementById('imageToTextResult');
+    const outputEl = document.getElementById('imageToTextOutput');
+    const footerEl = document.getElementById('imageToTextFooter');
+
+    document.querySelectorAll('.btn-image-to-text').forEach(function(btn) {
+        btn.addEventListener('click', function() {
+            const imageUrl = (this.getAttribute('data-image-url') || '').trim();
+            const targetName = this.getAttribute('data-target-textarea');
+            if (!targetName) return;
+            if (!imageUrl) {
+                alert('Bu savol uchun rasm yuklanmagan. Admin orqali savolga rasm qo\'shing.');
+                return;
+            }
+
+            progressEl.style.display = 'block';
+            resultEl.style.display = 'none';
+            footerEl.style.display = 'none';
+            outputEl.value = '';
+            progressBar.style.width = '0%';
+            statusEl.textContent = 'Recognizing...';
+            modal.show();
+
+            Tesseract.recognize(imageUrl, 'eng', {
+                logger: function(m) {
+                    if (m.status === 'recognizing text') {
+                        progressBar.style.width = (m.progress * 100) + '%';
+                    }
+                }
+            }).then(function(result) {
+                progressEl.style.display = 'none';
+                outputEl.value = (result.data.text || '').trim();
+                resultEl.style.display = 'block';
+                footerEl.style.display = 'flex';
+
+                document.getElementById('imageToTextInsertBtn').onclick = function() {
+                    const ta = document.querySelector('textarea[name="' + targetName + '"]');
+                    if (ta) {
+                        const pos = ta.selectionStart || ta.value.length;
+                        const before = ta.value.substring(0, pos);
+                        const after = ta.value.substring(pos);
+                        ta.value = before + outputEl.value + after;
+                        ta.dispatchEvent(new Event('input', { bubbles: true }));
+                        if (typeof initWordCount === 'function') initWordCount();
+                    }
+                    modal.hide();
+                };
+            }).catch(function(err) {
+                progressEl.style.display = 'none';
+                outputEl.value = 'Error: ' + (err.message || 'Could not read image.');
+                resultEl.style.display = 'block';
+                footerEl.style.display = 'flex';
+            });
+        });
+    });
+}
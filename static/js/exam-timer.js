@@ -0,0 +1,174 @@
+/* Imtihon taymeri, pauza/davom ettirish va vaqtni serverga yuborish. Sozlamalar — shablondagi window.EXAM_TAKE. */
+let timeLeft = EXAM_TAKE.timeLeft;
+let elapsedTime = EXAM_TAKE.elapsedTime;
+let isPaused = EXAM_TAKE.isPaused;
+const timerElement = document.getElementById('timer');
+const timerContainer = document.getElementById('timer-container');
+let timerInterval = null;
+let timeUpdateInterval = null;
+
+function updateTimer() {
+    if (isPaused) return;
+    
+    if (timeLeft <= 0) {
+        clearInterval(timerInterval);
+        clearInterval(timeUpdateInterval);
+        // Vaqt tugadi - testni avtomatik yakunlash
+        autoSubmitTest();
+        return;
+    }
+    
+    const hours = Math.floor(timeLeft / 3600);
+    const minutes = Math.floor((timeLeft % 3600) / 60);
+    const seconds = timeLeft % 60;
+    if (timerElement) {
+        const parts = [hours, minutes, seconds].map(function(v) { return v.toString().padStart(2, '0'); });
+        timerElement.textContent = parts.join(':');
+        
+        // Vaqt kamayganda rang o'zgartiradi (1 min — kritik tebranish)
+        if (timerContainer) {
+            timerContainer.classList.remove('timer-critical');
+            if (timeLeft <= 60) {
+                timerContainer.style.background = '#dc2626';
+                timerElement.style.color = '#fff';
+                timerElement.style.fontWeight = '700';
+                timerContainer.classList.add('timer-critical');
+            } else if (timeLeft <= 300) {
+                timerContainer.style.background = 'rgba(239, 68, 68, 0.5)';
+                timerElement.style.color = '#dc2626';
+                timerElement.style.fontWeight = '700';
+            } else if (timeLeft <= 600) {
+                timerContainer.style.background = 'rgba(245, 158, 11, 0.2)';
+                timerElement.style.color = '#b45309';
+                timerElement.style.fontWeight = '700';
+            } else {
+                timerContainer.style.background = '#111827';
+                timerElement.style.color = '#fff';
+                timerElement.style.fontWeight = '700';
+            }
+        }
+    }
+    timeLeft--;
+    elapsedTime++;
+}
+
+function updateTimeTracking() {
+    if (isPaused) return;
+    
+    // Serverga vaqtni yuborish (har 30 soniyada bir marta)
+    if (elapsedTime % 30 === 0) {
+        const formData = new FormData();
+        formData.append('elapsed_time', elapsedTime);
+        formData.append('timer_seconds_left', timeLeft);
+        formData.append('csrfmiddlewaretoken', EXAM_TAKE.csrfToken);
+        
+        fetch(EXAM_TAKE.urls.updateTime, {
+            method: 'POST',
+            body: formData,
+            headers: {
+                'X-CSRFToken': EXAM_TAKE.csrfToken
+            }
+        }).catch(error => {
+            console.error('Time update error:', error);
+        });
+    }
+}
+
+function autoSubmitTest() {
+    // Offline jurnal: qoldiq o'zgarishlar bilan commit (tarmoq bo'lmasa ulanish tiklanganda yuboriladi)
+    if (window.ExamJournal) {
+        window.ExamJournal.commit();
+        return;
+    }
+    // Barcha javoblarni saqlash va testni yakunlash
+    const form = document.querySelector('form');
+    if (form) {
+        const formData = new FormData(form);
+        formData.set('finish_test', '1');
+        fetch(form.action, {
+            method: 'POST',
+            body: formData,
+            headers: {
+                'X-CSRFToken': formData.get('csrfmiddlewaretoken')
+            }
+        }).then((res) => {
+            if (res.redirected && res.url) {
+                window.location.href = res.url;
+                return;
+            }
+            window.location.reload();
+        });
+    } else {
+        window.location.reload();
+    }
+}
+
+// Timer boshlash (agar to'xtatilmagan bo'lsa)
+if (!isPaused) {
+    timerInterval = setInterval(updateTimer, 1000);
+    timeUpdateInterval = setInterval(updateTimeTracking, 1000);
+    updateTimer(); // Birinchi marta darhol ko'rsatish
+}
+
+// Pause/Resume button
+const pauseResumeBtn = document.getElementById('pause-resume-btn');
+const pauseResumeIcon = document.getElementById('pause-resume-icon');
+const pauseResumeText = document.getElementById('pause-resume-text');
+
+if (pauseResumeBtn) {
+    pauseResumeBtn.addEventListener('click', function() {
+        if (isPaused) {
+            // Resume
+            fetch(EXAM_TAKE.urls.resume, {
+                method: 'POST',
+                headers: {
+                    'X-CSRFToken': EXAM_TAKE.csrfToken,
+                    'Content-Type': 'application/json'
+                }
+            }).then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    isPaused = false;
+                    pauseResumeIcon.className = 'fas fa-pause';
+                    pauseResumeText.textContent = 'To\'xtatish';
+                    // Timer qayta boshlash
+                    timerInterval = setInterval(updateTimer, 1000);
+                    timeUpdateInterval = setInterval(updateTimeTracking, 1000);
+                }
+            });
+        } else {
+            // Pause
+            fetch(EXAM_TAKE.urls.pause, {
+                method: 'POST',
+                headers: {
+                    'X-CSRFToken': EXAM_TAKE.csrfToken,
+                    'Content-Type': 'application/json'
+                }
+            }).then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    isPaused = true;
+                    pauseResumeIcon.className = 'fas fa-play';
+                    pauseResumeText.textContent = 'Davom ettirish';
+                    // Timer to'xtatish
+                    clearInterval(timerInterval);
+                    clearInterval(timeUpdateInterval);
+                }
+            });
+        }
+    });
+}
+
+// Sahifa yopilganda timer ni to'xtatish va vaqtni saqlash
+window.addEventListener('beforeunload', function() {
+    clearInterval(timerInterval);
+    clearInterval(timeUpdateInterval);
+    
+    // Oxirgi marta vaqtni saqlash
+    const formData = new FormData();
+    formData.append('elapsed_time', elapsedTime);
+    formData.append('timer_seconds_left', timeLeft);
+    formData.append('csrfmiddlewaretoken', EXAM_TAKE.csrfToken);
+    
+    navigator.sendBeacon(EXAM_TAKE.urls.updateTime, formData);
+});
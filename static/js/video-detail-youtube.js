@@ -0,0 +1,493 @@
+/* Video sahifasi: YouTube pleyer, progress, eslatma/bookmark/playlist. Sozlamalar — shablondagi window.VIDEO_DETAIL. */
+// YouTube Player variables
+let player;
+let progressUpdateInterval;
+const videoId = VIDEO_DETAIL.youtubeId;
+let youtubeAPILoaded = false;
+
+// YouTube API yuklash
+function loadYouTubeAPI() {
+    if (typeof YT === 'undefined' || typeof YT.Player === 'undefined') {
+        const tag = document.createElement('script');
+        tag.src = 'https://www.youtube.com/iframe_api';
+        const firstScriptTag = document.getElementsByTagName('script')[0];
+        firstScriptTag.parentNode.insertBefore(tag, firstScriptTag);
+        
+        // Global callback
+        window.onYouTubeIframeAPIReady = function() {
+            youtubeAPILoaded = true;
+            initYouTubePlayer();
+        };
+    } else {
+        youtubeAPILoaded = true;
+        initYouTubePlayer();
+    }
+}
+
+// YouTube Player initialization
+function initYouTubePlayer() {
+    if (!youtubeAPILoaded || typeof YT === 'undefined') {
+        return;
+    }
+    
+    const iframe = document.getElementById('youtube-player-' + VIDEO_DETAIL.pk);
+    if (!iframe) {
+        return;
+    }
+    
+    try {
+        player = new YT.Player('youtube-player-' + VIDEO_DETAIL.pk, {
+            events: {
+                'onReady': onPlayerReady,
+                'onStateChange': onPlayerStateChange,
+                'onError': onPlayerError
+            }
+        });
+    } catch (error) {
+        console.warn('YouTube API initialization error (non-critical):', error);
+        // API xatosi kritik emas, video oddiy iframe orqali ishlaydi
+    }
+}
+
+function onPlayerReady(event) {
+    // Progress bar yangilash
+    updateProgressBar();
+    progressUpdateInterval = setInterval(updateProgressBar, 1000);
+    
+    // Total time ko'rsatish
+    try {
+        const duration = player.getDuration();
+        const totalTimeEl = document.getElementById('total-time');
+        if (totalTimeEl) {
+            totalTimeEl.textContent = formatTime(duration);
+        }
+    } catch (error) {
+        console.warn('Duration error:', error);
+    }
+}
+
+function onPlayerStateChange(event) {
+    if (event.data === YT.PlayerState.ENDED) {
+        // Video tugaganda progress 100% qilish
+        updateVideoProgress(100);
+    }
+}
+
+function onPlayerError(event) {
+    console.warn('YouTube Player error:', event.data);
+    // Error 153 yoki boshqa xatolar - fallback ko'rsatish
+    if (event.data === 150 || event.data === 100 || event.data === 101 || event.data === 153) {
+        showVideoError();
+    }
+}
+
+function showVideoError() {
+    const errorDiv = document.getElementById('video-error-' + VIDEO_DETAIL.pk);
+    const container = document.getElementById('video-container-' + VIDEO_DETAIL.pk);
+    if (errorDiv && container) {
+        container.style.display = 'none';
+        errorDiv.style.display = 'flex';
+    }
+}
+
+function updateProgressBar() {
+    if (player && player.getCurrentTime) {
+        try {
+            const currentTime = player.getCurrentTime();
+            const duration = player.getDuration();
+            
+            if (duration > 0) {
+                const percentage = Math.min(100, Math.max(0, (currentTime / duration) * 100));
+                const progressFill = document.getElementById('video-progress-fill');
+                const currentTimeEl = document.getElementById('current-time');
+                
+                if (progressFill) {
+                    progressFill.style.width = percentage + '%';
+                    // Smooth transition
+                    progressFill.style.transition = 'width 0.3s ease';
+                }
+                if (currentTimeEl) {
+                    currentTimeEl.textContent = formatTime(currentTime);
+                }
+                
+                // Progress ni backend ga yuborish (har 3 soniyada bir marta - yaxshilangan)
+                const lastUpdateTime = window.lastProgressUpdate || 0;
+                if (Math.floor(currentTime) - lastUpdateTime >= 3) {
+                    updateVideoProgress(percentage);
+                    window.lastProgressUpdate = Math.floor(currentTime);
+                }
+            }
+        } catch (error) {
+            console.warn('Progress update error:', error);
+        }
+    }
+}
+
+function formatTime(seconds) {
+    const mins = Math.floor(seconds / 60);
+    const secs = Math.floor(seconds % 60);
+    return `${mins}:${secs.toString().padStart(2, '0')}`;
+}
+
+function updateVideoProgress(percentage) {
+    const formData = new FormData();
+    formData.append('progress', Math.round(percentage));
+    
+    const csrfToken = document.querySelector('[name=csrfmiddlewaretoken]');
+    if (csrfToken) {
+        formData.append('csrfmiddlewaretoken', csrfToken.value);
+    }
+    
+    fetch(VIDEO_DETAIL.urls.updateProgress, {
+        method: 'POST',
+        body: formData,
+        headers: {
+            'X-CSRFToken': csrfToken ? csrfToken.value : ''
+        }
+    }).catch(error => console.error('Progress update error:', error));
+}
+
+// Playback speed - DOMContentLoaded ichida qo'yiladi
+
+// Progress bar click - yaxshilangan
+const progressBar = document.getElementById('video-progress-bar');
+if (progressBar) {
+    progressBar.addEventListener('click', function(e) {
+        if (player && player.getDuration) {
+            const rect = this.getBoundingClientRect();
+            const x = e.clientX - rect.left;
+            const percentage = Math.min(100, Math.max(0, (x / rect.width) * 100));
+            const duration = player.getDuration();
+            const newTime = (percentage / 100) * duration;
+            
+            try {
+                player.seekTo(newTime, true);
+                
+                // Progress bar ni darhol yangilash
+                const progressFill = document.getElementById('video-progress-fill');
+                if (progressFill) {
+                    progressFill.style.width = percentage + '%';
+                }
+                
+                // Current time ni yangilash
+                const currentTimeEl = document.getElementById('current-time');
+                if (currentTimeEl) {
+                    currentTimeEl.textContent = formatTime(newTime);
+                }
+                
+                // Progress ni backend ga yuborish
+                updateVideoProgress(percentage);
+            } catch (error) {
+                console.warn('Seek error:', error);
+            }
+        }
+    });
+    
+    // Progress bar hover effect
+    progressBar.addEventListener('mousemove', function(e) {
+        if (player && player.getDuration) {
+            const rect = this.getBoundingClientRect();
+            const x = e.clientX - rect.left;
+            const percentage = Math.min(100, Math.max(0, (x / rect.width) * 100));
+            const duration = player.getDuration();
+            const hoverTime = (percentage / 100) * duration;
+            
+            // Tooltip ko'rsatish (optional)
+            this.title = formatTime(hoverTime);
+        }
+    });
+}
+
+// Add note button
+document.getElementById('add-note-btn').addEventListener('click', function() {
+    if (player && player.getCurrentTime) {
+        const currentTime = Math.floor(player.getCurrentTime());
+        document.getElementById('note-timestamp').value = currentTime;
+        document.getElementById('note-timestamp-display').textContent = formatTime(currentTime);
+        
+        const modal = new bootstrap.Modal(document.getElementById('addNoteModal'));
+        modal.show();
+    }
+});
+
+// Save note
+document.getElementById('save-note-btn').addEventListener('click', function() {
+    const noteText = document.getElementById('note-text').value.trim();
+    const timestamp = document.getElementById('note-timestamp').value;
+    
+    if (!noteText) {
+        alert('Eslatma matni bo\'sh bo\'lishi mumkin emas!');
+        return;
+    }
+    
+    const formData = new FormData();
+    formData.append('note_text', noteText);
+    formData.append('timestamp', timestamp);
+    
+    const csrfToken = document.querySelector('[name=csrfmiddlewaretoken]');
+    if (csrfToken) {
+        formData.append('csrfmiddlewaretoken', csrfToken.value);
+    }
+    
+    fetch(VIDEO_DETAIL.urls.addNote, {
+        method: 'POST',
+        body: formData,
+        headers: {
+            'X-CSRFToken': csrfToken ? csrfToken.value : ''
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            // Note qo'shish
+            const notesList = document.getElementById('notes-list');
+            if (notesList.querySelector('.text-center')) {
+                notesList.innerHTML = '';
+            }
+            
+            const noteHtml = `
+                <div class="card mb-3 border-0 shadow-sm video-note-item" data-note-id="${data.note.id}" style="border-left: 4px solid var(--primary) !important;">
+                    <div class="card-body p-3">
+                        <div class="d-flex justify-content-between align-items-start mb-2">
+                            <div>
+                                <span class="badge bg-primary me-2">${data.note.timestamp_display}</span>
+                                <small class="text-muted">${data.note.created_at}</small>
+                            </div>
+                            <button type="button" class="btn btn-sm btn-outline-danger delete-note-btn" data-note-id="${data.note.id}" title="O'chirish">
+                                <i class="fas fa-trash"></i>
+                            </button>
+                        </div>
+                        <p class="mb-0">${data.note.text.replace(/\n/g, '<br>')}</p>
+                    </div>
+                </div>
+            `;
+            notesList.insertAdjacentHTML('beforeend', noteHtml);
+            
+            // Modal yopish
+            bootstrap.Modal.getInstance(document.getElementById('addNoteModal')).hide();
+            document.getElementById('note-text').value = '';
+            
+            // Delete button event listener qo'shish
+            attachDeleteListeners();
+        } else {
+            alert('Xatolik: ' + (data.error || 'Noma\'lum xatolik'));
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('Xatolik yuz berdi');
+    });
+});
+
+// Delete note
+function attachDeleteListeners() {
+    document.querySelectorAll('.delete-note-btn').forEach(btn => {
+        if (btn.dataset.boundDelete === '1') return;
+        btn.dataset.boundDelete = '1';
+        btn.addEventListener('click', function() {
+            if (!confirm('Eslatmani o\'chirishni xohlaysizmi?')) {
+                return;
+            }
+            
+            const noteId = this.getAttribute('data-note-id');
+            const formData = new FormData();
+            
+            const csrfToken = document.querySelector('[name=csrfmiddlewaretoken]');
+            if (csrfToken) {
+                formData.append('csrfmiddlewaretoken', csrfToken.value);
+            }
+            
+            fetch(`/video/note/${noteId}/delete/`, {
+                method: 'POST',
+                body: formData,
+                headers: {
+                    'X-CSRFToken': csrfToken ? csrfToken.value : ''
+                }
+            })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    const noteEl = document.querySelector(`.video-note-item[data-note-id="${noteId}"], .note-item[data-note-id="${noteId}"]`);
+                    if (noteEl) {
+                        noteEl.remove();
+                    }
+                    
+                    // Agar eslatmalar bo'sh bo'lsa
+                    const notesList = document.getElementById('notes-list');
+                    if (notesList.children.length === 0) {
+                        notesList.innerHTML = `
+                            <div class="text-center text-muted py-4">
+                                <i class="fas fa-sticky-note fa-3x mb-3 opacity-25"></i>
+                                <p>Hozircha eslatmalar yo'q. Video davomida eslatma qo'shishingiz mumkin.</p>
+                            </div>
+                        `;
+                    }
+                }
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                alert('Xatolik yuz berdi');
+            });
+        });
+    });
+}
+
+// Initial delete listeners
+attachDeleteListeners();
+
+// Barcha funksiyalarni DOMContentLoaded ichiga qo'shish
+document.addEventListener('DOMContentLoaded', function() {
+    // Add bookmark button
+    const addBookmarkBtn = document.getElementById('add-bookmark-btn');
+    if (addBookmarkBtn) {
+        addBookmarkBtn.addEventListener('click', function() {
+            // Player tayyor bo'lguncha kutish
+            const checkPlayer = setInterval(function() {
+                if (player && player.getCurrentTime) {
+                    clearInterval(checkPlayer);
+                    const currentTime = Math.floor(player.getCurrentTime());
+                    const formData = new FormData();
+                    formData.append('timestamp', currentTime);
+                    
+                    const csrfToken = document.querySelector('[name=csrfmiddlewaretoken]');
+                    if (csrfToken) {
+                        formData.append('csrfmiddlewaretoken', csrfToken.value);
+                    }
+                    
+                    fetch(VIDEO_DETAIL.urls.addBookmark, {
+                        method: 'POST',
+                        body: formData,
+                        headers: {
+                            'X-CSRFToken': csrfToken ? csrfToken.value : ''
+                        }
+                    })
+                    .then(response => response.json())
+                    .then(data => {
+                        if (data.success) {
+                            if (data.bookmarked) {
+                                addBookmarkBtn.innerHTML = '<i class="fas fa-bookmark me-1"></i>Bookmark qo\'yildi';
+                                addBookmarkBtn.classList.add('active');
+                                setTimeout(() => {
+                                    addBookmarkBtn.innerHTML = '<i class="fas fa-bookmark me-1"></i>Bookmark';
+                                }, 2000);
+                            } else {
+                                addBookmarkBtn.innerHTML = '<i class="fas fa-bookmark me-1"></i>Bookmark olib tashlandi';
+                                addBookmarkBtn.classList.remove('active');
+                                setTimeout(() => {
+                                    addBookmarkBtn.innerHTML = '<i class="fas fa-bookmark me-1"></i>Bookmark';
+                                }, 2000);
+                            }
+                        }
+                    })
+                    .catch(error => console.error('Bookmark error:', error));
+                }
+            }, 100);
+            
+            // 5 soniyadan keyin to'xtatish
+            setTimeout(() => clearInterval(checkPlayer), 5000);
+        });
+    }
+
+    // Playlist functionality
+    document.querySelectorAll('.playlist-item').forEach(item => {
+        item.addEventListener('click', function(e) {
+            e.preventDefault();
+            const playlistId = this.getAttribute('data-playlist-id');
+            const videoId = this.getAttribute('data-video-id');
+            const isInPlaylist = this.querySelector('.fa-check');
+            
+            const formData = new FormData();
+            formData.append('playlist_id', playlistId);
+            
+            const csrfToken = document.querySelector('[name=csrfmiddlewaretoken]');
+            if (csrfToken) {
+                formData.append('csrfmiddlewaretoken', csrfToken.value);
+            }
+            
+            const url = isInPlaylist 
+                ? VIDEO_DETAIL.urls.removeFromPlaylist
+                : VIDEO_DETAIL.urls.addToPlaylist;
+            
+            fetch(url, {
+                method: 'POST',
+                body: formData,
+                headers: {
+                    'X-CSRFToken': csrfToken ? csrfToken.value : ''
+                }
+            })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    if (isInPlaylist) {
+                        this.innerHTML = '<i class="fas fa-plus me-2"></i>' + this.textContent.replace('✓', '').trim();
+                    } else {
+                        this.innerHTML = '<i class="fas fa-check text-success me-2"></i>' + this.textContent.replace('+', '').trim();
+                    }
+                }
+            })
+            .catch(error => console.error('Playlist error:', error));
+        });
+    });
+
+    // Create playlist button
+    const createPlaylistBtn = document.getElementById('create-playlist-btn');
+    if (createPlaylistBtn) {
+        createPlaylistBtn.addEventListener('click', function(e) {
+            e.preventDefault();
+            const name = prompt('Playlist nomini kiriting:');
+            if (!name) return;
+            
+            const formData = new FormData();
+            formData.append('name', name);
+            formData.append('description', '');
+            formData.append('is_public', 'false');
+            
+            const csrfToken = document.querySelector('[name=csrfmiddlewaretoken]');
+            if (csrfToken) {
+                formData.append('csrfmiddlewaretoken', csrfToken.value);
+            }
+            
+            fetch(VIDEO_DETAIL.urls.createPlaylist, {
+                method: 'POST',
+                body: formData,
+                headers: {
+                    'X-CSRFToken': csrfToken ? csrfToken.value : ''
+                }
+            })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    location.reload(); // Playlist ro'yxatini yangilash
+                }
+            })
+            .catch(error => console.error('Create playlist error:', error));
+        });
+    }
+});
+
+// Cleanup
+window.addEventListener('beforeunload', function() {
+    if (progressUpdateInterval) {
+        clearInterval(progressUpdateInterval);
+    }
+});
+
+document.addEventListener('DOMContentLoaded', function() {
+    // Iframe yuklangandan keyin API ni ishga tushirish
+    const iframe = document.getElementById('youtube-player-' + VIDEO_DETAIL.pk);
+    if (iframe) {
+        // Agar iframe allaqachon yuklangan bo'lsa
+        if (iframe.contentWindow) {
+            setTimeout(function() {
+                loadYouTubeAPI();
+            }, 1500);
+        } else {
+            iframe.addEventListener('load', function() {
+                // Kichik kechikish - iframe to'liq yuklanguncha kutish
+                setTimeout(function() {
+                    loadYouTubeAPI();
+                }, 1500);
+            });
+        }
+    }
+});
@@ -0,0 +1,397 @@
+/* Video sahifasi: reyting va izohlar (barcha video turlari). Sozlamalar — window.VIDEO_DETAIL. */
+// Video Rating
+document.addEventListener('DOMContentLoaded', function() {
+    const ratingStars = document.querySelector('.rating-stars');
+    if (!ratingStars) return;
+    
+    const stars = ratingStars.querySelectorAll('.rating-star');
+    const userRating = VIDEO_DETAIL.userRating;
+    
+    // Initial star colors
+    stars.forEach((star, index) => {
+        if (userRating > 0 && index < userRating) {
+            star.style.color = '#f59e0b';
+        }
+    });
+    
+    stars.forEach(star => {
+        star.addEventListener('click', function(e) {
+            e.preventDefault();
+            const rating = parseInt(this.getAttribute('data-rating'));
+            const clickedStar = this;
+            
+            // Animation
+            clickedStar.style.transform = 'scale(1.3)';
+            setTimeout(() => {
+                clickedStar.style.transform = 'scale(1)';
+            }, 200);
+            
+            const formData = new FormData();
+            formData.append('rating', rating);
+            
+            const csrfToken = document.querySelector('[name=csrfmiddlewaretoken]');
+            if (csrfToken) {
+                formData.append('csrfmiddlewaretoken', csrfToken.value);
+            }
+            
+            fetch(VIDEO_DETAIL.urls.rate, {
+                method: 'POST',
+                body: formData,
+                headers: {
+                    'X-CSRFToken': csrfToken ? csrfToken.value : ''
+                }
+            })
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Network response was not ok');
+                }
+                return response.json();
+            })
+            .then(data => {
+                if (data.success) {
+                    // Update all stars
+                    stars.forEach((s, index) => {
+                        if (index < rating) {
+                            s.style.color = '#f59e0b';
+                            s.querySelector('i').classList.remove('far');
+                            s.querySelector('i').classList.add('fas');
+                        } else {
+                            s.style.color = '#d1d5db';
+                            s.querySelector('i').classList.remove('fas');
+                            s.querySelector('i').classList.add('far');
+                        }
+                    });
+                    
+                    // Update rating display
+                    const ratingContainer = ratingStars.closest('.mt-3');
+                    if (ratingContainer) {
+                        // Update or create user rating text
+                        let userRatingText = ratingContainer.querySelector('.user-rating-text');
+                        if (!userRatingText) {
+                            userRatingText = document.createElement('span');
+                            userRatingText.className = 'text-muted user-rating-text';
+                            userRatingText.style.fontSize = '0.875rem';
+                            userRatingText.style.marginLeft = '1rem';
+                            ratingContainer.querySelector('.d-flex').appendChild(userRatingText);
+                        }
+                        userRatingText.innerHTML = `Sizning reytingingiz: <strong>${rating}/5</strong>`;
+                        
+                        // Update average rating
+                        let avgText = ratingContainer.querySelector('.average-rating-text');
+                        const avgRating = parseFloat(data.average_rating) || 0;
+                        const totalRatings = parseInt(data.total_ratings) || 0;
+                        const avgRatingText = `O'rtacha reyting: <strong>${avgRating.toFixed(1)}/5</strong> (${totalRatings} ta baho)`;
+                        
+                        if (avgText) {
+                            avgText.innerHTML = avgRatingText;
+                        } else {
+                            avgText = document.createElement('small');
+                            avgText.className = 'text-muted d-block mt-2 average-rating-text';
+                            avgText.innerHTML = avgRatingText;
+                            ratingContainer.appendChild(avgText);
+                        }
+                    }
+                    
+                    // Success notification
+                    const successBadge = document.createElement('span');
+                    successBadge.className = 'badge bg-success ms-2';
+                    successBadge.style.fontSize = '0.75rem';
+                    successBadge.innerHTML = '<i class="fas fa-check me-1"></i>Saqlandi';
+                    ratingContainer.querySelector('.d-flex').appendChild(successBadge);
+                    setTimeout(() => {
+                        successBadge.style.transition = 'opacity 0.3s';
+                        successBadge.style.opacity = '0';
+                        setTimeout(() => successBadge.remove(), 300);
+                    }, 2000);
+                } else {
+                    alert('Xatolik: ' + (data.error || 'Noma\'lum xatolik'));
+                }
+            })
+            .catch(error => {
+                console.error('Rating error:', error);
+                // Error notification
+                const errorBadge = document.createElement('span');
+                errorBadge.className = 'badge bg-danger ms-2';
+                errorBadge.style.fontSize = '0.75rem';
+                errorBadge.innerHTML = '<i class="fas fa-exclamation-triangle me-1"></i>Xatolik';
+                const ratingContainer = ratingStars.closest('.mt-3');
+                if (ratingContainer) {
+                    ratingContainer.querySelector('.d-flex').appendChild(errorBadge);
+                    setTimeout(() => {
+                        errorBadge.style.transition = 'opacity 0.3s';
+                        errorBadge.style.opacity = '0';
+                        setTimeout(() => errorBadge.remove(), 300);
+                    }, 3000);
+                }
+            });
+        });
+        
+        // Hover effect
+        star.addEventListener('mouseenter', function() {
+            const hoverRating = parseInt(this.getAttribute('data-rating'));
+            stars.forEach((s, index) => {
+                if (index < hoverRating) {
+                    s.style.color = '#f59e0b';
+                    s.style.transform = 'scale(1.15)';
+                    s.style.transition = 'all 0.2s ease';
+                }
+            });
+        });
+        
+        star.addEventListener('mouseleave', function() {
+            stars.forEach((s, index) => {
+                s.style.transform = 'scale(1)';
+                if (userRating > 0 && index < userRating) {
+                    s.style.color = '#f59e0b';
+                } else {
+                    s.style.color = '#d1d5db';
+                }
+            });
+        });
+    });
+});
+// Video Comments: keyset sahifalash (fragmentlar), delegatsiya — yangi yuklangan izohlar ham ishlaydi
+document.addEventListener('DOMContentLoaded', function() {
+    const commentsList = document.getElementById('comments-list');
+    const addCommentForm = document.getElementById('add-comment-form');
+    if (!commentsList) return;
+
+    const addCommentUrl = VIDEO_DETAIL.urls.addComment;
+    const emptyCommentsHtml = `
+        <div class="text-center text-muted py-4 comments-empty">
+            <i class="fas fa-comments fa-3x mb-3 opacity-25"></i>
+            <p>Hozircha izohlar yo'q. Birinchi izohni siz yozing!</p>
+        </div>
+    `;
+
+    function csrfValue() {
+        const el = document.querySelector('[name=csrfmiddlewaretoken]');
+        return el ? el.value : '';
+    }
+
+    function commentTextHtml(text) {
+        const div = document.createElement('div');
+        div.textContent = text;
+        return div.innerHTML.replace(/\n/g, '<br>');
+    }
+
+    function updateCommentsCount(delta) {
+        const badge = document.getElementById('comments-count');
+        if (badge) {
+            badge.textContent = Math.max(0, (parseInt(badge.textContent, 10) || 0) + delta);
+        }
+    }
+
+    function postComment(formData) {
+        formData.append('csrfmiddlewaretoken', csrfValue());
+        return fetch(addCommentUrl, {
+            method: 'POST',
+            body: formData,
+            headers: { 'X-CSRFToken': csrfValue() }
+        }).then(response => response.json());
+    }
+
+    function replyHtml(comment) {
+        return `
+            <div class="card mb-2 reply-item" data-comment-id="${comment.id}" style="background: var(--gray-50); border-left: 3px solid var(--info);">
+                <div class="card-body p-2">
+                    <div class="d-flex justify-content-between align-items-start">
+                        <div>
+                            <strong style="font-size: 0.875rem;">${commentTextHtml(comment.user_first_name)}</strong>
+                            <small class="text-muted ms-2">${comment.created_at}</small>
+                        </div>
+                        <button type="button" class="btn btn-sm btn-outline-danger delete-comment-btn" data-comment-id="${comment.id}" title="O'chirish">
+                            <i class="fas fa-trash" style="font-size: 0.75rem;"></i>
+                        </button>
+                    </div>
+                    <p class="mb-0" style="font-size: 0.875rem;">${commentTextHtml(comment.text)}</p>
+                </div>
+            </div>
+        `;
+    }
+
+    function commentHtml(comment) {
+        return `
+            <div class="card mb-3 comment-item" data-comment-id="${comment.id}" style="border-left: 4px solid var(--primary);">
+                <div class="card-body p-3">
+                    <div class="d-flex justify-content-between align-items-start mb-2">
+                        <div>
+                            <strong>${commentTextHtml(comment.user_first_name)}</strong>
+                            <small class="text-muted ms-2">${comment.created_at}</small>
+                        </div>
+                        <button type="button" class="btn btn-sm btn-outline-danger delete-comment-btn" data-comment-id="${comment.id}" title="O'chirish">
+                            <i class="fas fa-trash"></i>
+                        </button>
+                    </div>
+                    <p class="mb-2">${commentTextHtml(comment.text)}</p>
+                    <button type="button" class="btn btn-sm btn-outline-secondary reply-btn" data-comment-id="${comment.id}">
+                        <i class="fas fa-reply me-1"></i>Javob berish
+                    </button>
+                    <div class="mt-3 ms-4 comment-replies" data-comment-id="${comment.id}"></div>
+                    <div class="mt-2 ms-4 reply-form" id="reply-form-${comment.id}" style="display: none;">
+                        <form class="reply-comment-form" data-parent-id="${comment.id}">
+                            <div class="mb-2">
+                                <textarea class="form-control form-control-sm" name="comment_text" rows="2" placeholder="Javob yozing..." required></textarea>
+                            </div>
+                            <button type="submit" class="btn btn-sm btn-primary">Javob yuborish</button>
+                            <button type="button" class="btn btn-sm btn-secondary cancel-reply-btn">Bekor qilish</button>
+                        </form>
+                    </div>
+                </div>
+            </div>
+        `;
+    }
+
+    // Keyingi sahifa (izohlar yoki javoblar) — tugma o'rniga fragment qo'yiladi
+    function loadCommentsFragment(btn) {
+        btn.disabled = true;
+        fetch(btn.dataset.url, { headers: { 'HX-Request': 'true' }, credentials: 'same-origin' })
+            .then(response => {
+                if (!response.ok) throw new Error('HTTP ' + response.status);
+                return response.text();
+            })
+            .then(html => {
+                const tpl = document.createElement('template');
+                tpl.innerHTML = html;
+                // Shu sahifada qo'shilgan izoh fragmentda ham kelsa — takrorlanmasin
+                tpl.content.querySelectorAll('[data-comment-id].comment-item, [data-comment-id].reply-item').forEach(node => {
+                    const selector = `.${node.classList.contains('reply-item') ? 'reply-item' : 'comment-item'}[data-comment-id="${node.dataset.commentId}"]`;
+                    if (commentsList.querySelector(selector)) node.remove();
+                });
+                btn.replaceWith(tpl.content);
+            })
+            .catch(error => {
+                console.error('Comments load error:', error);
+                btn.disabled = false;
+            });
+    }
+
+    function deleteComment(btn) {
+        if (!confirm('Izohni o\'chirishni xohlaysizmi?')) {
+            return;
+        }
+        const commentId = btn.getAttribute('data-comment-id');
+        const formData = new FormData();
+        formData.append('csrfmiddlewaretoken', csrfValue());
+        fetch(`/video/comment/${commentId}/delete/`, {
+            method: 'POST',
+            body: formData,
+            headers: { 'X-CSRFToken': csrfValue() }
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) return;
+            const item = btn.closest('.reply-item, .comment-item');
+            if (item) item.remove();
+            updateCommentsCount(-1);
+            if (!commentsList.querySelector('.comment-item')) {
+                commentsList.innerHTML = emptyCommentsHtml;
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('Xatolik yuz berdi');
+        });
+    }
+
+    function submitReply(form) {
+        const parentId = form.getAttribute('data-parent-id');
+        const textarea = form.querySelector('textarea');
+        const commentText = textarea.value.trim();
+        if (!commentText) {
+            alert('Javob matni bo\'sh bo\'lishi mumkin emas!');
+            return;
+        }
+        const formData = new FormData();
+        formData.append('comment_text', commentText);
+        formData.append('parent_id', parentId);
+        postComment(formData)
+            .then(data => {
+                if (!data.success) {
+                    alert('Xatolik: ' + (data.error || 'Noma\'lum xatolik'));
+                    return;
+                }
+                const replies = commentsList.querySelector(`.comment-replies[data-comment-id="${parentId}"]`);
+                if (replies) {
+                    replies.insertAdjacentHTML('beforeend', replyHtml(data.comment));
+                }
+                updateCommentsCount(1);
+                textarea.value = '';
+                const replyForm = document.getElementById('reply-form-' + parentId);
+                if (replyForm) replyForm.style.display = 'none';
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                alert('Xatolik yuz berdi');
+            });
+    }
+
+    commentsList.addEventListener('click', function(e) {
+        const moreBtn = e.target.closest('.comments-load-more');
+        if (moreBtn) {
+            loadCommentsFragment(moreBtn);
+            return;
+        }
+        const replyBtn = e.target.closest('.reply-btn');
+        if (replyBtn) {
+            const replyForm = document.getElementById('reply-form-' + replyBtn.getAttribute('data-comment-id'));
+            if (replyForm) {
+                replyForm.style.display = replyForm.style.display === 'none' ? 'block' : 'none';
+            }
+            return;
+        }
+        const cancelBtn = e.target.closest('.cancel-reply-btn');
+        if (cancelBtn) {
+            const replyForm = cancelBtn.closest('.reply-form');
+            if (replyForm) {
+                replyForm.style.display = 'none';
+                replyForm.querySelector('textarea').value = '';
+            }
+            return;
+        }
+        const deleteBtn = e.target.closest('.delete-comment-btn');
+        if (deleteBtn) {
+            deleteComment(deleteBtn);
+        }
+    });
+
+    commentsList.addEventListener('submit', function(e) {
+        const form = e.target.closest('.reply-comment-form');
+        if (!form) return;
+        e.preventDefault();
+        submitReply(form);
+    });
+
+    if (addCommentForm) {
+        addCommentForm.addEventListener('submit', function(e) {
+            e.preventDefault();
+            const textarea = document.getElementById('comment-text');
+            const commentText = textarea.value.trim();
+            if (!commentText) {
+                alert('Izoh matni bo\'sh bo\'lishi mumkin emas!');
+                return;
+            }
+            const formData = new FormData();
+            formData.append('comment_text', commentText);
+            postComment(formData)
+                .then(data => {
+                    if (!data.success) {
+                        alert('Xatolik: ' + (data.error || 'Noma\'lum xatolik'));
+                        return;
+                    }
+                    const empty = commentsList.querySelector('.comments-empty, .text-center.text-muted');
+                    if (empty && !commentsList.querySelector('.comment-item')) {
+                        commentsList.innerHTML = '';
+                    }
+                    // Eng yangisi tepada (ro'yxat tartibi bilan bir xil)
+                    commentsList.insertAdjacentHTML('afterbegin', commentHtml(data.comment));
+                    updateCommentsCount(1);
+                    textarea.value = '';
+                })
+                .catch(error => {
+                    console.error('Error:', error);
+                    alert('Xatolik yuz berdi');
+                });
+        });
+    }
+});
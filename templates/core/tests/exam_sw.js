@@ -0,0 +1,81 @@
+/* Imtihon service worker i (core.views.exam_service_worker). Scope: /tests/.
+ * - Statik fayllar: hashli nomlar (main.3f2a9c1b7e4d.js) — keshdan; qolganlari — tarmoq, bo'lmasa kesh.
+ * - Imtihon sahifasi (/tests/<pk>/take/) va part fragmentlari: tarmoq birinchi, tarmoq yo'q bo'lsa oxirgi nusxa.
+ * - POST so'rovlar (sync, commit) keshlanmaydi — ularni exam-offline.js jurnali qayta yuboradi.
+ * - Chiqishda (accounts.logout_view) Clear-Site-Data sahifa keshi, jurnal va shu worker ni o'chiradi.
+ */
+const CACHE_VERSION = '{{ cache_version }}';
+const STATIC_CACHE = 'exam-static-' + CACHE_VERSION;
+const PAGE_CACHE = 'exam-pages-v1';
+const SHELL_ASSETS = {{ assets_json|safe }};
+const HASHED_STATIC_RE = /\.[0-9a-f]{12}\.[^./]+$/;
+const EXAM_PAGE_RE = /^\/tests\/\d+\/take\/(part\/\d+\/)?$/;
+
+self.addEventListener('install', function(event) {
+    event.waitUntil(
+        caches.open(STATIC_CACHE)
+            .then(function(cache) { return cache.addAll(SHELL_ASSETS); })
+            .then(function() { return self.skipWaiting(); })
+    );
+});
+
+self.addEventListener('activate', function(event) {
+    event.waitUntil(
+        caches.keys()
+            .then(function(keys) {
+                return Promise.all(keys.filter(function(key) {
+                    return key.indexOf('exam-static-') === 0 && key !== STATIC_CACHE;
+                }).map(function(key) { return caches.delete(key); }));
+            })
+            .then(function() { return self.clients.claim(); })
+    );
+});
+
+function networkFirst(request, cacheName) {
+    return fetch(request).then(function(response) {
+        if (response.ok && !response.redirected) {
+            const copy = response.clone();
+            caches.open(cacheName).then(function(cache) { cache.put(request, copy); });
+        }
+        return response;
+    }).catch(function() {
+        return caches.match(request, { ignoreVary: true }).then(function(cached) {
+            return cached || Response.error();
+        });
+    });
+}
+
+function cacheFirst(request) {
+    return caches.match(request).then(function(cached) {
+        return cached || networkFirst(request, STATIC_CACHE);
+    });
+}
+
+self.addEventListener('fetch', function(event) {
+    const request = event.request;
+    if (request.method !== 'GET') return;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) return;
+    if (SHELL_ASSETS.indexOf(url.pathname) !== -1 || HASHED_STATIC_RE.test(url.pathname)) {
+        event.respondWith(cacheFirst(request));
+        return;
+    }
+    if (EXAM_PAGE_RE.test(url.pathname) && !url.search) {
+        event.respondWith(networkFirst(request, PAGE_CACHE));
+    }
+});
+
+self.addEventListener('message', function(event) {
+    const data = event.data || {};
+    // Yakunlangan imtihon sahifalari keshdan o'chiriladi (boshqa foydalanuvchi / keyingi urinish uchun eskirgan)
+    if (data.type === 'exam-finished' && data.testPk) {
+        const prefix = '/tests/' + data.testPk + '/take/';
+        caches.open(PAGE_CACHE).then(function(cache) {
+            return cache.keys().then(function(requests) {
+                return Promise.all(requests.filter(function(req) {
+                    return new URL(req.url).pathname.indexOf(prefix) === 0;
+                }).map(function(req) { return cache.delete(req); }));
+            });
+        });
+    }
+});